@@ -97,6 +97,10 @@ def real_main():
                                              settings.MODULE_FMT)
   callback.getCore().initialize()
 
+  # compile the templates of the v2 views when the instance starts
+  from soc.cache import templates
+  templates.warm('v2')
+
   # Run the WSGI CGI handler with that application.
   util.run_wsgi_app(application)
 
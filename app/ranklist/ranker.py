@@ -522,12 +522,30 @@ class Ranker(object):
     """
     return self.FindRanks([score])[0]
 
-  def FindRanks(self, scores):
+  def GetScores(self, names):
+    """Gets the scores that are stored for a number of names.
+
+    Args:
+      names: A list of names (strings).
+
+    Returns:
+      A dict mapping the names that have a score to their score.
+    """
+    if not names:
+      return {}
+    keys = [self.__KeyForScore(name) for name in names]
+    return dict((score_ent.key().name(), score_ent["value"])
+                for score_ent in datastore.Get(keys) if score_ent)
+
+  def FindRanks(self, scores, pending=None):
     """Finds the 0-based ranks of a number of particular scores.
     Like FindRank, but more efficient for multiple scores.
 
     Args:
       scores: A list of scores.
+      pending: An optional dict mapping names to scores (or None) that
+        have not been set in the ranker yet.  The ranks are found as if
+        SetScores(pending) had been called.
 
     Returns:
       A list of ranks.
@@ -543,8 +561,19 @@ class Ranker(object):
     # Query the needed nodes:
     nodes_dict = self.__GetMultipleNodes(node_ids)
     # Call __FindRank, which does the math, for each score:
-    return [self.__FindRank(node_ids_with_children, nodes_dict) for
-            node_ids_with_children in node_ids_with_children_list]
+    ranks = [self.__FindRank(node_ids_with_children, nodes_dict) for
+             node_ids_with_children in node_ids_with_children_list]
+    if pending:
+      # Move the pending names from their stored score to their new one:
+      old_scores = self.GetScores(pending.keys())
+      for (name, new_score) in pending.iteritems():
+        old_score = old_scores.get(name)
+        for i, score in enumerate(scores):
+          if old_score and list(old_score) > list(score):
+            ranks[i] -= 1
+          if new_score and list(new_score) > list(score):
+            ranks[i] += 1
+    return ranks
 
   def __FindScore(self, node_id, rank, score_range, approximate):
     """To be run in a transaction.  Finds the score ranked 'rank' in the subtree
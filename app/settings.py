@@ -85,6 +85,13 @@ TEMPLATE_LOADERS = (
 #     'django.template.loaders.eggs.load_template_source',
 )
 
+# Keep the compiled templates in memory, except on the development server
+# where templates are edited while the instance keeps running.
+if not os.environ['SERVER_SOFTWARE'].startswith('Development/'):
+  TEMPLATE_LOADERS = (
+      ('soc.cache.templates.Loader', TEMPLATE_LOADERS),
+  )
+
 # The order of the middleware is as follows because:
 # - The ValueStore middleware should be before any other middleware
 #   so that the value store is available to it.
@@ -0,0 +1,253 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module contains a cache of the roles a user has.
+
+The access checks ask whether the current user has a role with a certain
+status in a certain scope. Without this cache every such check is a query.
+The capability set of a user holds all of their roles, is computed with one
+query per kind of role and is stored in memcache under a version that is
+incremented whenever one of the roles of the user is written.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import os
+import time
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+
+
+# roles written without going through their logic are picked up after
+# the retention time expires
+RETENTION = 10*60
+
+# the fields of a role that are stored in the capability set
+FIELDS = ['scope_path', 'link_id', 'status', 'scope', 'program']
+
+
+def _versionKey(user_key):
+  """Returns the memcache key for the version of the user's capabilities.
+  """
+
+  return 'capabilities_version_%s' % user_key
+
+
+def _dataKey(user_key, version):
+  """Returns the memcache key for the specified version of the capabilities.
+  """
+
+  # soc.logic.system can not be used as it depends on the site logic
+  app_version = os.environ.get('CURRENT_VERSION_ID')
+  return 'capabilities_%s_%s_%s' % (app_version, user_key, version)
+
+
+def _getVersion(user_key):
+  """Returns the current version of the capabilities of the user.
+  """
+
+  version_key = _versionKey(user_key)
+  # pylint: disable=E1101
+  version = memcache.get(version_key)
+
+  if version is None:
+    version = int(time.time() * 1000)
+    # pylint: disable=E1101
+    if not memcache.add(version_key, version):
+      version = memcache.get(version_key)
+
+  return version
+
+
+def _referenceKey(entity, name):
+  """Returns the key stored in the reference property name as a string.
+
+  Returns None if the entity does not have such a property or it is not set.
+  """
+
+  prop = entity.properties().get(name)
+  if not isinstance(prop, db.ReferenceProperty):
+    return None
+
+  key = prop.get_value_for_datastore(entity)
+  return str(key) if key else None
+
+
+class CapabilitySet(object):
+  """The roles of a single user, by role name.
+  """
+
+  def __init__(self, roles=None):
+    """Initializes the set with a role name to list of roles dictionary.
+    """
+
+    self.roles = roles or {}
+
+  def add(self, role_name, entity):
+    """Adds the specified role entity under role_name.
+    """
+
+    role = {
+        'key': str(entity.key()),
+        'scope_path': entity.scope_path,
+        'link_id': entity.link_id,
+        'status': entity.status,
+        'scope': _referenceKey(entity, 'scope'),
+        'program': _referenceKey(entity, 'program'),
+        }
+
+    self.roles.setdefault(role_name, []).append(role)
+
+  def hasRole(self, role_name, status='active', **fields):
+    """Returns True iff the user has a matching role.
+
+    Args:
+      role_name: the role_name of the logic of the role
+      status: string or list of strings specifying possible status
+      fields: the values the role should have, entities are compared by key,
+          only the FIELDS can be used
+    """
+
+    return bool(self.findRoles(role_name, status, **fields))
+
+  def findRoles(self, role_name, status='active', **fields):
+    """Returns the keys of the roles of the user that match.
+
+    See hasRole() for the arguments.
+    """
+
+    if not isinstance(status, (list, tuple)):
+      status = [status]
+
+    for name, value in fields.items():
+      if isinstance(value, db.Model):
+        fields[name] = str(value.key())
+      elif isinstance(value, db.Key):
+        fields[name] = str(value)
+
+    keys = []
+
+    for role in self.roles.get(role_name, []):
+      if role['status'] not in status:
+        continue
+
+      for name, value in fields.iteritems():
+        if role[name] != value:
+          break
+      else:
+        keys.append(db.Key(role['key']))
+
+    return keys
+
+
+def _build(user_key):
+  """Returns the capability set of the user, straight from the datastore.
+  """
+
+  # imported here to prevent circular imports with the role logic
+  from soc.logic.models import role as role_logic
+
+  capabilities = CapabilitySet()
+
+  models = {}
+  for role_name, logic in role_logic.ROLE_LOGICS.iteritems():
+    if not role_name:
+      continue
+    models.setdefault(logic.getModel(), []).append(role_name)
+
+  for model, role_names in models.iteritems():
+    for entity in model.all().filter('user', user_key):
+      for role_name in role_names:
+        capabilities.add(role_name, entity)
+
+  return capabilities
+
+
+def get(user):
+  """Returns the capability set of the specified user.
+
+  Args:
+    user: a User entity or key, None for anonymous users
+  """
+
+  if not user:
+    return CapabilitySet()
+
+  user_key = user.key() if isinstance(user, db.Model) else user
+  data_key = _dataKey(user_key, _getVersion(user_key))
+
+  # pylint: disable=E1101
+  roles = memcache.get(data_key)
+  if roles is not None:
+    return CapabilitySet(roles)
+
+  capabilities = _build(user_key)
+  # pylint: disable=E1101
+  memcache.set(data_key, capabilities.roles, RETENTION)
+
+  return capabilities
+
+
+def getRoles(user, role_name, status='active', **fields):
+  """Returns the role entities of the specified user that match.
+
+  The roles are looked up in the capability set of the user and retrieved
+  with a single get, instead of a query per status. Roles that no longer
+  exist or no longer have a matching status are left out.
+
+  Args:
+    user: a User entity or key, None for anonymous users
+    role_name: the role_name of the logic of the role
+    status: string or list of strings specifying possible status
+    fields: the values the roles should have, see CapabilitySet.hasRole()
+  """
+
+  keys = get(user).findRoles(role_name, status, **fields)
+  if not keys:
+    return []
+
+  if not isinstance(status, (list, tuple)):
+    status = [status]
+
+  return [i for i in db.get(keys) if i and i.status in status]
+
+
+def getRole(user, role_name, status='active', **fields):
+  """Returns one of the matching role entities of the user, or None.
+
+  See getRoles() for the arguments.
+  """
+
+  roles = getRoles(user, role_name, status, **fields)
+  return roles[0] if roles else None
+
+
+def flush(user):
+  """Discards the cached capabilities of the specified user.
+
+  Args:
+    user: a User entity or key
+  """
+
+  user_key = user.key() if isinstance(user, db.Model) else user
+
+  # an evicted version is recreated from the current time on the next get
+  # pylint: disable=E1101
+  memcache.incr(_versionKey(user_key))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module contains a read-through cache for rarely changing entities.
+
+Entities such as the Site singleton, programs and timelines are read on
+(nearly) every request but are hardly ever written. They are cached at two
+levels: a dictionary local to the running instance and memcache.
+
+Every cached entity has a version number in memcache which is incremented
+by flush(). An instance only uses its local copy if the version it was
+stored under is still the current one, so a single memcache round trip
+is enough to validate any number of locally cached entities.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import os
+import time
+
+from google.appengine.api import memcache
+from google.appengine.datastore import entity_pb
+from google.appengine.ext import db
+
+
+# entities are kept in memcache for an hour to force a refresh every so often
+RETENTION = 60*60
+
+# maps the memcache key of an entity to a (version, encoded entity) tuple
+_local = {}
+
+
+def _versionKey(key):
+  """Returns the memcache key for the version of the specified key.
+  """
+
+  return 'entity_version_%s' % key
+
+
+def _dataKey(key, version):
+  """Returns the memcache key for the specified version of an entity.
+  """
+
+  # soc.logic.system can not be used as it depends on the site logic
+  app_version = os.environ.get('CURRENT_VERSION_ID')
+  return 'entity_%s_%s_%s' % (app_version, key, version)
+
+
+def _newVersion():
+  """Returns a version to start with after the version has been evicted.
+
+  The version is based on the current time so that it can not collide
+  with a version that was used before the eviction.
+  """
+
+  return int(time.time() * 1000)
+
+
+def _getVersions(keys):
+  """Returns a dictionary with the current version of every key in keys.
+  """
+
+  version_keys = [_versionKey(i) for i in keys]
+  # pylint: disable=E1101
+  versions = memcache.get_multi(version_keys)
+
+  result = {}
+
+  for key, version_key in zip(keys, version_keys):
+    version = versions.get(version_key)
+
+    if version is None:
+      version = _newVersion()
+      # pylint: disable=E1101
+      if not memcache.add(version_key, version):
+        version = memcache.get(version_key)
+
+    result[key] = str(version)
+
+  return result
+
+
+def getVersions(keys):
+  """Returns a dictionary with the current version of every key in keys.
+
+  Can be used to key other cached data that has to be invalidated when
+  one of the entities is flushed.
+
+  Args:
+    keys: a list of keys, or their string form
+  """
+
+  return _getVersions([str(i) for i in keys])
+
+
+def _encode(entity):
+  """Returns the serialized form of entity.
+  """
+
+  return db.model_to_protobuf(entity).Encode()
+
+
+def _decode(encoded):
+  """Returns a new entity from its serialized form.
+  """
+
+  return db.model_from_protobuf(entity_pb.EntityProto(encoded))
+
+
+def get(keys):
+  """Returns the entities for the specified keys.
+
+  The entities are looked up in the local cache, memcache and finally the
+  datastore, in that order. Every call returns new instances, so callers
+  are free to modify them.
+
+  Args:
+    keys: a key or a list of keys, like db.get()
+
+  Returns:
+    an entity or a list of entities, None for entities that do not exist
+  """
+
+  multiple = isinstance(keys, (list, tuple))
+  if not multiple:
+    keys = [keys]
+
+  keys = [str(i) for i in keys]
+  versions = _getVersions(keys)
+
+  encoded = {}
+  missing = {}
+
+  for key in keys:
+    version, data = _local.get(key, (None, None))
+    if version == versions[key]:
+      encoded[key] = data
+    else:
+      missing[_dataKey(key, versions[key])] = key
+
+  if missing:
+    # pylint: disable=E1101
+    cached = memcache.get_multi(missing.keys())
+    for data_key, data in cached.iteritems():
+      key = missing.pop(data_key)
+      encoded[key] = data
+      _local[key] = (versions[key], data)
+
+  if missing:
+    fetched = db.get(missing.values())
+    new_data = {}
+
+    for data_key, entity in zip(missing.keys(), fetched):
+      if not entity:
+        continue
+      key = missing[data_key]
+      data = _encode(entity)
+      encoded[key] = new_data[data_key] = data
+      _local[key] = (versions[key], data)
+
+    # pylint: disable=E1101
+    memcache.set_multi(new_data, time=RETENTION)
+
+  result = [_decode(encoded[i]) if i in encoded else None for i in keys]
+
+  return result if multiple else result[0]
+
+
+def getScopedKey(scope, name, func):
+  """Returns the key computed by func, cached until scope is flushed.
+
+  Used to cache the result of a query that depends on a cached entity, such
+  as the org app survey of a program.
+
+  Args:
+    scope: the entity or key the result depends on
+    name: a name that identifies the query within the scope
+    func: called without arguments on a cache miss, should return a key
+        or None
+  """
+
+  if isinstance(scope, db.Model):
+    scope = scope.key()
+
+  scope = str(scope)
+  version = _getVersions([scope])[scope]
+  local_key = '%s_%s' % (scope, name)
+  memcache_key = _dataKey(local_key, version)
+
+  cached_version, result = _local.get(local_key, (None, None))
+  if cached_version == version:
+    return result
+
+  # pylint: disable=E1101
+  result = memcache.get(memcache_key)
+
+  if result is None:
+    result = func()
+    # store the empty string so that a missing result is cached as well
+    memcache.set(memcache_key, str(result or ''), time=RETENTION)
+  else:
+    result = result and db.Key(result) or None
+
+  _local[local_key] = (version, result)
+  return result
+
+
+def flush(entity):
+  """Invalidates the cached copies of the specified entity everywhere.
+
+  Args:
+    entity: an entity or a key
+  """
+
+  if isinstance(entity, db.Model):
+    entity = entity.key()
+
+  key = str(entity)
+  _local.pop(key, None)
+  # pylint: disable=E1101
+  memcache.incr(_versionKey(key), initial_value=_newVersion())
+
+
+def clear():
+  """Drops all entities cached locally by this instance.
+  """
+
+  _local.clear()
@@ -15,6 +15,14 @@
 # limitations under the License.
 
 """Module contains logic memcaching functions.
+
+Besides the generic query cache decorators, the results of
+soc.logic.models.base.Logic.getForFields() can be cached for logic classes
+that set CACHE_QUERIES. Every query is tagged with either its kind or, if
+it selects a single scope, with its kind and scope. Each tag has a
+generation counter in memcache that is part of the key under which the
+results are stored; writes through the logic increment the counters of
+the tags of the written entity, which makes the stale results unreachable.
 """
 
 __authors__ = [
@@ -23,29 +31,72 @@ __authors__ = [
   ]
 
 
+import hashlib
+import time
+
 from google.appengine.api import memcache
 from google.appengine.ext import db
 
 import soc.cache.base
 
 
-def key(model, filter, order, *args, **kwargs):
-  """Returns the memcache key for this query.
+# Store data for fifteen minutes to force a refresh every so often
+RETENTION = 15*60
+
+# the fields of which an equality filter restricts a query to a single scope
+SCOPE_FIELDS = ['scope', 'scope_path']
+
+
+def _canonical(value):
+  """Returns a stable, hashable representation of a filter value.
+
+  Entities and keys are represented by their encoded key, lists by tuples
+  of their canonical values and dictionaries by their sorted items.
+  """
+
+  if isinstance(value, db.Model):
+    return str(value.key())
+
+  if isinstance(value, db.Key):
+    return str(value)
+
+  if isinstance(value, (list, tuple)):
+    return tuple([_canonical(i) for i in value])
+
+  if isinstance(value, dict):
+    items = [(k, _canonical(v)) for k, v in value.iteritems()]
+    items.sort()
+    return tuple(items)
+
+  return value
+
+
+def _canonicalFilter(filter):
+  """Returns the canonical form of filter.
+
+  A list with a single value is the same filter as that value, see
+  soc.logic.models.base.Logic.getQueryForFields().
   """
 
   new_filter = {}
 
-  for filter_key, value in filter.iteritems():
-    if isinstance(value, db.Model):
-      new_value = value.key().id_or_name()
-    else:
-      new_value = value
-    new_filter[filter_key] = new_value
-
-  return 'query_for_%(kind)s_%(filter)s_%(order)s' % {
-      'kind': repr(model.kind()),
-      'filter': repr(new_filter),
-      'order': repr(order),
+  for filter_key, value in (filter or {}).iteritems():
+    if isinstance(value, list) and len(value) == 1:
+      value = value[0]
+    new_filter[filter_key] = value
+
+  return _canonical(new_filter)
+
+
+def key(model, filter, order=None, *args, **kwargs):
+  """Returns the memcache key for this query.
+  """
+
+  canonical = repr((_canonicalFilter(filter), _canonical(order or [])))
+
+  return 'query_for_%(kind)s_%(hash)s' % {
+      'kind': model.kind(),
+      'hash': hashlib.sha1(canonical).hexdigest(),
       }
 
 
@@ -67,10 +118,8 @@ def add(data, memcache_key, *args, **kwargs):
     data: the data to be cached
   """
 
-  # Store data for fifteen minutes to force a refresh every so often
-  retention = 15*60
   # pylint: disable=E1101
-  memcache.add(memcache_key, data, retention)
+  memcache.add(memcache_key, data, RETENTION)
 
 
 def set(data, memcache_key):
@@ -82,21 +131,149 @@ def set(data, memcache_key):
     data: the data to be cached
   """
 
-  # Store data for fifteen minutes to force a refresh every so often
-  retention = 15*60
   # pylint: disable=E1101
-  memcache.set(memcache_key, data, retention)
+  memcache.set(memcache_key, data, RETENTION)
 
 
-def flush(model, filter):
-  """Removes the data for the current user from the memcache.
+def flush(model, filter, order=None):
+  """Removes the data for the specified query from the memcache.
   """
 
-  memcache_key = key(model, filter)
+  memcache_key = key(model, filter, order)
   # pylint: disable=E1101
   memcache.delete(memcache_key)
 
 
+def _tag(kind, field=None, value=None):
+  """Returns the memcache key of the generation counter of a tag.
+
+  A tag is either a kind, or a kind together with the scope that is
+  selected by an equality filter on field.
+  """
+
+  if not field:
+    return 'query_generation_%s' % kind
+
+  return 'query_generation_%s_%s_%s' % (kind, field, _canonical(value))
+
+
+def _queryTag(model, filter):
+  """Returns the tag that is invalidated by all writes that can change
+  the results of a query on model with the specified filter.
+  """
+
+  filter = filter or {}
+
+  for field in SCOPE_FIELDS:
+    value = filter.get(field)
+    if isinstance(value, list) and len(value) == 1:
+      value = value[0]
+    if value and not isinstance(value, list):
+      return _tag(model.kind(), field, value)
+
+  return _tag(model.kind())
+
+
+def _entityTags(model, entity):
+  """Returns the tags that are invalidated when entity is written.
+  """
+
+  tags = [_tag(model.kind())]
+  properties = entity.properties()
+
+  # the scope is part of the key name of scoped entities and can therefore
+  # not change, only the current scope has to be invalidated
+  for field in SCOPE_FIELDS:
+    prop = properties.get(field)
+    if not prop:
+      continue
+    value = prop.get_value_for_datastore(entity)
+    if value:
+      tags.append(_tag(model.kind(), field, value))
+
+  return tags
+
+
+def _newGeneration():
+  """Returns a generation to start with after a counter has been evicted.
+
+  The generation is based on the current time so that it can not collide
+  with a generation that was used before the eviction.
+  """
+
+  return int(time.time() * 1000)
+
+
+def _getGeneration(tag):
+  """Returns the current generation of the specified tag.
+  """
+
+  # pylint: disable=E1101
+  generation = memcache.get(tag)
+
+  if generation is None:
+    generation = _newGeneration()
+    if not memcache.add(tag, generation):
+      generation = memcache.get(tag)
+
+  return generation
+
+
+def queryKey(model, filter, order, ancestors, limit, offset):
+  """Returns the memcache key for the results of a query.
+
+  The key contains the current generation of the tag of the query, so
+  invalidating the tag makes the cached results unreachable.
+  """
+
+  canonical = repr((_canonicalFilter(filter), _canonical(order or []),
+                    _canonical(ancestors or []), limit, offset))
+
+  return 'query_keys_%(kind)s_%(generation)s_%(hash)s' % {
+      'kind': model.kind(),
+      'generation': _getGeneration(_queryTag(model, filter)),
+      'hash': hashlib.sha1(canonical).hexdigest(),
+      }
+
+
+def fetch(query, model, filter, order, ancestors, limit, offset):
+  """Returns the results of query, which must have been constructed from
+  the other arguments.
+
+  Only the keys of the results are cached, the entities are retrieved
+  with a single db.get on a cache hit. Entities that have been deleted in
+  the meantime are skipped.
+  """
+
+  memcache_key = queryKey(model, filter, order, ancestors, limit, offset)
+  # pylint: disable=E1101
+  keys = memcache.get(memcache_key)
+
+  if keys is None:
+    result = query.fetch(limit, offset)
+    keys = [str(i.key()) for i in result]
+    memcache.set(memcache_key, keys, RETENTION)
+    return result
+
+  if not keys:
+    return []
+
+  return [i for i in db.get(keys) if i]
+
+
+def invalidate(model, entity):
+  """Invalidates all cached query results that entity might be part of.
+
+  Args:
+    model: the model that queries are made for
+    entity: the entity that has been written
+  """
+
+  for tag in _entityTags(model, entity):
+    # pylint: disable=E1101
+    memcache.incr(tag, initial_value=_newGeneration())
+
+
 # define the cache functions
 cache = soc.cache.base.getSoftCacher(get, add)
 force_cache = soc.cache.base.getHardCacher(key, set)
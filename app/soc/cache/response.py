@@ -0,0 +1,134 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module contains a cache for the complete responses to anonymous requests.
+
+A response is cached under the requested URL and the versions that
+soc.cache.entities keeps for the entities the page depends on, such as
+its program or organization. Flushing one of those entities therefore
+invalidates every cached page that depends on it.
+
+Entries are kept in memcache for a grace period after they have expired.
+The first request that finds an expired entry takes a short lock and
+renders the page again, while all other requests keep getting the expired
+entry, so that a popular page is never rendered by many requests at once.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import logging
+import time
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+
+from soc.cache import entities as entity_cache
+from soc.logic import system
+
+
+# number of seconds an expired entry is still served while it is rendered
+GRACE = 5*60
+
+# number of seconds after which a request that failed to render an expired
+# entry is assumed to be gone and another request may render it
+LOCK_TIME = 30
+
+# entries larger than this are not cached, memcache refuses values > 1MB
+MAX_SIZE = 900*1000
+
+
+def _lockKey(memcache_key):
+  """Returns the memcache key of the lock for the specified entry.
+  """
+
+  return 'lock_%s' % memcache_key
+
+
+def key(path, scopes):
+  """Returns the memcache key for the response to the specified path.
+
+  Args:
+    path: the full path of the request, including the GET arguments
+    scopes: the entities or keys the response depends on
+  """
+
+  host = system.getRawHostname()
+  app_version = system.getAppVersion()
+
+  scopes = [str(i.key() if isinstance(i, db.Model) else i) for i in scopes]
+  versions = entity_cache.getVersions(scopes)
+  versions = '_'.join(versions[i] for i in scopes)
+
+  # memcache hashes keys which are too long
+  return 'response_%s_%s_%s_%s' % (host, app_version, versions, path)
+
+
+def get(memcache_key):
+  """Returns the value cached under memcache_key.
+
+  None is returned if there is no such value, or if it has expired and
+  the current request should store a new one.
+  """
+
+  # pylint: disable=E1101
+  entry = memcache.get(memcache_key)
+
+  if entry is None:
+    return None
+
+  expires, value = entry
+
+  # pylint: disable=E1101
+  if expires < time.time() and memcache.add(_lockKey(memcache_key), True,
+                                            LOCK_TIME):
+    logging.info("Refreshing %s" % memcache_key)
+    return None
+
+  return value
+
+
+def put(memcache_key, value, size, retention):
+  """Caches value under memcache_key for the specified number of seconds.
+
+  Args:
+    memcache_key: the key returned by key()
+    value: the value to cache
+    size: the approximate size of value in bytes
+    retention: the number of seconds after which value expires
+  """
+
+  if size > MAX_SIZE:
+    logging.info("Not caching %s, it is %d bytes" % (memcache_key, size))
+    return
+
+  entry = (time.time() + retention, value)
+
+  # pylint: disable=E1101
+  memcache.set(memcache_key, entry, retention + GRACE)
+  memcache.delete(_lockKey(memcache_key))
+
+
+def flush(entity):
+  """Invalidates all cached responses that depend on the specified entity.
+
+  Args:
+    entity: an entity or a key
+  """
+
+  entity_cache.flush(entity)
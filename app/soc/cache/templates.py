@@ -0,0 +1,109 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module contains an in-process cache for compiled templates.
+
+Without it every render_to_string call reads and parses the template file,
+and the templates it extends, again. The Loader is used as the template
+loader in settings.TEMPLATE_LOADERS and wraps the filesystem and
+app_directories loaders, so every template that is looked up through
+django.template.loader, including {% extends %} and {% include %}, is
+compiled once per instance.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import logging
+import os
+
+from django.conf import settings
+from django.template import loader
+from django.template import TemplateDoesNotExist
+from django.template import TemplateSyntaxError
+from django.template.loaders import cached
+
+
+# the prefixes of the template trees that have been warmed already
+_warmed = set()
+
+
+class Loader(cached.Loader):
+  """Template loader that caches compiled templates by app version and path.
+  """
+
+  def load_template(self, template_name, template_dirs=None):
+    """Returns the compiled template for template_name.
+
+    Templates are only looked up and compiled once for the running version
+    of the application.
+    """
+
+    # soc.logic.system can not be used as it depends on the site logic
+    app_version = os.environ.get('CURRENT_VERSION_ID')
+    key = (app_version, template_name, tuple(template_dirs or ()))
+
+    if key not in self.template_cache:
+      template, origin = self.find_template(template_name, template_dirs)
+
+      if not hasattr(template, 'render'):
+        try:
+          template = loader.get_template_from_string(
+              template, origin, template_name)
+        except TemplateDoesNotExist:
+          # the template includes a template that does not exist, return
+          # the source so that the missing template is reported
+          return template, origin
+
+      self.template_cache[key] = template
+
+    return self.template_cache[key], None
+
+
+def warm(prefix):
+  """Compiles all templates below prefix in the template directories.
+
+  Meant to be called when an instance starts, so that the first requests
+  served by it do not have to compile the templates they use.
+
+  Args:
+    prefix: the directory of the templates relative to the template
+        directories, e.g. 'v2'
+  """
+
+  if prefix in _warmed:
+    return
+
+  _warmed.add(prefix)
+
+  for template_dir in settings.TEMPLATE_DIRS:
+    root = os.path.join(template_dir, prefix)
+
+    for dirpath, _, filenames in os.walk(root):
+      for filename in filenames:
+        if not filename.endswith('.html'):
+          continue
+
+        path = os.path.join(dirpath, filename)
+        template_name = path[len(template_dir):].lstrip(os.sep)
+
+        try:
+          loader.get_template(template_name)
+        except (TemplateDoesNotExist, TemplateSyntaxError), exception:
+          logging.warning('Unable to compile template %s: %s',
+                          template_name, exception)
@@ -253,6 +253,112 @@
     thegrid.addJSONData(json_to_return);
   };
 
+  /* Retrieves a single page of a server side list, the server filters,
+     sorts and pages the rows.
+  */
+  var retrieveServerData = function (postdata) {
+    var my_index = postdata.my_index;
+    var list_object = list_objects.get(my_index);
+
+    // Simple filters are sent as a dictionary of column names to text
+    var filters = {};
+    var search_by_reg_exp = jQuery("#regexp_" + list_object.jqgrid.id).is(":checked");
+    jQuery.each(list_object.configuration.colModel, function (column_index, column) {
+      var text = postdata[column.name];
+      if (text !== undefined && text !== "") {
+        // Search by regular expression if switch is on or if there is a select box to filter
+        if (search_by_reg_exp || column.editoptions !== undefined) {
+          text = "re:" + text;
+        }
+        filters[column.name] = text;
+      }
+    });
+
+    var params = {
+      fmt: "json",
+      idx: my_index,
+      page: postdata.page,
+      rows: postdata.rows,
+      sidx: postdata.sidx,
+      sord: postdata.sord,
+      filters: JSON.stringify(filters)
+    };
+    if (postdata._search && postdata.filters) {
+      params.search = postdata.filters;
+    }
+    if (list_object.data.refresh) {
+      params.refresh = "true";
+      list_object.data.refresh = false;
+    }
+
+    // Preserve current query string
+    var ampersand_question = "?";
+    if (window.location.href.indexOf("?") !== -1) {
+      ampersand_question = "&";
+    }
+
+    jQuery.ajax({
+      async: true,
+      cache: false,
+      dataType: "json",
+      url: window.location.href + ampersand_question + jQuery.param(params),
+      timeout: 60000,
+      error: function () {
+        jQuery("#temporary_list_placeholder_" + my_index).html([
+          '<span style="color:red">',
+          'Error retrieving data: please refresh the list or the whole page to try again',
+          '</span>'].join("")
+        );
+        jQuery("#load_" + list_object.jqgrid.id).hide();
+      },
+      success: function (data_from_server) {
+        var json_to_return = {
+          "page": data_from_server.page,
+          "total": data_from_server.total,
+          "records": data_from_server.records,
+          "rows": []
+        };
+
+        list_object.data.data = [];
+        list_object.data.all_data = data_from_server.rows;
+
+        jQuery.each(data_from_server.rows, function (row_index, row) {
+          list_object.data.data.push(row.columns);
+
+          var my_cell = [];
+          jQuery.each(list_object.configuration.colModel, function (column_index, column) {
+            var column_content = row.columns[column.name];
+            if (row.operations !== undefined && row.operations.row !== undefined && row.operations.row.link !== undefined) {
+              // If there are no links in the text then insert a listsnoul link
+              if (column_content !== null && column_content !== undefined && column_content.toString().match(/<a\b[^>]*>.*<\/a>/) === null) {
+                column_content = '<a style="display:block;" href="' + row.operations.row.link + '" class="listsnoul">' + column_content + '</a>';
+              }
+            }
+            my_cell.push(column_content);
+          });
+
+          json_to_return.rows.push({
+            "key": row.columns.key,
+            "cell": my_cell
+          });
+        });
+        list_object.data.filtered_data = list_object.data.data;
+
+        var thegrid = jQuery("#" + list_object.jqgrid.id)[0];
+        thegrid.addJSONData(json_to_return);
+
+        jQuery("#temporary_list_placeholder_" + my_index).remove();
+        jQuery("#load_" + list_object.jqgrid.id).hide();
+
+        // Set up the toolbar once, after the first page is received
+        if (!list_object.data.loaded) {
+          list_object.data.loaded = true;
+          list_object.finishLoading();
+        }
+      }
+    });
+  };
+
   var list_objects = (function () {
     var self = this;
     var lists = [];
@@ -720,231 +826,247 @@
               jQuery("#temporary_list_placeholder_" + idx).remove();
               jQuery("#load_" + _self.jqgrid.id).hide();
 
-              //Trigger toolbar set default filters if a default one is requested (searchoptions)
-              jQuery("#" + _self.jqgrid.id)[0].triggerToolbar();
+              _self.finishLoading();
+            }
+          }
+        });
+      };
+      setTimeout(server_loop, 100);
+    };
 
-              //check if there are editable columns
-              jQuery.each(_self.configuration.colModel, function (column_index, column) {
-                if (column.editable !== undefined && column.editable === true) {
-                  _self.jqgrid.editable_columns.push(column.name);
-                }
-              });
+    /* Sets up the toolbar of the list after its data, or the first page
+       of it for server side lists, has been loaded.
+    */
+    this.finishLoading = function () {
+      //Trigger toolbar set default filters if a default one is requested (searchoptions)
+      jQuery("#" + _self.jqgrid.id)[0].triggerToolbar();
+
+      //check if there are editable columns
+      jQuery.each(_self.configuration.colModel, function (column_index, column) {
+        if (column.editable !== undefined && column.editable === true) {
+          _self.jqgrid.editable_columns.push(column.name);
+        }
+      });
 
-              // Delete previous buttons, if any
-              jQuery("#t_" + _self.jqgrid.id).children().remove();
-
-              // Add global action buttons on the toolbar
-              if (_self.operations !== undefined && _self.operations.buttons !== undefined) {
-                jQuery.each(_self.operations.buttons, function (setting_index, operation) {
-                  var bounds = operation.bounds;
-                  // create button for global operation
-                  var new_button_id = _self.jqgrid.id + "_buttonOp_" + operation.id;
-                  jQuery("#t_" + _self.jqgrid.id).append("<input type='button' value='" + operation.caption + "' style='float:left' id='" + new_button_id + "'/>");
-
-                  operation.parameters.idx = idx;
-
-                  /* If this button is a post_edit button then button bounds should
-                     behave differently: the button should be disabled if no dirty
-                     fields are detected, then enabled the first time a cell content
-                     is changed
-                  */
-                  if (operation.type !== "post_edit") {
-                    // Substitute "all" string (if any) to actual number of records
-                    operation.real_bounds = operation.bounds;
-                    var handle_all = operation.real_bounds.indexOf("all");
-                    if (handle_all !== -1) {
-                      operation.real_bounds[handle_all] = _self.jqgrid.object.jqGrid('getGridParam','records');
-                    }
-                    /* Add button bounds on parameters to let POST
-                       requests working also with [0,"all"] bounds */
-                    operation.parameters.real_bounds = operation.real_bounds;
-                  }
-                  // the button should be disabled by default if lower bound is >0 or operation is a post_edit one
-                  if (operation.type === "post_edit" || operation.real_bounds[0] > 0) {
-                    jQuery("#" + new_button_id).attr("disabled","disabled");
-                  }
-                  /* Add id of the button operation to parameters so the appropriate backend action
-                     can be identified if multiple buttons redirect to the same page. */
-                  operation.parameters.button_id = operation.id;
-                  // associate action
-                  jQuery("#" + new_button_id).click(jqgrid_functions.global_button_functions[operation.type](operation.parameters));
-                  // If this is a partial function, than store it in a safe place
-                  if (operation.type == "redirect_custom") {
-                    jQuery("#" + new_button_id).data(
-                      'melange',
-                      {
-                        click: jqgrid_functions.global_button_functions[operation.type](operation.parameters)
-                      }
-                    );
-                  }
-                });
+      // Delete previous buttons, if any
+      jQuery("#t_" + _self.jqgrid.id).children().remove();
+
+      // Add global action buttons on the toolbar
+      if (_self.operations !== undefined && _self.operations.buttons !== undefined) {
+        jQuery.each(_self.operations.buttons, function (setting_index, operation) {
+          var bounds = operation.bounds;
+          // create button for global operation
+          var new_button_id = _self.jqgrid.id + "_buttonOp_" + operation.id;
+          jQuery("#t_" + _self.jqgrid.id).append("<input type='button' value='" + operation.caption + "' style='float:left' id='" + new_button_id + "'/>");
+
+          operation.parameters.idx = idx;
+
+          /* If this button is a post_edit button then button bounds should
+             behave differently: the button should be disabled if no dirty
+             fields are detected, then enabled the first time a cell content
+             is changed
+          */
+          if (operation.type !== "post_edit") {
+            // Substitute "all" string (if any) to actual number of records
+            operation.real_bounds = operation.bounds;
+            var handle_all = operation.real_bounds.indexOf("all");
+            if (handle_all !== -1) {
+              operation.real_bounds[handle_all] = _self.jqgrid.object.jqGrid('getGridParam','records');
+            }
+            /* Add button bounds on parameters to let POST
+               requests working also with [0,"all"] bounds */
+            operation.parameters.real_bounds = operation.real_bounds;
+          }
+          // the button should be disabled by default if lower bound is >0 or operation is a post_edit one
+          if (operation.type === "post_edit" || operation.real_bounds[0] > 0) {
+            jQuery("#" + new_button_id).attr("disabled","disabled");
+          }
+          /* Add id of the button operation to parameters so the appropriate backend action
+             can be identified if multiple buttons redirect to the same page. */
+          operation.parameters.button_id = operation.id;
+          // associate action
+          jQuery("#" + new_button_id).click(jqgrid_functions.global_button_functions[operation.type](operation.parameters));
+          // If this is a partial function, than store it in a safe place
+          if (operation.type == "redirect_custom") {
+            jQuery("#" + new_button_id).data(
+              'melange',
+              {
+                click: jqgrid_functions.global_button_functions[operation.type](operation.parameters)
               }
+            );
+          }
+        });
+      }
 
-              //Add row action if present
-              /*var multiselect = _self.jqgrid.object.jqGrid('getGridParam','multiselect');
-              if (_self.operations !== undefined && _self.operations.row !== undefined && !isEmptyObject(_self.operations.row)) {
+      //Add row action if present
+      /*var multiselect = _self.jqgrid.object.jqGrid('getGridParam','multiselect');
+      if (_self.operations !== undefined && _self.operations.row !== undefined && !isEmptyObject(_self.operations.row)) {
 
-                // if row action is present, than change cursor
-                // FIXME: this is done by polling continuosly the body element
-                // this is not so elegant nor efficient, need to find another solution
-                jQuery("body").live("mouseover", function() {
-                  if (multiselect) {
-                    jQuery("#" + _self.jqgrid.id + " tbody tr td:gt(0)").css("cursor","pointer")
-                  }
-                  else {
-                    jQuery("#" + _self.jqgrid.id + " tbody tr td").css("cursor","pointer")
-                  }
-                });
-
-                var operation = _self.operations.row;
-                operation.parameters.idx = idx;
+        // if row action is present, than change cursor
+        // FIXME: this is done by polling continuosly the body element
+        // this is not so elegant nor efficient, need to find another solution
+        jQuery("body").live("mouseover", function() {
+          if (multiselect) {
+            jQuery("#" + _self.jqgrid.id + " tbody tr td:gt(0)").css("cursor","pointer")
+          }
+          else {
+            jQuery("#" + _self.jqgrid.id + " tbody tr td").css("cursor","pointer")
+          }
+        });
 
-                // If this is a partial function, than store it in a safe place
-                if (operation.type == "redirect_custom") {
-                  _self.jqgrid.object.data(
-                    'melange',
-                    {
-                      rowsel: jqgrid_functions.row_functions[operation.type](operation.parameters)
-                    }
-                  );
-                }
-                // associate action to row
-                _self.jqgrid.object.jqGrid('setGridParam',{
-                  onCellSelect: function (row_number, cell_index, cell_content, event) {*/
-                    /* If this is a multiselect table, do not trigger row action
-                       if user clicks on a checkbox in the first column
-                    */
-                    /*if (multiselect && cell_index == 0) {
-                      return;
-                    }
-                    // get current selection
-                    var row = jQuery("#" + _self.jqgrid.id).jqGrid('getRowData',row_number);
-                    var object = jLinq.from(_self.data.all_data).equals("columns.key",row.key).select()[0];
-                    var partial_row_method = _self.jqgrid.object.data('melange').rowsel;
-                    partial_row_method(object.operations.row.link, event)();
-                  }
-                });
-              }*/
-
-              //Add CSV Export button and RegEx switch only once all data is loaded
-
-              //Add some padding at the bottom of the toolbar to display buttons correctly
-              jQuery("#t_" + _self.jqgrid.id).css("padding-bottom","3px");
-
-              //Add CSV export button
-              jQuery("#t_" + _self.jqgrid.id).append("<input type='button' value='CSV Export' style='float:right;' id='csvexport_" + _self.jqgrid.id + "'/>");
-              jQuery("#csvexport_" + _self.jqgrid.id).button();
-              //Add Click event to CSV export button
-              jQuery("#csvexport_" + _self.jqgrid.id).click(function () {
-                var csv_export = [];
-                csv_export[0] = [];
-                //get Columns names
-                if (_self.data.data[0] !== undefined || _self.data.filtered_data[0] !== undefined) {
-                  var iterate_through = _self.data.filtered_data || _self.data.data;
-                  jQuery.each(_self.configuration.colNames, function (column_index, column_name) {
-                    // check index for column name
-                    var field_text = column_name;
-                    // Check for &quot;, which is translated to " when output to textarea
-                    field_text = field_text.replace(/\"|&quot;|&#34;/g,"\"\"");
-
-                    if (field_text.indexOf(",") !== -1 || field_text.indexOf("\"") !== -1 || field_text.indexOf("\r\n") !== -1) {
-                      field_text = "\"" + field_text + "\"";
-                    }
-                    csv_export[0].push(field_text);
-                  });
-                  csv_export[0] = csv_export[0].join(",");
+        var operation = _self.operations.row;
+        operation.parameters.idx = idx;
 
-                  //Check the actual order of the column, so the data dictionary can be in any order
-                  var column_ids = [];
-                  jQuery.each(_self.configuration.colModel, function (column, details) {
-                    column_ids.push(details.name);
-                  });
-                  //now run through the columns
-                  jQuery.each(iterate_through, function (row_index, row) {
-                    csv_export[csv_export.length] = [];
-                    jQuery.each(column_ids, function (column_index, column_id) {
-                      var cell_value = row[column_id];
-                      if (cell_value === null) {
-                        cell_value = "";
-                      }
-                      if (cell_value === undefined) {
-                        cell_value = "";
-                      }
-                      var field_text = cell_value.toString();
-
-                      // extract link href (if any) from the text
-                      var extracted_text = /^<a\b[^>]*href="(.*?)" \b[^>]*>(.*?)<\/a>$/.exec(field_text);
-                      if (extracted_text !== null) {
-                        field_text = extracted_text[1];
-                      }
-
-                      // Check for &quot;, which is translated to " when output to textarea
-                      field_text = field_text.replace(/\"|&quot;|&#34;/g,"\"\"");
-
-                      if (field_text.indexOf(",") !== -1 || field_text.indexOf("\"") !== -1 || field_text.indexOf("\r\n") !== -1) {
-                        field_text = "\"" + field_text + "\"";
-                      }
-                      csv_export[csv_export.length - 1].push(field_text);
-                    });
-                    csv_export[csv_export.length - 1] = csv_export[csv_export.length - 1].join(",");
-                  });
-                  csv_export = csv_export.join("\r\n");
-
-                  //CSV string is there, now put it in a modal dialog for the user to copy/paste
-                  jQuery("#csv_dialog").remove();
-                  jQuery("body").append(
-                    [
-                      "<div id='csv_dialog' style='display:none'>",
-                      "  <h3>Now you can copy and paste CSV data from the text area to a new file:</h3>",
-                      "  <textarea style='width:450px;height:250px'>",csv_export,"</textarea>",
-                      "</div>"
-                    ].join("")
-                  );
-                  jQuery("#csv_dialog").dialog({
-                    height: 420,
-                    width: 500,
-                    modal: true,
-                    buttons: {
-                      "Close": function () {
-                        jQuery(this).dialog("close");
-                      }
-                    }
-                  });
-                }
-              });
+        // If this is a partial function, than store it in a safe place
+        if (operation.type == "redirect_custom") {
+          _self.jqgrid.object.data(
+            'melange',
+            {
+              rowsel: jqgrid_functions.row_functions[operation.type](operation.parameters)
+            }
+          );
+        }
+        // associate action to row
+        _self.jqgrid.object.jqGrid('setGridParam',{
+          onCellSelect: function (row_number, cell_index, cell_content, event) {*/
+            /* If this is a multiselect table, do not trigger row action
+               if user clicks on a checkbox in the first column
+            */
+            /*if (multiselect && cell_index == 0) {
+              return;
+            }
+            // get current selection
+            var row = jQuery("#" + _self.jqgrid.id).jqGrid('getRowData',row_number);
+            var object = jLinq.from(_self.data.all_data).equals("columns.key",row.key).select()[0];
+            var partial_row_method = _self.jqgrid.object.data('melange').rowsel;
+            partial_row_method(object.operations.row.link, event)();
+          }
+        });
+      }*/
+
+      //Add CSV Export button and RegEx switch only once all data is loaded
+
+      //Add some padding at the bottom of the toolbar to display buttons correctly
+      jQuery("#t_" + _self.jqgrid.id).css("padding-bottom","3px");
+
+      //Add CSV export button
+      jQuery("#t_" + _self.jqgrid.id).append("<input type='button' value='CSV Export' style='float:right;' id='csvexport_" + _self.jqgrid.id + "'/>");
+      jQuery("#csvexport_" + _self.jqgrid.id).button();
+      //Add Click event to CSV export button
+      jQuery("#csvexport_" + _self.jqgrid.id).click(function () {
+        var csv_export = [];
+        csv_export[0] = [];
+        //get Columns names
+        if (_self.data.data[0] !== undefined || _self.data.filtered_data[0] !== undefined) {
+          var iterate_through = _self.data.filtered_data || _self.data.data;
+          jQuery.each(_self.configuration.colNames, function (column_index, column_name) {
+            // check index for column name
+            var field_text = column_name;
+            // Check for &quot;, which is translated to " when output to textarea
+            field_text = field_text.replace(/\"|&quot;|&#34;/g,"\"\"");
+
+            if (field_text.indexOf(",") !== -1 || field_text.indexOf("\"") !== -1 || field_text.indexOf("\r\n") !== -1) {
+              field_text = "\"" + field_text + "\"";
+            }
+            csv_export[0].push(field_text);
+          });
+          csv_export[0] = csv_export[0].join(",");
 
-              //Add RegExp switch
-              jQuery("#t_" + _self.jqgrid.id).append("<div style='float:right;margin-right:4px;'><input type='checkbox' id='regexp_" + _self.jqgrid.id + "'/>RegExp Search</div>");
+          //Check the actual order of the column, so the data dictionary can be in any order
+          var column_ids = [];
+          jQuery.each(_self.configuration.colModel, function (column, details) {
+            column_ids.push(details.name);
+          });
+          //now run through the columns
+          jQuery.each(iterate_through, function (row_index, row) {
+            csv_export[csv_export.length] = [];
+            jQuery.each(column_ids, function (column_index, column_id) {
+              var cell_value = row[column_id];
+              if (cell_value === null) {
+                cell_value = "";
+              }
+              if (cell_value === undefined) {
+                cell_value = "";
+              }
+              var field_text = cell_value.toString();
 
-              //Make the switch trigger a new search when clicked
-              jQuery("#regexp_" + _self.jqgrid.id).click(function () {
-                jQuery("#" + _self.jqgrid.id).jqGrid().trigger("reloadGrid");
-              });
+              // extract link href (if any) from the text
+              var extracted_text = /^<a\b[^>]*href="(.*?)" \b[^>]*>(.*?)<\/a>$/.exec(field_text);
+              if (extracted_text !== null) {
+                field_text = extracted_text[1];
+              }
 
+              // Check for &quot;, which is translated to " when output to textarea
+              field_text = field_text.replace(/\"|&quot;|&#34;/g,"\"\"");
 
-              //Trigger event when loading of the list is finished
-              var loaded_event = jQuery.Event("melange_list_loaded");
-              loaded_event.list_object = _self;
-              _self.jqgrid.object.trigger(loaded_event);
-
-              /* Tweak the width of the element, because of horizontal bar
-               * appearing in Chrome. This should be temporary, since it's
-               * probably related to a small jqgrid bug when calculating
-               * the dimensions of the lists. This is also a quick hack,
-               * since to do it properly it should iterate through all the
-               * jqgrid's dom and make every width equal. Serve its purpose,
-               * though.
-               */
-              var jqgrid_dom = jQuery("#gview_" + _self.jqgrid.id + " .ui-jqgrid-bdiv");
-              jqgrid_dom.width(jqgrid_dom.width() + 1);
+              if (field_text.indexOf(",") !== -1 || field_text.indexOf("\"") !== -1 || field_text.indexOf("\r\n") !== -1) {
+                field_text = "\"" + field_text + "\"";
+              }
+              csv_export[csv_export.length - 1].push(field_text);
+            });
+            csv_export[csv_export.length - 1] = csv_export[csv_export.length - 1].join(",");
+          });
+          csv_export = csv_export.join("\r\n");
+
+          //CSV string is there, now put it in a modal dialog for the user to copy/paste
+          jQuery("#csv_dialog").remove();
+          jQuery("body").append(
+            [
+              "<div id='csv_dialog' style='display:none'>",
+              "  <h3>Now you can copy and paste CSV data from the text area to a new file:</h3>",
+              "  <textarea style='width:450px;height:250px'>",csv_export,"</textarea>",
+              "</div>"
+            ].join("")
+          );
+          jQuery("#csv_dialog").dialog({
+            height: 420,
+            width: 500,
+            modal: true,
+            buttons: {
+              "Close": function () {
+                jQuery(this).dialog("close");
+              }
             }
-          }
-        });
-      };
-      setTimeout(server_loop, 100);
+          });
+        }
+      });
+
+      //Add RegExp switch
+      jQuery("#t_" + _self.jqgrid.id).append("<div style='float:right;margin-right:4px;'><input type='checkbox' id='regexp_" + _self.jqgrid.id + "'/>RegExp Search</div>");
+
+      //Make the switch trigger a new search when clicked
+      jQuery("#regexp_" + _self.jqgrid.id).click(function () {
+        jQuery("#" + _self.jqgrid.id).jqGrid().trigger("reloadGrid");
+      });
+
+
+      //Trigger event when loading of the list is finished
+      var loaded_event = jQuery.Event("melange_list_loaded");
+      loaded_event.list_object = _self;
+      _self.jqgrid.object.trigger(loaded_event);
+
+      /* Tweak the width of the element, because of horizontal bar
+       * appearing in Chrome. This should be temporary, since it's
+       * probably related to a small jqgrid bug when calculating
+       * the dimensions of the lists. This is also a quick hack,
+       * since to do it properly it should iterate through all the
+       * jqgrid's dom and make every width equal. Serve its purpose,
+       * though.
+       */
+      var jqgrid_dom = jQuery("#gview_" + _self.jqgrid.id + " .ui-jqgrid-bdiv");
+      jqgrid_dom.width(jqgrid_dom.width() + 1);
+    };
+
+    var isServerSide = function () {
+      return _self.configuration !== null && _self.configuration.server_side === true;
     };
 
     this.refreshData = function () {
+      if (isServerSide()) {
+        // The next page is requested when the grid is reloaded
+        _self.data.refresh = true;
+        return;
+      }
       _self.data = {
         data: [],
         all_data: [],
@@ -959,6 +1081,8 @@
         {
           //giving index of the table in post data
           postData: {my_index: idx},
+          // server side lists request every page from the server
+          datatype: isServerSide() ? retrieveServerData : retrieveData,
           // Disable or enable button depending on how many rows are selected
           onSelectAll: jqgrid_functions.enableDisableButtons,
           onSelectRow: jqgrid_functions.enableDisableButtons
@@ -1036,7 +1160,9 @@
 
           createListHTML();
           initJQGrid();
-          fetchDataFromServer();
+          if (!isServerSide()) {
+            fetchDataFromServer();
+          }
         }
       );
 
@@ -0,0 +1,164 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers to export data as CSV or JSON.
+
+Rows are produced and encoded one at a time by generators, so the memory
+that is needed does not depend on the number of rows that are exported.
+Large exports are written page by page by soc.tasks.export.
+"""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+import csv
+import StringIO
+
+from django.utils import simplejson
+
+
+CSV = 'csv'
+JSON = 'json'
+
+CONTENT_TYPES = {
+    CSV: 'text/csv',
+    JSON: 'application/json',
+    }
+
+EXTENSIONS = {
+    CSV: '.csv',
+    JSON: '.json',
+    }
+
+
+class Exporter(object):
+  """Produces the rows of the export of an entity.
+
+  Subclasses define the query for the entities that make up the rows and
+  turn a page of those entities into rows.
+  """
+
+  #: the number of entities that are exported at once
+  page_size = 100
+
+  def getFilename(self, entity):
+    """Returns the name of the file for the export of entity.
+    """
+
+    return entity.link_id
+
+  def getHeader(self, entity):
+    """Returns the text that precedes the columns of a CSV export.
+    """
+
+    return ''
+
+  def getColumns(self, entity):
+    """Returns the names of the columns of the rows.
+    """
+
+    raise NotImplementedError
+
+  def getQuery(self, entity):
+    """Returns the query for the entities that are exported for entity.
+    """
+
+    raise NotImplementedError
+
+  def getRows(self, entity, entities):
+    """Yields a row, a list of values, for a page of entities.
+    """
+
+    raise NotImplementedError
+
+
+def _encodeValue(value):
+  """Returns value as a UTF-8 encoded string.
+  """
+
+  if value is None:
+    return ''
+
+  if isinstance(value, unicode):
+    return value.encode('utf-8')
+
+  return str(value)
+
+
+def encodeCSV(rows):
+  """Yields every row in CSV format, encoded as UTF-8.
+  """
+
+  output = StringIO.StringIO()
+  writer = csv.writer(output, dialect='excel')
+
+  for row in rows:
+    writer.writerow([_encodeValue(i) for i in row])
+    yield output.getvalue()
+    output.seek(0)
+    output.truncate()
+
+
+def encodeJSON(rows, columns, first=True):
+  """Yields every row as a JSON object that maps the columns to its values.
+
+  The objects are separated by commas, the list that holds them is opened
+  by encodeHeader and closed by encodeFooter.
+
+  Args:
+    rows: the rows to encode
+    columns: the names of the columns
+    first: whether the first row is the first one of the export
+  """
+
+  for row in rows:
+    if not first:
+      yield ',\n'
+    first = False
+
+    yield simplejson.dumps(dict(zip(columns, row)), default=unicode)
+
+
+def encodeHeader(exporter, entity, format):
+  """Yields the start of an export in the specified format.
+  """
+
+  if format == JSON:
+    yield '['
+  else:
+    yield _encodeValue(exporter.getHeader(entity))
+    for line in encodeCSV([exporter.getColumns(entity)]):
+      yield line
+
+
+def encodeRows(rows, columns, format, first=True):
+  """Yields rows encoded in the specified format.
+  """
+
+  if format == JSON:
+    return encodeJSON(rows, columns, first=first)
+
+  return encodeCSV(rows)
+
+
+def encodeFooter(format):
+  """Yields the end of an export in the specified format.
+  """
+
+  if format == JSON:
+    yield ']'
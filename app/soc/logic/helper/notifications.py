@@ -25,6 +25,7 @@ __authors__ = [
 import logging
 import time
 
+from django.template import Context
 from django.template import loader
 from django.utils.encoding import force_unicode
 from django.utils.translation import ugettext
@@ -122,11 +123,10 @@ def sendNewRequestNotification(request_entity):
     request_entity: an instance of Request model
   """
 
-  from soc.logic.helper import notifications
   from soc.logic.models.role import ROLE_LOGICS
   from soc.views.models.role import ROLE_VIEWS
 
-  # get the users who should get the notification
+  # get the keys of the users who should get the notification
   to_users = []
 
   # retrieve the Role Logics which we should query on
@@ -139,10 +139,10 @@ def sendNewRequestNotification(request_entity):
 
   for role_logic in role_logics_to_notify:
     roles = role_logic.getForFields(fields)
+    user_property = role_logic.getModel().user
 
-    for role_entity in roles:
-      # TODO: this might lead to double notifications
-      to_users.append(role_entity.user)
+    # duplicates are removed by sendNotifications
+    to_users += [user_property.get_value_for_datastore(i) for i in roles]
 
   # get the user the request is from
   user_entity = request_entity.user
@@ -169,9 +169,7 @@ def sendNewRequestNotification(request_entity):
 
   template = DEF_NEW_REQUEST_NOTIFICATION_TEMPLATE
 
-  for to_user in to_users:
-    notifications.sendNotification(to_user, None, message_properties,
-                                   subject, template)
+  sendNotifications(to_users, None, message_properties, subject, template)
 
 
 def sendRejectedRequestNotification(entity):
@@ -253,18 +251,19 @@ def sendNewOrganizationNotification(entity, module_name):
 
   template = DEF_NEW_ORG_TEMPLATE
 
-  for to in [entity.main_admin, entity.backup_admin]:
-    if not to:
-      continue
+  model = entity.__class__
+  to_users = [model.main_admin.get_value_for_datastore(entity),
+              model.backup_admin.get_value_for_datastore(entity)]
 
-    sendNotification(to, None, message_properties, subject, template)
+  sendNotifications([i for i in to_users if i], None, message_properties,
+                    subject, template)
 
 
-def sendNewReviewNotification(to_user, review, reviewed_name, redirect_url):
-  """Sends out a notification to alert the user of a new Review.
+def sendNewReviewNotification(to_users, review, reviewed_name, redirect_url):
+  """Sends out a notification to alert the users of a new Review.
 
   Args:
-    to_user: The user who should receive a notification
+    to_users: The users, or their keys, who should receive a notification
     review: The review which triggers this notification
     reviewed_name: Name of the entity reviewed
     redirect_url: URL to which the follower should be sent for more information
@@ -288,7 +287,7 @@ def sendNewReviewNotification(to_user, review, reviewed_name, redirect_url):
 
   # send the notification from the system
   # TODO(srabbelier): do this in a task instead
-  sendNotification(to_user, None, message_properties, subject, template)
+  sendNotifications(to_users, None, message_properties, subject, template)
 
 
 def sendNotification(to_user, from_user, message_properties, subject, template):
@@ -335,41 +334,108 @@ def sendNotification(to_user, from_user, message_properties, subject, template):
   notification_logic.updateOrCreateFromKeyName(fields, key_name)
 
 
-def sendNewNotificationMessage(notification_entity):
-  """Sends an email to a user about a new notification.
+def sendNotifications(to_users, from_user, message_properties, subject,
+                      template):
+  """Sends out a notification to each of the specified users.
 
-    Args:
-      notification_entity: Notification about which the message should be sent
+  The users are retrieved with a single get, the notifications stored with
+  a single put and the mails about them are sent out in one batch.
+
+  Args:
+    to_users : users, or their keys, to which the notification will be send;
+        every user receives the notification only once
+    from_user: user from who sends the notifications (None iff sent by site)
+    message_properties : message properties
+    subject : subject of notification email
+    template : template used for generating notification
   """
 
+  from google.appengine.ext import db
+
+  from soc.cache import sidebar
+  from soc.logic.models.notification import logic as notification_logic
   from soc.logic.models.site import logic as site_logic
-  from soc.views.models.notification import view as notification_view
 
-  # create the url to show this notification
-  notification_url = 'http://%(host)s%(index)s' % {
-      'host' : system.getHostname(),
-      'index': redirects.getPublicRedirect(notification_entity,
-          notification_view.getParams())}
+  keys = []
+  for to_user in to_users:
+    key = to_user if isinstance(to_user, db.Key) else to_user.key()
+    if key not in keys:
+      keys.append(key)
+
+  if not keys:
+    return
+
+  users = [i for i in db.get(keys) if i]
 
-  sender = mail_dispatcher.getDefaultMailSender()
   site_entity = site_logic.getSingleton()
-  site_name = site_entity.site_name
 
-  # get the default mail sender
+  if from_user:
+    sender_name = from_user.name
+  else:
+    sender_name = 'The %s Team' % (site_entity.site_name)
+
+  compiled = loader.get_template(template)
+  link_id = 't%i' % (int(time.time()*100))
+  model = notification_logic.getModel()
+
+  entities = []
+
+  for user_entity in users:
+    properties = dicts.merge(message_properties, {
+        'sender_name': sender_name,
+        'to_name': user_entity.name,
+        })
+
+    fields = {
+        'from_user': from_user,
+        'subject': subject,
+        'message': compiled.render(Context(properties)),
+        'scope': user_entity,
+        'link_id': link_id,
+        'scope_path': user_entity.link_id
+    }
+
+    key_name = notification_logic.getKeyNameFromFields(fields)
+    entities.append(model(key_name=key_name, **fields))
+
+  db.put(entities)
+
+  # the work done by notification_logic._onCreate for a single notification
   default_sender = mail_dispatcher.getDefaultMailSender()
 
   if not default_sender:
     # no valid sender found, abort
     logging.error('No default sender')
-    return
   else:
-    (sender_name, sender) = default_sender
+    contexts = [_getNewNotificationMailContext(i, default_sender,
+        site_entity.site_name) for i in entities]
+    mail_dispatcher.sendMailsFromTemplate('soc/mail/new_notification.html',
+                                          contexts)
+
+  for user_entity in users:
+    sidebar.flush(user_entity.account)
+
+
+def _getNewNotificationMailContext(notification_entity, default_sender,
+                                   site_name):
+  """Returns the context of the mail about a new notification.
+  """
+
+  from soc.views.models.notification import view as notification_view
+
+  sender_name, sender = default_sender
+
+  # create the url to show this notification
+  notification_url = 'http://%(host)s%(index)s' % {
+      'host' : system.getHostname(),
+      'index': redirects.getPublicRedirect(notification_entity,
+          notification_view.getParams())}
 
   to = accounts.denormalizeAccount(notification_entity.scope.account).email()
   subject = DEF_NEW_NOTIFICATION_MSG_SUBJECT_FMT % notification_entity.subject
 
   # create the message contents
-  messageProperties = {
+  return {
       'to_name': notification_entity.scope.name,
       'sender_name': sender_name,
       'to': to,
@@ -380,6 +446,29 @@ def sendNewNotificationMessage(notification_entity):
       'notification_url' : notification_url
       }
 
+
+def sendNewNotificationMessage(notification_entity):
+  """Sends an email to a user about a new notification.
+
+    Args:
+      notification_entity: Notification about which the message should be sent
+  """
+
+  from soc.logic.models.site import logic as site_logic
+
+  site_entity = site_logic.getSingleton()
+
+  # get the default mail sender
+  default_sender = mail_dispatcher.getDefaultMailSender()
+
+  if not default_sender:
+    # no valid sender found, abort
+    logging.error('No default sender')
+    return
+
+  messageProperties = _getNewNotificationMailContext(notification_entity,
+      default_sender, site_entity.site_name)
+
   # send out the message using the default new notification template
   mail_dispatcher.sendMailFromTemplate('soc/mail/new_notification.html',
                                        messageProperties)
@@ -66,6 +66,7 @@ __authors__ = [
 
 import logging
 
+from django.template import Context
 from django.template import loader
 
 from google.appengine.api import mail
@@ -123,6 +124,56 @@ def sendMail(context):
 
   mailer.spawnMailTask(context)
 
+def sendMailsFromTemplate(template, contexts):
+  """Sends out an email for each context using a single Django template.
+
+  The template is loaded and compiled once for all contexts, and the
+  messages are sent out in batches instead of one task per message.
+
+  Args:
+    template: the template (or search list of templates) to use
+    contexts: list of contexts supplied to the template and emails
+
+  Raises:
+    Error that corresponds with the first problem it finds iff one of the
+    messages is not properly initialized.
+  """
+
+  if isinstance(template, (list, tuple)):
+    compiled = loader.select_template(template)
+  else:
+    compiled = loader.get_template(template)
+
+  mail_contexts = []
+
+  for context in contexts:
+    context['html'] = compiled.render(Context(context))
+    mail_contexts.append(dicts.filter(context, mail.EmailMessage.PROPERTIES))
+
+  sendMails(mail_contexts)
+
+
+def sendMails(contexts):
+  """Sends out an email for each of the contexts in batches.
+
+  Args:
+    contexts: list of contexts supplied to the email messages
+
+  Raises:
+    Error that corresponds with the first problem it finds iff one of the
+    messages is not properly initialized.
+  """
+
+  for context in contexts:
+    mail.EmailMessage(**context).check_initialized()
+
+  # don't send out emails in non-local debug mode
+  if not system.isLocal() and system.isDebug():
+    return
+
+  mailer.spawnMailBatch(contexts)
+
+
 def getDefaultMailSender():
   """Returns the sender that currently can be used to send emails.
 
@@ -27,17 +27,25 @@ __authors__ = [
   ]
 
 
+import itertools
 import logging
 
+from google.appengine.api import datastore
 from google.appengine.ext import db
 
 from django.utils.translation import ugettext
 
+from soc.cache import entities as entity_cache
+from soc.cache import logic as query_cache
 from soc.cache import sidebar
 from soc.logic import dicts
+from soc.logic import references
 from soc.logic.exceptions import NotFound
 
 
+DEF_BATCH_SIZE = 100
+
+
 class Error(Exception):
   """Base class for all exceptions raised by this module.
   """
@@ -68,6 +76,14 @@ class Logic(object):
   on arguments passed to __init__.
   """
 
+  #: whether getFromKeyName reads the entities through soc.cache.entities,
+  #: if set the cached copies are flushed whenever an entity is changed
+  CACHE_ENTITIES = False
+
+  #: whether the results of getForFields are cached in soc.cache.logic,
+  #: only set this if all entities are written through this logic
+  CACHE_QUERIES = False
+
   def __init__(self, model, base_model=None, scope_logic=None,
                name=None, skip_properties=None, id_based=False):
     """Defines the name, key_name and model for this entity.
@@ -255,6 +271,12 @@ class Logic(object):
     if not key_name:
       raise InvalidArgumentError
 
+    if self.CACHE_ENTITIES and not parent and not datastore.IsInTransaction():
+      kind = self._model.kind()
+      if isinstance(key_name, basestring):
+        return entity_cache.get(db.Key.from_path(kind, key_name))
+      return entity_cache.get([db.Key.from_path(kind, i) for i in key_name])
+
     return self._model.get_by_key_name(key_name, parent=parent)
 
   def getFromID(self, id, parent=None):
@@ -372,38 +394,12 @@ class Logic(object):
     """Prefetches all fields in data from the datastore in one fetch.
 
     Args:
-      field: the field that should be fetched
+      field: the field that should be fetched, either a ReferenceProperty
+          or a ListProperty of keys
       data: the data for which the prefetch should be done
     """
 
-    prop = getattr(self._model, field, None)
-
-    if not prop:
-      logging.exception("Model %s does not have attribute %s" %
-                        (self._model, field))
-      return
-
-    # TODO(Madhu and Sverre): Prefetch fails when the property is a list of
-    # references.
-    if not isinstance(prop, db.ReferenceProperty):
-      logging.exception("Property %s of %s is not a ReferenceProperty but a %s" %
-                        (field, self._model.kind(), prop.__class__.__name__))
-      return
-
-    keys = [prop.get_value_for_datastore(i) for i in data]
-    keys = [i for i in keys if i]
-
-    prefetched_entities = db.get(keys)
-    prefetched_dict = dict((i.key(), i) for i in prefetched_entities if i)
-
-    for i in data:
-      key = prop.get_value_for_datastore(i)
-
-      if key not in prefetched_dict:
-        continue
-
-      value = prefetched_dict[key]
-      setattr(i, field, value)
+    references.prefetch(data, [field], model=self._model)
 
   def getOneForFields(self, fields=None, ancestors=None, order=None):
     """Returns the first entity to have the specified properties.
@@ -450,7 +446,11 @@ class Logic(object):
                                    ancestors=ancestors, order=order)
 
     try:
-      result = query.fetch(limit, offset)
+      if self.CACHE_QUERIES and not datastore.IsInTransaction():
+        result = query_cache.fetch(query, self._model, filter, order,
+                                   ancestors, limit, offset)
+      else:
+        result = query.fetch(limit, offset)
     except db.NeedIndexError, exception:
       result = []
       logging.exception("%s, model: %s filter: %s, ancestors: %s, order: %s" % 
@@ -460,8 +460,7 @@ class Logic(object):
     if unique:
       return result[0] if result else None
 
-    for field in prefetch:
-      self.prefetchField(field, result)
+    references.prefetch(result, prefetch, model=self._model)
 
     return result
 
@@ -549,6 +548,8 @@ class Logic(object):
     # call the _onUpdate method
     if not silent:
       self._onUpdate(entity)
+    elif store:
+      self.flushCache(entity)
 
     return entity
 
@@ -580,6 +581,8 @@ class Logic(object):
       if not silent:
         # a new entity has been created call _onCreate
         self._onCreate(entity)
+      else:
+        self.flushCache(entity)
     else:
       # If someone else already created the entity (due to a race), we
       # should not update the propties (as they 'won' the race).
@@ -606,6 +609,8 @@ class Logic(object):
       if not silent:
         # call the _onCreate hook
         self._onCreate(entity)
+      else:
+        self.flushCache(entity)
     else:
       key_name = self.getKeyNameFromFields(properties)
       entity = self.updateOrCreateFromKeyName(properties, key_name,
@@ -633,25 +638,68 @@ class Logic(object):
     # entity has been deleted call _onDelete
     self._onDelete(entity)
 
-  def getAll(self, query):
-    """Retrieves all entities for the specified query.
+  @staticmethod
+  def batchIterator(query, batch_size=DEF_BATCH_SIZE):
+    """Lazily yields the entities of the specified query in batches.
+
+    Consecutive batches are retrieved by resuming the query from a cursor,
+    so that every batch costs the same regardless of how many entities
+    have been read before. Queries that do not support cursors (such as
+    queries with an 'IN' filter) are streamed instead.
+
+    Args:
+      query: the Query object to iterate over
+      batch_size: how many entities to retrieve in one datastore call
+
+    Yields:
+      non-empty lists of at most batch_size entities
     """
 
-    chunk = 999
-    offset = 0
-    result = []
-    more = True
+    # AppEngine will not fetch more than 1000 results
+    batch_size = max(1, min(batch_size, 1000))
 
-    while(more):
-      data = query.fetch(chunk+1, offset)
+    while True:
+      batch = query.fetch(batch_size)
 
-      more = len(data) > chunk
+      if not batch:
+        return
 
-      if more:
-        del data[chunk]
+      yield batch
 
-      result.extend(data)
-      offset = offset + chunk
+      if len(batch) < batch_size:
+        return
+
+      try:
+        cursor = query.cursor()
+      except AssertionError:
+        break
+
+      query.with_cursor(cursor)
+
+    # the query can not be resumed from a cursor, stream the remaining
+    # entities instead of paging through them with an offset
+    batch = []
+    for entity in itertools.islice(query.run(), batch_size, None):
+      batch.append(entity)
+      if len(batch) == batch_size:
+        yield batch
+        batch = []
+
+    if batch:
+      yield batch
+
+  def getAll(self, query, batch_size=1000):
+    """Retrieves all entities for the specified query.
+
+    Args:
+      query: the Query object to retrieve the entities for
+      batch_size: how many entities to retrieve in one datastore call
+    """
+
+    result = []
+
+    for batch in self.batchIterator(query, batch_size=batch_size):
+      result.extend(batch)
 
     return result
 
@@ -668,7 +716,9 @@ class Logic(object):
       that should be fetched at first for the next batch
     """
 
-    batch_size = min(999, batch_size)
+    # one more entity is fetched for the start key of the next batch and
+    # AppEngine will not fetch more than 1000 results
+    batch_size = max(1, min(999, batch_size))
 
     query = self.getQueryForFields(filter=filter)
 
@@ -691,29 +741,11 @@ class Logic(object):
     Args:
       queryGen: should return a Query object
       batchSize: how many entities to retrieve in one datastore call
-
-    Retrieved from http://tinyurl.com/d887ll (AppEngine cookbook).
     """
 
-    # AppEngine will not fetch more than 1000 results
-    batch_size = min(batch_size, 1000)
-
-    done = False
-    count = 0
-    key = None
-
-    while not done:
-      query = queryGen()
-      if key:
-        query.filter("__key__ > ", key)
-      results = query.fetch(batch_size)
-      for result in results:
-        count += 1
-        yield result
-      if batch_size > len(results):
-        done = True
-      else:
-        key = results[-1].key()
+    for batch in self.batchIterator(queryGen(), batch_size=batch_size):
+      for entity in batch:
+        yield entity
 
   def _createField(self, entity_properties, name):
     """Hook called when a field is created.
@@ -764,6 +796,7 @@ class Logic(object):
     if not entity:
       raise NoEntityError
 
+    self.flushCache(entity)
     sidebar.flush()
 
   def _onUpdate(self, entity):
@@ -775,6 +808,8 @@ class Logic(object):
     if not entity:
       raise NoEntityError
 
+    self.flushCache(entity)
+
   def _onDelete(self, entity):
     """Called when an entity has been deleted.
 
@@ -783,3 +818,20 @@ class Logic(object):
 
     if not entity:
       raise NoEntityError
+
+    self.flushCache(entity)
+
+  def flushCache(self, entity):
+    """Flushes the cached copies of entity if CACHE_ENTITIES is set and
+    the cached query results it might be part of if CACHE_QUERIES is set.
+
+    Called for every write through this logic; code that stores an entity
+    directly has to call it as well. Classes that override this can use it
+    to flush any other cached data that depends on the entity.
+    """
+
+    if self.CACHE_ENTITIES:
+      entity_cache.flush(entity)
+
+    if self.CACHE_QUERIES:
+      query_cache.invalidate(self._model, entity)
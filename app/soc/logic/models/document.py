@@ -24,6 +24,7 @@ __authors__ = [
 
 from soc.cache import sidebar
 from soc.cache import home
+from soc.cache import response as response_cache
 from soc.logic.models import work
 from soc.logic.models import linkable as linkable_logic
 
@@ -86,6 +87,15 @@ class Logic(work.Logic):
 
     return True
 
+  def flushCache(self, entity):
+    """See base.Logic.flushCache().
+
+    Also invalidates the cached pages that show the document.
+    """
+
+    super(Logic, self).flushCache(entity)
+    response_cache.flush(entity)
+
   def _onCreate(self, entity):
     """Set the scope of the document.
 
@@ -76,5 +76,7 @@ class Logic(base.Logic):
     # call the _onUpdate method
     if not silent:
       self._onUpdate(entity)
+    elif store:
+      self.flushCache(entity)
 
     return entity
@@ -24,6 +24,7 @@ __authors__ = [
 
 from django.utils.translation import ugettext
 
+from soc.cache import entities as entity_cache
 from soc.logic.models import program as program_logic
 from soc.logic.models import survey
 from soc.logic.models.org_app_record import logic as \
@@ -37,6 +38,8 @@ class Logic(survey.Logic):
   """Logic class for OrgAppSurvey.
   """
 
+  CACHE_ENTITIES = True
+
   def __init__(self, model=OrgAppSurvey,
                base_model=Survey, scope_logic=program_logic,
                record_logic=org_app_record_logic):
@@ -50,15 +53,20 @@ class Logic(survey.Logic):
   def getForProgram(self, program):
     """Returns the OrgAppSurvey belonging to the given program.
 
+    The survey is read through soc.cache.entities.
+
     Args:
       program: Program entity to get the OrgAppSurvey for
 
     Returns:
       OrgAppSurvey belonging to the given Program, None if not exists.
     """
-    fields = {'scope': program}
 
-    return self.getForFields(fields, unique=True)
+    query_func = lambda: self.getQueryForFields(
+        {'scope': program}, keys_only=True).get()
+    key = entity_cache.getScopedKey(program, 'org_app', query_func)
+
+    return entity_cache.get(key) if key else None
 
   def getForProgramOr404(self, program):
     """Returns the OrgAppSurvery belonging to the given program.
@@ -78,5 +86,15 @@ class Logic(survey.Logic):
 
     raise NotFound(msg)
 
+  def flushCache(self, entity):
+    """Also flushes the cached org app survey lookup of the program.
+    """
+
+    super(Logic, self).flushCache(entity)
+
+    scope_key = entity.__class__.scope.get_value_for_datastore(entity)
+    if scope_key:
+      entity_cache.flush(scope_key)
+
 
 logic = Logic()
@@ -34,6 +34,9 @@ class Logic(presence_with_tos.Logic):
   """Logic methods for the Program model.
   """
 
+  CACHE_ENTITIES = True
+  CACHE_QUERIES = True
+
   def __init__(self, model=soc.models.program.Program, 
                base_model=None, scope_logic=sponsor_logic,
                timeline_logic=None):
@@ -26,6 +26,7 @@ __authors__ = [
 
 from django.utils.translation import ugettext
 
+from soc.cache import capabilities
 from soc.cache import sidebar
 from soc.logic.models import base
 from soc.logic.models import program as program_logic
@@ -104,6 +105,16 @@ class Logic(base.Logic):
 
     super(Logic, self)._onCreate(entity)
 
+  def flushCache(self, entity):
+    """Flushes the capabilities of the user the role belongs to as well.
+    """
+
+    super(Logic, self).flushCache(entity)
+
+    user = entity.properties()['user'].get_value_for_datastore(entity)
+    if user:
+      capabilities.flush(user)
+
   def canResign(self, entity):
     """Checks if the current entity is allowed to be resigned.
 
@@ -24,6 +24,7 @@ __authors__ = [
 
 
 from google.appengine.api import memcache
+from google.appengine.ext import db
 
 from soc.logic.helper import xsrfutil
 from soc.logic.models import presence_with_tos
@@ -38,6 +39,8 @@ class Logic(presence_with_tos.Logic):
 
   DEF_SITE_LINK_ID = 'site'
 
+  CACHE_ENTITIES = True
+
   def __init__(self, model=soc.models.site.Site,
                base_model=soc.models.presence_with_tos.PresenceWithToS):
     """Defines the name, key_name and model for this entity.
@@ -78,6 +81,13 @@ class Logic(presence_with_tos.Logic):
 
     return ['link_id']
 
+  def getSingletonKey(self):
+    """Returns the key of the singleton Site settings entity.
+    """
+
+    key_name = self.getKeyNameFromFields({'link_id': self.DEF_SITE_LINK_ID})
+    return db.Key.from_path(self._model.kind(), key_name)
+
   def getSingleton(self):
     """Return singleton Site settings entity, since there is always only one.
     """
@@ -113,6 +123,7 @@ class Logic(presence_with_tos.Logic):
         key = memcache.get("new_xsrf_secret_key")
       settings.xsrf_secret_key = key
       settings.put()
+      self.flushCache(settings)
     return settings.xsrf_secret_key
 
 
@@ -31,6 +31,7 @@ from soc.logic.models import survey_record as survey_record_logic
 from soc.logic.models import work
 from soc.models.survey import Survey
 from soc.models.survey import SurveyContent
+from soc.models.survey import dumpSchema
 from soc.models.work import Work
 
 
@@ -71,7 +72,7 @@ class Logic(work.Logic):
     for name, value in survey_fields.items():
       setattr(survey_content, name, value)
 
-    survey_content.schema = str(schema)
+    survey_content.schema = dumpSchema(schema)
 
     db.put(survey_content)
 
@@ -31,6 +31,8 @@ class Logic(base.Logic):
   """Logic methods for the Timeline model.
   """
 
+  CACHE_ENTITIES = True
+
   def __init__(self, model=soc.models.timeline.Timeline,
                base_model=None, scope_logic=sponsor_logic):
     """Defines the name, key_name and model for this entity.
@@ -22,6 +22,7 @@ __authors__ = [
   ]
 
 
+from google.appengine.api import memcache
 from google.appengine.api import users
 from google.appengine.ext import db
 
@@ -34,6 +35,10 @@ from soc.logic.models.site import logic as site_logic
 import soc.models.user
 
 
+# memcache key of the key of the User entity with a given user id
+USER_KEY_FOR_ID = 'user_key_for_id_%s'
+
+
 class Logic(base.Logic):
   """Logic methods for the User model.
   """
@@ -84,11 +89,16 @@ class Logic(base.Logic):
 
     return user
 
-  def _getForCurrentUserId(self):
+  def _getForCurrentUserId(self, user=None):
     """Retrieves the user entity for the currently logged in user id.
 
     If there is no user logged in, or they have no valid associated User
     entity, None is returned.
+
+    Args:
+      user: the User entity that was fetched by the key that
+          getCurrentUserKey() returned, it is only used if it still
+          belongs to the current user id
     """
 
     user_id = accounts.getCurrentUserId()
@@ -96,7 +106,11 @@ class Logic(base.Logic):
     if not user_id:
       return None
 
-    user = self.getForUserId(user_id)
+    if not user or user.user_id != user_id or user.status != 'valid':
+      user = self.getForUserId(user_id)
+
+      if user:
+        memcache.set(USER_KEY_FOR_ID % user_id, str(user.key()))
 
     current_account = accounts.getCurrentAccount()
     if user and (str(user.account) != str(current_account)):
@@ -106,14 +120,38 @@ class Logic(base.Logic):
 
     return user
 
-  def getCurrentUser(self):
+  def getCurrentUserKey(self):
+    """Returns the key of the User entity of the currently logged in user.
+
+    The key is remembered in memcache by getCurrentUser(), so that the
+    User entity can be fetched together with other entities instead of
+    being queried for.
+
+    Returns:
+      The key or None if it is not known.
+    """
+
+    user_id = accounts.getCurrentUserId()
+
+    if not user_id:
+      return None
+
+    key = memcache.get(USER_KEY_FOR_ID % user_id)
+
+    return key and db.Key(key)
+
+  def getCurrentUser(self, user=None):
     """Retrieves the user entity for the currently logged in user.
 
+    Args:
+      user: the User entity for the key returned by getCurrentUserKey(),
+          if it was fetched already
+
     Returns:
       The User entity of the logged in user or None if not available.
     """
     # look up with the unique id first
-    user = self._getForCurrentUserId()
+    user = self._getForCurrentUserId(user=user)
 
     if not user:
       # look up using the account address thereby setting the unique id
@@ -0,0 +1,129 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Logic for batch fetching the entities referenced by other entities.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import logging
+
+from google.appengine.ext import db
+
+
+PREFETCHED_ATTR = '_prefetched_%s'
+
+
+def _getReferenceProperty(model, field):
+  """Returns the property for field and whether it is a list of keys.
+
+  Returns (None, False) if field is not a ReferenceProperty or a
+  ListProperty of keys.
+  """
+
+  prop = getattr(model, field, None)
+
+  if isinstance(prop, db.ReferenceProperty):
+    return prop, False
+
+  if isinstance(prop, db.ListProperty) and prop.item_type == db.Key:
+    return prop, True
+
+  if not prop:
+    logging.error("Model %s does not have attribute %s" %
+                  (model.kind(), field))
+  else:
+    logging.error("Property %s of %s is not a ReferenceProperty or a list "
+                  "of keys but a %s" %
+                  (field, model.kind(), prop.__class__.__name__))
+
+  return None, False
+
+
+def prefetch(data, fields, model=None):
+  """Prefetches the entities referenced by fields of all entities in data.
+
+  All referenced entities are retrieved with a single db.get, no matter how
+  many fields are specified. A ReferenceProperty is resolved in place, the
+  entities referenced by a ListProperty of keys can be retrieved with
+  getReferenced().
+
+  Args:
+    data: the entities for which the prefetch should be done
+    fields: the names of the fields that should be fetched
+    model: the model of the entities in data, defaults to the class
+        of the first entity
+  """
+
+  if not data or not fields:
+    return
+
+  if not model:
+    model = data[0].__class__
+
+  props = []
+  for field in fields:
+    prop, is_list = _getReferenceProperty(model, field)
+    if prop:
+      props.append((field, prop, is_list))
+
+  keys = set()
+
+  for field, prop, is_list in props:
+    for entity in data:
+      value = prop.get_value_for_datastore(entity)
+      if is_list:
+        keys.update(value)
+      elif value:
+        keys.add(value)
+
+  if not keys:
+    return
+
+  prefetched = dict((i.key(), i) for i in db.get(list(keys)) if i)
+
+  for field, prop, is_list in props:
+    for entity in data:
+      value = prop.get_value_for_datastore(entity)
+
+      if is_list:
+        entities = [prefetched[i] for i in value if i in prefetched]
+        setattr(entity, PREFETCHED_ATTR % field, entities)
+      elif value in prefetched:
+        setattr(entity, field, prefetched[value])
+
+
+def getReferenced(entity, field):
+  """Returns the entities referenced by a ListProperty of keys.
+
+  The entities stored by prefetch() are used if available, otherwise they
+  are retrieved from the datastore. Keys of entities that do not exist
+  are skipped.
+
+  Args:
+    entity: the entity that holds the keys
+    field: the name of the ListProperty of keys
+  """
+
+  entities = getattr(entity, PREFETCHED_ATTR % field, None)
+
+  if entities is None:
+    entities = [i for i in db.get(getattr(entity, field)) if i]
+
+  return entities
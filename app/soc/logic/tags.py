@@ -85,7 +85,4 @@ class TagsService(object):
 
     for tag_name in tag_names:
       if tag_name in self.tag_names:
-        cls = entity.tags_class(tag_name)
-        tags = cls.get_tags_for_key(entity.key())
-        for tag in tags:
-          tag.remove_tagged(entity.key())
+        entity.clear_tags(tag_name)
@@ -28,6 +28,10 @@ from google.appengine.runtime.apiproxy_errors import CapabilityDisabledError
 
 from django.utils.translation import ugettext
 
+from soc.logic import accounts
+from soc.logic.helper import timeline
+from soc.logic.models.site import logic as site_logic
+from soc.logic.models.user import logic as user_logic
 from soc.views.helper import responses
 
 
@@ -71,13 +75,21 @@ class MaintenanceMiddleware(object):
     the method signature.
     """
 
-    context = responses.getUniversalContext(request)
-    allowed = (context['is_admin']
-        or ('HTTP_X_APPENGINE_CRON' in os.environ)
-        or ('HTTP_X_APPENGINE_QUEUENAME' in os.environ))
+    # cron jobs and tasks are always allowed
+    if ('HTTP_X_APPENGINE_CRON' in os.environ
+        or 'HTTP_X_APPENGINE_QUEUENAME' in os.environ):
+      return None
 
-    if not allowed and context['in_maintenance']:
-      return self.maintenance(request)
+    # the site singleton is cached, so this does not hit the datastore
+    settings = site_logic.getSingleton()
+    if not timeline.isActivePeriod(settings, 'maintenance'):
+      return None
+
+    account = accounts.getCurrentAccount()
+    if account and user_logic.isDeveloper(account=account):
+      return None
+
+    return self.maintenance(request)
 
   def process_exception(self, request, exception):
     """Called when an uncaught exception is raised.
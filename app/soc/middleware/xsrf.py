@@ -35,7 +35,7 @@ from django.utils.safestring import mark_safe
 
 from soc.logic.helper import xsrfutil
 from soc.logic.models.site import logic as site_logic
-from soc.views.helper import responses
+from soc.modules import callback
 
 
 _HTML_TYPES = ('text/html', 'application/xhtml+xml')
@@ -43,6 +43,38 @@ _POST_FORM_RE = \
   re.compile(r'(<form\W[^>]*\bmethod\s*=\s*(\'|"|)POST(\'|"|)\b[^>]*>)',
     re.IGNORECASE)
 
+# names of the values stored in the per-request value store
+_TOKEN_KEY = 'xsrf_token'
+_TOKENIZED_KEY = 'xsrf_tokenized'
+
+
+def getToken():
+  """Returns the XSRF token for the current user.
+
+  The token is generated once per request and kept in the per-request
+  value store, if there is one.
+  """
+
+  core = callback.getCore()
+  token = core.in_request and core.getRequestValue(_TOKEN_KEY)
+
+  if not token:
+    secret_key = site_logic.getXsrfSecretKey(site_logic.getSingleton())
+    token = xsrfutil.getGeneratedTokenForCurrentUser(secret_key)
+    if core.in_request:
+      core.setRequestValue(_TOKEN_KEY, token)
+
+  return token
+
+
+def markTokenized():
+  """Marks the response to the current request as containing the XSRF
+  token in all its forms, so that the middleware does not rewrite it.
+  """
+
+  callback.getCore().setRequestValue(_TOKENIZED_KEY, True)
+
+
 class XsrfMiddleware(object):
   """Middleware for preventing cross-site request forgery attacks."""
 
@@ -77,24 +109,38 @@ class XsrfMiddleware(object):
     """Alters HTML responses containing <form> tags to embed the XSRF token."""
 
     content_type = response.get('Content-Type', None)
-    if content_type and content_type.split(';')[0] in _HTML_TYPES:
-      xsrf_token = \
-        xsrfutil.getGeneratedTokenForCurrentUser(self._getSecretKey(request))
-
-      # there may be multiple forms per page, but we only id= one of them
-      idattributes = itertools.chain(("id='xsrftoken'",), itertools.repeat(''))
-
-      # invoked on every matching <form> tag
-      def add_xsrf_field(match):
-        """Returns the matched <form> tag plus the added <input> element"""
-        return mark_safe(match.group() + ("<div style='display:none;'>" +
-            "<input type='hidden' " + idattributes.next() +
-            " name='xsrf_token' value='" + xsrf_token +
-            "' /></div>"))
-
-      response.content, n = _POST_FORM_RE.subn(add_xsrf_field, response.content)
-      if n > 0:
-        # content has changed, so ETag would be invalid
-        del response['ETag']
+    if not content_type or content_type.split(';')[0] not in _HTML_TYPES:
+      return response
+
+    core = callback.getCore()
+    if core.in_request and core.getRequestValue(_TOKENIZED_KEY):
+      return response
+
+    content = response.content
+
+    # only the part starting at the first form has to be rewritten,
+    # lower() and find() are much faster than a case insensitive search
+    start = content.lower().find('<form')
+    if start < 0:
+      return response
+
+    xsrf_token = getToken()
+
+    # there may be multiple forms per page, but we only id= one of them
+    idattributes = itertools.chain(("id='xsrftoken'",), itertools.repeat(''))
+
+    # invoked on every matching <form> tag
+    def add_xsrf_field(match):
+      """Returns the matched <form> tag plus the added <input> element"""
+      return mark_safe(match.group() + ("<div style='display:none;'>" +
+          "<input type='hidden' " + idattributes.next() +
+          " name='xsrf_token' value='" + xsrf_token +
+          "' /></div>"))
+
+    tail, n = _POST_FORM_RE.subn(add_xsrf_field, content[start:])
+    if n > 0:
+      response.content = content[:start] + tail
+      # content has changed, so ETag would be invalid
+      del response['ETag']
 
     return response
@@ -31,3 +31,14 @@ class Email(db.Model):
 
   #: JSON content to be passed along the the Mail constructor
   context = db.TextProperty(required=True)
+
+
+class EmailBatch(db.Model):
+  """Data model for storing a batch of emails that are sent by one task.
+  """
+
+  #: JSON list of contexts to be passed along to the Mail constructor
+  contexts = db.TextProperty(required=True)
+
+  #: indices of the contexts in the batch that have been sent already
+  sent = db.ListProperty(int, default=[])
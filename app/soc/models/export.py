@@ -0,0 +1,83 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module contains the Export and ExportChunk Models.
+"""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+import soc.models.base
+import soc.models.user
+
+
+class Export(soc.models.base.ModelWithFieldAttributes):
+  """An export that is written by a background task, see soc.tasks.export.
+
+  The content of the export is stored in ExportChunk entities that have
+  the Export as their parent.
+  """
+
+  #: the user that requested the export, the only one who may download it
+  user = db.ReferenceProperty(reference_class=soc.models.user.User,
+                              required=True, collection_name='exports')
+
+  #: the dotted name of the View whose exporter produces the rows
+  view = db.StringProperty(required=True)
+
+  #: the key of the entity that is exported
+  entity_key = db.StringProperty(required=True)
+
+  #: the name of the file without its extension
+  filename = db.StringProperty(required=True)
+
+  #: the format of the export, see soc.logic.export
+  format = db.StringProperty(required=True, default='csv',
+                             choices=['csv', 'json'])
+
+  #: the status of the export
+  status = db.StringProperty(required=True, default='running',
+                             choices=['running', 'finished', 'failed'])
+
+  #: the cursor of the query at which the export continues
+  cursor = db.TextProperty()
+
+  #: the number of ExportChunks that have been written
+  chunk_count = db.IntegerProperty(required=True, default=0)
+
+  #: the number of rows that have been written
+  row_count = db.IntegerProperty(required=True, default=0)
+
+  #: the date and time the export was requested
+  created_on = db.DateTimeProperty(auto_now_add=True)
+
+  #: the date and time the last chunk was written
+  modified_on = db.DateTimeProperty(auto_now=True)
+
+
+class ExportChunk(db.Model):
+  """A part of the content of an Export.
+
+  The parent is the Export and the key_name is the position of the chunk,
+  zero padded so that the chunks are ordered by their keys.
+  """
+
+  #: the encoded content of this part of the export
+  data = db.BlobProperty(required=True)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module contains the MigrationFailure Model.
+"""
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+import soc.models.base
+
+
+class MigrationFailure(soc.models.base.ModelWithFieldAttributes):
+  """The entities that one shard of a migration failed to migrate.
+
+  The key_name is the mapreduce id of the migration followed by a slash
+  and the id of the shard.
+  """
+
+  #: the dotted name of the migration, see soc.tasks.helper.migration
+  migration = db.StringProperty(required=True)
+
+  #: the mapreduce id of the run of the migration
+  mapreduce_id = db.StringProperty(required=True)
+
+  #: the keys of the entities that could not be migrated
+  failed_keys = db.ListProperty(db.Key)
+
+  #: the errors that were raised, in the order of failed_keys
+  errors = db.StringListProperty(indexed=False)
+
+  #: the date and time of the last failure
+  modified_on = db.DateTimeProperty(auto_now=True)
@@ -27,8 +27,11 @@ __authors__ = [
 ]
 
 
+import _ast
+
 from google.appengine.ext import db
 
+from django.utils import simplejson
 from django.utils.translation import ugettext
 
 from soc.models.expando_base import ExpandoBase
@@ -38,6 +41,64 @@ import soc.models.work
 
 COMMENT_PREFIX = 'comment_for_'
 
+# maximum number of parsed schemas that are kept by an instance
+MAX_CACHED_SCHEMAS = 200
+
+# maps the text of a schema to the parsed dictionary
+_schemas = {}
+
+# the only names that can be used in a legacy schema
+_LEGACY_NAMES = {'True': True, 'False': False, 'None': None}
+
+
+def dumpSchema(schema):
+  """Returns the text under which a schema dictionary is stored.
+  """
+
+  return simplejson.dumps(schema, sort_keys=True)
+
+
+def _literal(node):
+  """Returns the value of node, which may only be a literal.
+  """
+
+  if isinstance(node, _ast.Str):
+    return node.s
+  if isinstance(node, _ast.Num):
+    return node.n
+  if isinstance(node, _ast.Name) and node.id in _LEGACY_NAMES:
+    return _LEGACY_NAMES[node.id]
+  if isinstance(node, _ast.UnaryOp) and isinstance(node.op, _ast.USub) and (
+      isinstance(node.operand, _ast.Num)):
+    return -node.operand.n
+  if isinstance(node, _ast.List):
+    return [_literal(i) for i in node.elts]
+  if isinstance(node, _ast.Tuple):
+    return tuple([_literal(i) for i in node.elts])
+  if isinstance(node, _ast.Dict):
+    return dict((_literal(k), _literal(v))
+                for k, v in zip(node.keys, node.values))
+
+  raise ValueError('Not a literal: %s' % node.__class__.__name__)
+
+
+def loadSchema(text):
+  """Returns the schema dictionary that is stored as text.
+
+  Schemas used to be stored as the repr of the dictionary. Those are parsed
+  as a Python literal, without evaluating any code, until they have been
+  converted to JSON by the survey_schema_conversion update.
+  """
+
+  if not text:
+    return {}
+
+  try:
+    return simplejson.loads(text)
+  except ValueError:
+    tree = compile(text, '<schema>', 'eval', _ast.PyCF_ONLY_AST)
+    return _literal(tree.body)
+
 
 class SurveyContent(ExpandoBase):
   """Fields (questions) and schema representation of a Survey.
@@ -45,7 +106,7 @@ class SurveyContent(ExpandoBase):
   Each survey content entity consists of properties where names and default
   values are set by the survey creator as survey fields.
 
-    schema: A dictionary (as text) storing, for each field:
+    schema: A dictionary (as JSON text) storing, for each field:
       - type
       - index
       - order (for choice questions)
@@ -60,11 +121,28 @@ class SurveyContent(ExpandoBase):
   created = db.DateTimeProperty(auto_now_add=True)
   modified = db.DateTimeProperty(auto_now=True)
 
+  def getSchema(self):
+    """Returns the schema as a dictionary.
+
+    A schema is parsed once per instance and version of its text, the
+    dictionary is shared by all callers and must not be modified.
+    """
+
+    text = self.schema or ''
+
+    schema = _schemas.get(text)
+    if schema is None:
+      if len(_schemas) >= MAX_CACHED_SCHEMAS:
+        _schemas.clear()
+      schema = _schemas[text] = loadSchema(text)
+
+    return schema
+
   def getSurveyOrder(self):
     """Make survey questions always appear in the same (creation) order.
     """
     survey_order = {}
-    schema = eval(self.schema)
+    schema = self.getSchema()
     for property in self.dynamic_properties():
       # map out the order of the survey fields
       index = schema[property]["index"]
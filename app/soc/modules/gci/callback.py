@@ -26,6 +26,7 @@ from soc.modules.gci.tasks import bulk_create
 from soc.modules.gci.tasks import org_app_survey as org_app_survey_tasks
 from soc.modules.gci.tasks import parental_forms
 from soc.modules.gci.tasks import ranking_update
+from soc.modules.gci.tasks import task_tags
 from soc.modules.gci.tasks import task_update
 from soc.modules.gci.views.models import mentor
 from soc.modules.gci.views.models import organization
@@ -81,6 +82,7 @@ class Callback(object):
     self.core.registerSitemapEntry(org_app_survey_tasks.getDjangoURLPatterns())
     self.core.registerSitemapEntry(parental_forms.getDjangoURLPatterns())
     self.core.registerSitemapEntry(ranking_update.getDjangoURLPatterns())
+    self.core.registerSitemapEntry(task_tags.getDjangoURLPatterns())
     self.core.registerSitemapEntry(task_update.getDjangoURLPatterns())
 
   def registerWithSidebar(self):
@@ -22,12 +22,17 @@ __authors__ = [
 ]
 
 
+from google.appengine.ext import db
+
 from soc.logic.models import base
 
 import soc.models.linkable
 
 import soc.modules.gci.logic.models
 import soc.modules.gci.models.student_ranking
+from soc.modules.gci.models.student_ranking import DEF_BRANCHING_FACTOR
+from soc.modules.gci.models.student_ranking import DEF_RANKER_NAME
+from soc.modules.gci.models.student_ranking import DEF_SCORE
 import soc.modules.gci.logic.models.program
 
 
@@ -58,34 +63,106 @@ class Logic(base.Logic):
         'student': student,
         }
 
-    return self.updateOrCreateFromFields(properties)
+    key_name = self.getKeyNameFromFields(properties)
+    ranking = self.getFromKeyName(key_name)
+    if ranking:
+      return ranking
+
+    properties['student_name'] = student.user.name
+    return self.updateOrCreateFromKeyName(properties, key_name)
+
+  def getRankerFor(self, program):
+    """Returns the ranker for the rankings of the specified program.
+
+    The ranker is created when it does not exist yet.
+    """
+
+    from soc.modules.gsoc.logic.models.ranker_root import logic \
+        as ranker_root_logic
+
+    fields = {
+        'link_id': DEF_RANKER_NAME,
+        'scope': program,
+        }
+
+    ranker_root = ranker_root_logic.getForFields(fields, unique=True)
+    if not ranker_root:
+      ranker_root_logic.create(DEF_RANKER_NAME, program, DEF_SCORE,
+                               DEF_BRANCHING_FACTOR)
+      ranker_root = ranker_root_logic.getForFields(fields, unique=True)
+
+    return ranker_root_logic.getRootFromEntity(ranker_root)
+
+  def setScores(self, rankings):
+    """Stores the points of the specified rankings in the ranker of their
+    program.
+
+    Rankings without points are removed from the ranker. Setting the same
+    points again leaves the ranker unchanged.
+    """
+
+    by_program = {}
+    for ranking in rankings:
+      program_key = self.getModel().scope.get_value_for_datastore(ranking)
+      by_program.setdefault(program_key, []).append(ranking)
+
+    for program_key, program_rankings in by_program.iteritems():
+      ranker = self.getRankerFor(db.get(program_key))
+
+      scores = {}
+      for ranking in program_rankings:
+        scores[ranking.key().id_or_name()] = (
+            [ranking.points] if ranking.points else None)
+
+      ranker.SetScores(scores)
+
+  def getRank(self, ranking):
+    """Returns the 1-based rank of the specified ranking in its program.
+    """
+
+    program_key = self.getModel().scope.get_value_for_datastore(ranking)
+    ranker = self.getRankerFor(db.get(program_key))
+
+    return ranker.FindRank([ranking.points]) + 1
 
   def updateRanking(self, task, ranking=None, tasks=None, difficulties=None):
     """Updates ranking with the specified task.
+
+    The points of a task are only ever added once, so it is safe to call
+    this more than once for the same task.
     """
 
     # get current ranking for the student if it is not specified
     if not ranking:
       ranking = self.getOrCreateForStudent(task.student)
 
-    # get list of tasks that are already considered by the ranking
-    tasks = ranking.tasks
+    # rankings that were created before the student name was stored on
+    # them get it with their next task
+    student_name = ranking.student_name or ranking.student.user.name
 
-    if task.key() in tasks:
-       # already considered
-       return
+    task_key = task.key()
+    if task_key not in ranking.tasks:
+      points = task.taskDifficulty(difficulties).value
 
-    #: update total number of points with new points for the task
-    points = ranking.points + task.taskDifficulty(difficulties).value
+      def update_ranking_txn():
+        entity = db.get(ranking.key())
 
-    #: append a new task to the list of the tasks that have been counted
-    tasks.append(task.key())
+        if task_key in entity.tasks:
+          return entity
 
-    properties = {
-        'points': points,
-        'tasks': tasks
-        }
-    self.updateEntityProperties(ranking, properties)
+        entity.points += points
+        entity.tasks.append(task_key)
+        entity.tasks_count = len(entity.tasks)
+        entity.student_name = student_name
+        entity.put()
+
+        return entity
+
+      ranking = db.run_in_transaction(update_ranking_txn)
+
+    # the ranker is set from the stored points every time, so that it is
+    # brought up to date by a retry if storing it failed before
+    self.setScores([ranking])
 
   def calculateRankingForStudent(self, student, tasks, difficulties):
     """Calculates ranking for the specified student with the specified
@@ -100,10 +177,25 @@ class Logic(base.Logic):
     for task in tasks:
       points += task.taskDifficulty(difficulties).value
 
-    properties = {
-        'points': points,
-        'tasks': [task.key() for task in tasks]
-        }
-    self.updateEntityProperties(ranking, properties)
+    ranking.points = points
+    ranking.tasks = [task.key() for task in tasks]
+    ranking.tasks_count = len(tasks)
+    ranking.student_name = student.user.name
+    ranking.put()
+
+    self.setScores([ranking])
+
+  def clearRankings(self, rankings):
+    """Resets the specified rankings and removes them from the ranker.
+    """
+
+    for ranking in rankings:
+      ranking.points = 0
+      ranking.tasks = []
+      ranking.tasks_count = 0
+
+    db.put(rankings)
+    self.setScores(rankings)
+
 
 logic = Logic()
@@ -158,9 +158,14 @@ class Logic(base.Logic):
     entity = self.tags_service.setTagValuesForEntity(entity, entity_properties)
 
     # call the base logic method to store the updated Task entity
-    return super(Logic, self).updateEntityProperties(
+    entity = super(Logic, self).updateEntityProperties(
         entity, entity_properties, silent=silent, store=store)
 
+    if store:
+      entity.apply_tag_changes()
+
+    return entity
+
   def updateEntityPropertiesWithCWS(self, entity, entity_properties,
                                     comment_properties=None, 
                                     ws_properties=None, silent=False):
@@ -211,6 +216,7 @@ class Logic(base.Logic):
 
     entity, comment_entity, ws_entity = db.run_in_transaction(
         comment_create)
+    entity.apply_tag_changes()
 
     if not silent:
       # call the _onCreate methods for the Comment and WorkSubmission
@@ -264,6 +270,10 @@ class Logic(base.Logic):
 
     self.tags_service.setTagValuesForEntity(entity, properties)
 
+    # store the keys of the tags that have been set on the task
+    entity.put()
+    entity.apply_tag_changes()
+
     return entity
 
   def _onCreate(self, entity):
@@ -497,6 +507,7 @@ class Logic(base.Logic):
   
     self.tags_service.removeAllTagsForEntity(entity)
     db.run_in_transaction(task_delete_txn, entity)
+    entity.apply_tag_changes()
 
 
 logic = Logic()
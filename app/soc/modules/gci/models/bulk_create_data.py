@@ -29,9 +29,20 @@ class GCIBulkCreateData(db.Model):
   """GCI model for bulk creating Tasks.
   """
 
-  #: The tasks to be created in json format.
+  #: The tasks to be created in json format, only set for data that was
+  #: stored before the rows were moved to GCIBulkCreateRows.
   tasks = db.ListProperty(item_type=db.Text)
 
+  #: The index of the next row to be created.
+  next_row = db.IntegerProperty(default=0)
+
+  #: The keys of the tags of the last stored batch that have not been
+  #: counted yet.
+  pending_tags = db.ListProperty(item_type=db.Key)
+
+  #: The number of tasks of the last stored batch for each of pending_tags.
+  pending_counts = db.ListProperty(item_type=int)
+
   #: The accumulated error messages
   errors = db.ListProperty(item_type=db.Text)
 
@@ -47,8 +58,16 @@ class GCIBulkCreateData(db.Model):
   #: Date when the task creation was first stored.
   created_on = db.DateTimeProperty(auto_now_add=True)
 
-  def tasksRemoved(self):
-    """Returns the number of tasks that have been removed from the list.
-    """
-    return self.total_tasks - len(self.tasks)
+
+class GCIBulkCreateRows(db.Model):
+  """The rows of a bulk create, stored apart from GCIBulkCreateData so that
+  the progress can be stored without writing all rows again.
+
+  The parent is the GCIBulkCreateData and the key_name is ROWS_KEY_NAME.
+  """
+
+  ROWS_KEY_NAME = 'rows'
+
+  #: The tasks to be created in json format.
+  tasks = db.ListProperty(item_type=db.Text)
 
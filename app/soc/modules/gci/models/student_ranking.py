@@ -27,6 +27,16 @@ from google.appengine.ext import db
 import soc.models.linkable
 
 
+#: the name of the ranker of the student rankings of a program
+DEF_RANKER_NAME = 'gci_student_ranking'
+
+#: the range of points that can be ranked, see ranklist.ranker.Ranker
+DEF_SCORE = [0, 100000]
+
+#: the branching factor of the ranker
+DEF_BRANCHING_FACTOR = 100
+
+
 class GCIStudentRanking(soc.models.linkable.Linkable):
   """GCI Student Ranking model extends the linkable model.
   """
@@ -41,3 +51,10 @@ class GCIStudentRanking(soc.models.linkable.Linkable):
 
   #: tasks that have been taken account into this ranking
   tasks = db.ListProperty(item_type=db.Key, default=[])
+
+  #: the number of tasks in tasks, stored so that the ranking can be
+  #: listed without loading anything else
+  tasks_count = db.IntegerProperty(required=False, default=0)
+
+  #: the name of the user of the student, stored for the same reason
+  student_name = db.StringProperty(required=False, default='')
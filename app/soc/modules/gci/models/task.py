@@ -55,6 +55,15 @@ class TaskTag(Tag):
     tags = db.Query(cls).filter('scope =', scope).order('order').fetch(1000)
     return tags
 
+  @classmethod
+  def get_all_by_key(cls, limit=100):
+    """Returns a dictionary which maps the keys of all tags to the tags.
+
+    Used to resolve the tags of many tasks, see GCITask.taskDifficulty().
+    """
+
+    return dict((i.key(), i) for i in db.Query(cls).fetch(limit))
+
   @classmethod
   def get_highest_order(cls, scope):
     """Get a tag with highest order.
@@ -94,6 +103,7 @@ class TaskTag(Tag):
         new_tag.put()
         return new_tag
       existing_tag = db.run_in_transaction(create_tag_txn)
+      cls.expire_cached_tags()
     return existing_tag
 
 
@@ -152,6 +162,13 @@ class GCITask(Taggable, soc.models.linkable.Linkable):
   #: be assigned by Org Admins and mentors.
   arbit_tag = tag_property('arbit_tag')
 
+  #: The keys of the tags of the task, so that the tags of a task can be
+  #: retrieved without querying the tags and the tasks with a certain tag
+  #: can be queried. They are maintained by the tag properties above.
+  difficulty_keys = db.ListProperty(item_type=db.Key, default=[])
+  task_type_keys = db.ListProperty(item_type=db.Key, default=[])
+  arbit_tag_keys = db.ListProperty(item_type=db.Key, default=[])
+
   #: A field which contains time allowed for completing the task (in hours)
   #: from the moment that this task has been assigned to a Student
   time_to_complete = db.IntegerProperty(required=True,
@@ -286,25 +303,29 @@ class GCITask(Taggable, soc.models.linkable.Linkable):
                       difficulty=TaskDifficultyTag,
                       arbit_tag=TaskArbitraryTag)
 
+  def _resolveTags(self, tag_name, all_tags):
+    """Returns the tags of tag_name from all_tags, a dictionary of tags by
+    their key, or from the tag property if all_tags is not specified.
+    """
+
+    keys = self.tag_keys(tag_name)
+    if not all_tags or not keys:
+      return getattr(self, tag_name)
+
+    return [all_tags[i] for i in keys if i in all_tags]
+
   def taskDifficulty(self, all_difficulties=None):
-    if all_difficulties:
-      key = self.key()
-      difficulties = [i for i in all_difficulties if key in i.tagged]
-    else:
-      difficulties = self.difficulty
+    difficulties = self._resolveTags('difficulty', all_difficulties)
 
     if len(difficulties) == 1:
       return difficulties[0]
 
-    self.difficulty = {'tags': ['Unknown'], 'scope': self.program}
-    return self.difficulty[0]
+    # the tag is not stored, so that showing a task does not change the
+    # number of tasks tagged with it
+    return TaskDifficultyTag(tag='Unknown', scope=self.program)
 
   def taskType(self, all_types=None, ret_list=False):
-    if all_types:
-      key = self.key()
-      types = [i for i in all_types if key in i.tagged]
-    else:
-      types = self.task_type
+    types = self._resolveTags('task_type', all_types)
 
     return self.tags_string(types, ret_list=ret_list)
 
@@ -25,7 +25,6 @@ __authors__ = [
 import csv
 import logging
 import StringIO
-import time
 
 from django import http
 from django.utils import simplejson
@@ -48,9 +47,15 @@ from soc.modules.gci.logic.models.organization import logic as org_logic
 from soc.modules.gci.logic.models.task import logic as task_logic
 from soc.modules.gci.models import task as task_model
 from soc.modules.gci.models import bulk_create_data as bulk_create_model
+from soc.modules.gci.models.task_subscription import GCITaskSubscription
 
 BULK_CREATE_URL = '/tasks/gci/task/bulk_create_tasks'
 
+# number of rows that are created with one batch put
+DEF_BATCH_SIZE = 50
+
+ROWS_KEY_NAME = bulk_create_model.GCIBulkCreateRows.ROWS_KEY_NAME
+
 DATA_HEADERS = ['title', 'description', 'time_to_complete', 'mentors',
                 'difficulty', 'task_type', 'arbit_tag']
 
@@ -91,9 +96,20 @@ def spawnBulkCreateTasks(data, org_admin):
     task_list.append(db.Text(simplejson.dumps(task)))
 
   bulk_data = bulk_create_model.GCIBulkCreateData(
-      tasks=task_list, created_by=org_admin, total_tasks=len(task_list))
+      created_by=org_admin, total_tasks=len(task_list))
   bulk_data.put()
 
+  rows = bulk_create_model.GCIBulkCreateRows(
+      parent=bulk_data, key_name=ROWS_KEY_NAME, tasks=task_list)
+  rows.put()
+
+  _spawnBulkCreateTask(bulk_data)
+
+
+def _spawnBulkCreateTask(bulk_data):
+  """Spawns a task that continues creating the tasks of bulk_data.
+  """
+
   task_params = {
       'bulk_create_key': bulk_data.key()
       }
@@ -105,9 +121,121 @@ def spawnBulkCreateTasks(data, org_admin):
   new_task.add(queue_name='gci-update')
 
 
+def _getRows(bulk_data):
+  """Returns the rows of bulk_data.
+  """
+
+  if bulk_data.tasks:
+    # the rows were stored on the entity itself
+    return bulk_data.tasks
+
+  rows = bulk_create_model.GCIBulkCreateRows.get_by_key_name(
+      ROWS_KEY_NAME, parent=bulk_data)
+  return rows.tasks if rows else []
+
+
+def _loadTask(task_as_string):
+  """Returns the dictionary with the fields of a task stored as JSON.
+  """
+
+  loaded_task = simplejson.loads(task_as_string)
+  task = {}
+  for key, value in loaded_task.iteritems():
+    # If we don't do this python will complain about kwargs not being
+    # strings when we try to save the new task.
+    task[key.encode('UTF-8')] = value
+
+  return task
+
+
+def _splitValues(value):
+  """Returns the stripped values of a comma separated field.
+  """
+
+  return set([i.strip() for i in value.split(',')])
+
+
+class TaskResolver(object):
+  """Resolves the mentors and tags that are named in the rows of a bulk
+  create with a few batched lookups, rather than a few queries per row.
+  """
+
+  def __init__(self, org_admin, tasks):
+    """Looks up the mentors and tags used by tasks.
+
+    Args:
+      org_admin: the GCIOrgAdmin that is creating the tasks
+      tasks: the dictionaries of the tasks that will be created
+    """
+
+    self.program = org_admin.program
+    program_key_name = self.program.key().name()
+
+    self.difficulties = dict((str(i), i) for i in
+        task_model.TaskDifficultyTag.get_by_scope(self.program))
+    self.task_types = dict((str(i), i) for i in
+        task_model.TaskTypeTag.get_by_scope(self.program))
+
+    mentor_ids = set()
+    arbit_tag_names = set()
+    for task in tasks:
+      mentor_ids.update(_splitValues(task['mentors']))
+      arbit_tag_names.update(_splitValues(task['arbit_tag']))
+
+    mentor_ids = list(mentor_ids)
+    key_names = [mentor_logic.getKeyNameFromFields({
+        'scope_path': org_admin.scope_path,
+        'link_id': i,
+        }) for i in mentor_ids]
+    mentors = mentor_logic.getModel().get_by_key_name(key_names)
+    self.mentors = dict((link_id, mentor.key()) for link_id, mentor
+                        in zip(mentor_ids, mentors)
+                        if mentor and mentor.status == 'active')
+
+    arbit_tag_names = [i for i in arbit_tag_names if i]
+    # pylint: disable=W0212
+    key_names = [task_model.TaskArbitraryTag._key_name(program_key_name, i)
+                 for i in arbit_tag_names]
+    arbit_tags = task_model.TaskArbitraryTag.get_by_key_name(key_names)
+    self.arbit_tags = dict((i.tag, i) for i in arbit_tags if i)
+
+  def getMentor(self, link_id):
+    """Returns the key of the active mentor with link_id or None.
+    """
+
+    return self.mentors.get(link_id)
+
+  def getDifficulty(self, name):
+    """Returns the difficulty tag with the specified name or None.
+    """
+
+    return self.difficulties.get(name)
+
+  def getTaskType(self, name):
+    """Returns the task type tag with the specified name or None.
+    """
+
+    return self.task_types.get(name)
+
+  def getArbitTag(self, name):
+    """Returns the arbitrary tag with the specified name, it is created
+    when it does not exist yet.
+    """
+
+    if name not in self.arbit_tags:
+      self.arbit_tags[name] = task_model.TaskArbitraryTag.get_or_create(
+          self.program, name)
+
+    return self.arbit_tags[name]
+
+
 def bulkCreateTasks(request, *args, **kwargs):
   """Task that creates GCI Tasks from bulk data specified in the POST dict.
 
+  The rows are created in batches. After every batch the index of the next
+  row is stored, and once the time limit is reached the task requeues
+  itself to continue from there.
+
   The POST dict should have the following information present:
       bulk_create_key: the key of the bulk_create entity
   """
@@ -133,86 +261,182 @@ def bulkCreateTasks(request, *args, **kwargs):
   org_admin = bulk_data.created_by
   task_quota = org_logic.getRemainingTaskQuota(org_admin.scope)
 
-  tasks = bulk_data.tasks
-  while len(tasks) > 0:
-    try:
+  rows = _getRows(bulk_data)
+  tasks = [_loadTask(i) for i in rows[bulk_data.next_row:]]
+  resolver = TaskResolver(org_admin, tasks)
+
+  # the rows that were created before the rows were stored separately
+  # are not part of rows
+  row_offset = bulk_data.total_tasks - len(rows)
+
+  try:
+    # the tags of a batch that was stored by an interrupted invocation
+    _countTags(bulk_data)
+
+    while bulk_data.next_row < len(rows):
       # check if we have time
       timekeeper.ping()
 
-      if settings.GCI_TASK_QUOTA_LIMIT_ENABLED and task_quota <= 0:
-        return error_handler.logErrorAndReturnOK(
-            'Task quota reached for %s' %(org_admin.scope.name))
-
-      # remove the first task
-      task_as_string = tasks.pop(0)
-
-      loaded_task = simplejson.loads(task_as_string)
-      task = {}
-      for key, value in loaded_task.iteritems():
-        # If we don't do this python will complain about kwargs not being
-        # strings when we try to save the new task.
-        task[key.encode('UTF-8')] = value
-
-      logging.info('Uncleaned task: %s' %task)
-      # clean the data
-      errors = _cleanTask(task, org_admin)
-
-      if errors:
-        logging.warning(
-            'Invalid task data uploaded, the following errors occurred: %s'
-            %errors)
-        bulk_data.errors.append(db.Text(
-            'The task in row %i contains the following errors.\n %s' \
-            %(bulk_data.tasksRemoved(), '\n'.join(errors))))
-
-      # at-most-once semantics for creating tasks
+      batch_size = DEF_BATCH_SIZE
+      if settings.GCI_TASK_QUOTA_LIMIT_ENABLED:
+        if task_quota <= 0:
+          return error_handler.logErrorAndReturnOK(
+              'Task quota reached for %s' %(org_admin.scope.name))
+        batch_size = min(batch_size, task_quota)
+
+      first_row = bulk_data.next_row
+      batch = tasks[:batch_size]
+      tasks = tasks[batch_size:]
+
+      task_quota -= _createTasks(bulk_data, first_row, row_offset, batch,
+                                 org_admin, resolver)
+
+      # store the progress together with the tags that are still to be
+      # counted, the rows themselves are not written again
+      bulk_data.next_row = first_row + len(batch)
       bulk_data.put()
 
-      if errors:
-        # do the next task
-        continue
-
-      # set other properties
-      task['link_id'] = 't%i' % (int(time.time()*100))
-      task['scope'] = org_admin.scope
-      task['scope_path'] = org_admin.scope_path
-      task['program'] = org_admin.program
-      task['status'] = 'Unpublished'
-      task['created_by'] = org_admin
-      task['modified_by'] = org_admin
-
-      # create the new task
-      logging.info('Creating new task with fields: %s' %task)
-      task_logic.updateOrCreateFromFields(task)
-      task_quota = task_quota - 1
-    except DeadlineExceededError:
-      # time to bail out
-      pass
-
-  if len(tasks) == 0:
+      _countTags(bulk_data)
+  except DeadlineExceededError:
+    # time to bail out, the progress of all finished batches is stored
+    pass
+
+  if bulk_data.next_row >= len(rows):
     # send out a message
     notifications.sendBulkCreationCompleted(bulk_data)
-    bulk_data.delete()
+    db.delete([bulk_data, db.Key.from_path(
+        bulk_create_model.GCIBulkCreateRows.kind(), ROWS_KEY_NAME,
+        parent=bulk_data.key())])
   else:
     # there is still work to be done, do a non 500 response and requeue
-    task_params = {
-        'bulk_create_key': bulk_data.key().id_or_name()
-        }
-    new_task = taskqueue.Task(params=task_params,
-                              url=BULK_CREATE_URL)
-    # add to the gci queue
-    new_task.add(queue_name='gci-update')
+    _spawnBulkCreateTask(bulk_data)
 
   # we're done here
   return http.HttpResponse('OK')
 
 
-def _cleanTask(task, org_admin):
+def _createTasks(bulk_data, first_row, row_offset, batch, org_admin,
+                 resolver):
+  """Creates the tasks for a batch of rows with one batch put.
+
+  The link_id of a task is derived from its row, so that rows which were
+  created before an invocation was cut short are not created again.
+
+  The tags of all valid rows of the batch, including the ones that already
+  exist, are added to the pending tags of bulk_data. They are counted by
+  _countTags once the progress of the batch has been stored, so that every
+  row is counted exactly once.
+
+  Args:
+    bulk_data: the GCIBulkCreateData the rows belong to
+    first_row: the index of the first row of the batch
+    row_offset: the number of rows that preceded the stored rows
+    batch: the dictionaries of the tasks of the rows
+    org_admin: the GCIOrgAdmin that is creating the tasks
+    resolver: the TaskResolver for the mentors and tags
+
+  Returns:
+    The number of tasks that have been created.
+  """
+
+  task_model_class = task_logic.getModel()
+
+  properties_list = []
+  for index, task in enumerate(batch):
+    row = first_row + index
+
+    logging.info('Uncleaned task: %s' %task)
+    # clean the data
+    errors = _cleanTask(task, org_admin, resolver)
+
+    if errors:
+      logging.warning(
+          'Invalid task data uploaded, the following errors occurred: %s'
+          %errors)
+      bulk_data.errors.append(db.Text(
+          'The task in row %i contains the following errors.\n %s' \
+          %(row_offset + row + 1, '\n'.join(errors))))
+      continue
+
+    # set other properties
+    task['link_id'] = 't%i_%i' % (bulk_data.key().id(), row)
+    task['scope'] = org_admin.scope
+    task['scope_path'] = org_admin.scope_path
+    task['program'] = org_admin.program
+    task['status'] = 'Unpublished'
+    task['created_by'] = org_admin
+    task['modified_by'] = org_admin
+
+    properties_list.append(task)
+
+  key_names = [task_logic.getKeyNameFromFields(i) for i in properties_list]
+  existing = task_model_class.get_by_key_name(key_names)
+
+  entities = []
+  subscriptions = []
+  tag_counts = dict(zip(bulk_data.pending_tags, bulk_data.pending_counts))
+
+  for properties, key_name, existing_task in zip(
+      properties_list, key_names, existing):
+    # the tags of a batch are counted once, after its progress is stored
+    for tag in properties.pop('tags'):
+      tag_counts[tag.key()] = tag_counts.get(tag.key(), 0) + 1
+
+    if existing_task:
+      # created by an invocation that did not get to store its progress
+      continue
+
+    # create the new task
+    logging.info('Creating new task with fields: %s' %properties)
+    entity = task_model_class(key_name=key_name, **properties)
+    entities.append(entity)
+
+    subscriptions.append(GCITaskSubscription(
+        task=entity, subscribers=[org_admin.user.key()]))
+
+  db.put(entities + subscriptions)
+
+  bulk_data.pending_tags = tag_counts.keys()
+  bulk_data.pending_counts = tag_counts.values()
+
+  for entity in entities:
+    task_logic.flushCache(entity)
+
+  return len(entities)
+
+
+def _countTags(bulk_data):
+  """Counts the pending tags of the last stored batch of bulk_data.
+
+  The counts are applied with an id derived from the stored progress, so
+  that an invocation that is cut short while counting can safely count the
+  same batch again.
+  """
+
+  if not bulk_data.pending_tags:
+    return
+
+  tags = db.get(bulk_data.pending_tags)
+  for tag, count in zip(tags, bulk_data.pending_counts):
+    if tag:
+      tag.increment_tagged(count, op_id='bulk%i_%i' % (
+          bulk_data.key().id(), bulk_data.next_row))
+
+  bulk_data.pending_tags = []
+  bulk_data.pending_counts = []
+  bulk_data.put()
+
+
+def _cleanTask(task, org_admin, resolver):
   """Cleans the data given so that it can be safely stored as a task.
 
+  The tags are replaced by the keys of the tags and the tags themselves are
+  stored under 'tags', so that they can be counted.
+
     Args:
       task: Dictionary as constructed by the csv.DictReader().
       org_admin: the Org Admin who is creating these tasks.
+      resolver: the TaskResolver for the mentors and tags.
 
     Returns:
         A list of error messages if any have occurred.
@@ -244,60 +468,50 @@ def _cleanTask(task, org_admin):
                   %task['time_to_complete'])
 
   # clean mentors
-  mentor_ids = set(task['mentors'].split(','))
-
-  mentor_fields = {'scope': org_admin.scope,
-                   'status': 'active'}
   mentors = []
-  for mentor_id in mentor_ids:
-    mentor_fields['link_id'] = mentor_id.strip()
-    mentor = mentor_logic.getForFields(mentor_fields, unique=True)
+  for mentor_id in _splitValues(task['mentors']):
+    mentor = resolver.getMentor(mentor_id)
     if mentor:
-      mentors.append(mentor.key())
+      mentors.append(mentor)
     else:
       errors.append('%s is not a mentor.' %mentor_id)
 
   task['mentors'] = mentors
 
-  program_entity = org_admin.program
+  tags = []
 
   # clean task difficulty
-  difficulty = task['difficulty'].strip()
-  allowed_difficulties = [
-      str(x) for x in 
-          task_model.TaskDifficultyTag.get_by_scope(program_entity)]
-  if not difficulty or difficulty not in allowed_difficulties:
+  difficulty_name = task.pop('difficulty').strip()
+  difficulty = resolver.getDifficulty(difficulty_name)
+  if not difficulty:
     # no valid difficulty found
-    errors.append('No valid task difficulty found, given %s.' %difficulty)
+    errors.append('No valid task difficulty found, given %s.'
+                  %difficulty_name)
   else:
-    task['difficulty'] = {
-        'tags': task['difficulty'],
-        'scope': program_entity
-        }
+    task['difficulty_keys'] = [difficulty.key()]
+    tags.append(difficulty)
 
   # clean task types
   task_types = []
-  allowed_types = [
-      str(x) for x in task_model.TaskTypeTag.get_by_scope(program_entity)]
-  for task_type in set(task['task_type'].split(',')):
-    task_type = task_type.strip()
-    if task_type in allowed_types:
+  for task_type_name in _splitValues(task.pop('task_type')):
+    task_type = resolver.getTaskType(task_type_name)
+    if task_type:
       task_types.append(task_type)
     else:
-      errors.append('%s is not a valid task type.' %task_type)
+      errors.append('%s is not a valid task type.' %task_type_name)
 
-  task['task_type'] = {
-      'tags': task_types,
-      'scope': program_entity
-      }
+  task['task_type_keys'] = [i.key() for i in task_types]
+  tags.extend(task_types)
 
-  # clean task tags
-  arbit_tags = []
-  for tag in set(task['arbit_tag'].split(',')):
-    arbit_tags.append(tag.strip())
-  task['arbit_tag'] = {
-      'tags': arbit_tags,
-      'scope': program_entity
-      }
+  # clean task tags, new tags are only created for valid tasks
+  arbit_tag_names = [i for i in _splitValues(task.pop('arbit_tag')) if i]
+  if errors:
+    arbit_tag_names = []
+  arbit_tags = [resolver.getArbitTag(i) for i in arbit_tag_names]
+
+  task['arbit_tag_keys'] = [i.key() for i in arbit_tags]
+  tags.extend(arbit_tags)
+
+  task['tags'] = tags
 
   return errors
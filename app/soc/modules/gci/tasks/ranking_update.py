@@ -96,7 +96,7 @@ def recalculateGCIRanking(request, entities, context, *args, **kwargs):
     return responses.terminateTask()
 
   # prefetch all task difficulties
-  all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
+  all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
 
   for entity in entities:
     # check if the entity refers to the program in scope
@@ -127,16 +127,10 @@ def clearGCIRanking(request, entities, context, *args, **kwargs):
   if not program:
     return responses.terminateTask()
 
-  for entity in entities:
-
-    # check if the entity refers to the program in scope
-    if entity.scope.key() != program.key():
-      continue
+  # only clear the rankings of the program in scope
+  rankings = [i for i in entities if i.scope.key() == program.key()]
 
-    entity.points = 0
-    entity.tasks = []
-
-    entity.put()
+  gci_student_ranking_logic.clearRankings(rankings)
 
 def recalculateGCIStudentRanking(request, *args, **kwargs):
   """Recalculates GCI Student Ranking for the specified student.
@@ -146,16 +140,6 @@ def recalculateGCIStudentRanking(request, *args, **kwargs):
   if not student:
     return responses.terminateTask()
 
-  # find ranking entity for the student and clear it
-  filter = {
-      'student': student
-      }
-  ranking = gci_student_ranking_logic.getForFields(filter=filter,
-      unique=True)
-  ranking.points = 0
-  ranking.tasks = []
-  ranking.put()
-
   # get all the tasks that the student has completed
   filter = {
       'student': student,
@@ -163,8 +147,8 @@ def recalculateGCIStudentRanking(request, *args, **kwargs):
       }
   tasks = gci_task_logic.getForFields(filter=filter)
 
-  for task in tasks:
-    gci_student_ranking_logic.updateRanking(task)
+  # recalculate the ranking of the student from scratch
+  gci_student_ranking_logic.calculateRankingForStudent(student, tasks, None)
 
   return responses.terminateTask()
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Appengine Tasks related to the tags of GCI Tasks.
+
+GCI Tasks store the keys of their tags, see taggable.tag_property. The
+tasks in this module store them for tasks that were tagged before and
+update them when a tag is renamed.
+"""
+
+__authors__ = [
+    '"Daniel Hans" <dhans@google.com>',
+  ]
+
+
+import pickle
+
+from google.appengine.ext import db
+
+from soc.tasks import responses
+from soc.tasks.helper import decorators
+
+from soc.modules.gci.logic.models.task import logic as gci_task_logic
+from soc.modules.gci.logic.models.task import TAG_NAMES
+
+
+RETAG_URL = '/tasks/gci/task_tags/retag'
+
+
+def getDjangoURLPatterns():
+  """Returns the URL patterns for the tasks in this module.
+  """
+
+  patterns = [
+      (r'^tasks/gci/task_tags/retag$',
+       'soc.modules.gci.tasks.task_tags.retag')]
+
+  return patterns
+
+
+def renameTag(model, tag_name, scope, name, new_name):
+  """Renames the tag and moves the tasks that have it to the renamed tag.
+
+  Args:
+    model: the TaskTag model of the tag
+    tag_name: the name of the tag property of GCITask, e.g. 'task_type'
+    scope: the program of the tag
+    name: the current name of the tag
+    new_name: the new name of the tag
+
+  Returns:
+    The renamed tag or the tag that already had new_name.
+  """
+
+  tag = model.get_by_scope_and_name(scope, name)
+  existing_tag = model.get_by_scope_and_name(scope, new_name)
+
+  new_tag = model.copy_tag(scope, name, new_name)
+
+  # the tasks of a tag are only moved if the tag has been copied, as was
+  # the case when the tasks were recorded in the tagged list of the tag
+  if tag and new_tag and not existing_tag:
+    spawnRetagTask(tag_name, tag.key(), new_tag.key())
+
+  return new_tag
+
+
+def spawnRetagTask(tag_name, old_key, new_key):
+  """Spawns a task that replaces old_key by new_key in the tags of all tasks.
+  """
+
+  fields = {'%s_keys' % tag_name: old_key}
+
+  context = {
+      'tag_name': tag_name,
+      'old_key': str(old_key),
+      'new_key': str(new_key),
+      'fields': pickle.dumps(fields),
+      }
+
+  responses.startTask(RETAG_URL, context=context)
+
+
+@decorators.iterative_task(gci_task_logic)
+def retagTasks(request, entities, context, *args, **kwargs):
+  """Replaces the key of a renamed tag in the tags of a batch of tasks.
+  """
+
+  tag_name = context['tag_name']
+  if tag_name not in TAG_NAMES:
+    raise responses.FatalTaskError('Unknown tag %s' % tag_name)
+
+  property_name = '%s_keys' % tag_name
+  old_key = db.Key(context['old_key'])
+  new_key = db.Key(context['new_key'])
+
+  for entity in entities:
+    keys = getattr(entity, property_name)
+    keys = [i for i in keys if i != old_key]
+    if new_key not in keys:
+      keys.append(new_key)
+    setattr(entity, property_name, keys)
+
+  db.put(entities)
+
+
+@decorators.iterative_task(gci_task_logic)
+def runTaskTagsUpdate(request, entities, context, *args, **kwargs):
+  """Stores the keys of the tags of a batch of tasks on the tasks.
+
+  The tasks are removed from the tagged lists of their tags only after
+  they have been stored, so that a retry of the batch does not lose them.
+  """
+
+  for entity in entities:
+    for tag_name in TAG_NAMES:
+      entity.index_tags(tag_name)
+
+  db.put(entities)
+
+  for entity in entities:
+    entity.apply_tag_changes()
+
+
+retag = retagTasks
@@ -130,8 +130,8 @@ class View(mentor.View):
     visibility = 'public'
 
     if idx == 0:
-      all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
-      all_t = gci_task_model.TaskTypeTag.all().fetch(100)
+      all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
+      all_t = gci_task_model.TaskTypeTag.get_all_by_key()
       args = [all_d, all_t]
       contents = lists.getListData(request, params, filter,
                                    visibility=visibility, args=args)
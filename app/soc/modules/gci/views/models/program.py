@@ -32,6 +32,7 @@ from django import http
 from django.utils import simplejson
 from django.utils.translation import ugettext
 
+from soc.cache import capabilities
 from soc.logic import accounts
 from soc.logic import dicts
 from soc.logic.helper import timeline as timeline_helper
@@ -56,6 +57,7 @@ from soc.modules.gci.logic.models import student as gci_student_logic
 from soc.modules.gci.logic.models import task as gci_task_logic
 from soc.modules.gci.logic.models.org_app_survey import logic as org_app_logic
 from soc.modules.gci.models import task as gci_task_model
+from soc.modules.gci.tasks import task_tags
 from soc.modules.gci.views.helper import access as gci_access
 from soc.modules.gci.views.helper import redirects as gci_redirects
 
@@ -451,10 +453,9 @@ class View(program.View):
              "List My Organization Applications", 'any_access')]
 
     # get the student entity for this user and program
-    filter = {'user': user,
-              'scope': gci_program_entity,
-              'status': ['active', 'inactive']}
-    student_entity = gci_student_logic.logic.getForFields(filter, unique=True)
+    student_entity = capabilities.getRole(
+        user, gci_student_logic.logic.role_name, ['active', 'inactive'],
+        scope=gci_program_entity)
 
     # students can register after successfully completing their first
     # task. So if a user has completed one task he is still a student
@@ -470,14 +471,12 @@ class View(program.View):
                                        params, id, user, 'gci')
     else:
       # get mentor and org_admin entity for this user and program
-      filter = {
-          'user': user,
-          'program': gci_program_entity,
-          'status': 'active'
-          }
-      mentor_entity = gci_mentor_logic.logic.getForFields(filter, unique=True)
-      org_admin_entity = gci_org_admin_logic.logic.getForFields(
-          filter, unique=True)
+      mentor_entity = capabilities.getRole(
+          user, gci_mentor_logic.logic.role_name,
+          program=gci_program_entity)
+      org_admin_entity = capabilities.getRole(
+          user, gci_org_admin_logic.logic.role_name,
+          program=gci_program_entity)
 
       if timeline_helper.isAfterEvent(
           timeline_entity, 'accepted_organization_announced_deadline'):
@@ -499,11 +498,7 @@ class View(program.View):
       # add a link to list all the organizations
       items += [(url, "List participating Organizations", 'any_access')]
 
-    user_fields = {
-        'user': user,
-        'status': 'active'
-        }
-    host_entity = host_logic.getForFields(user_fields, unique=True)
+    host_entity = capabilities.getRole(user, host_logic.role_name)
 
     # for org admins this link should be visible only after accepted
     # organizations are announced and for other public after the tasks
@@ -667,8 +662,8 @@ class View(program.View):
 
         if current_tag_name != new_tag_name:
           # rename tag
-          new_tag = gci_task_model.TaskDifficultyTag.copy_tag(
-              program_entity, current_tag_name, new_tag_name)
+          new_tag = task_tags.renameTag(gci_task_model.TaskDifficultyTag,
+              'difficulty', program_entity, current_tag_name, new_tag_name)
           # TODO(ljvderijk): The tag copy method should work with new fields
           new_tag.order = current_tag.order
           new_tag.value = int(new_tag_data['value'])
@@ -751,7 +746,7 @@ class View(program.View):
           gci_task_model.TaskTypeTag.delete_tag(
               program_entity, tag_name)
         elif tag_name != tag_value:
-          gci_task_model.TaskTypeTag.copy_tag(
+          task_tags.renameTag(gci_task_model.TaskTypeTag, 'task_type',
               program_entity, tag_name, tag_value)
       else:
         gci_task_model.TaskTypeTag.get_or_create(program_entity, tag_value)
@@ -841,8 +836,8 @@ class View(program.View):
     visibility = 'public'
 
     if idx == 0:
-      all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
-      all_t = gci_task_model.TaskTypeTag.all().fetch(100)
+      all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
+      all_t = gci_task_model.TaskTypeTag.get_all_by_key()
       args = [all_d, all_t]
 
       contents = lists.getListData(request, params, tasks_filter,
@@ -925,8 +920,8 @@ class View(program.View):
 
     idx = lists.getListIndex(request)
 
-    all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
-    all_t = gci_task_model.TaskTypeTag.all().fetch(100)
+    all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
+    all_t = gci_task_model.TaskTypeTag.get_all_by_key()
     args = [all_d, all_t]
 
     if idx == 0:
@@ -1034,11 +1029,15 @@ class View(program.View):
         "rowNum": -1,
         "rowList": [],
         }
-    list_params['public_field_prefetch'] = ['student']
+    # the public columns are denormalized on the ranking, the students are
+    # only needed for the columns that are shown to hosts
+    if is_host:
+      list_params['public_field_prefetch'] = ['student']
+
     def getExtraFields(entity, *args):
       res = {
-          'student': entity.student.user.name,
-          'number': len(entity.tasks)
+          'student': entity.student_name or entity.student.user.name,
+          'number': entity.tasks_count or len(entity.tasks)
       }
       if is_host:
         fields = sparams['admin_field_keys']
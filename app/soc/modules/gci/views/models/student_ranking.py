@@ -42,7 +42,7 @@ class View(base.View):
   """View methods for the Tasks.
   """
 
-  DETAILS_MSG_FMT = 'Ranking details for %s.'
+  DETAILS_MSG_FMT = 'Ranking details for %s (rank %d).'
 
   def __init__(self, params=None):
     """Defines the fields and methods required for the task View class
@@ -98,10 +98,11 @@ class View(base.View):
     ranking = logic.getFromKeyFieldsOr404(kwargs)
     student = ranking.student
 
-    all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
+    all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
 
     list_params = params.copy()
-    list_params['list_description'] = self.DETAILS_MSG_FMT % student.user.name
+    list_params['list_description'] = self.DETAILS_MSG_FMT % (
+        student.user.name, logic.getRank(ranking))
     list_params['public_field_extra'] = lambda entity: {
         'task': entity.title,
         'org': entity.scope.name,
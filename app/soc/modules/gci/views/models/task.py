@@ -41,6 +41,7 @@ from django.utils.translation import ugettext
 from soc.logic import accounts
 from soc.logic import cleaning
 from soc.logic import dicts
+from soc.logic import references
 from soc.logic.helper import timeline as timeline_helper
 from soc.logic.models import host as host_logic
 from soc.logic.models import user as user_logic
@@ -250,7 +251,8 @@ class View(base.View):
                                        'created_by', 'created_on',
                                        'modified_by', 'modified_on',
                                        'history', 'link_id', 'difficulty',
-                                       'closed_on']
+                                       'closed_on', 'difficulty_keys',
+                                       'task_type_keys', 'arbit_tag_keys']
 
     patterns = []
     patterns += [
@@ -319,18 +321,15 @@ class View(base.View):
       size = len(entities) - 2
       return result if size < 2 else "%s + %d" % (result, size)
 
-    # TODO (Madhu) Add mentors to prefetch of both public and home
-    # once prefetch for list of references is fixed
     new_params['public_field_extra'] = lambda entity, all_d, all_t: {
         "org": entity.scope.name,
         "points_difficulty": entity.taskDifficultyValue(all_d),
         "task_type": entity.taskType(all_t),
-        # TODO(SRabbelier): change back to 'render(db.get(entity.mentors))'
-        "mentors": str(len(entity.mentors)),
+        "mentors": render(references.getReferenced(entity, 'mentors')),
         "arbit_tag": entity.taskArbitTag(),
         "days_hours": entity.taskTimeToComplete(),
     }
-    new_params['public_field_prefetch'] = ["scope"]
+    new_params['public_field_prefetch'] = ["scope", "mentors"]
     new_params['public_field_keys'] = [
         "title", "org", "points_difficulty", "task_type",
         "arbit_tag", "time_to_complete", "days_hours", "status", "mentors",
@@ -350,9 +349,10 @@ class View(base.View):
         "points_difficulty": entity.taskDifficultyValue(all_d),
         "task_type": entity.taskType(all_t),
         "arbit_tag": entity.taskArbitTag(),
-        "mentors": render(db.get(entity.mentors)),
+        "mentors": render(references.getReferenced(entity, 'mentors')),
         "days_hours": entity.taskTimeToComplete(),
     }
+    new_params['home_field_prefetch'] = ["mentors"]
 
     new_params['home_field_keys'] = ["title", "points_difficulty", "task_type",
                                      "arbit_tag", "time_to_complete", "days_hours",
@@ -966,8 +966,8 @@ class View(base.View):
     else:
       return lists.getErrorResponse(request, "idx not valid")
 
-    all_d = gci_task_model.TaskDifficultyTag.all().fetch(100)
-    all_t = gci_task_model.TaskTypeTag.all().fetch(100)
+    all_d = gci_task_model.TaskDifficultyTag.get_all_by_key()
+    all_t = gci_task_model.TaskTypeTag.get_all_by_key()
     args = [all_d, all_t]
 
     params = params_collection[idx]
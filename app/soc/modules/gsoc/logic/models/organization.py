@@ -25,6 +25,7 @@ __authors__ = [
 
 from google.appengine.ext import db
 
+from soc.cache import response as response_cache
 from soc.logic import tags
 from soc.logic.models import organization
 
@@ -78,6 +79,21 @@ class Logic(organization.Logic):
     
     return self.tags_service.setTagValuesForEntity(entity, entity_properties)
 
+  def flushCache(self, entity):
+    """See base.Logic.flushCache().
+
+    Also invalidates the cached pages that show the organization, which
+    includes the pages of its program that list organizations.
+    """
+
+    super(Logic, self).flushCache(entity)
+
+    response_cache.flush(entity)
+
+    program_key = org_model.scope.get_value_for_datastore(entity)
+    if program_key:
+      response_cache.flush(program_key)
+
   def _onCreate(self, entity):
     """Creates a RankerRoot entity.
     """
@@ -26,6 +26,7 @@ import datetime
 from google.appengine.api import memcache
 from google.appengine.ext import db
 
+from soc.cache import response as response_cache
 from soc.logic.models import base
 
 from soc.modules.gsoc.logic.models import organization as org_logic
@@ -49,6 +50,19 @@ class Logic(base.Logic):
     super(Logic, self).__init__(model=model, base_model=base_model,
                                 scope_logic=scope_logic)
 
+  def flushCache(self, entity):
+    """See base.Logic.flushCache().
+
+    Also invalidates the cached pages of the program, which list the
+    projects that have been accepted into it.
+    """
+
+    super(Logic, self).flushCache(entity)
+
+    program_key = self._model.program.get_value_for_datastore(entity)
+    if program_key:
+      response_cache.flush(program_key)
+
   def canChangeMentors(self, entity):
     """Returns true iff the Project's mentors may be changed.
     """
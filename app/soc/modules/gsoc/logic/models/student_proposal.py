@@ -25,6 +25,8 @@ __authors__ = [
 
 import time
 
+from google.appengine.ext import db
+
 from soc.logic.models import base
 
 from soc.modules.gsoc.logic.models import student as student_logic
@@ -32,6 +34,11 @@ from soc.modules.gsoc.logic.models import student as student_logic
 import soc.models.linkable
 
 import soc.modules.gsoc.models.student_proposal
+from soc.modules.gsoc.models.pending_score import PendingScore
+
+
+# the maximum number of pending score changes that are merged into ranks
+DEF_MAX_PENDING_SCORES = 1000
 
 
 class Logic(base.Logic):
@@ -59,12 +66,18 @@ class Logic(base.Logic):
       Ranker object which is used to rank the given entity
     """
 
+    return self.getRankerForOrg(entity.org)
+
+  def getRankerForOrg(self, org_entity):
+    """Returns the ranker for the Student Proposals of the given Organization.
+    """
+
     from soc.modules.gsoc.logic.models.ranker_root import logic \
         as ranker_root_logic
 
     fields = {
         'link_id': soc.modules.gsoc.models.student_proposal.DEF_RANKER_NAME,
-        'scope': entity.org
+        'scope': org_entity
         }
 
     ranker_root = ranker_root_logic.getForFields(fields, unique=True)
@@ -72,6 +85,52 @@ class Logic(base.Logic):
 
     return ranker
 
+  def getPendingScores(self, org_entity):
+    """Returns the score changes of the Student Proposals of the given
+    Organization that are not stored in its ranker yet.
+
+    Returns:
+      A dict mapping the key names of the proposals to their new score,
+      or None if the score is removed, as expected by Ranker.FindRanks.
+    """
+
+    query = PendingScore.all().filter('org', org_entity)
+    pending = query.fetch(DEF_MAX_PENDING_SCORES)
+    pending.sort(key=lambda i: i.created_on)
+
+    return dict((i.name, i.value or None) for i in pending)
+
+  def flushPendingScores(self, org_entity, limit):
+    """Stores at most limit pending score changes of the Student Proposals
+    of the given Organization in its ranker with a single transaction.
+
+    The scores are taken from the proposals themselves, so it does not
+    matter in which order or how often the changes are flushed.
+
+    Returns:
+      True iff there may be more pending score changes.
+    """
+
+    pending = PendingScore.all().filter('org', org_entity).fetch(limit)
+
+    if not pending:
+      return False
+
+    names = list(set(i.name for i in pending))
+    proposals = self.getFromKeyName(names)
+
+    scores = {}
+    for name, proposal in zip(names, proposals):
+      if proposal and proposal.status not in ['invalid', 'rejected']:
+        scores[name] = [proposal.score]
+      else:
+        scores[name] = None
+
+    self.getRankerForOrg(org_entity).SetScores(scores)
+    db.delete(pending)
+
+    return len(pending) == limit
+
   def getProposalsToBeAcceptedForOrg(self, org_entity, step_size=25):
     """Returns all StudentProposals which will be accepted into the program
     for the given organization.
@@ -105,8 +164,11 @@ class Logic(base.Logic):
     query = self.getQueryForFields(
         fields, order=order)
 
+    # check the mentor key without fetching the mentor
+    has_mentor = self._model.mentor.get_value_for_datastore
+
     proposals = query.fetch(slots_left_to_assign)
-    proposals = [i for i in proposals if i.mentor]
+    proposals = [i for i in proposals if has_mentor(i)]
 
     offset = slots_left_to_assign
 
@@ -119,7 +181,7 @@ class Logic(base.Logic):
         # we ran out of proposals`
         break
 
-      new_proposals = [i for i in new_proposals if i.mentor]
+      new_proposals = [i for i in new_proposals if has_mentor(i)]
       proposals += new_proposals
       offset += step_size
 
@@ -244,18 +306,29 @@ class Logic(base.Logic):
                                                                view._params)
     review_redirect_url = redirects.getReviewRedirect(entity, view._params)
 
-    student_id = entity.scope.link_id
+    # compare the keys of the users without fetching them
+    user_property = review_follower_logic.getModel().user
+    author_key = user.key()
+    student = entity.scope
+    student_key = student.__class__.user.get_value_for_datastore(student)
+
+    org_member_keys = []
 
     for follower in followers:
+      follower_key = user_property.get_value_for_datastore(follower)
+
       # sent to every follower except the reviewer
-      if follower.user.key() != review_entity.author.key():
-        if follower.user.link_id == student_id:
-          redirect_url = private_redirect_url
-        else:
-          redirect_url = review_redirect_url
-
-        notifications_helper.sendNewReviewNotification(follower.user,
-            review_entity, entity.title, redirect_url)
+      if follower_key == author_key:
+        continue
+
+      if follower_key == student_key:
+        notifications_helper.sendNewReviewNotification([follower_key],
+            review_entity, entity.title, private_redirect_url)
+      else:
+        org_member_keys.append(follower_key)
+
+    notifications_helper.sendNewReviewNotification(org_member_keys,
+        review_entity, entity.title, review_redirect_url)
 
 
 logic = Logic()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module contains the PendingScore Model."""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+]
+
+
+from google.appengine.ext import db
+
+
+class PendingScore(db.Model):
+  """A score change of a proposal that is not stored in the ranker yet.
+
+  Every PendingScore is an entity group of its own, so score changes can
+  be written at any rate. They are applied to the ranker of the
+  organization in batches by soc.modules.gsoc.tasks.proposal_review.
+  """
+
+  #: the organization whose ranker the score belongs to
+  org = db.ReferenceProperty(required=True, collection_name='pending_scores')
+
+  #: the key name of the proposal, the name of the score in the ranker
+  name = db.StringProperty(required=True)
+
+  #: the new score, the score is removed from the ranker if it is empty
+  value = db.ListProperty(int)
+
+  #: the time the score changed, later changes replace earlier ones
+  created_on = db.DateTimeProperty(auto_now_add=True)
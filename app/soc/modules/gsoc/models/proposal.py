@@ -34,6 +34,9 @@ import soc.modules.gsoc.models.program
 
 class GSoCProposal(soc.models.base.ModelWithFieldAttributes):
   """Model for a student proposal used in the GSoC workflow.
+
+  Every proposal is stored together with a GSoCProposalSummary. Lists
+  query the summaries, so that they do not read the text of proposals.
   """
 
   #: Required field indicating the "title" of the proposal
@@ -83,6 +86,16 @@ class GSoCProposal(soc.models.base.ModelWithFieldAttributes):
   #: should be assigned a project slot.
   score = db.IntegerProperty(required=True, default=0)
 
+  #: the number of GSoCScores that have been given to this proposal
+  nr_scores = db.IntegerProperty(required=True, default=0)
+
+  #: the profiles that scored this proposal, the value each of them gave
+  #: is stored at the same index in score_values
+  score_authors = db.ListProperty(item_type=db.Key, default=[])
+
+  #: the values of the GSoCScores given by score_authors
+  score_values = db.ListProperty(item_type=int, default=[])
+
   #: the status of this proposal
   #: new : the proposal has not been ranked/scored yet
   #: pending: the proposal is in the process of being ranked/scored
@@ -109,3 +122,111 @@ class GSoCProposal(soc.models.base.ModelWithFieldAttributes):
 
   #: date when the proposal was last modified, should be set manually on edit
   last_modified_on = db.DateTimeProperty(required=True, auto_now_add=True)
+
+  def getScoreFor(self, author_key):
+    """Returns the value of the score given by author_key or 0.
+    """
+
+    if author_key not in self.score_authors:
+      return 0
+
+    return self.score_values[self.score_authors.index(author_key)]
+
+  def setScoreFor(self, author_key, value):
+    """Updates score, nr_scores and the score of author_key.
+
+    The matching GSoCScore should be updated in the same transaction.
+
+    Args:
+      author_key: the key of the profile that scored the proposal
+      value: the new value of the score, 0 if the score was removed
+    """
+
+    if author_key in self.score_authors:
+      index = self.score_authors.index(author_key)
+      self.score -= self.score_values[index]
+      self.nr_scores -= 1
+      del self.score_authors[index]
+      del self.score_values[index]
+
+    if value:
+      self.score += value
+      self.nr_scores += 1
+      self.score_authors.append(author_key)
+      self.score_values.append(value)
+
+  def getSummaryKey(self):
+    """Returns the key of the GSoCProposalSummary of this proposal.
+    """
+
+    return db.Key.from_path(GSoCProposalSummary.kind(),
+                            self.key().id_or_name(), parent=self.parent_key())
+
+  def getSummary(self):
+    """Returns the GSoCProposalSummary that matches this proposal.
+    """
+
+    # references are copied as keys, so that they are not fetched
+    properties = self.properties()
+    properties = dict((i, properties[i].get_value_for_datastore(self))
+                      for i in SUMMARY_PROPERTIES)
+
+    return GSoCProposalSummary(key=self.getSummaryKey(), **properties)
+
+  def put(self, **kwargs):
+    """Stores the proposal and its GSoCProposalSummary.
+    """
+
+    if not self.has_key():
+      # the summary needs the id of the proposal
+      key = super(GSoCProposal, self).put(**kwargs)
+      self.getSummary().put(**kwargs)
+      return key
+
+    return db.put([self, self.getSummary()], **kwargs)[0]
+
+  def delete(self, **kwargs):
+    """Deletes the proposal and its GSoCProposalSummary.
+    """
+
+    db.delete([self.key(), self.getSummaryKey()], **kwargs)
+
+
+class GSoCProposalSummary(db.Model):
+  """The properties of a GSoCProposal that lists show, without its text.
+
+  A summary has the same parent and id as its proposal.
+  """
+
+  title = db.StringProperty(required=True)
+
+  is_publicly_visible = db.BooleanProperty(default=False)
+
+  mentor = db.ReferenceProperty(
+      reference_class=soc.modules.gsoc.models.profile.GSoCProfile,
+      required=False,
+      collection_name='proposal_summaries')
+
+  possible_mentors = db.ListProperty(item_type=db.Key, default=[])
+
+  score = db.IntegerProperty(required=True, default=0)
+
+  status = db.StringProperty(required=True, default='new')
+
+  org = db.ReferenceProperty(
+      reference_class=soc.modules.gsoc.models.organization.GSoCOrganization,
+      required=False,
+      collection_name='proposal_summaries')
+
+  program = db.ReferenceProperty(
+      reference_class=soc.modules.gsoc.models.program.GSoCProgram,
+      required=True,
+      collection_name='proposal_summaries')
+
+  created_on = db.DateTimeProperty(required=True)
+
+  last_modified_on = db.DateTimeProperty(required=True)
+
+
+#: the properties of a GSoCProposal that are copied to its summary
+SUMMARY_PROPERTIES = GSoCProposalSummary.properties().keys()
@@ -21,15 +21,17 @@ __authors__ = [
   ]
 
 
+import hashlib
 import logging
-import time
 
 from django import http
 from google.appengine.api import taskqueue
+from google.appengine.ext import db
 from google.appengine.runtime import DeadlineExceededError
 
 from soc.logic import mail_dispatcher
 from soc.logic import dicts
+from soc.logic import references
 from soc.tasks.helper import error_handler
 from soc.tasks.helper.timekeeper import Timekeeper
 from soc.tasks import responses
@@ -38,6 +40,17 @@ from soc.modules.gsoc.logic.models.organization import logic as org_logic
 from soc.modules.gsoc.logic.models.program import logic as program_logic
 from soc.modules.gsoc.logic.models.student_proposal import logic as student_proposal_logic
 from soc.modules.gsoc.logic.models.student_project import logic as student_project_logic
+from soc.modules.gsoc.models.student_proposal import StudentProposal
+
+
+# the number of proposals that are converted with a single put
+BATCH_SIZE = 50
+
+MAIL_URL = '/tasks/accept_proposals/mail'
+
+ACCEPTED_TEMPLATE = 'modules/gsoc/student_proposal/mail/accepted_gsoc2010.html'
+
+REJECTED_TEMPLATE = 'modules/gsoc/student_proposal/mail/rejected_gsoc2010.html'
 
 
 def getDjangoURLPatterns():
@@ -50,7 +63,9 @@ def getDjangoURLPatterns():
       (r'tasks/accept_proposals/accept$',
        r'soc.modules.gsoc.tasks.accept_proposals.accept_proposals'),
       (r'tasks/accept_proposals/reject$',
-       r'soc.modules.gsoc.tasks.accept_proposals.reject_proposals')]
+       r'soc.modules.gsoc.tasks.accept_proposals.reject_proposals'),
+      (r'tasks/accept_proposals/mail$',
+       r'soc.modules.gsoc.tasks.accept_proposals.send_proposal_emails')]
 
   return patterns
 
@@ -125,6 +140,10 @@ def convert_proposals(request, *args, **kwargs):
 
 def accept_proposals(request, *args, **kwargs):
   """Accept proposals for an organization
+
+  The proposals are accepted in batches, every batch is stored with a
+  single put. Accepted proposals are not returned by the query again, so
+  a requeued task continues where the previous one stopped.
   """
 
   params = request.POST
@@ -137,12 +156,14 @@ def accept_proposals(request, *args, **kwargs):
   org = org_logic.getFromKeyName(params["orgkey"])
   proposals = student_proposal_logic.getProposalsToBeAcceptedForOrg(org)
 
+  batches = [proposals[i:i+BATCH_SIZE]
+             for i in range(0, len(proposals), BATCH_SIZE)]
+
   # Accept proposals
   try:
-    for remain, proposal in timekeeper.iterate(proposals):
-      logging.info("accept %s %s %s", remain, org.key(), proposal.key())
-      accept_proposal(proposal)
-      accept_proposal_email(proposal)
+    for remain, batch in timekeeper.iterate(batches):
+      logging.info("accept %s %s %d", remain, org.key(), len(batch))
+      accept_proposal_batch(batch)
 
   # Requeue this task for continuation
   except DeadlineExceededError:
@@ -156,9 +177,15 @@ def accept_proposals(request, *args, **kwargs):
 
 def reject_proposals(request, *args, **kwargs):
   """Reject proposals for an org_logic
+
+  POST Args:
+    orgkey: the key name of the organization
+    timelimit: the time in milliseconds this task may take
+    cursor: the cursor to continue the query of proposals at
   """
 
-  params = request.POST
+  # Copy for modification below
+  params = request.POST.copy()
 
   # Setup an artifical request deadline
   timelimit = int(params["timelimit"])
@@ -166,14 +193,25 @@ def reject_proposals(request, *args, **kwargs):
 
   # Query proposals
   org = org_logic.getFromKeyName(params["orgkey"])
-  proposals = reject_proposals_query(org)
+  query = reject_proposals_query(org)
 
   # Reject proposals
   try:
-    for remain, proposal in timekeeper.iterate(proposals):
-      logging.info("reject %s %s %s", remain, org.key(), proposal.key())
-      reject_proposal(proposal)
-      reject_proposal_email(proposal)
+    while True:
+      remain = timekeeper.ping()
+
+      if params.get("cursor"):
+        query.with_cursor(params["cursor"])
+
+      proposals = query.fetch(BATCH_SIZE)
+      logging.info("reject %s %s %d", remain, org.key(), len(proposals))
+      reject_proposal_batch(proposals)
+
+      # persist the position so that a requeued task continues from here
+      params["cursor"] = query.cursor()
+
+      if len(proposals) < BATCH_SIZE:
+        break
 
   # Requeue this task for continuation
   except DeadlineExceededError:
@@ -183,12 +221,94 @@ def reject_proposals(request, *args, **kwargs):
   return responses.terminateTask()
 
 
+def send_proposal_emails(request, *args, **kwargs):
+  """Sends the acceptance or reject mails for a batch of proposals.
+
+  The task is repeated as long as any of the proposals is new or pending.
+
+  POST Args:
+    proposals: comma separated keys of the proposals
+    status: the status the proposals were converted to, either
+        'accepted' or 'rejected'
+  """
+
+  params = request.POST
+
+  status = params.get("status")
+  if status == 'accepted':
+    get_context = accept_proposal_email_context
+    template = ACCEPTED_TEMPLATE
+  elif status == 'rejected':
+    get_context = reject_proposal_email_context
+    template = REJECTED_TEMPLATE
+  else:
+    return error_handler.logErrorAndReturnOK(
+        "invalid status in params: '%s'" % params)
+
+  keys = [i for i in params.get("proposals", "").split(",") if i]
+  proposals = [i for i in db.get(keys) if i]
+
+  if [i for i in proposals if i.status in ['new', 'pending']]:
+    # the batch is still being stored, or it will be converted again by
+    # the requeued task that was cut short
+    return responses.repeatTask()
+
+  # skip proposals that have been converted differently since
+  proposals = [i for i in proposals if i.status == status]
+  references.prefetch(proposals, ['scope', 'program', 'org'])
+
+  sender = mail_dispatcher.getDefaultMailSender()
+
+  contexts = [get_context(i, sender) for i in proposals]
+  mail_dispatcher.sendMailsFromTemplate(template, contexts)
+
+  return responses.terminateTask()
+
+
+def spawn_proposal_emails(proposals, status):
+  """Enqueues a single task that sends the mails for all proposals.
+
+  The task is enqueued before the proposals are stored and is named after
+  them, so that a batch that is converted again after its task was cut
+  short does not enqueue a second one. send_proposal_emails waits until
+  the proposals have been converted.
+  """
+
+  if not proposals:
+    return
+
+  keys = ",".join([str(i.key()) for i in proposals])
+  params = {
+      "proposals": keys,
+      "status": status,
+      }
+
+  name = 'proposal-mail-%s' % hashlib.sha1(status + keys).hexdigest()
+
+  try:
+    taskqueue.add(url=MAIL_URL, params=params, name=name, countdown=5)
+  except (taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError):
+    # enqueued for the same batch by an attempt that was cut short
+    pass
+
+
 # Logic below ported from student_proposal_mailer.py
-def accept_proposal_email(proposal):
+def accept_proposal_email(proposal, default_sender=None):
   """Send an acceptance mail for the specified proposal.
   """
 
-  sender_name, sender = mail_dispatcher.getDefaultMailSender()
+  if not default_sender:
+    default_sender = mail_dispatcher.getDefaultMailSender()
+
+  context = accept_proposal_email_context(proposal, default_sender)
+  mail_dispatcher.sendMailFromTemplate(ACCEPTED_TEMPLATE, context)
+
+
+def accept_proposal_email_context(proposal, default_sender):
+  """Returns the context of the acceptance mail for the specified proposal.
+  """
+
+  sender_name, sender = default_sender
 
   student_entity = proposal.scope
   program_entity = proposal.program
@@ -204,15 +324,25 @@ def accept_proposal_email(proposal):
     'org_name': proposal.org.name
     }
 
-  template = 'modules/gsoc/student_proposal/mail/accepted_gsoc2010.html'
-  mail_dispatcher.sendMailFromTemplate(template, context)
+  return context
 
 
-def reject_proposal_email(proposal):
+def reject_proposal_email(proposal, default_sender=None):
   """Send an reject mail for the specified proposal.
   """
 
-  sender_name, sender = mail_dispatcher.getDefaultMailSender()
+  if not default_sender:
+    default_sender = mail_dispatcher.getDefaultMailSender()
+
+  context = reject_proposal_email_context(proposal, default_sender)
+  mail_dispatcher.sendMailFromTemplate(REJECTED_TEMPLATE, context)
+
+
+def reject_proposal_email_context(proposal, default_sender):
+  """Returns the context of the reject mail for the specified proposal.
+  """
+
+  sender_name, sender = default_sender
 
   student_entity = proposal.scope
   program_entity = proposal.program
@@ -226,46 +356,94 @@ def reject_proposal_email(proposal):
     'subject': 'Thank you for applying to %s' % (program_entity.name)
     }
 
-  template = 'modules/gsoc/student_proposal/mail/rejected_gsoc2010.html'
-  mail_dispatcher.sendMailFromTemplate(template, context)
+  return context
+
 
+def get_project_link_id(proposal):
+  """Returns the link_id of the project for the specified proposal.
 
-# Logic below ported from scripts/stats.py
-def accept_proposal(proposal):
-  """Accept a single proposal.
+  The link_id is derived from the proposal, so that accepting a proposal
+  again after a requeue overwrites the project instead of adding another.
   """
 
-  fields = {
-    'link_id': 't%i' % (int(time.time()*100)),
-    'scope_path': proposal.org.key().id_or_name(),
-    'scope': proposal.org,
-    'program': proposal.program,
-    'student': proposal.scope,
-    'title': proposal.title,
-    'abstract': proposal.abstract,
-    'mentor': proposal.mentor,
-    }
+  digest = hashlib.sha1(str(proposal.key().id_or_name())).hexdigest()
+  return 't%s' % digest[:16]
 
-  project = student_project_logic.updateOrCreateFromFields(fields, silent=True)
 
-  fields = {'status':'accepted'}
-  student_proposal_logic.updateEntityProperties(proposal, fields, silent=True)
+def accept_proposal_batch(proposals):
+  """Accept a batch of proposals.
 
+  The projects and the accepted proposals are stored with a single put,
+  the references of the proposals are copied as keys without fetching
+  the referenced entities.
+  """
+
+  if not proposals:
+    return
+
+  entities = []
+
+  for proposal in proposals:
+    org_key = StudentProposal.org.get_value_for_datastore(proposal)
+
+    fields = {
+      'link_id': get_project_link_id(proposal),
+      'scope_path': org_key.id_or_name(),
+      'scope': org_key,
+      'program': StudentProposal.program.get_value_for_datastore(proposal),
+      'student': StudentProposal.scope.get_value_for_datastore(proposal),
+      'title': proposal.title,
+      'abstract': proposal.abstract,
+      'mentor': StudentProposal.mentor.get_value_for_datastore(proposal),
+      }
+
+    key_name = student_project_logic.getKeyNameFromFields(fields)
+    entities.append(student_project_logic.getModel()(key_name=key_name,
+                                                     **fields))
+
+    proposal.status = 'accepted'
+    entities.append(proposal)
+
+  # the mails are enqueued first, so that they are not lost if the task is
+  # cut short after the put, see spawn_proposal_emails
+  spawn_proposal_emails(proposals, 'accepted')
+
+  db.put(entities)
 
-def reject_proposal(proposal):
-  """Reject a single proposal.
+
+def reject_proposal_batch(proposals):
+  """Reject the proposals of a batch which are still new or pending.
+
+  The proposals all belong to the same organization; they are stored
+  with a single put and removed from its ranker in one transaction.
   """
 
-  fields = {'status':'rejected'}
-  student_proposal_logic.updateEntityProperties(proposal, fields, silent=True)
+  proposals = [i for i in proposals if i.status in ['new', 'pending']]
+
+  if not proposals:
+    return
+
+  for proposal in proposals:
+    proposal.status = 'rejected'
+
+  spawn_proposal_emails(proposals, 'rejected')
+
+  db.put(proposals)
+
+  # entries in the ranker are removed by setting the score to None
+  ranker = student_proposal_logic.getRankerFor(proposals[0])
+  ranker.SetScores(dict((i.key().id_or_name(), None) for i in proposals))
 
 
 def reject_proposals_query(org):
   """Query proposals to reject
+
+  The query is not filtered on status as a query for several statuses
+  can not be continued with a cursor, reject_proposal_batch skips the
+  proposals which are not new or pending.
   """
 
   fields = {
-    'status': ['new', 'pending'],
     'org': org,
     }
 
@@ -14,29 +14,48 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Tasks related to proposal reviews."""
+"""Tasks related to proposal reviews.
+
+Score changes are not written to the ranker of an organization one by one,
+since all its entities are in a single entity group. Every change is
+appended as a PendingScore instead, and a task that runs at most once per
+FLUSH_DELAY seconds for each organization stores them in the ranker with
+a single transaction.
+"""
 
 __authors__ = [
   '"Leo (Chong Liu)" <HiddenPython@gmail.com>',
   ]
 
 
+import time
+
 from django import http
 
 from google.appengine.api import taskqueue
+from google.appengine.ext import db
 
 from soc.logic.models import user as user_logic
 from soc.tasks.helper import error_handler
 
 from soc.modules.gsoc.logic.models.student_proposal import logic as \
    student_proposal_logic
+from soc.modules.gsoc.models.pending_score import PendingScore
+from soc.modules.gsoc.models.student_proposal import StudentProposal
 from soc.modules.gsoc.views.models.student_proposal import view  as \
    student_proposal_view
 
 
 URL_UPDATE_RANKER = r'/tasks/gsoc/proposal_review/update_ranker'
+URL_FLUSH_SCORES = r'/tasks/gsoc/proposal_review/flush_scores'
 URL_CREATE_REVIEW_FOR = r'/tasks/gsoc/proposal_review/create_review_for'
 
+# seconds during which score changes are collected before they are flushed
+FLUSH_DELAY = 10
+
+# the number of score changes that are flushed with one transaction
+FLUSH_BATCH = 100
+
 
 def getDjangoURLPatterns():
   """Returns the URL patterns for the tasks in this module.
@@ -45,6 +64,8 @@ def getDjangoURLPatterns():
   patterns = [
       (URL_UPDATE_RANKER[1:]+'$',
        r'soc.modules.gsoc.tasks.proposal_review.update_ranker'),
+      (URL_FLUSH_SCORES[1:]+'$',
+       r'soc.modules.gsoc.tasks.proposal_review.flush_scores'),
       (URL_CREATE_REVIEW_FOR[1:]+'$',
        r'soc.modules.gsoc.tasks.proposal_review.create_review_for'),
       ]
@@ -86,10 +107,58 @@ def update_ranker(request, *args, **kwargs):
         'invalid student_proposal_key in params: "%s"' % params)
 
   value = params.get('value', '')
-  value = [int(value)] if value else None
-  # update the ranker
-  ranker = student_proposal_logic.getRankerFor(student_proposal)
-  ranker.SetScore(student_proposal.key().id_or_name(), value)
+  value = [int(value)] if value else []
+
+  # the ranker is updated by flush_scores
+  org_key = StudentProposal.org.get_value_for_datastore(student_proposal)
+  pending = PendingScore(org=org_key, value=value,
+                         name=student_proposal.key().id_or_name())
+  pending.put()
+
+  spawn_flush_scores(org_key)
+
+  # return OK
+  return http.HttpResponse()
+
+
+def spawn_flush_scores(org_key):
+  """Spawns the task that flushes the pending scores of an organization.
+
+  All score changes within FLUSH_DELAY seconds share a single task.
+  """
+
+  bucket = int(time.time() / FLUSH_DELAY)
+
+  try:
+    taskqueue.add(
+      url = URL_FLUSH_SCORES,
+      name = 'flush-scores-%s-%d' % (org_key, bucket),
+      params = {'org_key': str(org_key)},
+      countdown = FLUSH_DELAY)
+  except (taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError):
+    # the change is flushed by the task that exists already
+    pass
+
+
+def flush_scores(request, *args, **kwargs):
+  """Stores the pending scores of an organization in its ranker.
+
+  POST Args:
+    org_key: the key of the organization
+  """
+
+  params = request.POST
+
+  org_key = params.get('org_key')
+  org = org_key and db.get(org_key)
+
+  if not org:
+    return error_handler.logErrorAndReturnOK(
+        'invalid org_key in params: "%s"' % params)
+
+  if student_proposal_logic.flushPendingScores(org, FLUSH_BATCH):
+    # continue with the next batch
+    taskqueue.add(url=URL_FLUSH_SCORES, params={'org_key': org_key})
 
   # return OK
   return http.HttpResponse()
@@ -87,6 +87,8 @@ class AcceptedOrgsPage(RequestHandler):
   """View for the accepted organizations page.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/accepted_orgs/base.html'
 
@@ -24,8 +24,11 @@ __authors__ = [
   '"Lennard de Rijk" <ljvderijk@gmail.com>',
   ]
 
+from soc.cache import response as response_cache
+from soc.views.base import Response
 from soc.views.base import RequestHandler
 
+from soc.modules.gsoc.models.program import GSoCProgram
 from soc.modules.gsoc.views import base_templates
 from soc.modules.gsoc.views.helper import access_checker
 from soc.modules.gsoc.views.helper.request_data import RequestData
@@ -36,6 +39,69 @@ class RequestHandler(RequestHandler):
   """Customization required by GSoC to handle HTTP requests.
   """
 
+  #: the number of seconds for which the responses to anonymous GET requests
+  #: are cached, the responses of views that leave it at 0 are never cached
+  CACHE_TTL = 0
+
+  def cacheScopes(self):
+    """Returns the entities or keys whose changes invalidate the cached
+    responses of this view.
+
+    Defaults to the program, its timeline and org app, views that show
+    other entities should add those.
+    """
+
+    timeline_key = GSoCProgram.timeline.get_value_for_datastore(
+        self.data.program)
+    scopes = [self.data.program, timeline_key]
+
+    if self.data.org_app:
+      scopes.append(self.data.org_app)
+
+    return scopes
+
+  def cacheKey(self):
+    """Returns the key under which the response to the current request is
+    cached, or None if it should not be cached.
+    """
+
+    if not self.CACHE_TTL or self.request.method != 'GET' or self.posted:
+      return None
+
+    # only pages that look the same for every anonymous user can be cached
+    if self.data.gae_user:
+      return None
+
+    return response_cache.key(self.data.full_path, self.cacheScopes())
+
+  def _dispatch(self):
+    """Serves the cached response to the request if there is one.
+
+    See soc.views.base.RequestHandler._dispatch().
+    """
+
+    cache_key = self.cacheKey()
+    if not cache_key:
+      super(RequestHandler, self)._dispatch()
+      return
+
+    cached = response_cache.get(cache_key)
+    if cached:
+      status, headers, content = cached
+      self.response = Response(content, status=status)
+      for header, value in headers:
+        self.response[header] = value
+      return
+
+    super(RequestHandler, self)._dispatch()
+
+    if self.response.status_code != 200:
+      return
+
+    content = self.response.content
+    cached = (self.response.status_code, self.response.items(), content)
+    response_cache.put(cache_key, cached, len(content), self.CACHE_TTL)
+
   def render(self, context):
     """Renders the page using the specified context.
 
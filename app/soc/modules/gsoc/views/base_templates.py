@@ -131,6 +131,14 @@ class LoggedInMsg(Template):
     self.apply_role = apply_role
     self.div_name = div_name
 
+  def render(self):
+    """Renders nothing for anonymous users, as nobody is logged in.
+    """
+    if not self.data.gae_user:
+      return ''
+
+    return super(LoggedInMsg, self).render()
+
   def context(self):
     context = {
         'logout_link': self.data.redirect.logout().url(),
@@ -39,7 +39,7 @@ from soc.modules.gsoc.logic.models.student_project import logic as \
     project_logic
 from soc.modules.gsoc.logic.models.survey import project_logic as \
     ps_logic
-from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.models.proposal import GSoCProposalSummary
 from soc.modules.gsoc.models.profile import GSoCProfile
 from soc.modules.gsoc.views.base import RequestHandler
 from soc.modules.gsoc.views.base_templates import LoggedInMsg
@@ -303,11 +303,11 @@ class MyProposalsComponent(Component):
     """
     idx = lists.getListIndex(self.request)
     if idx == 1:
-      q = GSoCProposal.all()
+      q = GSoCProposalSummary.all()
       q.filter('program', self.data.program)
       q.ancestor(self.data.profile)
 
-      starter = lists.keyModelStarter(GSoCProposal)
+      starter = lists.keyModelStarter(GSoCProposalSummary)
 
       response_builder = lists.RawQueryContentResponseBuilder(
           self.request, self._list_config, q, starter, prefetch=['org'])
@@ -437,6 +437,8 @@ class SubmittedProposalsComponent(Component):
     list_config.setRowAction(lambda e, *args, **kwargs: 
         r.review(e.key().id_or_name(), e.parent().link_id).
         urlOf('review_gsoc_proposal'))
+    # an org can receive thousands of proposals
+    list_config.server_side = True
     self._list_config = list_config
 
     super(SubmittedProposalsComponent, self).__init__(request, data)
@@ -467,10 +469,10 @@ class SubmittedProposalsComponent(Component):
     """
     idx = lists.getListIndex(self.request)
     if idx == 4:
-      q = GSoCProposal.all()
+      q = GSoCProposalSummary.all()
       q.filter('org IN', self.data.mentor_for)
 
-      starter = lists.keyModelStarter(GSoCProposal)
+      starter = lists.keyModelStarter(GSoCProposalSummary)
 
       response_builder = lists.RawQueryContentResponseBuilder(
           self.request, self._list_config, q, starter, prefetch=['org'])
@@ -24,6 +24,7 @@ __authors__ = [
 
 from django.conf.urls.defaults import url
 
+from soc.cache import response as response_cache
 from soc.logic import dicts
 from soc.logic.helper import prefixes
 from soc.logic.models.document import logic as document_logic
@@ -103,6 +104,7 @@ class EditDocumentPage(RequestHandler):
     """
     document = self.validate()
     if document:
+      response_cache.flush(document)
       self.redirect.document(document)
       self.redirect.to('edit_gsoc_document')
     else:
@@ -113,6 +115,8 @@ class DocumentPage(RequestHandler):
   """Encapsulate all the methods required to show documents.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/base.html'
 
@@ -127,6 +131,12 @@ class DocumentPage(RequestHandler):
     self.mutator.documentKeyNameFromKwargs()
     self.check.canViewDocument()
 
+  def cacheScopes(self):
+    """See soc.modules.gsoc.views.base.RequestHandler.cacheScopes().
+    """
+    scopes = super(DocumentPage, self).cacheScopes()
+    return scopes + [self.data.document]
+
   def context(self):
     return {
         'tmpl': document.Document(self.data, self.data.document),
@@ -138,6 +148,8 @@ class EventsPage(RequestHandler):
   """Encapsulates all the methods required to show the events page.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/document/events.html'
 
@@ -151,6 +163,12 @@ class EventsPage(RequestHandler):
     self.data.document = self.data.program.events_page
     self.check.canViewDocument()
 
+  def cacheScopes(self):
+    """See soc.modules.gsoc.views.base.RequestHandler.cacheScopes().
+    """
+    scopes = super(EventsPage, self).cacheScopes()
+    return scopes + [self.data.document]
+
   def context(self):
     return {
         'document': self.data.program.events_page,
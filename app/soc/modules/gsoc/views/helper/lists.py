@@ -22,15 +22,37 @@ __authors__ = [
   ]
 
 
+import hashlib
 import logging
+import re
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
 
 from django.utils import simplejson
 
+from soc.logic import accounts
+from soc.logic import references
+from soc.logic.exceptions import BadRequest
+from soc.logic.models import base as base_logic
 from soc.views.template import Template
 
 
 URL_PATTERN = '<a href="%(url)s"%(target)s%(nofollow)s>%(name)s</a>'
 
+# the GET arguments that select a page of a server side list
+PAGE_ARGS = ['page', 'rows', 'sidx', 'sord', 'filters', 'search', 'refresh',
+             'start', 'limit']
+
+# the number of seconds the rows of a server side list are cached
+ROWS_RETENTION = 5*60
+
+# the maximum number of records that is counted for a server side list
+MAX_RECORDS = 10000
+
+# the number of entities that are fetched at once to build all rows
+ROWS_BATCH_SIZE = 500
+
 
 def urlize(url, name=None, target="_blank", nofollow=True):
   """Make an url clickable.
@@ -88,6 +110,8 @@ class ListConfiguration(object):
                  allows the user to select a number of rows.
     toolbar: [boolean, string] showing if and where the toolbar with buttons
              should be present.
+    server_side: If true the client requests one page at a time, the rows are
+                 filtered, sorted and paged on the server.
   """
 
   def __init__(self, add_key_column=True):
@@ -106,7 +130,9 @@ class ListConfiguration(object):
     self.height = 'auto'
     self.multiselect = False
     self.toolbar = [True, 'top']
+    self.server_side = False
 
+    self._simple_columns = set()
     self._buttons = {}
     self._button_functions = {}
     self._row_operation = {}
@@ -172,6 +198,7 @@ class ListConfiguration(object):
     """
     func = lambda ent, *args: getattr(ent, id)
     self.addColumn(id, name, func, resizable=resizable, hidden=hidden)
+    self._simple_columns.add(id)
 
   def __addButton(self, id, caption, bounds, type, parameters):
     """Internal method for adding buttons so that the uniqueness of the id can
@@ -352,6 +379,7 @@ class ListConfigurationResponse(Template):
         'multiselect': False if self._config._row_operation else \
                        self._config.multiselect,
         'toolbar': self._config.toolbar,
+        'server_side': self._config.server_side,
     }
 
     operations = {
@@ -382,12 +410,26 @@ class ListContentResponse(object):
     otherwise an empty string will be used indicating a request for the first
     batch.
 
+    The request can instead ask for a single page of a server side list by
+    defining the page parameter, the rows are then sorted on sidx in sord
+    order and filtered by the filters (a JSON dictionary of column ids to
+    text the column should contain) and search (the JSON of an advanced
+    search) parameters.
+
     Public fields:
       start: The start argument as parsed from the request.
       next: The value that should be used to query for the next set of
             rows. In other words what start will be on the next roundtrip.
       limit: The maximum number of rows to return as indicated by the request,
              defaults to 50.
+      page: The number of the requested page starting at 1, 0 if the request
+            is not for a single page.
+      sort: The id of the column to sort on, may be empty.
+      order: The order to sort in, either 'asc' or 'desc'.
+      filters: A dictionary mapping column ids to the text to filter on.
+      search: The advanced search as a dictionary, None if not requested.
+      refresh: Whether cached rows should not be used.
+      records: The number of rows in all pages of the list.
 
     Args:
       request: The HTTPRequest containing the request for data.
@@ -401,11 +443,48 @@ class ListContentResponse(object):
     get_args = request.GET
     self.next = ''
     self.start =  get_args.get('start', '')
-    self.limit = int(get_args.get('limit', 50))
+
+    page = get_args.get('page', '')
+    self.page = int(page) if page.isdigit() else 0
+
+    try:
+      if self.page:
+        self.limit = int(get_args.get('rows', config.row_num))
+      else:
+        self.limit = int(get_args.get('limit', 50))
+      self.filters = simplejson.loads(get_args.get('filters') or '{}')
+      self.search = simplejson.loads(get_args.get('search') or 'null')
+    except ValueError:
+      raise BadRequest('Invalid list arguments.')
+
+    # a negative number of rows requests all rows on a single page
+    if self.limit < 1 or self.limit > MAX_RECORDS:
+      self.limit = MAX_RECORDS
+
+    if not _isValidFilters(self.filters):
+      raise BadRequest('Invalid list filters.')
+
+    if self.search is not None and not _isValidSearch(self.search):
+      raise BadRequest('Invalid list search.')
+
+    self.sort = get_args.get('sidx', '')
+    self.order = 'desc' if get_args.get('sord') == 'desc' else 'asc'
+    self.refresh = bool(get_args.get('refresh'))
+    self.records = 0
 
   def addRow(self, entity, *args, **kwargs):
     """Renders a row for a single entity.
 
+    Args:
+      entity: The entity to render.
+      args: The args passed to the render functions defined in the config.
+      kwargs: The kwargs passed to the render functions defined in the config.
+    """
+    self.__rows.append(self.renderRow(entity, *args, **kwargs))
+
+  def renderRow(self, entity, *args, **kwargs):
+    """Returns the row for a single entity without adding it.
+
     Args:
       entity: The entity to render.
       args: The args passed to the render functions defined in the config.
@@ -436,17 +515,163 @@ class ListContentResponse(object):
       'columns': columns,
       'operations': operations,
     }
-    self.__rows.append(data)
+    return data
+
+  def setPage(self, rows, records):
+    """Sets the rows of the requested page.
+
+    Args:
+      rows: The rendered rows of the page.
+      records: The number of rows in all pages of the list.
+    """
+    self.__rows = rows
+    self.records = records
 
   def content(self):
     """Returns the object that should be parsed to JSON.
     """
+    if self.page:
+      total = (self.records + self.limit - 1) / self.limit if self.limit else 1
+      return {'page': self.page,
+              'total': total,
+              'records': self.records,
+              'rows': self.__rows[0:self.limit]}
+
     # The maximum number of rows to return is determined by the limit
     data = {self.start: self.__rows[0:self.limit]}
     return {'data': data,
             'next': self.next}
 
 
+def _isValidFilters(filters):
+  """Returns whether filters maps column ids to text.
+  """
+  if not isinstance(filters, dict):
+    return False
+  return all(isinstance(i, basestring) for i in filters.itervalues())
+
+
+def _isValidSearch(search):
+  """Returns whether search is an advanced search with a list of rules
+  on column ids.
+  """
+  if not isinstance(search, dict):
+    return False
+  rules = search.get('rules', [])
+  if not isinstance(rules, list):
+    return False
+  return all(isinstance(i, dict) and isinstance(i.get('field'), basestring)
+             for i in rules)
+
+
+def _searchValue(value):
+  """Returns the text of a column value to search in.
+  """
+  if value is None:
+    return ''
+  return unicode(value).lower()
+
+
+def _sortValue(value):
+  """Returns the value a column is sorted on, text is sorted ignoring case.
+  """
+  if isinstance(value, basestring):
+    return (1, value.lower())
+  if value is None:
+    return (0, None)
+  return (1, value)
+
+
+def _literalPattern(text):
+  """Returns a pattern that matches any of the | separated alternatives of
+  text literally, optionally anchored with ^ and $.
+
+  The filters of select boxes and the regular expression switch of the
+  client only need alternatives and anchors, so other characters are
+  escaped and the pattern can not take exponential time on a row.
+  """
+  alternatives = []
+  for alternative in text.split('|'):
+    start = '^' if alternative.startswith('^') else ''
+    end = '$' if alternative.endswith('$') and alternative != '^' else ''
+    literal = alternative[len(start):len(alternative) - len(end)]
+    alternatives.append(start + re.escape(literal) + end)
+
+  return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+
+def _matchesAny(value, data):
+  """Returns whether value is one of the comma separated values in data.
+  """
+  return value in [i.strip().lower() for i in data.split(',')]
+
+
+# maps the operators of the advanced search to a function of the (lower
+# case) text of the column and the data the user entered
+SEARCH_OPERATORS = {
+    'eq': lambda value, data: value == data,
+    'ne': lambda value, data: value != data,
+    'lt': lambda value, data: value < data,
+    'le': lambda value, data: value <= data,
+    'gt': lambda value, data: value > data,
+    'ge': lambda value, data: value >= data,
+    'bw': lambda value, data: value.startswith(data),
+    'bn': lambda value, data: not value.startswith(data),
+    'ew': lambda value, data: value.endswith(data),
+    'en': lambda value, data: not value.endswith(data),
+    'cn': lambda value, data: data in value,
+    'nc': lambda value, data: data not in value,
+    'in': _matchesAny,
+    'ni': lambda value, data: not _matchesAny(value, data),
+}
+
+
+def filterRows(rows, filters, search=None):
+  """Returns the rows that match the filters and the advanced search.
+
+  Args:
+    rows: The rendered rows to filter.
+    filters: A dictionary mapping column ids to the text the column should
+             contain, or alternatives it should match if the value starts
+             with 're:', see _literalPattern.
+    search: The advanced search as sent by the client, a dictionary with
+            groupOp 'AND' or 'OR' and a list of rules with a field, op and
+            data.
+  """
+  for column_id, text in filters.iteritems():
+    if text.startswith('re:'):
+      pattern = _literalPattern(text[3:])
+      match = lambda value: pattern.search(value)
+    else:
+      text = text.lower()
+      match = lambda value: text in value
+
+    rows = [i for i in rows
+            if match(_searchValue(i['columns'].get(column_id)))]
+
+  rules = search.get('rules', []) if search else []
+  rules = [i for i in rules if i.get('op') in SEARCH_OPERATORS]
+
+  if rules:
+    combine = any if search.get('groupOp') == 'OR' else all
+
+    def matches(row):
+      return combine(SEARCH_OPERATORS[i['op']](
+          _searchValue(row['columns'].get(i['field'])),
+          _searchValue(i.get('data'))) for i in rules)
+
+    rows = [i for i in rows if matches(i)]
+
+  return rows
+
+
+def sortRows(rows, column_id, order='asc'):
+  """Sorts the rendered rows on the specified column in place.
+  """
+  rows.sort(key=lambda row: _sortValue(row['columns'].get(column_id)),
+            reverse=(order == 'desc'))
+
+
 def keyModelStarter(model):
   """Returns a starter for the specified key-based model.
   """
@@ -479,11 +704,13 @@ class RawQueryContentResponseBuilder(object):
       ender: The function used to retrieve the value for the next start.
       skipper: The function used to determine whether to skip a value.
       prefetch: The fields that need to be prefetched for increased
-                performance.
+                performance, either ReferenceProperties or ListProperties
+                of keys. See soc.logic.references.
     """
     if not ender:
       ender = lambda entity, is_last, start: (
           "done" if is_last else entity.key().id_or_name())
+    has_skipper = skipper is not None
     if not skipper:
       skipper = lambda entity, start: False
 
@@ -494,6 +721,7 @@ class RawQueryContentResponseBuilder(object):
     self._ender = ender
     self._skipper = skipper
     self._prefetch = prefetch
+    self._has_skipper = has_skipper
 
   def build(self, *args, **kwargs):
     """Returns a ListContentResponse containing the data as indicated by the
@@ -504,11 +732,17 @@ class RawQueryContentResponseBuilder(object):
     The next variable will be defined as the key of the last entity returned,
     empty if there are no entities to return.
 
+    If the request is for a single page of a server side list, only the rows
+    of that page are returned, see buildPage().
+
     Args and Kwargs passed into this method will be passed along to
     ListContentResponse.addRow().
     """
     content_response = ListContentResponse(self._request, self._config)
 
+    if content_response.page:
+      return self.buildPage(content_response, *args, **kwargs)
+
     start = content_response.start
 
     if start == 'done':
@@ -526,7 +760,8 @@ class RawQueryContentResponseBuilder(object):
 
     is_last = len(entities) != count
 
-    # TODO(SRabbelier): prefetch
+    if self._prefetch:
+      references.prefetch(entities, self._prefetch)
 
     for entity in entities:
       if self._skipper(entity, start):
@@ -540,6 +775,96 @@ class RawQueryContentResponseBuilder(object):
 
     return content_response
 
+  def buildPage(self, content_response, *args, **kwargs):
+    """Sets the rows of the page requested in content_response.
+
+    Pages that are not filtered are retrieved from the datastore directly if
+    the query can be sorted as requested, otherwise all rows of the list are
+    rendered (or taken from memcache) and filtered, sorted and paged in
+    memory.
+    """
+    offset = (content_response.page - 1) * content_response.limit
+    has_filters = content_response.filters or content_response.search
+
+    query = None
+    if not has_filters and not self._has_skipper:
+      query = self.getSortedQuery(content_response.sort,
+                                  content_response.order)
+
+    if query is not None:
+      try:
+        entities = query.fetch(content_response.limit, offset)
+        records = query.count(MAX_RECORDS)
+      except db.NeedIndexError:
+        logging.warning('No index to sort list on %s' % content_response.sort)
+      else:
+        if self._prefetch:
+          references.prefetch(entities, self._prefetch)
+
+        rows = [content_response.renderRow(i, *args, **kwargs)
+                for i in entities]
+        content_response.setPage(rows, records)
+        return content_response
+
+    rows = self.getAllRows(content_response, *args, **kwargs)
+    rows = filterRows(rows, content_response.filters, content_response.search)
+
+    if content_response.sort:
+      sortRows(rows, content_response.sort, content_response.order)
+
+    content_response.setPage(
+        rows[offset:offset + content_response.limit], len(rows))
+    return content_response
+
+  def getSortedQuery(self, sort, order):
+    """Returns the query sorted on the column with id sort, or None if it
+    can not be sorted by the datastore.
+    """
+    if sort:
+      return None
+    return self._query
+
+  def getAllRows(self, content_response, *args, **kwargs):
+    """Returns all rendered rows of the list.
+
+    The rows are cached in memcache for the current user, unless the rows
+    are too large to be cached.
+    """
+    memcache_key = self._rowsKey()
+
+    if not content_response.refresh:
+      # pylint: disable=E1101
+      rows = memcache.get(memcache_key)
+      if rows is not None:
+        return rows
+
+    rows = []
+    for entities in base_logic.Logic.batchIterator(
+        self._query, batch_size=ROWS_BATCH_SIZE):
+      if self._prefetch:
+        references.prefetch(entities, self._prefetch)
+
+      rows += [content_response.renderRow(i, *args, **kwargs)
+               for i in entities if not self._skipper(i, '')]
+
+    try:
+      # pylint: disable=E1101
+      memcache.set(memcache_key, rows, time=ROWS_RETENTION)
+    except ValueError:
+      logging.info('Not caching %d rows of list %s' % (len(rows),
+                                                       memcache_key))
+
+    return rows
+
+  def _rowsKey(self):
+    """Returns the memcache key for the rows of the requested list.
+    """
+    args = sorted((k, v) for k, v in self._request.GET.iteritems()
+                  if k not in PAGE_ARGS)
+    identifier = '%s|%s|%s' % (accounts.getCurrentAccount(normalize=False),
+                               self._request.path, args)
+    return 'list_rows_%s' % hashlib.sha1(identifier.encode('utf-8')).hexdigest()
+
 
 class QueryContentResponseBuilder(RawQueryContentResponseBuilder):
   """Builds a ListContentResponse for lists that are based on a single query.
@@ -563,5 +888,28 @@ class QueryContentResponseBuilder(RawQueryContentResponseBuilder):
     query = logic.getQueryForFields(
         filter=fields, ancestors=ancestors)
 
+    self._logic = logic
+    self._fields = fields
+    self._ancestors = ancestors
+
     super(QueryContentResponseBuilder, self).__init__(
         request, config, query, starter, prefetch=prefetch)
+
+  def getSortedQuery(self, sort, order):
+    """Returns a new query sorted on the column with id sort, if the column
+    is a simple column on an indexed property of the model.
+    """
+    if not sort:
+      return self._query
+
+    model = self._logic.getModel()
+    prop = model.properties().get(sort)
+
+    if (sort not in self._config._simple_columns or not prop or
+        isinstance(prop, db.ReferenceProperty) or
+        sort in model._unindexed_properties):
+      return None
+
+    sort_order = '-%s' % sort if order == 'desc' else sort
+    return self._logic.getQueryForFields(
+        filter=self._fields, ancestors=self._ancestors, order=[sort_order])
@@ -33,6 +33,7 @@ from google.appengine.ext import db
 from django.core.urlresolvers import reverse
 
 from soc.models import role
+from soc.models.site import Site
 from soc.logic.models.host import logic as host_logic
 from soc.logic.models.site import logic as site_logic
 from soc.logic.models.user import logic as user_logic
@@ -40,6 +41,8 @@ from soc.views.helper.access_checker import isSet
 from soc.views.helper.request_data import RequestData
 
 from soc.modules.gsoc.models import profile
+from soc.modules.gsoc.models.organization import GSoCOrganization
+from soc.modules.gsoc.models.program import GSoCProgram
 
 from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
 from soc.modules.gsoc.logic.models.organization import logic as org_logic
@@ -49,6 +52,11 @@ from soc.modules.gsoc.logic.models.program import logic as program_logic
 from soc.modules.gsoc.logic.models.student import logic as student_logic
 
 
+# reference fields of GSoCProgram to documents that every page links to
+PROGRAM_DOCUMENTS = ['about_page', 'events_page', 'connect_with_us_page',
+                     'help_page']
+
+
 def isBefore(date):
   """Returns True iff date is before utcnow().
 
@@ -249,49 +257,117 @@ class RequestData(RequestData):
 
     return self.profile.key() in self.proposal.possible_mentors
 
+  def _programKey(self):
+    """Returns the key of the program the request is pointing to.
+    """
+    if self.kwargs.get('sponsor') and self.kwargs.get('program'):
+      key_name = '%s/%s' % (self.kwargs['sponsor'], self.kwargs['program'])
+      return db.Key.from_path(GSoCProgram.kind(), key_name)
+
+    return Site.active_program.get_value_for_datastore(self.site)
+
+  def _organizationKey(self):
+    """Returns the key of the organization in the kwargs.
+    """
+    key_name = '%s/%s' % (self._programKey().name(),
+                          self.kwargs['organization'])
+    return db.Key.from_path(GSoCOrganization.kind(), key_name)
+
+  def _profileKey(self, user_key):
+    """Returns the key of the profile of the user in the program.
+    """
+    key_name = '%s/%s' % (self._programKey().name(), user_key.name())
+    return db.Key.from_path(profile.GSoCProfile.kind(), key_name,
+                            parent=user_key)
+
+  def wantCachedKeys(self):
+    """See soc.views.helper.request_data.RequestData.wantCachedKeys.
+    """
+    if self.kwargs.get('sponsor') and self.kwargs.get('program'):
+      self.loader.want([self._programKey()], cached=True)
+
+  def wantKeys(self, user_key):
+    """See soc.views.helper.request_data.RequestData.wantKeys.
+    """
+    program_key = self._programKey()
+    if not program_key:
+      return
+
+    self.loader.want([program_key], cached=True)
+
+    if self.kwargs.get('organization'):
+      self.loader.want([self._organizationKey()])
+
+    if user_key:
+      self.loader.want([self._profileKey(user_key)])
+
   def populate(self, redirect, request, args, kwargs):
     """Populates the fields in the RequestData object.
 
+    The entities are fetched by the loader with two datastore calls at
+    most, besides the ones for entities that are not cached yet.
+
     Args:
       request: Django HTTPRequest object.
       args & kwargs: The args and kwargs django sends along.
     """
     super(RequestData, self).populate(redirect, request, args, kwargs)
 
+    self.program = self.loader.get(self._programKey(), cached=True)
+
     if kwargs.get('sponsor') and kwargs.get('program'):
-      program_keyfields = {'link_id': kwargs['program'],
-                           'scope_path': kwargs['sponsor']}
-      self.program = program_logic.getFromKeyFieldsOr404(program_keyfields)
+      if not self.program:
+        program_keyfields = {'link_id': kwargs['program'],
+                             'scope_path': kwargs['sponsor']}
+        # raises NotFound
+        self.program = program_logic.getFromKeyFieldsOr404(program_keyfields)
     else:
-      self.program =  self.site.active_program
+      self.site.active_program = self.program
 
-    self.program_timeline = self.program.timeline
+    if kwargs.get('organization'):
+      self.organization = self.loader.get(self._organizationKey())
+      if not self.organization:
+        org_keyfields = {
+            'link_id': kwargs.get('organization'),
+            'scope_path': self.program.key().id_or_name(),
+            }
+        # raises NotFound
+        self.organization = org_logic.getFromKeyFieldsOr404(org_keyfields)
 
-    org_app_fields = {'scope': self.program}
-    self.org_app = org_app_logic.getOneForFields(org_app_fields)
+    if self.user:
+      self.profile = self.loader.get(self._profileKey(self.user.key()))
 
-    self.timeline = TimelineHelper(self.program_timeline, self.org_app)
+      sponsor_key = GSoCProgram.scope.get_value_for_datastore(self.program)
+      self.is_host = sponsor_key in self.user.host_for
 
-    if kwargs.get('organization'):
-      org_keyfields = {
-          'link_id': kwargs.get('organization'),
-          'scope_path': self.program.key().id_or_name(),
-          }
-      self.organization = org_logic.getFromKeyFieldsOr404(org_keyfields)
+    timeline_key = GSoCProgram.timeline.get_value_for_datastore(self.program)
+    self.loader.want([timeline_key], cached=True)
 
-    if self.user:
-      key_name = '%s/%s' % (self.program.key().name(), self.user.link_id)
-      self.profile = profile.GSoCProfile.get_by_key_name(
-          key_name, parent=self.user)
+    # documents linked from the menu of every page
+    self.loader.wantReferences(self.program, PROGRAM_DOCUMENTS)
 
-      self.is_host = self.program.scope.key() in self.user.host_for
+    if self.profile:
+      self.loader.want(self.profile.mentor_for + self.profile.org_admin_for)
+      self.loader.wantReferences(self.profile, ['student_info'])
+
+    self.loader.load()
+
+    self.program_timeline = self.loader.get(timeline_key, cached=True)
+    self.program.timeline = self.program_timeline
+    self.loader.resolveReferences(self.program, PROGRAM_DOCUMENTS)
+
+    self.org_app = org_app_logic.getForProgram(self.program)
+
+    self.timeline = TimelineHelper(self.program_timeline, self.org_app)
 
     if self.profile:
       orgs = set(self.profile.mentor_for + self.profile.org_admin_for)
-      org_map = dict((i.key(), i) for i in db.get(orgs))
+      org_map = dict(zip(orgs, self.loader.getMany(list(orgs))))
 
       self.mentor_for = org_map.values()
       self.org_admin_for = [org_map[i] for i in self.profile.org_admin_for]
+
+      self.loader.resolveReferences(self.profile, ['student_info'])
       self.student_info = self.profile.student_info
 
 
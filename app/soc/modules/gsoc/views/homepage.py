@@ -173,6 +173,8 @@ class Homepage(RequestHandler):
   """Encapsulate all the methods required to generate GSoC Home page.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/homepage/base.html'
 
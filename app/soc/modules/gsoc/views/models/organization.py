@@ -348,6 +348,9 @@ class View(organization.View):
       ranker_root = ranker_root_logic.getForFields(fields, unique=True)
       ranker = ranker_root_logic.getRootFromEntity(ranker_root)
 
+      # score changes that are not flushed to the ranker yet
+      pending = sp_logic.getPendingScores(org_entity)
+
       status = {}
 
       program_entity = org_entity.scope
@@ -385,7 +388,7 @@ class View(organization.View):
                 'status': ['accepted','pending','rejected']}
 
       # some extras for the list
-      args = [ranker, status]
+      args = [ranker, status, pending]
       visibility = 'review'
     elif idx == 2:
       # check if the current user is a mentor
@@ -474,8 +477,20 @@ class View(organization.View):
                                        'Created On']
     rp_params['review_field_no_filter'] = ['status']
     rp_params['review_field_prefetch'] = ['scope', 'mentor', 'program']
-    rp_params['review_field_extra'] = lambda entity, ranker, status: {
-          'rank': ranker.FindRanks([[entity.score]])[0] + 1,
+
+    def find_ranks(entities, ranker, status, pending):
+      """Returns the ranks of a page of proposals by their key.
+
+      A single FindRanks call fetches every ranker node it needs only once.
+      """
+      scores = [[i.score] for i in entities]
+      ranks = ranker.FindRanks(scores, pending=pending)
+      return dict(zip([i.key() for i in entities], ranks))
+
+    rp_params['review_page_extra'] = find_ranks
+    rp_params['review_field_extra'] = (
+        lambda entity, ranker, status, pending, ranks: {
+          'rank': ranks[entity.key()] + 1,
           'student': entity.scope.name(),
           'mentor': entity.mentor.name() if entity.mentor else
               '%s Proposed' % len(entity.possible_mentors),
@@ -483,7 +498,7 @@ class View(organization.View):
               '<font color="red">Pending rejection</font>') if (
               entity.program.allocations_visible \
               and entity.status == 'pending') else entity.status,
-    }
+    })
     rp_params['review_row_action'] = {
         "type": "redirect_custom",
         "parameters": dict(new_window=True),
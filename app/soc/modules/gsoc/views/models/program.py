@@ -29,6 +29,7 @@ from django import forms
 from django.utils import simplejson
 from django.utils.translation import ugettext
 
+from soc.cache import capabilities
 from soc.logic import allocations
 from soc.logic import cleaning
 from soc.logic import dicts
@@ -297,25 +298,19 @@ class View(program.View):
              "List My Organization Applications", 'any_access')]
 
     # get the student entity for this user and program
-    filter = {
-        'user': user,
-        'scope': program_entity,
-        'status': ['active', 'inactive']
-        }
-    student_entity = student_logic.getForFields(filter, unique=True)
+    status = ['active', 'inactive']
+    student_entity = capabilities.getRole(user, student_logic.role_name,
+                                          status, scope=program_entity)
 
     if student_entity:
       items += self._getStudentEntries(program_entity, student_entity,
                                        params, id, user, 'gsoc')
 
     # get mentor and org_admin entity for this user and program
-    filter = {
-        'user': user,
-        'program': program_entity,
-        'status': ['active', 'inactive']
-        }
-    mentor_entity = mentor_logic.getForFields(filter, unique=True)
-    org_admin_entity = org_admin_logic.getForFields(filter, unique=True)
+    mentor_entity = capabilities.getRole(user, mentor_logic.role_name,
+                                         status, program=program_entity)
+    org_admin_entity = capabilities.getRole(
+        user, org_admin_logic.role_name, status, program=program_entity)
 
     if mentor_entity or org_admin_entity:
       items += self._getOrganizationEntries(program_entity, org_admin_entity,
@@ -543,6 +538,7 @@ class View(program.View):
       if submit:
         program_entity.slots_allocation = result
         program_entity.put()
+        program_logic.flushCache(program_entity)
 
     orgs = {}
     applications = {}
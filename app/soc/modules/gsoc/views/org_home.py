@@ -164,6 +164,8 @@ class OrgHome(RequestHandler):
   """View methods for Organization Home page.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/org_home/base.html'
 
@@ -183,6 +185,13 @@ class OrgHome(RequestHandler):
     """
     self.mutator.organizationFromKwargs()
 
+  def cacheScopes(self):
+    """See soc.modules.gsoc.views.base.RequestHandler.cacheScopes().
+    """
+    assert isSet(self.data.organization)
+    scopes = super(OrgHome, self).cacheScopes()
+    return scopes + [self.data.organization]
+
   def jsonContext(self):
     """Handler for JSON requests.
     """
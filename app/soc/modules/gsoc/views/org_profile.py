@@ -31,6 +31,7 @@ from soc.logic import cleaning
 from soc.logic import dicts
 from soc.logic.exceptions import NotFound
 
+from soc.modules.gsoc.logic.models.organization import logic as org_logic
 from soc.modules.gsoc.models.organization import GSoCOrganization
 
 from soc.modules.gsoc.views.base import RequestHandler
@@ -160,4 +161,6 @@ class OrgProfilePage(RequestHandler):
     else:
       entity = form.save(commit=True)
 
+    org_logic.flushCache(entity)
+
     return entity
@@ -28,6 +28,7 @@ from django.core.urlresolvers import reverse
 from soc.logic.models.document import logic as document_logic
 from soc.views.forms import ModelForm
 
+from soc.modules.gsoc.logic.models.program import logic as program_logic
 from soc.modules.gsoc.models.program import GSoCProgram
 from soc.modules.gsoc.views.base import RequestHandler
 from soc.modules.gsoc.views.helper import url_patterns
@@ -96,6 +97,7 @@ class ProgramPage(RequestHandler):
       return False
 
     program_form.save()
+    program_logic.flushCache(self.data.program)
 
   def post(self):
     """Handler for HTTP POST request.
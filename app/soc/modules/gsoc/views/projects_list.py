@@ -51,6 +51,7 @@ class ProjectList(Template):
     list_config.addColumn('mentor', 'Mentor',
                           lambda entity, *args: entity.mentor.user.name)
     list_config.setDefaultSort('student')
+    list_config.server_side = True
     self._list_config = list_config
 
   def context(self):
@@ -88,6 +89,8 @@ class ListProjects(RequestHandler):
   """View methods for listing all the projects accepted into a program.
   """
 
+  CACHE_TTL = 10*60
+
   def templatePath(self):
     return 'v2/modules/gsoc/projects_list/base.html'
 
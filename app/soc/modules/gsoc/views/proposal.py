@@ -43,7 +43,8 @@ class ProposalForm(forms.ModelForm):
     model = GSoCProposal
     css_prefix = 'gsoc_proposal'
     exclude = ['status', 'mentor', 'possible_mentors', 'org', 'program',
-        'created_on', 'last_modified_on', 'score']
+        'created_on', 'last_modified_on', 'score', 'nr_scores',
+        'score_authors', 'score_values']
 
   clean_content = cleaning.clean_html_content('content')
 
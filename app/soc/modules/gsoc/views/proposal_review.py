@@ -27,6 +27,7 @@ from google.appengine.ext import db
 from django.core.urlresolvers import reverse
 from django.conf.urls.defaults import url
 
+from soc.logic import references
 from soc.logic.exceptions import NotFound
 from soc.logic.exceptions import BadRequest
 from soc.views import forms
@@ -111,24 +112,16 @@ class ReviewProposal(RequestHandler):
     if not self.data.private_comments_visible:
       return None
 
-    total = 0
-    number = 0
-    user_score = 0
-
-    query = db.Query(GSoCScore).ancestor(self.data.proposal)
-    for score in query:
-      total += score.value
-      number += 1
-
-      author_key = GSoCScore.author.get_value_for_datastore(score)
-      if author_key == self.data.profile.key():
-        user_score = score.value
+    # the aggregates are maintained on the proposal by PostScore
+    proposal = self.data.proposal
+    number = proposal.nr_scores
+    total = proposal.score
 
     return {
         'average': total / number if number else 0,
         'number': number,
         'total': total,
-        'user_score': user_score,
+        'user_score': proposal.getScoreFor(self.data.profile.key()),
         }
 
   def getComments(self):
@@ -147,6 +140,10 @@ class ReviewProposal(RequestHandler):
       elif self.data.private_comments_visible:
         private_comments.append(comment)
 
+    # the template shows the author of every comment
+    references.prefetch(public_comments + private_comments, ['author'],
+                        model=GSoCComment)
+
     return public_comments, private_comments
 
   def context(self):
@@ -333,32 +330,36 @@ class PostScore(RequestHandler):
     """
     assert isSet(self.data.proposal)
 
-    query = db.Query(GSoCScore)
-    query.filter('author = ', self.data.profile)
-    query.ancestor(self.data.proposal)
+    proposal_key = self.data.proposal.key()
+    author_key = self.data.profile.key()
 
-    score = query.get()
+    def update_score_trx():
+      proposal = db.get(proposal_key)
 
-    if not score:
-      score = GSoCScore(
-          parent=self.data.proposal,
-          author=self.data.profile,
-          value=value)
-    else:
-      score.value = value
+      query = db.Query(GSoCScore)
+      query.filter('author = ', author_key)
+      query.ancestor(proposal)
 
-    proposal_key = self.data.proposal.key()
-    def update_score_trx(score):
-      if score and not score.value:
-        score.delete()
+      score = query.get()
+
+      if not value:
+        if score:
+          score.delete()
+        score = None
+      elif not score:
+        score = GSoCScore(parent=proposal, author=author_key, value=value)
+        score.put()
       else:
+        score.value = value
         score.put()
-      # update total score for the proposal
-      proposal = db.get(proposal_key)
-      proposal.score += (value - (score.value if score else 0))
+
+      # keep the aggregates shown by ReviewProposal up to date
+      proposal.setScoreFor(author_key, value)
       proposal.put()
 
-    db.run_in_transaction(update_score_trx, score)
+      return score
+
+    return db.run_in_transaction(update_score_trx)
 
   def post(self):
     value = int(self.data.POST['value'])
@@ -421,7 +422,7 @@ class WishToMentor(RequestHandler):
         if profile_key not in proposal.possible_mentors:
           return
         proposal.possible_mentors.remove(profile_key)
-      db.put(proposal)
+      proposal.put()
 
     db.run_in_transaction(update_possible_mentors_trx)
 
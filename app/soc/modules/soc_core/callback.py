@@ -21,6 +21,7 @@ __authors__ = [
   ]
 
 
+from soc.tasks import export as export_tasks
 from soc.tasks import grading_survey_group as grading_group_tasks
 from soc.tasks import mailer as mailer_tasks
 from soc.tasks import surveys as survey_tasks
@@ -70,9 +71,11 @@ class Callback(object):
   def registerViews(self):
     """Instantiates all view objects.
     """
+    from soc.views import export
     from soc.views import legacy
     from soc.views import site
 
+    self.views.append(export.ExportDownload())
     self.views.append(legacy.Legacy())
     self.views.append(site.EditSitePage())
     self.views.append(site.SiteHomepage())
@@ -90,6 +93,7 @@ class Callback(object):
     self.core.registerSitemapEntry(role_conversion.getDjangoURLPatterns())
     self.core.registerSitemapEntry(proposal_conversion.getDjangoURLPatterns())
     self.core.registerSitemapEntry(project_conversion.getDjangoURLPatterns())
+    self.core.registerSitemapEntry(export_tasks.getDjangoURLPatterns())
 
     if self.v2:
       return
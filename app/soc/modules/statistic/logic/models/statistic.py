@@ -104,6 +104,20 @@ class Logic(base.Logic):
 
     return self.updateEntityProperties(statistic, properties)
 
+  def _getScopeKey(self, statistic):
+    """Returns the key of the program in scope of statistic without
+    fetching the program.
+    """
+
+    return self._model.scope.get_value_for_datastore(statistic)
+
+  def _getNextKey(self, statistic):
+    """Returns the key of the entity the next batch starts at without
+    fetching the entity.
+    """
+
+    return self._model.next_entity.get_value_for_datastore(statistic)
+
   def _preparePerField(self, statistic, instructions):
     """Prepares all settings needed by 'per field' statistics to be collected.
     """
@@ -199,14 +213,17 @@ class Logic(base.Logic):
         logic = self.helper.getLogicForItem(item, 'model')
         ref_logic = self.helper.getLogicForItem(item, 'ref_logic')
         ref_field = item['ref_field']
+        ref_program_field = item.get('ref_program_field') or \
+            self.helper.getProgramFieldForModel(item['ref_logic'])
 
         result = self._collectAverage(statistic, logic, ref_logic, ref_field,
-            program_field)
+            program_field, ref_program_field)
 
       if result is not None:
         self._updateFinalJsonString(statistic, {name: result}, is_last_item)
 
-      return (statistic, True) if is_last_item and result else (statistic, False)
+      completed = is_last_item and result is not None
+      return statistic, completed
 
   def _collectChoicesList(self, statistic, logic, fields=[], filter=None,
                           program_field=None, params={}):
@@ -231,13 +248,12 @@ class Logic(base.Logic):
 
     query_filter = {}
     if program_field:
-      query_filter = {program_field: statistic.scope}
+      query_filter = {program_field: self._getScopeKey(statistic)}
 
     query = logic.getQueryForFields(filter=query_filter)
 
-    next_key = None
-    if statistic.next_entity:
-      next_key = statistic.next_entity.key()
+    next_key = self._getNextKey(statistic)
+    if next_key:
       query.filter('__key__ > ', next_key)
 
     entities = query.fetch(self.BATCH_SIZE)
@@ -247,7 +263,7 @@ class Logic(base.Logic):
       result = choices
       json_to_update = 'choices_json'
     else:
-      new_choices = []
+      seen = set(choices)
 
       for entity in entities:
 
@@ -257,10 +273,11 @@ class Logic(base.Logic):
         for field in fields:
           entity = entity.__getattribute__(field)
 
-        new_choices.append(entity.key().id_or_name())
+        choice = entity.key().id_or_name()
+        if choice not in seen:
+          seen.add(choice)
+          choices.append(choice)
 
-      choices += new_choices
-      choices = list(set(choices))
       next_entity = entities[-1]
       result = None
       json_to_update = 'working_json'
@@ -276,62 +293,145 @@ class Logic(base.Logic):
     return result
 
 
-  def _collectNumber(self, statistic, model, fields, filter, program_field,
+  def _loadState(self, statistic, default):
+    """Returns the partial state of the item that is being collected.
+    """
+
+    if statistic.working_json:
+      return simplejson.loads(statistic.working_json)
+
+    return default
+
+  def _storeState(self, statistic, state):
+    """Stores the partial state of the item that is being collected.
+    """
+
+    properties = {
+        'working_json': simplejson.dumps(state),
+        'next_entity': None,
+        }
+
+    self.updateEntityProperties(statistic, properties, store=True)
+
+  def _countBatch(self, query, state, check=None, distinct_prop=None):
+    """Counts one batch of the entities of query, continuing at the cursor
+    stored in state.
+
+    Args:
+      query: the query to count the entities of
+      state: a dict with the 'count', 'cursor' and 'last' of the previous
+          batches, it is updated in place
+      check: if specified, only entities for which it returns True count
+      distinct_prop: if specified, query has to be ordered by this
+          property and only entities with a new value of it count
+
+    Returns:
+      True iff all entities have been counted.
+    """
+
+    if state.get('cursor'):
+      query.with_cursor(state['cursor'])
+
+    entities = query.fetch(self.BATCH_SIZE)
+
+    for entity in entities:
+      if check and not check(entity):
+        continue
+
+      if distinct_prop:
+        value = distinct_prop.get_value_for_datastore(entity)
+        if not value or str(value) == state.get('last'):
+          continue
+        state['last'] = str(value)
+
+      state['count'] += 1
+
+    state['cursor'] = query.cursor()
+
+    return len(entities) < self.BATCH_SIZE
+
+  def _collectNumber(self, statistic, logic, fields, filter, program_field,
                      params):
     """Collects one batch of data for "number" statistics.
+
+    Only a counter and a cursor are kept between batches. Entities are
+    fetched keys only if no filter is needed. If a single reference field
+    is specified, the distinct values of it are counted by ordering the
+    query on that field.
     """
 
-    choices = self._collectChoicesList(statistic, model, fields, filter,
-        program_field, params)
-    return len(choices) if choices is not None else None
+    if len(fields) > 1:
+      choices = self._collectChoicesList(statistic, logic, fields, filter,
+          program_field, params)
+      return len(choices) if choices is not None else None
+
+    query_filter = {}
+    if program_field:
+      query_filter = {program_field: self._getScopeKey(statistic)}
+
+    check = None
+    if filter and filter != self._defaultFilter:
+      check = lambda entity: filter(entity, params)
 
+    distinct_prop = None
+    if fields:
+      distinct_prop = getattr(logic.getModel(), fields[0])
+
+    keys_only = not check and not distinct_prop
+    query = logic.getQueryForFields(filter=query_filter, order=fields,
+                                    keys_only=keys_only)
+
+    state = self._loadState(statistic, {'count': 0})
+
+    if not self._countBatch(query, state, check, distinct_prop):
+      self._storeState(statistic, state)
+      return None
+
+    return state['count']
 
   def _collectAverage(self, statistic, logic, ref_logic, ref_field,
-                      program_field):
+                      program_field, ref_program_field=None):
     """Collects one batch of data for "average" statistics.
+
+    The entities of the program are counted keys only first, after which
+    the entities that refer to them are counted in a second pass over the
+    referencing model; every entity is read at most once. The referencing
+    entities are selected by ref_program_field, so they are assumed to
+    belong to the same program as the entities they refer to.
     """
 
-    if program_field:
-      filter = {program_field: statistic.scope}
-    else:
-      filter = {}
+    state = self._loadState(statistic,
+        {'phase': 'entities', 'count': 0, 'entities_num': 0})
 
-    query = logic.getQueryForFields(filter=filter)
+    scope_key = self._getScopeKey(statistic)
 
-    if statistic.next_entity:
-      next_key = statistic.next_entity.key()
-      query.filter('__key__ >= ', next_key)
-      partial_stats = simplejson.loads(statistic.working_json)
-    else:
-      next_key = None
-      partial_stats = {"sum": 0, "entities_num": 0}
+    if state['phase'] == 'entities':
+      query_filter = {program_field: scope_key} if program_field else {}
+      query = logic.getQueryForFields(filter=query_filter, keys_only=True)
 
-    entities = query.fetch(self.BATCH_SIZE + 1)
+      if self._countBatch(query, state):
+        state = {'phase': 'references', 'count': 0,
+                 'entities_num': state['count']}
 
-    if len(entities) == self.BATCH_SIZE + 1:
-      next_entity = entities.pop()
-    else:
-      next_entity = None
+      self._storeState(statistic, state)
+      return None
 
-    entities_num = int(partial_stats["entities_num"]) + len(entities)
-    sum = int(partial_stats["sum"])
+    query_filter = {}
+    if ref_program_field:
+      query_filter = {ref_program_field: scope_key}
+    query = ref_logic.getQueryForFields(filter=query_filter)
 
-    for entity in entities:
-      query = ref_logic.getQueryForFields(filter={ref_field: entity})
-      sum += len(query.fetch(1000))
-
-    if next_entity:
-      properties = {
-          "working_json": simplejson.dumps({
-              "sum": sum,
-              "entities_num": entities_num
-              }),
-          "next_entity": next_entity
-          }
-      self.updateEntityProperties(statistic, properties, store=True)
+    ref_prop = getattr(ref_logic.getModel(), ref_field)
+    check = lambda entity: ref_prop.get_value_for_datastore(entity)
+
+    if not self._countBatch(query, state, check):
+      self._storeState(statistic, state)
       return None
 
-    return float(sum) / float(entities_num)
+    if not state['entities_num']:
+      return 0.0
+
+    return float(state['count']) / float(state['entities_num'])
 
   def _collectPerField(self, statistic, logic, choices, selector,
                        transformer=None, filter=None, subsets=None,
@@ -352,9 +452,7 @@ class Logic(base.Logic):
 
     """
 
-    next_key = None
-    if statistic.next_entity:
-      next_key = statistic.next_entity.key()
+    next_key = self._getNextKey(statistic)
 
     query = logic.getQueryForFields()
 
@@ -362,7 +460,7 @@ class Logic(base.Logic):
     # are fetched
     program_field = params.get('program_field')
     if program_field:
-      query.filter(program_field +' = ', statistic.scope)
+      query.filter(program_field +' = ', self._getScopeKey(statistic))
 
     # if the next_key field is specified, it is not the first batch
     if next_key:
@@ -705,7 +803,7 @@ class Logic(base.Logic):
     desired_keyname = params.get('desired_keyname')
     if not desired_keyname:
       statistic = params.get('statistic')
-      desired_keyname = statistic.scope.key().id_or_name()
+      desired_keyname = self._getScopeKey(statistic).id_or_name()
       params['desired_keyname'] = desired_keyname
 
     program_field = params.get('program_field')
@@ -755,13 +853,19 @@ class Logic(base.Logic):
     if 'ref_logic' not in params:
       return False
 
-    logic = self.helper.getLogicForItem(params, 'ref_logic')
-    filter = {
-        params['ref_field']: entity.key()
-        }
-    ref_entity = logic.getForFields(filter=filter, unique=True)
+    # the referenced and no-referenced subsets check the same entity
+    referenced = params.setdefault('referenced', {})
+    key = entity.key()
+
+    if key not in referenced:
+      logic = self.helper.getLogicForItem(params, 'ref_logic')
+      filter = {
+          params['ref_field']: key
+          }
+      query = logic.getQueryForFields(filter=filter, keys_only=True)
+      referenced[key] = query.get() is not None
 
-    result = ref_entity is not None
+    result = referenced[key]
 
     no_ref = params.get('no_ref')
     if no_ref:
@@ -22,9 +22,7 @@ __authors__ = [
   ]
 
 
-import csv
 import logging
-import StringIO
 
 from google.appengine.api import memcache
 from google.appengine.ext import db
@@ -40,6 +38,7 @@ from soc.models import linkable
 
 from soc.logic import accounts
 from soc.logic import dicts
+from soc.logic import export
 
 from soc.views import helper
 from soc.views import out_of_band
@@ -544,14 +543,7 @@ class View(base.View):
     params['export_extension'] = '.csv'
     params['export_content_type'] = 'text/csv'
 
-    file_handler = StringIO.StringIO()
-    writer = csv.writer(file_handler, dialect='excel')
-
-    # encode the data to UTF-8 to ensure compatibiliy
-    for row in data:
-      writer.writerow(row)
-
-    data = file_handler.getvalue()
+    data = ''.join(export.encodeCSV(data))
     filename = statistic.link_id + '_' + statistic.calculated_on.isoformat('_')
 
     return self.download(request, data, filename, params)
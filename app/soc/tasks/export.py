@@ -0,0 +1,222 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tasks that write exports in the background.
+
+An export pages through the query of its exporter with a cursor. Every
+page is encoded and appended to the export as ExportChunk entities in the
+same transaction that stores the cursor of the next page, so a task that
+is interrupted or runs twice never writes a page twice.
+"""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+import logging
+
+from google.appengine.ext import db
+from google.appengine.ext.mapreduce import util
+from google.appengine.runtime import DeadlineExceededError
+
+from django import http
+
+from soc.logic import export as export_logic
+from soc.models.export import Export
+from soc.models.export import ExportChunk
+from soc.tasks import responses
+from soc.tasks.helper import error_handler
+from soc.tasks.helper.timekeeper import Timekeeper
+
+
+RUN_EXPORT_URL = '/tasks/export/run'
+
+# time an invocation may spend before it requeues itself, in milliseconds
+DEF_TIMELIMIT = 20000
+
+# maximum size of an ExportChunk, well below the limit for an entity
+MAX_CHUNK_SIZE = 900000
+
+
+def getDjangoURLPatterns():
+  """Returns the URL patterns for the tasks in this module.
+  """
+
+  patterns = [(r'tasks/export/run$', 'soc.tasks.export.runExport')]
+
+  return patterns
+
+
+def getExporter(export):
+  """Returns the Exporter of the View of export.
+  """
+
+  view = util.for_name(export.view)
+  return view.getParams()['exporter']
+
+
+def startExport(user, view_name, exporter, entity, format=export_logic.CSV):
+  """Creates an Export for entity and starts the task that writes it.
+
+  Args:
+    user: the User that requests the export
+    view_name: the dotted name of the View whose exporter is used
+    exporter: the Exporter of that View
+    entity: the entity to export
+    format: the format of the export, see soc.logic.export
+
+  Returns:
+    The new Export entity.
+  """
+
+  export = Export(user=user, view=view_name, entity_key=str(entity.key()),
+                  filename=exporter.getFilename(entity), format=format)
+  export.put()
+
+  _spawnExportTask(export)
+
+  return export
+
+
+def _spawnExportTask(export):
+  """Spawns a task that continues writing export.
+  """
+
+  context = {'export_key': str(export.key())}
+  responses.startTask(RUN_EXPORT_URL, context=context)
+
+
+def getChunks(export):
+  """Yields the content of export one chunk at a time.
+  """
+
+  query = ExportChunk.all().ancestor(export).order('__key__')
+
+  for chunk in query:
+    yield chunk.data
+
+
+def runExport(request, *args, **kwargs):
+  """Writes pages of an export until it is finished or time runs out.
+
+  Expects the following to be present in the POST dict:
+    export_key: the key of the Export to write
+  """
+
+  export_key = request.POST.get('export_key')
+  export = export_key and Export.get(export_key)
+
+  if not export:
+    return error_handler.logErrorAndReturnOK(
+        'Invalid export specified: %s' % export_key)
+
+  if export.status != 'running':
+    return http.HttpResponse()
+
+  entity = db.get(export.entity_key)
+  if not entity:
+    export.status = 'failed'
+    export.put()
+    return error_handler.logErrorAndReturnOK(
+        'The exported entity %s no longer exists' % export.entity_key)
+
+  timekeeper = Timekeeper(DEF_TIMELIMIT)
+
+  try:
+    exporter = getExporter(export)
+    while export.status == 'running':
+      timekeeper.ping()
+      export = _exportPage(export, exporter, entity)
+  except DeadlineExceededError:
+    _spawnExportTask(export)
+  except Exception:
+    logging.exception('Writing export %s failed' % export.key())
+    export = Export.get(export.key())
+    export.status = 'failed'
+    export.put()
+
+  return http.HttpResponse()
+
+
+def _exportPage(export, exporter, entity):
+  """Appends the next page of entities to export.
+
+  Returns:
+    The updated Export entity.
+  """
+
+  query = exporter.getQuery(entity)
+  if export.cursor:
+    query.with_cursor(export.cursor)
+
+  entities = query.fetch(exporter.page_size)
+  finished = len(entities) < exporter.page_size
+
+  columns = exporter.getColumns(entity)
+  rows = exporter.getRows(entity, entities)
+
+  parts = []
+
+  if not export.chunk_count:
+    parts.extend(export_logic.encodeHeader(exporter, entity, export.format))
+
+  parts.extend(export_logic.encodeRows(rows, columns, export.format,
+                                       first=not export.row_count))
+
+  if finished:
+    parts.extend(export_logic.encodeFooter(export.format))
+
+  return _appendChunks(export, ''.join(parts), query.cursor(),
+                       len(entities), finished)
+
+
+def _appendChunks(export, data, cursor, count, finished):
+  """Stores data as the next chunks of export together with the cursor.
+
+  Nothing is stored if another run of the task has already written the
+  page that starts at the cursor of export.
+
+  Returns:
+    The updated Export entity.
+  """
+
+  chunks = [data[i:i + MAX_CHUNK_SIZE]
+            for i in range(0, len(data), MAX_CHUNK_SIZE)]
+
+  def append_chunks_txn():
+    stored = Export.get(export.key())
+    if stored.cursor != export.cursor or stored.status != 'running':
+      return stored
+
+    to_put = []
+    for chunk in chunks:
+      key_name = '%08d' % stored.chunk_count
+      to_put.append(ExportChunk(parent=stored, key_name=key_name,
+                                data=db.Blob(chunk)))
+      stored.chunk_count += 1
+
+    stored.cursor = cursor
+    stored.row_count += count
+    if finished:
+      stored.status = 'finished'
+
+    to_put.append(stored)
+    db.put(to_put)
+
+    return stored
+
+  return db.run_in_transaction(append_chunks_txn)
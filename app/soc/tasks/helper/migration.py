@@ -0,0 +1,386 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sharded data migrations on top of the mapreduce library.
+
+A migration is a function that takes a batch of entities of one model and
+returns the entities that should be stored. It is declared with the
+migrate decorator:
+
+  @migration.migrate(student_logic, prefetch=['user'])
+  def convertStudents(entities):
+    ...
+    return new_students
+
+The entities of the model are split by key range over a number of shards
+that run in parallel. Each shard reads batch_size entities at a time,
+prefetches the specified references for the whole batch and stores the
+returned entities through the mutation pool of the mapreduce library,
+which writes them in large db.put calls. The mapreduce library records the
+position of every shard, so a shard that is interrupted resumes where it
+stopped. Entities that can not be migrated are recorded per shard in
+MigrationFailure entities and can be migrated again with retryFailures.
+"""
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+import logging
+
+from google.appengine.ext import db
+from google.appengine.ext import deferred
+from google.appengine.ext.mapreduce import context
+from google.appengine.ext.mapreduce import input_readers
+from google.appengine.ext.mapreduce import operation as op
+from google.appengine.ext.mapreduce import util
+from google.appengine.ext.mapreduce.control import start_map
+
+from django import http
+
+from soc.logic import references
+from soc.models.migration_failure import MigrationFailure
+
+
+# number of shards the entities of a migration are split into
+DEF_SHARD_COUNT = 8
+
+# number of entities that are migrated at once
+DEF_BATCH_SIZE = 100
+
+# base path of the mapreduce handlers, see app.yaml
+MAPREDUCE_BASE_PATH = '/mapreduce'
+
+# queue on which the shards are run
+QUEUE_NAME = 'migration'
+
+HANDLER_SPEC = 'soc.tasks.helper.migration.processBatch'
+READER_SPEC = 'soc.tasks.helper.migration.BatchInputReader'
+
+# name of the mapreduce parameter that holds the name of the migration
+MIGRATION_PARAM = 'migration'
+
+
+class BatchInputReader(input_readers.DatastoreInputReader):
+  """Input reader that yields the entities of a key range in batches.
+
+  A batch holds up to batch_size entities, so that the handler can do the
+  work for all of them at once.
+  """
+
+  def _iter_key_range(self, k_range):
+    """Yields the last key of every batch and the batch itself.
+    """
+
+    model = util.for_name(self._entity_kind)
+    cursor = None
+
+    while True:
+      query = k_range.make_ascending_query(model)
+      if cursor:
+        query.with_cursor(cursor)
+
+      results = query.fetch(limit=self._batch_size)
+      if not results:
+        break
+
+      yield results[-1].key(), results
+      cursor = query.cursor()
+
+
+class Migration(object):
+  """A sharded migration of the entities of the model of a logic.
+  """
+
+  def __init__(self, func, logic, prefetch=None,
+               shard_count=DEF_SHARD_COUNT, batch_size=DEF_BATCH_SIZE):
+    """Initializes the migration.
+
+    Args:
+      func: the function that migrates a batch of entities, it takes the
+          list of entities and returns the entities that should be stored
+      logic: the logic of the model of the entities to migrate
+      prefetch: the reference properties that are fetched for a whole batch
+      shard_count: the number of shards to run in parallel
+      batch_size: the number of entities passed to func at once
+    """
+
+    self.func = func
+    self.logic = logic
+    self.prefetch = prefetch or []
+    self.shard_count = shard_count
+    self.batch_size = batch_size
+
+    self.name = '%s.%s' % (func.__module__, func.__name__)
+    self.__doc__ = func.__doc__
+
+  def start(self, request=None, task_url=None):
+    """Starts the migration.
+
+    Has the signature of the starters of soc.tasks.updates.start_update,
+    the URL is not used as the shards are run by the mapreduce library.
+
+    Returns:
+      True iff the migration has been started
+    """
+
+    model = self.logic.getModel()
+
+    reader_parameters = {
+        'entity_kind': '%s.%s' % (model.__module__, model.__name__),
+        'batch_size': self.batch_size,
+        }
+
+    mapreduce_parameters = {
+        MIGRATION_PARAM: self.name,
+        }
+
+    mapreduce_id = start_map(self.name, HANDLER_SPEC, READER_SPEC,
+                             reader_parameters, self.shard_count,
+                             mapreduce_parameters=mapreduce_parameters,
+                             base_path=MAPREDUCE_BASE_PATH,
+                             queue_name=QUEUE_NAME)
+
+    logging.info('Started migration %s as %s' % (self.name, mapreduce_id))
+
+    return True
+
+  def __call__(self, request, *args, **kwargs):
+    """Starts the migration from a request.
+
+    Allows a migration to be used as the runner of an update option.
+    """
+
+    self.start(request)
+    return http.HttpResponse('Ok')
+
+  def process(self, entities):
+    """Migrates entities and returns the entities that should be stored.
+    """
+
+    references.prefetch(entities, self.prefetch, model=self.logic.getModel())
+
+    return self.func(entities) or []
+
+  def processEach(self, entities):
+    """Migrates entities one by one.
+
+    Returns:
+      A tuple with the entities that should be stored and a list of
+      (key, error) pairs for the entities that could not be migrated.
+    """
+
+    to_put = []
+    failed = []
+
+    for entity in entities:
+      try:
+        to_put.extend(self.process([entity]))
+      except Exception, exception:
+        logging.exception(exception)
+        failed.append((entity.key(), str(exception)))
+
+    return to_put, failed
+
+
+def migrate(logic, **options):
+  """Decorator that turns a function into a sharded Migration.
+
+  Args:
+    logic: the logic of the model of the entities to migrate
+    options: the keyword arguments for Migration
+  """
+
+  def wrapper(func):
+    return Migration(func, logic, **options)
+
+  return wrapper
+
+
+def getCorresponding(entities, fields, model):
+  """Returns the entities of model that correspond to references.
+
+  Conversions replace a reference to an entity with a reference to the
+  entity of another model that has the same key name. The entities are
+  retrieved with one batch get for all entities and fields, instead of a
+  get per reference.
+
+  Args:
+    entities: the entities that hold the references
+    fields: the names of the ReferenceProperties and ListProperties of keys
+    model: the model of the corresponding entities
+
+  Returns:
+    A dictionary mapping key names to the corresponding entities, key names
+    without a corresponding entity are left out.
+  """
+
+  if not entities:
+    return {}
+
+  entity_model = entities[0].__class__
+  key_names = set()
+
+  for field in fields:
+    prop = getattr(entity_model, field)
+
+    for entity in entities:
+      value = prop.get_value_for_datastore(entity)
+      if isinstance(value, list):
+        key_names.update(i.id_or_name() for i in value)
+      elif value:
+        key_names.add(value.id_or_name())
+
+  key_names = list(key_names)
+  corresponding = model.get_by_key_name(key_names)
+
+  return dict((key_name, entity) for key_name, entity
+              in zip(key_names, corresponding) if entity)
+
+
+def getProperties(entity):
+  """Returns a dictionary with the values of the properties of entity.
+
+  References are returned as keys, so that copying the properties of an
+  entity does not retrieve the entities it refers to.
+  """
+
+  properties = {}
+
+  for name, prop in entity.properties().iteritems():
+    if isinstance(prop, db.ReferenceProperty):
+      properties[name] = prop.get_value_for_datastore(entity)
+    else:
+      properties[name] = getattr(entity, name)
+
+  return properties
+
+
+def getKeyName(entity, field):
+  """Returns the key name of the entity referenced by field, or None.
+
+  The referenced entity is not retrieved.
+  """
+
+  value = getattr(entity.__class__, field).get_value_for_datastore(entity)
+  return value.id_or_name() if value else None
+
+
+def _getMigration(name):
+  """Returns the migration with the specified dotted name.
+  """
+
+  migration = util.for_name(name)
+  if not isinstance(migration, Migration):
+    raise TypeError('%s is not a migration' % name)
+
+  return migration
+
+
+def recordFailures(migration, mapreduce_id, shard_id, failed):
+  """Records the entities a shard of a migration failed to migrate.
+
+  Args:
+    migration: the Migration that failed
+    mapreduce_id: the id of the run of the migration
+    shard_id: the id of the shard
+    failed: a list of (key, error) pairs
+  """
+
+  key_name = '%s/%s' % (mapreduce_id, shard_id)
+
+  def record_failures_txn():
+    record = MigrationFailure.get_by_key_name(key_name)
+    if not record:
+      record = MigrationFailure(key_name=key_name, migration=migration.name,
+                                mapreduce_id=mapreduce_id)
+
+    for key, error in failed:
+      if key in record.failed_keys:
+        continue
+      record.failed_keys.append(key)
+      record.errors.append(error)
+
+    record.put()
+
+  db.run_in_transaction(record_failures_txn)
+
+
+def processBatch(entities):
+  """Mapreduce handler that migrates a batch of entities.
+
+  When the batch fails as a whole, the entities are migrated one by one
+  and only the ones that fail are recorded.
+  """
+
+  ctx = context.get()
+  migration = _getMigration(ctx.mapreduce_spec.params[MIGRATION_PARAM])
+
+  try:
+    to_put = migration.process(entities)
+    failed = []
+  except Exception, exception:
+    logging.exception(exception)
+    to_put, failed = migration.processEach(entities)
+
+  if failed:
+    recordFailures(migration, ctx.mapreduce_id, ctx.shard_id, failed)
+    yield op.counters.Increment('failed', len(failed))
+
+  for entity in to_put:
+    yield op.db.Put(entity)
+
+  yield op.counters.Increment('migrated', len(entities) - len(failed))
+
+
+def retryFailures(mapreduce_id):
+  """Migrates the entities that a run of a migration failed to migrate.
+
+  Meant to be deferred once the problem that made them fail is fixed.
+  Entities that fail again stay recorded.
+
+  Args:
+    mapreduce_id: the id of the run of the migration
+  """
+
+  query = MigrationFailure.all().filter('mapreduce_id', mapreduce_id)
+
+  for record in query:
+    migration = _getMigration(record.migration)
+
+    errors = dict(zip(record.failed_keys, record.errors))
+    entities = [i for i in db.get(record.failed_keys) if i]
+
+    to_put, failed = migration.processEach(entities)
+    db.put(to_put)
+
+    if failed:
+      record.failed_keys = [key for key, _ in failed]
+      record.errors = [error for _, error in failed]
+      record.put()
+    else:
+      record.delete()
+
+    logging.info('Migrated %d of %d failed entities of %s' % (
+        len(entities) - len(failed), len(errors), record.migration))
+
+
+def startRetryFailures(mapreduce_id):
+  """Defers retryFailures for the specified run of a migration.
+  """
+
+  deferred.defer(retryFailures, mapreduce_id, _queue=QUEUE_NAME)
@@ -14,7 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Task to send out an email message.
+"""Tasks to send out email messages.
 """
 
 __authors__ = [
@@ -27,6 +27,7 @@ import logging
 from google.appengine.api import mail
 from google.appengine.api import taskqueue
 from google.appengine.ext import db
+from google.appengine.runtime import DeadlineExceededError
 from google.appengine.runtime.apiproxy_errors import OverQuotaError
 
 from django.utils import simplejson
@@ -34,14 +35,26 @@ from django.utils import simplejson
 from soc.models import email
 from soc.tasks import responses
 from soc.tasks.helper import error_handler
+from soc.tasks.helper.timekeeper import Timekeeper
 
 
 SEND_MAIL_URL = '/tasks/mail/send_mail'
 
+SEND_MAIL_BATCH_URL = '/tasks/mail/send_mail_batch'
+
+# the number of messages that are stored in a single EmailBatch
+MAIL_BATCH_SIZE = 100
+
+# the time in milliseconds a task that sends a batch may take
+MAIL_BATCH_TIMELIMIT = 20000
+
+
 def getDjangoURLPatterns():
   """Returns the URL patterns for the tasks in this module.
   """
-  patterns = [(r'tasks/mail/send_mail$', 'soc.tasks.mailer.sendMail')]
+  patterns = [
+      (r'tasks/mail/send_mail$', 'soc.tasks.mailer.sendMail'),
+      (r'tasks/mail/send_mail_batch$', 'soc.tasks.mailer.sendMailBatch')]
   return patterns
 
 
@@ -65,6 +78,103 @@ def spawnMailTask(context):
   db.RunInTransaction(txn)
 
 
+def spawnMailBatch(contexts):
+  """Spawns Tasks that send out an email for each of the given dictionaries.
+
+  The contexts are stored in EmailBatch entities of at most MAIL_BATCH_SIZE
+  messages, and a single Task is enqueued for each of those.
+  """
+  batches = []
+  for i in range(0, len(contexts), MAIL_BATCH_SIZE):
+    batch_contexts = contexts[i:i+MAIL_BATCH_SIZE]
+    batches.append(email.EmailBatch(contexts=simplejson.dumps(batch_contexts)))
+
+  for batch_entity in batches:
+    def txn():
+      """Transaction to ensure that a task get enqueued for each batch stored.
+      """
+      batch_entity.put()
+
+      task_params = {'batch_key': batch_entity.key()}
+      new_task = taskqueue.Task(params=task_params, url=SEND_MAIL_BATCH_URL,
+                                countdown=5)
+      new_task.add(queue_name='mail', transactional=True)
+
+    db.RunInTransaction(txn)
+
+
+def _loadContext(json_context):
+  """Returns the EmailMessage keyword arguments from a loaded JSON context.
+  """
+  context = {}
+  for key, value in json_context.iteritems():
+    # If we don't do this python will complain about kwargs not being
+    # strings.
+    context[str(key)] = value
+
+  return context
+
+
+def sendMailBatch(request):
+  """Sends out the emails of an EmailBatch that is stored in the datastore.
+
+  The messages which have been sent are recorded in the batch, so a repeated
+  task does not send them again. The batch is deleted when all messages are
+  sent.
+
+  The POST request should contain the following entries:
+    batch_key: Datastore key for an EmailBatch entity.
+  """
+  post_dict = request.POST
+
+  batch_key = post_dict.get('batch_key', None)
+
+  if not batch_key:
+    return error_handler.logErrorAndReturnOK('No email batch key specified')
+
+  batch_entity = email.EmailBatch.get(batch_key)
+
+  if not batch_entity:
+    return error_handler.logErrorAndReturnOK(
+        'No email batch entity found for key %s' %batch_key)
+
+  timekeeper = Timekeeper(MAIL_BATCH_TIMELIMIT)
+
+  contexts = simplejson.loads(batch_entity.contexts)
+  sent = set(batch_entity.sent)
+  pending = [i for i in range(len(contexts)) if i not in sent]
+
+  try:
+    for remain, index in timekeeper.iterate(pending):
+      context = _loadContext(contexts[index])
+      message = mail.EmailMessage(**context)
+
+      try:
+        message.check_initialized()
+        message.send()
+      except mail.Error, exception:
+        # skip the message, retrying it would not help
+        logging.error('Not sending message %d of batch %s: %s',
+                      index, batch_key, exception)
+
+      sent.add(index)
+
+  except (DeadlineExceededError, OverQuotaError):
+    # continue with the rest in a new attempt
+    return responses.repeatTask()
+  finally:
+    # record the progress however the attempt ends, so that the messages
+    # which have been sent are not sent again
+    if len(sent) < len(contexts) and len(sent) > len(batch_entity.sent):
+      batch_entity.sent = sorted(sent)
+      batch_entity.put()
+
+  batch_entity.delete()
+
+  # all mails of the batch successfully sent
+  return responses.terminateTask()
+
+
 def sendMail(request):
   """Sends out an email that is stored in the datastore.
 
@@ -85,13 +195,7 @@ def sendMail(request):
         'No email entity found for key %s' %mail_key)
 
   # construct the EmailMessage from the given context
-  loaded_context = simplejson.loads(mail_entity.context)
-
-  context = {}
-  for key, value in loaded_context.iteritems():
-    # If we don't do this python will complain about kwargs not being
-    # strings.
-    context[str(key)] = value
+  context = _loadContext(simplejson.loads(mail_entity.context))
 
   logging.info('Sending %s' %context)
   message = mail.EmailMessage(**context)
@@ -15,6 +15,10 @@
 # limitations under the License.
 
 """The module conversion updates are defined in this module.
+
+The conversions are sharded migrations, see soc.tasks.helper.migration.
+Each of them takes a batch of entities and returns the entities that
+should be stored.
 """
 
 __authors__ = [
@@ -24,9 +28,6 @@ __authors__ = [
 
 
 from google.appengine.api import taskqueue
-from google.appengine.ext import db
-
-from django.http import HttpResponse
 
 from soc.logic.models.survey import logic as survey_logic
 from soc.logic.models.survey_record import logic as record_logic
@@ -38,8 +39,7 @@ from soc.logic.models.program import logic as program_logic
 from soc.logic.models.student import logic as student_logic
 from soc.logic.models.timeline import logic as timeline_logic
 
-from soc.tasks.helper import decorators
-from soc.tasks.helper import error_handler
+from soc.tasks.helper import migration
 
 from soc.modules.gsoc.logic.models.survey import grading_logic as \
     grading_survey_logic
@@ -56,9 +56,12 @@ from soc.modules.gsoc.logic.models.student_project import logic as \
     student_project_logic
 from soc.modules.gsoc.logic.models.student_proposal import logic as \
     student_proposal_logic
-
-# batch size to use when going through the entities
-DEF_BATCH_SIZE = 10
+from soc.modules.gsoc.models.mentor import GSoCMentor
+from soc.modules.gsoc.models.org_admin import GSoCOrgAdmin
+from soc.modules.gsoc.models.organization import GSoCOrganization
+from soc.modules.gsoc.models.program import GSoCProgram
+from soc.modules.gsoc.models.student import GSoCStudent
+from soc.modules.gsoc.models.timeline import GSoCTimeline
 
 
 def startUpdateWithUrl(request, task_url):
@@ -78,83 +81,62 @@ def startUpdateWithUrl(request, task_url):
   return True
 
 
-@decorators.iterative_task(program_logic)
-def runProgramConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts Programs into GSoCPrograms.
+def _getKeys(keys, corresponding):
+  """Returns the keys of the corresponding entities for a list of keys.
 
-  Args:
-    request: Django Request object
-    entities: list of Program entities to convert
-    context: the context of this task
+  Raises KeyError if an entity does not have a corresponding entity.
   """
 
-  from soc.modules.gsoc.models.program import GSoCProgram
+  return [corresponding[i.id_or_name()].key() for i in keys]
+
+
+@migration.migrate(program_logic)
+def runProgramConversionUpdate(entities):
+  """Converts Programs into GSoCPrograms.
 
-  # get all the properties that are part of each Programs
-  program_model = program_logic.getModel()
-  program_properties = program_model.properties().keys()
+  Args:
+    entities: list of Program entities to convert
+  """
 
-  # use this to store all the new GSoCPrograms
   gsoc_programs = []
 
   for entity in entities:
-    gsoc_properties = {}
-
-    for program_property in program_properties:
-      # copy over all the information from the program entity
-      gsoc_properties[program_property] = getattr(entity, program_property)
+    # copy over all the information from the program entity
+    gsoc_properties = migration.getProperties(entity)
 
-    # create the new GSoCProgram entity and prepare it to be stored
     gsoc_program_entity = GSoCProgram(key_name=entity.key().name(),
                                       **gsoc_properties)
     gsoc_programs.append(gsoc_program_entity)
 
-  # store all the new GSoCPrograms
-  db.put(gsoc_programs)
-
-  # task completed, return
-  return
+  return gsoc_programs
 
 
-@decorators.iterative_task(org_logic)
-def runOrgConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts Organizations into GSoCOrganizations.
+@migration.migrate(org_logic)
+def runOrgConversionUpdate(entities):
+  """Converts Organizations into GSoCOrganizations.
 
   Also updates the RankerRoots that are associated with the Organization.
 
   Args:
-    request: Django Request object
     entities: list of Organization entities to convert
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.logic.models.program import logic as gsoc_program_logic
   from soc.modules.gsoc.logic.models.ranker_root import logic as \
       ranker_root_logic
-  from soc.modules.gsoc.models.organization import GSoCOrganization
 
-  # get all the properties that are part of each Organization
-  org_model = org_logic.getModel()
-  org_properties = org_model.properties().keys()
+  gsoc_programs = migration.getCorresponding(entities, ['scope'], GSoCProgram)
 
-  # use this to store all the new GSoCOrganization
   gsoc_orgs = []
   gsoc_rankers = []
 
   for entity in entities:
-    gsoc_properties = {}
-
-    for org_property in org_properties:
-      # copy over all the information from the Organization entity
-      gsoc_properties[org_property] = getattr(entity, org_property)
+    # copy over all the information from the Organization entity
+    gsoc_properties = migration.getProperties(entity)
 
-    # get the Program key belonging to the old Organization
-    program_key = entity.scope.key().id_or_name()
-    # get the new GSoCProgram and set it as scope for the GSoCOrganzation
-    gsoc_program = gsoc_program_logic.getFromKeyName(program_key)
-    gsoc_properties['scope'] = gsoc_program
+    # set the new GSoCProgram as scope for the GSoCOrganzation
+    gsoc_properties['scope'] = gsoc_programs.get(
+        migration.getKeyName(entity, 'scope'))
 
-    # create the new GSoCOrganization entity and prepare it to be stored
     gsoc_org_entity = GSoCOrganization(key_name=entity.key().name(),
                                        **gsoc_properties)
     gsoc_orgs.append(gsoc_org_entity)
@@ -165,316 +147,214 @@ def runOrgConversionUpdate(request, entities, context, *args, **kwargs):
 
     for ranker in rankers:
       ranker.scope = gsoc_org_entity
-      # append the adjusted ranker
       gsoc_rankers.append(ranker)
 
-  # store all the new GSoCOrganizations
-  db.put(gsoc_orgs)
-  # store all the new rankers
-  db.put(gsoc_rankers)
+  return gsoc_orgs + gsoc_rankers
 
-  # task completed, return
-  return
 
-
-@decorators.iterative_task(org_admin_logic)
-def runOrgAdminConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts OrgAdmins into GSoCOrgAdmins.
+@migration.migrate(org_admin_logic)
+def runOrgAdminConversionUpdate(entities):
+  """Converts OrgAdmins into GSoCOrgAdmins.
 
   Args:
-    request: Django Request object
     entities: list of OrgAdmin entities to convert
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.models.org_admin import GSoCOrgAdmin
-
-  return _runOrgRoleConversionUpdate(entities, org_admin_logic, GSoCOrgAdmin)
+  return _runOrgRoleConversionUpdate(entities, GSoCOrgAdmin)
 
 
-@decorators.iterative_task(mentor_logic)
-def runMentorConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts Mentors into GSoCMentors.
+@migration.migrate(mentor_logic)
+def runMentorConversionUpdate(entities):
+  """Converts Mentors into GSoCMentors.
 
   Args:
-    request: Django Request object
     entities: list of Mentor entities to convert
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.models.mentor import GSoCMentor
-
-  return _runOrgRoleConversionUpdate(entities, mentor_logic, GSoCMentor)
+  return _runOrgRoleConversionUpdate(entities, GSoCMentor)
 
 
-def _runOrgRoleConversionUpdate(entities, from_role_logic, to_role_model):
-  """AppEngine Task that converts a normal Organization Role into a
-  GSoCOrganization Role.
+def _runOrgRoleConversionUpdate(entities, to_role_model):
+  """Converts normal Organization Roles into GSoCOrganization Roles.
 
   Args:
     entities: Role entities to convert
-    from_role_logic: the Role Logic instance where to convert from
     to_role_model: the role Model class where to convert to
   """
 
-  from soc.modules.gsoc.logic.models.organization import logic as \
-      gsoc_org_logic
-  from soc.modules.gsoc.logic.models.program import logic as gsoc_program_logic
+  gsoc_programs = migration.getCorresponding(
+      entities, ['program'], GSoCProgram)
+  gsoc_orgs = migration.getCorresponding(
+      entities, ['scope'], GSoCOrganization)
 
-  # get all the properties that are part of each Organization's Role
-  role_model = from_role_logic.getModel()
-  role_properties = role_model.properties().keys()
-
-  # use this to store all the new Roles
   gsoc_roles = []
 
   for entity in entities:
-    gsoc_properties = {}
-
-    for role_property in role_properties:
-      # copy over all the information from the Role entity
-      gsoc_properties[role_property] = getattr(entity, role_property)
-
-    # get the Program key belonging to the old Role
-    program_key = entity.program.key().id_or_name()
-    # get the new GSoCProgram and set it for the Role
-    gsoc_program = gsoc_program_logic.getFromKeyName(program_key)
-    gsoc_properties['program'] = gsoc_program
+    # copy over all the information from the Role entity
+    gsoc_properties = migration.getProperties(entity)
 
-    # get the Organization key belonging to the old Role
-    org_key = entity.scope.key().id_or_name()
-    # get the new GSoCOrganization and set it as scope for the Role
-    gsoc_org = gsoc_org_logic.getFromKeyName(org_key)
-    gsoc_properties['scope'] = gsoc_org
+    # set the new GSoCProgram and GSoCOrganization for the Role
+    gsoc_properties['program'] = gsoc_programs.get(
+        migration.getKeyName(entity, 'program'))
+    gsoc_properties['scope'] = gsoc_orgs.get(
+        migration.getKeyName(entity, 'scope'))
 
-    # create the new GSoC Role entity and prepare it to be stored
     gsoc_role_entity = to_role_model(key_name=entity.key().name(),
-                                        **gsoc_properties)
+                                     **gsoc_properties)
     gsoc_roles.append(gsoc_role_entity)
 
-  # store all the new GSoC Roles
-  db.put(gsoc_roles)
-
-  # task completed, return
-  return
+  return gsoc_roles
 
 
-@decorators.iterative_task(student_logic)
-def runStudentConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts Students into GSoCStudents.
+@migration.migrate(student_logic)
+def runStudentConversionUpdate(entities):
+  """Converts Students into GSoCStudents.
 
   Args:
-    request: Django Request object
     entities: list of Student entities to convert
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.logic.models.program import logic as gsoc_program_logic
-  from soc.modules.gsoc.models.student import GSoCStudent
-
-  # get all the properties that are part of each Student
-  student_model = student_logic.getModel()
-  student_properties = student_model.properties().keys()
+  gsoc_programs = migration.getCorresponding(entities, ['scope'], GSoCProgram)
 
-  # use this to store all the new GSoCStudents
   gsoc_students = []
 
   for entity in entities:
-    gsoc_properties = {}
-
-    for student_property in student_properties:
-      # copy over all the information from the Student entity
-      gsoc_properties[student_property] = getattr(entity, student_property)
+    # copy over all the information from the Student entity
+    gsoc_properties = migration.getProperties(entity)
 
-    # get the Program key belonging to the old Student
-    program_key = entity.scope.key().id_or_name()
-    # get the new GSoCProgram and set it as scope for the GSoCStudent
-    gsoc_program = gsoc_program_logic.getFromKeyName(program_key)
-    gsoc_properties['scope'] = gsoc_program
+    # set the new GSoCProgram as scope for the GSoCStudent
+    gsoc_properties['scope'] = gsoc_programs.get(
+        migration.getKeyName(entity, 'scope'))
 
-    # create the new GSoCStudent entity and prepare it to be stored
     gsoc_student_entity = GSoCStudent(key_name=entity.key().name(),
                                       **gsoc_properties)
     gsoc_students.append(gsoc_student_entity)
 
-  # store all the new GSoCStudents
-  db.put(gsoc_students)
+  return gsoc_students
 
-  # task completed, return
-  return
 
-
-@decorators.iterative_task(student_proposal_logic)
-def runStudentProposalUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates StudentProposal entities.
+@migration.migrate(student_proposal_logic)
+def runStudentProposalUpdate(entities):
+  """Updates StudentProposal entities.
 
   Args:
-    request: Django Request object
     entities: list of StudentProposal entities to update
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
-  from soc.modules.gsoc.logic.models.organization import logic as org_logic
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
-  from soc.modules.gsoc.logic.models.student import logic as student_logic
+  students = migration.getCorresponding(entities, ['scope'], GSoCStudent)
+  orgs = migration.getCorresponding(entities, ['org'], GSoCOrganization)
+  programs = migration.getCorresponding(entities, ['program'], GSoCProgram)
+  mentors = migration.getCorresponding(
+      entities, ['mentor', 'possible_mentors'], GSoCMentor)
 
   for entity in entities:
-    entity.scope = student_logic.getFromKeyName(
-        entity.scope.key().id_or_name())
-    entity.org = org_logic.getFromKeyName(entity.org.key().id_or_name())
-    entity.program = program_logic.getFromKeyName(
-        entity.program.key().id_or_name())
+    entity.scope = students.get(migration.getKeyName(entity, 'scope'))
+    entity.org = orgs.get(migration.getKeyName(entity, 'org'))
+    entity.program = programs.get(migration.getKeyName(entity, 'program'))
 
     if entity.mentor:
-      entity.mentor = mentor_logic.getFromKeyName(
-          entity.mentor.key().id_or_name())
+      entity.mentor = mentors.get(migration.getKeyName(entity, 'mentor'))
 
-    old_mentors = entity.possible_mentors
-    new_mentors = []
+    entity.possible_mentors = _getKeys(entity.possible_mentors, mentors)
 
-    for old_mentor in old_mentors:
-      new_mentor = mentor_logic.getFromKeyName(old_mentor.id_or_name())
-      new_mentors.append(new_mentor.key())
-
-    entity.possible_mentors = new_mentors
-
-  # store all StudentProposal
-  db.put(entities)
-
-  # task completed, return
-  return
+  return entities
 
 
-@decorators.iterative_task(review_logic)
-def runReviewUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates Review entities.
+@migration.migrate(review_logic)
+def runReviewUpdate(entities):
+  """Removes the reviewer from Review entities.
 
   Args:
-    request: Django Request object
     entities: list of Review entities to update
-    context: the context of this task
   """
 
   for entity in entities:
     entity.reviewer = None
 
-  # store all Reviews
-  db.put(entities)
-
-  # task completed, return
-  return
+  return entities
 
 
-@decorators.iterative_task(student_project_logic)
-def runStudentProjectUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates StudentProject entities.
+@migration.migrate(student_project_logic)
+def runStudentProjectUpdate(entities):
+  """Updates StudentProject entities.
 
   Args:
-    request: Django Request object
     entities: list of StudentProject entities to update
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
-  from soc.modules.gsoc.logic.models.organization import logic as org_logic
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
-  from soc.modules.gsoc.logic.models.student import logic as student_logic
+  orgs = migration.getCorresponding(entities, ['scope'], GSoCOrganization)
+  students = migration.getCorresponding(entities, ['student'], GSoCStudent)
+  programs = migration.getCorresponding(entities, ['program'], GSoCProgram)
+  mentors = migration.getCorresponding(
+      entities, ['mentor', 'additional_mentors'], GSoCMentor)
 
   for entity in entities:
-    entity.scope = org_logic.getFromKeyName(entity.scope.key().id_or_name())
-    entity.mentor = mentor_logic.getFromKeyName(
-        entity.mentor.key().id_or_name())
-    entity.student = student_logic.getFromKeyName(
-        entity.student.key().id_or_name())
-    entity.program = program_logic.getFromKeyName(
-        entity.program.key().id_or_name())
-
-    old_mentors = entity.additional_mentors
-    new_mentors = []
-
-    for old_mentor in old_mentors:
-      new_mentor = mentor_logic.getFromKeyName(old_mentor.id_or_name())
-      new_mentors.append(new_mentor.key())
+    entity.scope = orgs.get(migration.getKeyName(entity, 'scope'))
+    entity.mentor = mentors.get(migration.getKeyName(entity, 'mentor'))
+    entity.student = students.get(migration.getKeyName(entity, 'student'))
+    entity.program = programs.get(migration.getKeyName(entity, 'program'))
 
-    entity.additional_mentors = new_mentors
+    entity.additional_mentors = _getKeys(entity.additional_mentors, mentors)
 
-  # store all StudentProjects
-  db.put(entities)
-
-  # task completed, return
-  return
+  return entities
 
 
-@decorators.iterative_task(survey_logic)
-def runSurveyUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates Survey entities.
+@migration.migrate(survey_logic)
+def runSurveyUpdate(entities):
+  """Updates Survey entities.
 
   Args:
-    request: Django Request object
     entities: list of Survey entities to update
-    context: the context of this task
   """
 
   return _runSurveyUpdate(entities, survey_logic)
 
 
-@decorators.iterative_task(project_survey_logic)
-def runProjectSurveyUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates ProjectSurvey entities.
+@migration.migrate(project_survey_logic)
+def runProjectSurveyUpdate(entities):
+  """Updates ProjectSurvey entities.
 
   Args:
-    request: Django Request object
     entities: list of ProjectSurvey entities to update
-    context: the context of this task
   """
 
   return _runSurveyUpdate(entities, project_survey_logic)
 
 
-@decorators.iterative_task(grading_survey_logic)
-def runGradingProjectSurveyUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates GradingProjectSurvey entities.
+@migration.migrate(grading_survey_logic)
+def runGradingProjectSurveyUpdate(entities):
+  """Updates GradingProjectSurvey entities.
 
   Args:
-    request: Django Request object
     entities: list of GradingProjectSurvey entities to update
-    context: the context of this task
   """
 
   return _runSurveyUpdate(entities, grading_survey_logic)
 
 
 def _runSurveyUpdate(entities, logic):
-  """AppEngine Task that updates Survey entities.
+  """Creates the GSoCProgram Surveys for Program Surveys.
 
   Args:
     entities: list of Survey entities to update
     logic: concrete logic instance which the surveys are to be updated for
 
   Returns:
-    A list of pairs that maps the old surveys with the corresponding new ones.
+    The new surveys.
   """
 
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
-
-  # get all the properties that are part of each Document
   survey_model = logic.getModel()
-  survey_properties = survey_model.properties().keys()
+  programs = migration.getCorresponding(entities, ['scope'], GSoCProgram)
 
   new_surveys = []
 
   for entity in entities:
-    new_survey_properties = {}
-
-    for survey_property in survey_properties:
-      # copy over all the information from the Survey entity
-      new_survey_properties[survey_property] = getattr(entity,
-                                                       survey_property)
+    # copy over all the information from the Survey entity
+    new_survey_properties = migration.getProperties(entity)
 
     new_survey_properties['prefix'] = 'gsoc_program'
-    new_survey_properties['scope'] = program_logic.getFromKeyName(
-        entity.scope.key().id_or_name())
+    new_survey_properties['scope'] = programs.get(
+        migration.getKeyName(entity, 'scope'))
 
     new_survey_key = logic.getKeyNameFromFields(new_survey_properties)
     new_survey = survey_model(key_name=new_survey_key, **new_survey_properties)
@@ -484,34 +364,26 @@ def _runSurveyUpdate(entities, logic):
 
     new_surveys.append(new_survey)
 
-  # batch put the new Surveys
-  db.put(new_surveys)
-
-  # task completed, return
-  return
+  return new_surveys
 
 
-@decorators.iterative_task(record_logic)
-def runSurveyRecordUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates ProjectSurveyRecord entities.
+@migration.migrate(record_logic, prefetch=['survey'])
+def runSurveyRecordUpdate(entities):
+  """Updates SurveyRecord entities.
 
   Args:
-    request: Django Request object
     entities: list of SurveyRecord entities to update
-    context: the context of this task
   """
 
   return _runSurveyRecordUpdate(entities, survey_logic)
 
 
-@decorators.iterative_task(project_record_logic)
-def runProjectSurveyRecordUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates ProjectSurveyRecord entities.
+@migration.migrate(project_record_logic, prefetch=['survey'])
+def runProjectSurveyRecordUpdate(entities):
+  """Updates ProjectSurveyRecord entities.
 
   Args:
-    request: Django Request object
     entities: list of ProjectSurveyRecord entities to update
-    context: the context of this task
   """
 
   entities = _runSurveyRecordUpdate(entities, project_survey_logic)
@@ -519,15 +391,12 @@ def runProjectSurveyRecordUpdate(request, entities, context, *args, **kwargs):
   return _runOrgSurveyRecordUpdate(entities)
 
 
-@decorators.iterative_task(grading_record_logic)
-def runGradingProjectSurveyRecordUpdate(request, entities, context, *args, 
-                                        **kwargs):
-  """AppEngine Task that updates GradingProjectSurveyRecord entities.
+@migration.migrate(grading_record_logic, prefetch=['survey'])
+def runGradingProjectSurveyRecordUpdate(entities):
+  """Updates GradingProjectSurveyRecord entities.
 
   Args:
-    request: Django Request object
     entities: list of GradingProjectSurveyRecord entities to update
-    context: the context of this task
   """
 
   entities = _runSurveyRecordUpdate(entities, grading_survey_logic)
@@ -536,80 +405,63 @@ def runGradingProjectSurveyRecordUpdate(request, entities, context, *args,
 
 
 def _runSurveyRecordUpdate(entities, survey_logic):
-  """AppEngine Task that updates SurveyRecord entities.
+  """Updates SurveyRecord entities to point to the new Surveys.
 
   Args:
     entities: list of SurveyRecord entities to update
     survey_logic: survey specific logic to get a new survey reference
   """
 
-  cached_surveys = {}
+  key_names = set()
 
   for entity in entities:
-
     # update only the entities which has 'program' prefix
-    if not entity.survey.prefix == 'program':
-      continue
-
-    survey_key_name = 'gsoc_' + entity.survey.key().id_or_name()
-    survey_entity = cached_surveys.get(survey_key_name)
+    if entity.survey.prefix == 'program':
+      key_names.add('gsoc_' + entity.survey.key().id_or_name())
 
-    if not survey_entity:
-      survey_entity = survey_logic.getFromKeyName(survey_key_name)
-      cached_surveys[survey_key_name] = survey_entity
+  key_names = list(key_names)
+  surveys = dict(zip(key_names,
+                     survey_logic.getModel().get_by_key_name(key_names)))
 
-    entity.survey = survey_entity
+  for entity in entities:
+    if not entity.survey.prefix == 'program':
+      continue
 
-  db.put(entities)
+    entity.survey = surveys['gsoc_' + entity.survey.key().id_or_name()]
 
-  # task completed, return
   return entities
 
 
 def _runOrgSurveyRecordUpdate(entities):
-  """AppEngine Task that updates SurveyRecord entities which refer to
-  an organization. In particular, these are GradingProjectSurvey and
-  ProjectSurvey records.
+  """Updates SurveyRecord entities which refer to an organization.
+
+  In particular, these are GradingProjectSurvey and ProjectSurvey records.
 
   Args:
     entities: list of SurveyRecord entities to update
   """
 
-  from soc.modules.gsoc.logic.models.organization import logic as org_logic
-
-  cached_orgs = {}
+  orgs = migration.getCorresponding(entities, ['org'], GSoCOrganization)
 
   for entity in entities:
-    org_key_name = entity.org.key().id_or_name()
-    org_entity = cached_orgs.get(org_key_name)
+    entity.org = orgs.get(migration.getKeyName(entity, 'org'))
 
-    if not org_entity:
-      org_entity = org_logic.getFromKeyName(org_key_name)
-      cached_orgs[org_key_name] = org_entity
-
-    entity.org = org_entity
-
-  db.put(entities)
-
-  # task completed, return
   return entities
 
 
-@decorators.iterative_task(grading_survey_group_logic)
-def runGradingSurveyGroupUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates GradingSurveyGroup entities.
+@migration.migrate(grading_survey_group_logic,
+                   prefetch=['grading_survey', 'student_survey'])
+def runGradingSurveyGroupUpdate(entities):
+  """Updates GradingSurveyGroup entities.
 
   Args:
-    request: Django Request object
-    entities: list of Document entities to update
-    context: the context of this task
+    entities: list of GradingSurveyGroup entities to update
   """
 
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
+  programs = migration.getCorresponding(entities, ['scope'], GSoCProgram)
 
   for entity in entities:
-    entity.scope = program_logic.getFromKeyName(
-        entity.scope.key().id_or_name())
+    entity.scope = programs.get(migration.getKeyName(entity, 'scope'))
 
     survey_attrs = ['grading_survey', 'student_survey']
     for survey_attr in survey_attrs:
@@ -629,121 +481,91 @@ def runGradingSurveyGroupUpdate(request, entities, context, *args, **kwargs):
       new_survey = logic.getFromKeyName(survey_key_name)
       setattr(entity, survey_attr, new_survey)
 
-  db.put(entities)
-
-  # task completed, return
-  return
+  return entities
 
 
-@decorators.iterative_task(document_logic)
-def runDocumentUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that updates Document entities.
+@migration.migrate(document_logic)
+def runDocumentUpdate(entities):
+  """Updates the prefixes of Document entities.
 
   Args:
-    request: Django Request object
     entities: list of Document entities to update
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.logic.models.organization import logic as org_logic
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
+  # we do not want to convert the other Documents
+  entities = [i for i in entities if i.prefix in ['org', 'program']]
+
+  org_key_names = [i.scope_path for i in entities if i.prefix == 'org']
+  program_key_names = [i.scope_path for i in entities
+                       if i.prefix == 'program']
+
+  presences = {
+      'org': dict(zip(org_key_names,
+                      GSoCOrganization.get_by_key_name(org_key_names))),
+      'program': dict(zip(program_key_names,
+                          GSoCProgram.get_by_key_name(program_key_names))),
+      }
 
-  # get all the properties that are part of each Document
   document_model = document_logic.getModel()
-  document_properties = document_model.properties().keys()
 
-  # use this to store all the new Documents and Presences
   documents = []
-  presences = []
+  home_presences = []
 
   for entity in entities:
+    # copy over all the information from the Document entity
+    new_document_properties = migration.getProperties(entity)
 
-    if entity.prefix not in ['org', 'program']:
-      # we do not want to convert this Document
-      continue
-
-    new_document_properties = {}
-
-    for document_property in document_properties:
-      # copy over all the information from the Document entity
-      new_document_properties[document_property] = getattr(entity,
-                                                           document_property)
-
-    if entity.prefix == 'org':
-      new_document_prefix = 'gsoc_org'
-      presence_entity = org_logic.getFromKeyName(entity.scope_path)
-    elif entity.prefix == 'program':
-      new_document_prefix = 'gsoc_program'
-      presence_entity = program_logic.getFromKeyName(entity.scope_path)
+    new_document_prefix = 'gsoc_' + entity.prefix
+    presence_entity = presences[entity.prefix][entity.scope_path]
 
     new_document_properties['prefix'] = new_document_prefix
     new_document_properties['scope'] = presence_entity
-    new_document_properties['home_for'] = presence_entity if entity.home_for else None
+    new_document_properties['home_for'] = (
+        presence_entity if new_document_properties['home_for'] else None)
 
-    # create the new Document entity and prepare it to be stored
     new_document_entity = document_model(
         key_name=document_logic.getKeyNameFromFields(new_document_properties),
         **new_document_properties)
     documents.append(new_document_entity)
 
-    if entity.home_for:
+    if new_document_properties['home_for']:
       # update the presence for which this document was the home page
       presence_entity.home = new_document_entity
-      presences.append(presence_entity)
-
-  # store all the new Documents and updated Presences
-  db.put(documents)
-  db.put(presences)
+      home_presences.append(presence_entity)
 
-  # task completed, return
-  return
+  return documents + home_presences
 
 
-@decorators.iterative_task(timeline_logic)
-def runTimelineConversionUpdate(request, entities, context, *args, **kwargs):
-  """AppEngine Task that converts Timelines into GSoCTimelines.
+@migration.migrate(timeline_logic)
+def runTimelineConversionUpdate(entities):
+  """Converts Timelines into GSoCTimelines.
 
   It also updates all GSoCPrograms with a reference to the new GSoCTimeline.
 
   Args:
-    request: Django Request object
     entities: list of Timeline entities to convert
-    context: the context of this task
   """
 
-  from soc.modules.gsoc.models.timeline import GSoCTimeline
-  from soc.modules.gsoc.logic.models.program import logic as program_logic
-
-  # get all the properties that are part of each Timeline
-  timeline_model = timeline_logic.getModel()
-  timeline_properties = timeline_model.properties().keys()
+  key_names = [i.key().name() for i in entities]
+  gsoc_programs = dict(zip(key_names, GSoCProgram.get_by_key_name(key_names)))
 
-  # use this to store all the new GSoCTimelines and GSoCPrograms
   gsoc_timelines = []
-  gsoc_programs = []
+  programs = []
 
   for entity in entities:
-    gsoc_properties = {}
+    # copy over all the information from the timeline entity
+    gsoc_properties = migration.getProperties(entity)
 
-    for timeline_property in timeline_properties:
-      # copy over all the information from the timeline entity
-      gsoc_properties[timeline_property] = getattr(entity, timeline_property)
+    gsoc_program = gsoc_programs[entity.key().name()]
+    gsoc_properties['scope'] = GSoCProgram.scope.get_value_for_datastore(
+        gsoc_program)
 
-    gsoc_program = program_logic.getFromKeyName(entity.key().id_or_name())
-    gsoc_properties['scope'] = gsoc_program.scope
-
-    # create the new GSoCTimeline entity and prepare it to be stored
     gsoc_timeline_entity = GSoCTimeline(key_name=entity.key().name(),
                                         **gsoc_properties)
     gsoc_timelines.append(gsoc_timeline_entity)
 
-    # set the timeline for the GSoCProgram entity and prepare it for storage
+    # set the timeline for the GSoCProgram entity
     gsoc_program.timeline = gsoc_timeline_entity
-    gsoc_programs.append(gsoc_program)
-
-  # store all the new GSoCTimelines and GSoCPrograms
-  db.put(gsoc_timelines)
-  db.put(gsoc_programs)
+    programs.append(gsoc_program)
 
-  # task completed, return
-  return
+  return gsoc_timelines + programs
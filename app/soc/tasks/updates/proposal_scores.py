@@ -0,0 +1,56 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Update that stores the score aggregates of every GSoCProposal.
+"""
+
+
+from google.appengine.ext import db
+
+from soc.logic.models import base
+from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.models.score import GSoCScore
+from soc.tasks.helper import migration
+
+
+proposal_logic = base.Logic(model=GSoCProposal, id_based=True)
+
+
+@migration.migrate(proposal_logic)
+def runProposalScoresUpdate(entities):
+  """Recomputes score, nr_scores and the score of every author from the
+  GSoCScores of the proposals.
+
+  Args:
+    entities: list of GSoCProposal entities to update
+  """
+
+  to_put = []
+
+  for proposal in entities:
+    proposal.score = 0
+    proposal.nr_scores = 0
+    proposal.score_authors = []
+    proposal.score_values = []
+
+    for score in db.Query(GSoCScore).ancestor(proposal):
+      author_key = GSoCScore.author.get_value_for_datastore(score)
+      proposal.setScoreFor(author_key, score.value)
+
+    # the score is part of the summary as well
+    to_put.extend([proposal, proposal.getSummary()])
+
+  return to_put
@@ -0,0 +1,41 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Update that stores a GSoCProposalSummary for every GSoCProposal.
+"""
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+from soc.logic.models import base
+from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.tasks.helper import migration
+
+
+proposal_logic = base.Logic(model=GSoCProposal, id_based=True)
+
+
+@migration.migrate(proposal_logic)
+def runProposalSummaryUpdate(entities):
+  """Creates or refreshes the summaries of proposals.
+
+  Args:
+    entities: list of GSoCProposal entities to summarize
+  """
+
+  return [i.getSummary() for i in entities]
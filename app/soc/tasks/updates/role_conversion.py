@@ -25,22 +25,27 @@ __authors__ = [
 import gae_django
 
 from google.appengine.ext import db
-from google.appengine.ext import deferred
-from google.appengine.runtime import DeadlineExceededError
 
 from django import http
 
-from soc.models.host import Host
+from soc.logic import references
+from soc.logic.models.host import logic as host_logic
 from soc.models.linkable import Linkable
 from soc.models.mentor import Mentor
 from soc.models.org_admin import OrgAdmin
 from soc.models.role import StudentInfo
-
+from soc.tasks.helper import migration
+
+from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
+from soc.modules.gsoc.logic.models.org_admin import logic as org_admin_logic
+from soc.modules.gsoc.logic.models.student import logic as student_logic
+from soc.modules.gsoc.logic.models.student_project import logic \
+    as student_project_logic
+from soc.modules.gsoc.logic.models.student_proposal import logic \
+    as student_proposal_logic
 from soc.modules.gsoc.models.mentor import GSoCMentor
-from soc.modules.gsoc.models.organization import GSoCOrganization
 from soc.modules.gsoc.models.org_admin import GSoCOrgAdmin
 from soc.modules.gsoc.models.profile import GSoCProfile
-from soc.modules.gsoc.models.program import GSoCProgram
 from soc.modules.gsoc.models.student import GSoCStudent
 from soc.modules.gsoc.models.student_project import StudentProject
 from soc.modules.gsoc.models.student_proposal import StudentProposal
@@ -80,51 +85,28 @@ def getDjangoURLPatterns():
   return patterns
 
 
-class HostUpdater(object):
-  """Class which is responsible for updating Host entities.
-  """
-
-  def run(self, batch_size=25):
-    """Starts the updater.
-    """
-
-    self._process(None, batch_size)
-
-  def _process(self, start_key, batch_size):
-    """Retrieves Host entities and updates them.
-    """
+@migration.migrate(host_logic, prefetch=['user'], shard_count=1)
+def convertHosts(entities):
+  """Adds the sponsors of Host entities to the host_for of their users.
 
-    query = Host.all()
-    if start_key:
-      query.filter('__key__ > ', start_key)
-
-    try:
-      entities = query.fetch(batch_size)
-
-      if not entities:
-        # all entities has already been processed
-        return
-
-      for entity in entities:
-        sponsor = entity.scope
-        host_for = entity.user.host_for
+  A user may be a host for more than one sponsor, so the hosts are not
+  split over shards and the users are stored right away rather than
+  through the mutation pool, which may be flushed after the next batch
+  has been read.
+  """
 
-        if not host_for:
-          host_for = []
+  users = {}
 
-        user = entity.user
-        if sponsor.key() not in host_for:
-          host_for.append(sponsor.key())
-        user.host_for = host_for
+  for entity in entities:
+    user = users.setdefault(entity.user.key(), entity.user)
+    sponsor_key = entity.__class__.scope.get_value_for_datastore(entity)
 
-        db.put(user)
+    host_for = user.host_for or []
+    if sponsor_key not in host_for:
+      host_for.append(sponsor_key)
+    user.host_for = host_for
 
-      # process the next batch of entities
-      start_key = entities[-1].key()
-      deferred.defer(self._process, start_key, batch_size)
-    except DeadlineExceededError:
-      # here we should probably be more careful
-      deferred.defer(self._process, start_key, batch_size)
+  db.put(users.values())
 
 
 class RoleUpdater(object):
@@ -137,103 +119,119 @@ class RoleUpdater(object):
     self.PROGRAM_FIELD = program_field
     self.ROLE_FIELD = role_field
 
-  def run(self, batch_size=25):
-    """Starts the updater.
-    """
+  def _processEntity(self, entity):
+    """Creates or updates the Profile entity for a role entity.
 
-    self._process(None, batch_size)
+    The profile is read and written in one transaction, as roles of the
+    same user may be processed by different shards at the same time.
+    """
 
-  def _processEntity(self, entity):
-    program = getattr(entity, self.PROGRAM_FIELD)
+    # the values are read before the transaction, as it can not retrieve
+    # the entities the role refers to
+    role_properties = migration.getProperties(entity)
+    program_key = role_properties[self.PROGRAM_FIELD]
+    scope_key = role_properties['scope']
     user = entity.user
 
     # try to find an existing Profile entity or create a new one
-    key_name = program.key().name() + '/' + user.link_id
+    key_name = program_key.name() + '/' + user.link_id
     properties = {
         'link_id': entity.link_id,
-        'scope_path': program.key().name(),
-        'scope': program,
+        'scope_path': program_key.name(),
+        'scope': program_key,
         'parent': user,
         }
     for prop in POPULATED_PROFILE_PROPS:
-      properties[prop] = getattr(entity, prop)
+      properties[prop] = role_properties[prop]
 
-    profile = self.PROFILE_MODEL.get_or_insert(
-        key_name=key_name, **properties)
+    def update_profile_txn():
+      profile = self.PROFILE_MODEL.get_by_key_name(key_name, parent=user)
+      if not profile:
+        profile = self.PROFILE_MODEL(key_name=key_name, **properties)
 
-    # do not update anything if the role is already in the profile
-    if profile.student_info and self.MODEL == GSoCStudent:
-      return
-    elif self.ROLE_FIELD:
-      if entity.scope.key() in getattr(profile, self.ROLE_FIELD):
+      # do not update anything if the role is already in the profile
+      if profile.student_info and self.MODEL == GSoCStudent:
         return
+      elif self.ROLE_FIELD:
+        if scope_key in getattr(profile, self.ROLE_FIELD):
+          return
+
+      to_put = [profile]
+
+      # a non-invalid role is found, we should re-populate the profile
+      if profile.status == 'invalid' and entity.status != 'invalid':
+        for prop_name, value in role_properties.iteritems():
+          setattr(profile, prop_name, value)
+
+        if profile.student_info:
+          profile.student_info = None
 
-    to_put = [profile]
-
-    # a non-invalid role is found, we should re-populate the profile
-    if profile.status == 'invalid' and entity.status != 'invalid':
-      for prop_name in entity.properties():
-        value = getattr(entity, prop_name)
-        setattr(profile, prop_name, value)
-
-      if profile.student_info:
-        profile.student_info = None
-
-    if self.ROLE_FIELD:
-      # the role is either Mentor or OrgAdmin
-      getattr(profile, self.ROLE_FIELD).append(entity.scope.key())
-    else:
-      # the role is certainly Student; we have to create a new StudentInfo
-      properties = {}
-      for prop in POPULATED_STUDENT_PROPS:
-        properties[prop] = getattr(entity, prop)
-
-      key_name = profile.key().name()
-      student_info = StudentInfo(key_name=key_name,
-          parent=profile, **properties)
-      profile.student_info = student_info
-      to_put.append(student_info)
-
-    db.run_in_transaction(db.put, to_put)
-
-  def _process(self, start_key, batch_size):
-    """Retrieves entities and creates or updates a corresponding
-    Profile entity.
+      if self.ROLE_FIELD:
+        # the role is either Mentor or OrgAdmin
+        getattr(profile, self.ROLE_FIELD).append(scope_key)
+      else:
+        # the role is certainly Student; we have to create a new StudentInfo
+        student_properties = {}
+        for prop in POPULATED_STUDENT_PROPS:
+          student_properties[prop] = role_properties[prop]
+
+        student_info = StudentInfo(key_name=key_name,
+            parent=profile, **student_properties)
+        profile.student_info = student_info
+        to_put.append(student_info)
+
+      db.put(to_put)
+
+    db.run_in_transaction(update_profile_txn)
+
+  def process(self, entities):
+    """Creates or updates the Profile entities for a batch of roles.
+
+    The profiles are stored by _processEntity, nothing is returned.
     """
 
-    query = self.MODEL.all()
-    if start_key:
-      query.filter('__key__ > ', start_key)
+    for entity in entities:
+      self._processEntity(entity)
 
-    try:
-      entities = query.fetch(batch_size)
 
-      if not entities:
-        # all entities has already been processed
-        return
+@migration.migrate(mentor_logic, prefetch=['user'])
+def convertMentors(entities):
+  """Adds GSoCMentors to the GSoCProfiles of their users.
+  """
+
+  RoleUpdater(GSoCMentor, GSoCProfile, 'program', 'mentor_for'
+      ).process(entities)
 
-      for entity in entities:
-        try:
-          self._processEntity(entity)
-        except db.Error, e:
-          import logging
-          logging.exception(e)
-          logging.error("Broke on %s: %s" % (entity.key().name(), self.MODEL))
 
-      # process the next batch of entities
-      start_key = entities[-1].key()
-      deferred.defer(self._process, start_key, batch_size)
-    except DeadlineExceededError:
-      # here we should probably be more careful
-      deferred.defer(self._process, start_key, batch_size)
+@migration.migrate(org_admin_logic, prefetch=['user'])
+def convertOrgAdmins(entities):
+  """Adds GSoCOrgAdmins to the GSoCProfiles of their users.
+  """
+
+  RoleUpdater(GSoCOrgAdmin, GSoCProfile, 'program', 'org_admin_for'
+      ).process(entities)
+
+
+@migration.migrate(student_logic, prefetch=['user'])
+def convertStudents(entities):
+  """Adds StudentInfos for GSoCStudents to the GSoCProfiles of their users.
+  """
+
+  RoleUpdater(GSoCStudent, GSoCProfile, 'scope').process(entities)
+
+
+ROLE_MIGRATIONS = {
+    'gsoc_mentor': convertMentors,
+    'gsoc_org_admin': convertOrgAdmins,
+    'gsoc_student': convertStudents,
+    }
 
 
 def updateHosts(request):
   """Starts a task which updates Host entities.
   """
 
-  updater = HostUpdater()
-  updater.run()
+  convertHosts.start(request)
   return http.HttpResponse("Ok")
 
 
@@ -241,15 +239,7 @@ def updateRole(role_name):
   """Starts a task which updates a particular role.
   """
 
-  if role_name == 'gsoc_mentor':
-    updater = RoleUpdater(GSoCMentor, GSoCProfile, 'program', 'mentor_for')
-  elif role_name == 'gsoc_org_admin':
-    updater = RoleUpdater(
-        GSoCOrgAdmin, GSoCProfile, 'program', 'org_admin_for')
-  elif role_name == 'gsoc_student':
-    updater = RoleUpdater(GSoCStudent, GSoCProfile, 'scope')
-
-  updater.run()
+  ROLE_MIGRATIONS[role_name].start()
   return http.HttpResponse("Ok")
 
 def updateRoles(request):
@@ -288,32 +278,23 @@ def updateStudents(request):
 
   return updateRole('gsoc_student')
 
-def _getProfileForRole(entity, profile_model):
-  """Returns GSoCProfile or GCIProfile which corresponds to the specified
-  entity.
-  """
+def _getProfileKeyForRole(entity, profile_model):
+  """Returns the key of the GSoCProfile or GCIProfile which corresponds to
+  the specified role entity.
 
-  if isinstance(entity, profile_model):
-    return entity
+  The referenced user and program are not retrieved.
+  """
 
   if isinstance(entity, OrgAdmin) or isinstance(entity, Mentor):
-    key_name = entity.program.key().name() + '/' + entity.user.key().name()
+    key_name = '%s/%s' % (migration.getKeyName(entity, 'program'),
+                          migration.getKeyName(entity, 'user'))
   else:
     key_name = entity.key().name()
 
-  parent = entity.user
-  return profile_model.get_by_key_name(key_name, parent=parent)
+  parent = entity.__class__.user.get_value_for_datastore(entity)
+  return db.Key.from_path(profile_model.kind(), key_name, parent=parent)
 
 
-def _getProfileKeyForRoleKey(key, profile_model):
-  """Returns Key instance of the Profile which corresponds to the Role which
-  is represented by the specified Key.
-  """
-
-  entity = db.get(key)
-  profile = _getProfileForRole(entity, profile_model)
-  return profile.key()
-
 class ReferenceUpdater(object):
   """Class which is responsible for updating references to Profile in
   the specified model.
@@ -326,68 +307,65 @@ class ReferenceUpdater(object):
     self.FIELDS_TO_UPDATE = fields_to_update
     self.LISTS_TO_UPDATE = lists_to_update
 
-  def run(self, batch_size=25):
-    """Starts the updater.
+  def process(self, entities):
+    """Updates the references of a batch of entities.
+
+    The referenced roles are expected to be prefetched.
     """
 
-    self._process(None, batch_size)
+    for entity in entities:
+      for field in self.FIELDS_TO_UPDATE:
+        old_reference = getattr(entity, field)
 
-  def _process(self, start_key, batch_size):
-    """Iterates through the entities and updates the references.
-    """
+        if not old_reference:
+          continue
 
-    query = self.MODEL.all()
-    if start_key:
-      query.filter('__key__ > ', start_key)
+        # check if the field has not been updated
+        if isinstance(old_reference, self.PROFILE_MODEL):
+          continue
 
-    try:
-      entities = query.fetch(batch_size)
+        setattr(entity, field,
+                _getProfileKeyForRole(old_reference, self.PROFILE_MODEL))
 
-      if not entities:
-        # all entities has already been processed
-        return
+      for list_property in self.LISTS_TO_UPDATE:
+        roles = references.getReferenced(entity, list_property)
+        setattr(entity, list_property,
+                [_getProfileKeyForRole(i, self.PROFILE_MODEL) for i in roles])
 
-      for entity in entities:
-        for field in self.FIELDS_TO_UPDATE:
-          old_reference = getattr(entity, field)
+    return entities
 
-          if not old_reference:
-            continue
 
-          # check if the field has not been updated
-          if isinstance(old_reference, self.PROFILE_MODEL):
-            continue
+@migration.migrate(student_proposal_logic,
+                   prefetch=['scope', 'mentor', 'possible_mentors'])
+def convertStudentProposalReferences(entities):
+  """Points the roles referenced by StudentProposals to GSoCProfiles.
+  """
+
+  return ReferenceUpdater(StudentProposal, GSoCProfile,
+      ['scope', 'mentor'], ['possible_mentors']).process(entities)
+
 
-          profile = _getProfileForRole(old_reference, self.PROFILE_MODEL)
-          setattr(entity, field, profile)
+@migration.migrate(student_project_logic,
+                   prefetch=['mentor', 'student', 'additional_mentors'])
+def convertStudentProjectReferences(entities):
+  """Points the roles referenced by StudentProjects to GSoCProfiles.
+  """
+
+  return ReferenceUpdater(StudentProject, GSoCProfile,
+      ['mentor', 'student'], ['additional_mentors']).process(entities)
 
-        for list_property in self.LISTS_TO_UPDATE:
-          l = getattr(entity, list_property)
-          new_l = []
-          for key in l:
-            new_l.append(_getProfileKeyForRoleKey(key, self.PROFILE_MODEL))
-          setattr(entity, list_property, new_l)
 
-      db.put(entities)
-      start_key = entities[-1].key()
-      deferred.defer(self._process, start_key, batch_size)
-    except DeadlineExceededError:
-      # here we should probably be more careful
-      deferred.defer(self._process, start_key, batch_size)
+REFERENCE_MIGRATIONS = {
+    'student_proposal': convertStudentProposalReferences,
+    'student_project': convertStudentProjectReferences,
+    }
 
 
 def updateReferencesForModel(model):
   """Starts a task which updates references for a particular model.
   """
 
-  if model == 'student_proposal':
-    updater = ReferenceUpdater(StudentProposal, GSoCProfile,
-        ['scope', 'mentor'], ['possible_mentors'])
-  elif model == 'student_project':
-    updater = ReferenceUpdater(StudentProject, GSoCProfile,
-        ['mentor', 'student'], ['additional_mentors'])
-
-  updater.run()
+  REFERENCE_MIGRATIONS[model].start()
   return http.HttpResponse("Ok")
 
 
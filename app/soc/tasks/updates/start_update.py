@@ -29,9 +29,15 @@ from django.utils.translation import ugettext
 
 from soc.tasks.helper import error_handler
 from soc.tasks.updates import module_conversion
+from soc.tasks.updates import proposal_scores
+from soc.tasks.updates import proposal_summary
+from soc.tasks.updates import student_ranking
 from soc.tasks.updates import student_school_type
+from soc.tasks.updates import survey_schema
 from soc.views.helper import responses
 
+from soc.modules.gci.tasks import task_tags
+
 
 def getDjangoURLPatterns():
   """Returns the URL patterns for the views in this module.
@@ -103,7 +109,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that converts Program->GSoCProgram entities for use in the '
           'new Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runProgramConversionUpdate.start,
       'runner': module_conversion.runProgramConversionUpdate,
       }
 
@@ -113,7 +119,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that converts Organization->GSoCOrganization entities for '
           'use in the new Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runOrgConversionUpdate.start,
       'runner': module_conversion.runOrgConversionUpdate,
       }
 
@@ -123,7 +129,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that converts OrgAdmin->GSoCOrgAdmin entities for '
           'use in the new Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runOrgAdminConversionUpdate.start,
       'runner': module_conversion.runOrgAdminConversionUpdate,
       }
 
@@ -133,7 +139,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that converts Mentor->GSoCMentor entities for '
           'use in the new Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runMentorConversionUpdate.start,
       'runner': module_conversion.runMentorConversionUpdate,
       }
 
@@ -143,7 +149,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that converts Student->GSoCStudent entities for '
           'use in the new Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runStudentConversionUpdate.start,
       'runner': module_conversion.runStudentConversionUpdate,
       }
 
@@ -153,7 +159,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that sets the properties in the StudentProposal to match '
           'the new entities in the Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runStudentProposalUpdate.start,
       'runner': module_conversion.runStudentProposalUpdate,
       }
 
@@ -162,7 +168,7 @@ class TaskRunner(object):
       'in_version_order': 7,
       'description': ugettext(
           'Update that removes the reviewer property from the Review entity.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runReviewUpdate.start,
       'runner': module_conversion.runReviewUpdate,
       }
 
@@ -172,7 +178,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that sets the properties in the StudentProject to match '
           'the new entities in the Module system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runStudentProjectUpdate.start,
       'runner': module_conversion.runStudentProjectUpdate,
       }
 
@@ -182,7 +188,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that changes prefix from Program to GSoCProgram and updates '
           'the necessary references for Surveys.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runSurveyUpdate.start,
       'runner': module_conversion.runSurveyUpdate,
       }
 
@@ -192,7 +198,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that changes prefix from Program to GSoCProgram and updates '
           'the necessary references for ProjectSurveys.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runProjectSurveyUpdate.start,
       'runner': module_conversion.runProjectSurveyUpdate,
       }
 
@@ -202,7 +208,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update that changes prefix from Program to GSoCProgram and updates '
           'the necessary references for GradingProjectSurveys.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runGradingProjectSurveyUpdate.start,
       'runner': module_conversion.runGradingProjectSurveyUpdate,
       }
 
@@ -211,7 +217,7 @@ class TaskRunner(object):
       'in_version_order': 12,
       'description': ugettext(
           'Update for SurveyRecords to point to the new Surveys'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runSurveyRecordUpdate.start,
       'runner': module_conversion.runSurveyRecordUpdate,
       }
 
@@ -221,7 +227,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update for ProjectSurveyRecords to point to the new Surveys and '
           'update the Organization reference.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runProjectSurveyRecordUpdate.start,
       'runner': module_conversion.runProjectSurveyRecordUpdate,
       }
 
@@ -231,7 +237,7 @@ class TaskRunner(object):
       'description': ugettext(
           'Update for GradingProjectSurveyRecords to point to the new Surveys '
           'and update the Organization reference.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runGradingProjectSurveyRecordUpdate.start,
       'runner': module_conversion.runGradingProjectSurveyRecordUpdate,
       }
 
@@ -240,7 +246,7 @@ class TaskRunner(object):
       'in_version_order': 15,
       'description': ugettext(
           'Update for GradingSurveyGroups to point to the new Surveys.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runGradingSurveyGroupUpdate.start,
       'runner': module_conversion.runGradingSurveyGroupUpdate,
       }
 
@@ -250,17 +256,67 @@ class TaskRunner(object):
       'description': ugettext(
           'Update to change the prefixes of Documents to the new Module '
           'system.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runDocumentUpdate.start,
       'runner': module_conversion.runDocumentUpdate,
       }
 
+  GCI_TASK_TAGS = {
+      'from_version': '0-5-20110318',
+      'in_version_order': 1,
+      'description': ugettext(
+          'Update that stores the keys of the tags of GCI Tasks on the tasks '
+          'and moves the tasks out of the tagged lists of the tags.'),
+      'starter': module_conversion.startUpdateWithUrl,
+      'runner': task_tags.runTaskTagsUpdate,
+      }
+
+  SURVEY_SCHEMA_CONVERSION = {
+      'from_version': '0-5-20110318',
+      'in_version_order': 2,
+      'description': ugettext(
+          'Update that stores the schemas of SurveyContents as JSON, so that '
+          'they no longer have to be evaluated.'),
+      'starter': survey_schema.runSurveySchemaUpdate.start,
+      'runner': survey_schema.runSurveySchemaUpdate,
+      }
+
+  PROPOSAL_SUMMARY = {
+      'from_version': '0-5-20110318',
+      'in_version_order': 3,
+      'description': ugettext(
+          'Update that stores a GSoCProposalSummary for every GSoCProposal, '
+          'so that lists do not have to read the text of proposals.'),
+      'starter': proposal_summary.runProposalSummaryUpdate.start,
+      'runner': proposal_summary.runProposalSummaryUpdate,
+      }
+
+  PROPOSAL_SCORES = {
+      'from_version': '0-5-20110318',
+      'in_version_order': 4,
+      'description': ugettext(
+          'Update that stores the number of scores and the score of every '
+          'mentor on each GSoCProposal.'),
+      'starter': proposal_scores.runProposalScoresUpdate.start,
+      'runner': proposal_scores.runProposalScoresUpdate,
+      }
+
+  STUDENT_RANKING = {
+      'from_version': '0-5-20110318',
+      'in_version_order': 5,
+      'description': ugettext(
+          'Update that stores the points of every GCIStudentRanking in the '
+          'ranker of its program, so that the ranks can be looked up.'),
+      'starter': student_ranking.runStudentRankingUpdate.start,
+      'runner': student_ranking.runStudentRankingUpdate,
+      }
+
   TIMELINE_MODULE_CONVERSION = {
       'from_version': '0-5-20091121',
       'in_version_order': 17,
       'description': ugettext(
           'Update to convert Timeline->GSoCTimeline and also update the '
           'Program reference to point to the new GSoCProgram.'),
-      'starter': module_conversion.startUpdateWithUrl,
+      'starter': module_conversion.runTimelineConversionUpdate.start,
       'runner': module_conversion.runTimelineConversionUpdate,
       }
 
@@ -291,6 +347,11 @@ class TaskRunner(object):
         'grading_survey_group_module': self.GRADING_SURVEY_GROUP_MODULE,
         'document_module_conversion': self.DOCUMENT_MODULE_CONVERSION,
         'timeline_module_conversion': self.TIMELINE_MODULE_CONVERSION,
+        'gci_task_tags': self.GCI_TASK_TAGS,
+        'survey_schema_conversion': self.SURVEY_SCHEMA_CONVERSION,
+        'proposal_summary': self.PROPOSAL_SUMMARY,
+        'proposal_scores': self.PROPOSAL_SCORES,
+        'student_ranking': self.STUDENT_RANKING,
     }
 
   def getOptions(self):
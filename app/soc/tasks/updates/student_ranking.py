@@ -0,0 +1,48 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Update that stores the points of existing GCIStudentRankings in the
+ranker of their program and fills in the fields that are shown in the
+ranking list.
+"""
+
+
+from soc.logic import references
+from soc.modules.gci.logic.models.student_ranking import logic \
+    as ranking_logic
+from soc.tasks.helper import migration
+
+
+# all rankings of a program are stored in the same ranker entity group,
+# so running more shards would only make them collide
+@migration.migrate(ranking_logic, shard_count=1, prefetch=['student'])
+def runStudentRankingUpdate(entities):
+  """Stores the points of rankings in the ranker and sets the student_name
+  and tasks_count of the rankings.
+
+  Args:
+    entities: list of GCIStudentRanking entities
+  """
+
+  references.prefetch([i.student for i in entities], ['user'])
+
+  for ranking in entities:
+    ranking.student_name = ranking.student.user.name
+    ranking.tasks_count = len(ranking.tasks)
+
+  ranking_logic.setScores(entities)
+
+  return entities
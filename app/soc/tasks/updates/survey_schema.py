@@ -0,0 +1,53 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Update that stores the schemas of SurveyContent entities as JSON.
+"""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from soc.logic.models import expando_base
+from soc.models.survey import SurveyContent
+from soc.models.survey import dumpSchema
+from soc.models.survey import loadSchema
+from soc.tasks.helper import migration
+
+
+survey_content_logic = expando_base.Logic(model=SurveyContent)
+
+
+@migration.migrate(survey_content_logic)
+def runSurveySchemaUpdate(entities):
+  """Converts schemas that are stored as the repr of a dictionary to JSON.
+
+  Args:
+    entities: list of SurveyContent entities to convert
+  """
+
+  converted = []
+
+  for entity in entities:
+    schema = dumpSchema(loadSchema(entity.schema))
+    if schema == entity.schema:
+      continue
+
+    entity.schema = schema
+    converted.append(entity)
+
+  return converted
@@ -35,8 +35,7 @@ from soc.logic.exceptions import LoginRequest
 from soc.logic.exceptions import RedirectRequest
 from soc.logic.exceptions import AccessViolation
 from soc.logic.exceptions import Error
-from soc.logic.helper import xsrfutil
-from soc.logic.models.site import logic as site
+from soc.middleware import xsrf
 from soc.views.helper.request_data import RequestData
 
 
@@ -234,8 +233,7 @@ class RequestHandler(object):
     context['app_version'] = os.environ.get('CURRENT_VERSION_ID', '').split('.')[0]
     context['is_local'] = system.isLocal()
     context['posted'] = self.posted
-    xsrf_secret_key = site.getXsrfSecretKey(self.data.site)
-    context['xsrf_token'] = xsrfutil.getGeneratedTokenForCurrentUser(xsrf_secret_key)
+    context['xsrf_token'] = xsrf.getToken()
     context['ga_tracking_num'] = self.data.site.ga_tracking_num
     if system.isSecondaryHostname(self.request):
       context['google_api_key'] = self.data.site.secondary_google_api_key
@@ -0,0 +1,91 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for the download page of exports.
+"""
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from django.conf.urls.defaults import url
+from django.core.urlresolvers import reverse
+from django.utils.translation import ugettext
+
+from soc.logic import export as export_logic
+from soc.logic.exceptions import AccessViolation
+from soc.logic.exceptions import NotFound
+from soc.models.export import Export
+from soc.tasks import export as export_tasks
+from soc.views.base import SiteRequestHandler
+
+
+DEF_NOT_FOUND_MSG = ugettext('There is no such export.')
+
+DEF_NOT_OWNER_MSG = ugettext(
+    'Only the user who requested an export can download it.')
+
+
+def getDownloadUrl(export):
+  """Returns the URL of the download page of export.
+  """
+
+  return reverse('export_download', kwargs={'id': export.key().id()})
+
+
+class ExportDownload(SiteRequestHandler):
+  """View that shows the progress of an export and downloads it when it
+  is finished.
+  """
+
+  def djangoURLPatterns(self):
+    return [
+        url(r'^export/download/(?P<id>\d+)$', self, name='export_download'),
+    ]
+
+  def checkAccess(self):
+    self.export = Export.get_by_id(int(self.kwargs['id']))
+    if not self.export:
+      raise NotFound(DEF_NOT_FOUND_MSG)
+
+    owner_key = Export.user.get_value_for_datastore(self.export)
+    if not self.data.user or owner_key != self.data.user.key():
+      raise AccessViolation(DEF_NOT_OWNER_MSG)
+
+  def templatePath(self):
+    return 'v2/soc/export/download.html'
+
+  def context(self):
+    return {
+        'page_name': 'Export %s' % self.export.filename,
+        'export': self.export,
+    }
+
+  def get(self):
+    """Writes the export once it is finished, shows its progress otherwise.
+    """
+
+    if self.export.status != 'finished':
+      return super(ExportDownload, self).get()
+
+    export_format = self.export.format
+    self.response['Content-Type'] = export_logic.CONTENT_TYPES[export_format]
+    self.response['Content-Disposition'] = 'attachment; filename=%s%s' % (
+        self.export.filename, export_logic.EXTENSIONS[export_format])
+
+    for data in export_tasks.getChunks(self.export):
+      self.response.write(data)
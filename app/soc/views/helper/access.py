@@ -35,6 +35,7 @@ __authors__ = [
 
 from django.utils.translation import ugettext
 
+from soc.cache import capabilities
 from soc.logic import dicts
 from soc.logic.helper import timeline as timeline_helper
 from soc.logic.models.club_admin import logic as club_admin_logic
@@ -48,6 +49,7 @@ from soc.logic.models.organization import logic as org_logic
 from soc.logic.models.program import logic as program_logic
 from soc.logic.models.request import logic as request_logic
 from soc.logic.models.role import logic as role_logic
+from soc.logic.models.role import ROLE_LOGICS
 from soc.logic.models.site import logic as site_logic
 from soc.logic.models.sponsor import logic as sponsor_logic
 from soc.logic.models.student import logic as student_logic
@@ -302,6 +304,7 @@ class Checker(object):
     self.rights = base.rights if base else {}
     self.id = None
     self.user = None
+    self.capabilities = None
 
   def normalizeChecker(self, checker):
     """Normalizes the checker to a pre-defined format.
@@ -395,6 +398,54 @@ class Checker(object):
 
     self.id = id
     self.user = user
+    self.capabilities = None
+
+  def getCapabilities(self):
+    """Returns the capability set of the current user.
+
+    It is only looked up once per request.
+    """
+
+    if self.capabilities is None:
+      self.capabilities = capabilities.get(self.user)
+
+    return self.capabilities
+
+  def _hasRole(self, logic, status='active', **fields):
+    """Returns whether the current user has the role of logic with status.
+
+    Returns None if logic is not the logic of a role or fields contains a
+    field that is not cached, in which case the caller has to query for the
+    role itself.
+    """
+
+    role_name = getattr(logic, 'role_name', None)
+    if ROLE_LOGICS.get(role_name) is not logic:
+      return None
+
+    for name in fields:
+      if name not in capabilities.FIELDS:
+        return None
+
+    return self.getCapabilities().hasRole(role_name, status, **fields)
+
+  def _hasCurrentUserRole(self, user_entity, logic, filter):
+    """Returns whether user_entity has a role of logic matching filter.
+
+    The capability set is used if user_entity is the current user, the
+    datastore is queried otherwise.
+    """
+
+    if user_entity and self.user and user_entity.key() == self.user.key():
+      fields = filter.copy()
+      del fields['user']
+      status = fields.pop('status')
+      has_role = self._hasRole(logic, status, **fields)
+
+      if has_role is not None:
+        return has_role
+
+    return logic.getForFields(filter, unique=True)
 
   def checkAccess(self, access_type, django_args):
     """Runs all the defined checks for the specified type.
@@ -717,7 +768,10 @@ class Checker(object):
     fields = dicts.filter(django_args, fields)
     fields['status'] = status
 
-    entity = logic.getForFields(fields, unique=True)
+    if 'user' in fields:
+      entity = self._hasCurrentUserRole(fields['user'], logic, fields)
+    else:
+      entity = logic.getForFields(fields, unique=True)
 
     if entity:
       return entity
@@ -963,7 +1017,8 @@ class Checker(object):
     role_entity = None
 
     for role_logic in role_logics:
-      role_entity = role_logic.getForFields(role_fields, unique=True)
+      role_entity = self._hasCurrentUserRole(self.user, role_logic,
+                                             role_fields)
 
       if role_entity:
         break;
@@ -1260,7 +1315,8 @@ class Checker(object):
               'status': 'active'}
 
     # check if the current user is already a student for this program
-    student_role = student_logic.getForFields(filter, unique=True)
+    student_role = self._hasCurrentUserRole(user_entity, student_logic,
+                                            filter)
 
     if student_role:
       raise out_of_band.AccessViolation(
@@ -1273,13 +1329,14 @@ class Checker(object):
               'program': program_entity,
               'status': 'active'}
 
-    mentor_role = mentor_logic.getForFields(filter, unique=True)
+    mentor_role = self._hasCurrentUserRole(user_entity, mentor_logic, filter)
     if mentor_role:
       # the current user has a role for the given program
       raise out_of_band.AccessViolation(
             message_fmt=DEF_ALREADY_PARTICIPATING_MSG)
 
-    org_admin_role = org_admin_logic.getForFields(filter, unique=True)
+    org_admin_role = self._hasCurrentUserRole(user_entity, org_admin_logic,
+                                              filter)
     if org_admin_role:
       # the current user has a role for the given program
       raise out_of_band.AccessViolation(
@@ -1316,7 +1373,8 @@ class Checker(object):
               'status': 'active'}
 
     # check if the current user is already a student for this program
-    student_role = student_logic.getForFields(filter, unique=True)
+    student_role = self._hasCurrentUserRole(user_entity, student_logic,
+                                            filter)
 
     if student_role:
       raise out_of_band.AccessViolation(
@@ -1353,7 +1411,8 @@ class Checker(object):
               'user': user_entity,
               'status': 'active'}
 
-    student_role = student_logic.getForFields(filter=filter, unique=True)
+    student_role = self._hasCurrentUserRole(user_entity, student_logic,
+                                            filter)
 
     if student_role:
       raise out_of_band.AccessViolation(
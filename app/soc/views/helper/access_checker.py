@@ -26,6 +26,7 @@ __authors__ = [
 from django.utils.translation import ugettext
 
 from google.appengine.api import users
+from google.appengine.ext import db
 
 from soc.logic.models.user import logic as user_logic
 
@@ -194,7 +195,8 @@ class Mutator(object):
     fields = ['sponsor', 'program', 'organization']
 
     key_name = '/'.join(self.data.kwargs[field] for field in fields)
-    self.data.organization = GSoCOrganization.get_by_key_name(key_name)
+    key = db.Key.from_path(GSoCOrganization.kind(), key_name)
+    self.data.organization = self.data.loader.get(key)
 
   def documentKeyNameFromKwargs(self):
     """Returns the document key fields from kwargs.
@@ -231,11 +233,14 @@ class Mutator(object):
 
     self.data.scope_path = '/'.join(fields[1:-1])
     self.data.key_name = '/'.join(fields)
-    self.data.document = Document.get_by_key_name(self.data.key_name)
+    key = db.Key.from_path(Document.kind(), self.data.key_name)
+    self.data.document = self.data.loader.get(key)
 
   def proposalFromKwargs(self):
     id = int(self.data.kwargs['id'])
-    self.data.proposal = GSoCProposal.get_by_id(id, parent=self.data.profile)
+    parent = self.data.profile and self.data.profile.key()
+    key = db.Key.from_path(GSoCProposal.kind(), id, parent=parent)
+    self.data.proposal = self.data.loader.get(key)
 
   def canRespondForUser(self):
     assert isSet(self.data.invited_user)
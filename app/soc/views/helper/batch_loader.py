@@ -0,0 +1,128 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module containing the BatchLoader that fetches the entities of a request.
+
+Code that needs an entity first tells the loader about its key with want(),
+the entities of all keys that are wanted are then fetched together by the
+next load(). Every entity is fetched at most once per request.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+from google.appengine.ext import db
+
+from soc.cache import entities as entity_cache
+
+
+class BatchLoader(object):
+  """Collects keys and fetches their entities with as few calls as possible.
+
+  Keys that are wanted as cached are fetched through soc.cache.entities,
+  all other keys with a single db.get().
+  """
+
+  def __init__(self):
+    """Constructs an empty BatchLoader.
+    """
+
+    # maps the key of every loaded entity to the entity, or None
+    self._entities = {}
+    self._pending = set()
+    self._pending_cached = set()
+
+  def want(self, keys, cached=False):
+    """Marks keys to be fetched by the next call to load().
+
+    Args:
+      keys: a list of keys, None values are ignored
+      cached: whether the entities are fetched through the entity cache
+    """
+
+    pending = self._pending_cached if cached else self._pending
+
+    for key in keys:
+      if key and key not in self._entities:
+        pending.add(key)
+
+  def wantReferences(self, entity, fields):
+    """Marks the entities that fields of entity refer to as wanted.
+    """
+
+    self.want([getattr(entity.__class__, i).get_value_for_datastore(entity)
+               for i in fields])
+
+  def load(self):
+    """Fetches the entities of all keys that are wanted.
+    """
+
+    if self._pending_cached:
+      keys = list(self._pending_cached)
+      self._pending_cached = set()
+      self._entities.update(zip(keys, entity_cache.get(keys)))
+
+    # keys that were wanted both ways are loaded already
+    self._pending.difference_update(self._entities)
+
+    if self._pending:
+      keys = list(self._pending)
+      self._pending = set()
+      self._entities.update(zip(keys, db.get(keys)))
+
+  def get(self, key, cached=False):
+    """Returns the entity for key or None if it does not exist.
+
+    The entity is fetched together with all other keys that are wanted if
+    it is not loaded yet.
+    """
+
+    if not key:
+      return None
+
+    if key not in self._entities:
+      self.want([key], cached=cached)
+      self.load()
+
+    return self._entities[key]
+
+  def getMany(self, keys, cached=False):
+    """Returns the entities for keys, None for those that do not exist.
+    """
+
+    self.want(keys, cached=cached)
+    self.load()
+
+    return [self._entities.get(i) for i in keys]
+
+  def resolveReferences(self, entity, fields):
+    """Replaces the values of the reference fields of entity by the
+    entities they refer to.
+
+    The entities are fetched together with all other keys that are wanted
+    if they are not loaded yet.
+    """
+
+    self.wantReferences(entity, fields)
+    self.load()
+
+    for field in fields:
+      key = getattr(entity.__class__, field).get_value_for_datastore(entity)
+      # dangling references are left alone
+      if self._entities.get(key):
+        setattr(entity, field, self._entities[key])
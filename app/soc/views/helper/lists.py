@@ -317,9 +317,14 @@ def getListData(request, params, fields, visibility=None, args=[]):
   button = params.get('%s_button_extra' % visibility, lambda *args: {})
   no_filter = params.get('%s_field_no_filter' % visibility, [])
   prefetch = params.get('%s_field_prefetch' % visibility, [])
+  page = params.get('%s_page_extra' % visibility)
 
   entities = logic.getForFields(filter=fields, limit=limit, prefetch=prefetch)
 
+  if page:
+    # computed once for all rows, passed to the extract funcs as last arg
+    args = args + [page(entities, *args)]
+
   extract_args = [key_order, no_filter, column, button, row, args]
   columns = [entityToRowDict(i, *extract_args) for i in entities]
 
@@ -255,6 +255,7 @@ def constructParams(params):
   new_params['cache_pick'] = False
 
   new_params['export_content_type'] = None
+  new_params['exporter'] = None
   new_params['export_extension'] = '.txt'
   new_params['csv_fieldnames'] = []
 
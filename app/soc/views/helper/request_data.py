@@ -27,6 +27,7 @@ from google.appengine.api import users
 
 from soc.logic.models.site import logic as site_logic
 from soc.logic.models.user import logic as user_logic
+from soc.views.helper.batch_loader import BatchLoader
 
 
 class RequestData(object):
@@ -44,6 +45,7 @@ class RequestData(object):
     POST: the POST dictionary (from the request object)
     is_developer: is the current user a developer
     gae_user: the Google Appengine user object
+    loader: the BatchLoader that fetches the entities of the request
   """
 
   def __init__(self):
@@ -58,6 +60,7 @@ class RequestData(object):
     self.POST = None
     self.is_developer = False
     self.gae_user = None
+    self.loader = BatchLoader()
 
   def populate(self, redirect, request, args, kwargs):
     """Populates the fields in the RequestData object.
@@ -74,10 +77,36 @@ class RequestData(object):
     self.POST = request.POST
     self.path = request.path.encode('utf-8')
     self.full_path = request.get_full_path().encode('utf-8')
-    self.site = site_logic.getSingleton()
-    self.user = user_logic.getCurrentUser()
+
+    site_key = site_logic.getSingletonKey()
+    self.loader.want([site_key], cached=True)
+    self.wantCachedKeys()
+    self.loader.load()
+    self.site = self.loader.get(site_key) or site_logic.getSingleton()
+
+    user_key = user_logic.getCurrentUserKey()
+    self.loader.want([user_key])
+    self.wantKeys(user_key)
+    self.loader.load()
+    self.user = user_logic.getCurrentUser(user=self.loader.get(user_key))
+
     if users.is_current_user_admin():
       self.is_developer = True
     if self.user and self.user.is_developer:
       self.is_developer = True
     self.gae_user = users.get_current_user()
+
+  def wantCachedKeys(self):
+    """Marks the cached entities that only depend on the kwargs as wanted.
+
+    They are fetched together with the Site entity.
+    """
+
+  def wantKeys(self, user_key):
+    """Marks the entities that depend on the Site or the kwargs as wanted.
+
+    They are fetched together with the User entity.
+
+    Args:
+      user_key: the key of the User entity of the current user, if known
+    """
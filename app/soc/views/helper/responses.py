@@ -33,9 +33,9 @@ from django.utils import simplejson
 from soc.logic import accounts
 from soc.logic import system
 from soc.logic.helper import timeline
-from soc.logic.helper import xsrfutil
 from soc.logic.models import site
 from soc.logic.models.user import logic as user_logic
+from soc.middleware import xsrf
 from soc.modules import callback
 from soc.views import helper
 from soc.views.helper import redirects
@@ -153,8 +153,7 @@ def getUniversalContext(request):
   context['in_maintenance'] = timeline.isActivePeriod(settings, 'maintenance')
 
   # Only one xsrf_token is generated per request.
-  xsrf_secret_key = site.logic.getXsrfSecretKey(settings)
-  context['xsrf_token'] = xsrfutil.getGeneratedTokenForCurrentUser(xsrf_secret_key)
+  context['xsrf_token'] = xsrf.getToken()
 
   core.setRequestValue('context', context)
 
@@ -26,10 +26,8 @@ __authors__ = [
 
 
 from itertools import chain
-import csv
 import datetime
 import logging
-import StringIO
 
 from google.appengine.ext import db
 from google.appengine.ext.db import djangoforms
@@ -43,6 +41,8 @@ from django.utils.encoding import force_unicode
 from django.utils.encoding import smart_unicode
 from django.utils.html import escape
 
+from soc.logic import export
+from soc.logic import references
 from soc.models.survey import COMMENT_PREFIX
 from soc.models.survey import SurveyContent
 
@@ -163,7 +163,7 @@ class SurveyTakeForm(djangoforms.ModelForm):
 
     schema = {}
     if self.survey_content:
-      schema = eval(self.survey_content.schema)
+      schema = self.survey_content.getSchema()
 
     for key, val in schema.items():
       if val['type'] == 'long_answer':
@@ -222,7 +222,7 @@ class SurveyTakeForm(djangoforms.ModelForm):
 
     post_dict = post_dict or {}
     self.survey_fields = {}
-    schema = SurveyContentSchema(self.survey_content.schema)
+    schema = SurveyContentSchema(self.survey_content.getSchema())
     attrs = {}
 
     # figure out whether we want a read-only view
@@ -556,7 +556,7 @@ class SurveyEditForm(djangoforms.ModelForm):
       return
 
     self.survey_fields = {}
-    schema = SurveyContentSchema(self.survey_content.schema)
+    schema = SurveyContentSchema(self.survey_content.getSchema())
     extra_attrs = {}
 
     # add unordered fields to self.survey_fields
@@ -607,10 +607,10 @@ class SurveyContentSchema(object):
     """Set the dictionary that this class encapsulates.
 
     Args:
-      schema: schema as stored in SurveyConent entity
+      schema: schema dictionary as returned by SurveyContent.getSchema()
     """
 
-    self.schema = eval(schema)
+    self.schema = schema
 
   def getType(self, field):
     """Fetch question type for field e.g. short_answer, pick_multi, etc.
@@ -1029,89 +1029,89 @@ class HelperForm(object):
     return form
 
 
-def getCSVHeader(survey_entity):
+def getCSVHeader(survey_entity, plain, fields):
   """CSV header helper, needs support for comment lines in CSV.
 
   Args:
       survey_entity: Survey entity
+      plain: space separated names of properties that are written as is
+      fields: space separated names of references that are written by
+          the link_id of the referenced entity
   """
 
   tpl = '# %s: %s\n'
 
   # add static properties
-  fields = ['# Melange Survey export for \n#  %s\n#\n' % survey_entity.title]
-  fields += [tpl % (k, v) for k, v in survey_entity.toDict().items()]
-  fields += [tpl % (f, str(getattr(survey_entity, f))) for f in PLAIN.split()]
-  fields += [tpl % (f, str(getattr(survey_entity, f).link_id))
-             for f in FIELDS.split()]
-  fields.sort()
+  lines = ['# Melange Survey export for \n#  %s\n#\n' % survey_entity.title]
+  lines += [tpl % (k, v) for k, v in survey_entity.toDict().items()]
+  lines += [tpl % (f, str(getattr(survey_entity, f))) for f in plain.split()]
+  lines += [tpl % (f, str(getattr(survey_entity, f).link_id))
+            for f in fields.split()]
+  lines.sort()
 
   # add dynamic properties
-  fields += ['#\n#---\n#\n']
+  lines += ['#\n#---\n#\n']
   dynamic = survey_entity.survey_content.dynamic_properties()
   dynamic = [(prop, getattr(survey_entity.survey_content, prop))
              for prop in dynamic]
-  fields += [tpl % (k, v) for k, v in sorted(dynamic)]
+  lines += [tpl % (k, v) for k, v in sorted(dynamic)]
 
   # add schema
-  fields += ['#\n#---\n#\n']
+  lines += ['#\n#---\n#\n']
   schema =  survey_entity.survey_content.schema
   indent = '},\n#' + ' ' * 9
-  fields += [tpl % ('Schema', schema.replace('},', indent)) + '#\n']
+  lines += [tpl % ('Schema', schema.replace('},', indent)) + '#\n']
 
-  return ''.join(fields).replace('\n', '\r\n')
+  return ''.join(lines).replace('\n', '\r\n')
 
 
-def getRecords(recs, props):
-  """Fetch properties from SurveyRecords for CSV export.
+class SurveyExporter(export.Exporter):
+  """Exports the records of a survey as CSV or JSON.
   """
 
-  records = []
-  props = props[1:]
-  for rec in recs:
-    values = tuple(getattr(rec, prop, None) for prop in props)
-    leading = (rec.user.link_id,)
-    records.append(leading + values)
-  return records
+  #: static properties of the survey that are written to the CSV header
+  PLAIN = 'is_featured content created modified'
+  FIELDS = 'author modified_by'
 
+  #: properties of the records that precede the answers
+  LEADING = ['user', 'created', 'modified']
 
-def toCSV(survey_view):
-  """CSV exporter.
+  def __init__(self, survey_view):
+    """Initializes the exporter for the records of a survey View.
+    """
 
-  Args:
-      survey_view: instance of the SurveyView
-  """
+    self.survey_view = survey_view
+
+  def getHeader(self, survey):
+    """See soc.logic.export.Exporter.getHeader().
+    """
+
+    return getCSVHeader(survey, self.PLAIN, self.FIELDS)
 
-  def wrapper(survey):
-    """Wrapper function.
+  def getColumns(self, survey):
+    """See soc.logic.export.Exporter.getColumns().
     """
-    survey_logic = survey_view.getParams()['logic']
+
+    return self.LEADING + survey.survey_content.orderedProperties()
+
+  def getQuery(self, survey):
+    """See soc.logic.export.Exporter.getQuery().
+    """
+
+    survey_logic = self.survey_view.getParams()['logic']
     record_logic = survey_logic.getRecordLogic()
 
-    # get header and properties
-    header = getCSVHeader(survey)
-    leading = ['user', 'created', 'modified']
-    properties = leading + survey.survey_content.orderedProperties()
-
-    # retrieve the query of the data to export
-    fields = {'survey': survey}
-    record_query = record_logic.getQueryForFields(fields)
-
-    try:
-      _ = record_query.run().next()
-    except StopIteration:
-      # bail out early if survey_records.run() is empty
-      return header, survey.link_id
-
-    # generate results list
-    recs = record_query.run()
-    recs = getRecords(recs, properties)
-
-    # write results to CSV
-    output = StringIO.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(properties)
-    writer.writerows(recs)
-
-    return header + output.getvalue(), survey.link_id
-  return wrapper
+    return record_logic.getQueryForFields({'survey': survey})
+
+  def getRows(self, survey, records):
+    """See soc.logic.export.Exporter.getRows().
+    """
+
+    props = self.getColumns(survey)[1:]
+
+    # retrieve the users of all records at once instead of one by one
+    references.prefetch(records, ['user'])
+
+    for record in records:
+      values = [getattr(record, prop, None) for prop in props]
+      yield [record.user.link_id] + values
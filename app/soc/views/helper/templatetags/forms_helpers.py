@@ -36,6 +36,7 @@ from django.utils.html import escape
 
 from soc.logic import accounts
 from soc.logic import dicts
+from soc.middleware import xsrf
 from soc.views.helper import widgets
 
 
@@ -73,6 +74,27 @@ def as_upload_form(form, form_name, submit_button_text):
 
 
 
+@register.inclusion_tag('soc/templatetags/_xsrf_field.html')
+def xsrf_field():
+  """Prints a hidden field with the XSRF token of the current user.
+
+  The XSRF middleware does not add the token to responses of requests in
+  which this tag has been used, so every POST form on such a page has to
+  include it.
+
+  Usage:
+    {% load forms_helpers %}
+    ...
+    <form action="#" method="post">
+      {% xsrf_field %}
+      ...
+    </form>
+  """
+
+  xsrf.markTokenized()
+  return {'xsrf_token': xsrf.getToken()}
+
+
 @register.inclusion_tag('soc/templatetags/_field_as_table_row.html')
 def field_as_table_row(field):
   """Prints a newforms field as a table row.
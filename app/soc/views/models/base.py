@@ -25,9 +25,6 @@ __authors__ = [
   ]
 
 
-import csv
-import StringIO
-
 from google.appengine.ext import db
 
 from django import http
@@ -35,6 +32,10 @@ from django.utils import simplejson
 from django.utils.translation import ugettext
 
 from soc.logic import dicts
+from soc.logic import export as export_logic
+from soc.logic.models.user import logic as user_logic
+from soc.tasks import export as export_tasks
+from soc.views import export as export_view
 from soc.views import helper
 from soc.views import out_of_band
 from soc.views.helper import blobstore as bs_helper
@@ -196,6 +197,10 @@ class View(object):
       error_export: The error_export value is used as template when
         the key values (as defined by the page's url) do not
         correspond to an existing entity.
+      exporter: The exporter value, if set, is the soc.logic.export.Exporter
+        that produces the rows of the export. The export is then written
+        by a background task and the user is redirected to the page from
+        which it can be downloaded once it is finished.
       Params is passed to download, refer to it's docstring for more
       details on how it uses it.
 
@@ -225,6 +230,12 @@ class View(object):
       return helper.responses.errorResponse(
           error, request, template=params['error_export'])
 
+    if params.get('exporter'):
+      view_name = '%(module_package)s.%(module_name)s.view' % params
+      export = export_tasks.startExport(user_logic.getCurrentUser(), view_name,
+                                        params['exporter'], entity)
+      return http.HttpResponseRedirect(export_view.getDownloadUrl(export))
+
     export_function = params['export_function']
     data, filename = export_function(entity)
 
@@ -752,34 +763,13 @@ class View(object):
     params = params.copy()
     params['export_extension'] = '.csv'
     params['export_content_type'] = 'text/csv'
-    # fieldnames = params['csv_fieldnames']
-
-    file_handler = StringIO.StringIO()
 
+    rows = data
     if key_order:
-      writer = csv.DictWriter(file_handler, key_order, dialect='excel')
-      writer.writerow(dicts.identity(key_order))
-
-      # encode the data to UTF-8 to ensure compatibiliy
-      for row_dict in data:
-        for key in row_dict.keys():
-          value = row_dict[key]
-          if isinstance(value, basestring):
-            row_dict[key] = value.encode("utf-8")
-          else:
-            row_dict[key] = str(value)
-        writer.writerow(row_dict)
-    else:
-      writer = csv.writer(file_handler, dialect='excel')
-
-      # encode the data to UTF-8 to ensure compatibiliy
-      for row in data:
-        if row:
-          writer.writerow(row.encode("utf-8"))
-        else:
-          writer.writerow(row)
+      rows = [key_order]
+      rows += [[row_dict.get(key) for key in key_order] for row_dict in data]
 
-    data = file_handler.getvalue()
+    data = ''.join(export_logic.encodeCSV(rows))
 
     return self.download(request, data, filename, params)
 
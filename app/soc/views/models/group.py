@@ -26,6 +26,7 @@ __authors__ = [
 from django import forms
 from django.utils.translation import ugettext
 
+from soc.cache import capabilities
 from soc.logic import cleaning
 from soc.logic import dicts
 from soc.logic.models import user as user_logic
@@ -275,11 +276,8 @@ class View(presence.View):
 
     params = dicts.merge(params, self._params)
 
-    # set fields to match every active/inactive role this user has
-    fields = {
-        'user': user,
-        'status': ['active', 'inactive']
-        }
+    # match every active/inactive role this user has
+    status = ['active', 'inactive']
 
     # get the role views and start filling group_entities
     role_views = self._params['role_views']
@@ -290,7 +288,7 @@ class View(presence.View):
       role_view_params = role_view.getParams()
       role_logic = role_view_params['logic']
 
-      roles = role_logic.getForFields(fields)
+      roles = capabilities.getRoles(user, role_logic.role_name, status)
 
       for role in roles:
         group_key_name = role.scope.key().id_or_name()
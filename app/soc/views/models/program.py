@@ -239,8 +239,8 @@ class View(presence.View):
     is_active = fields['is_active']
     if is_active:
       site_entity = site_logic.logic.getSingleton()
-      site_entity.active_program = entity
-      site_entity.put()
+      site_logic.logic.updateEntityProperties(
+          site_entity, {'active_program': entity})
 
   def getListParticipantsData(self, request, params, program_entity):
     """Returns the list data.
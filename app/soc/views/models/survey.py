@@ -24,6 +24,7 @@ __authors__ = [
   '"Lennard de Rijk" <ljvderijk@gmail.com>',
   ]
 
+import copy
 import datetime
 import re
 import string
@@ -85,7 +86,7 @@ DEF_LONG_ANSWER = (
 DEF_QUESTION_TYPES = dict(short_answer=DEF_SHORT_ANSWER,
                           long_answer=DEF_LONG_ANSWER, choice=DEF_CHOICE)
 
-# for toCSV and View.exportSerialized
+# for View.exportSerialized
 DEF_FIELDS = 'author modified_by'
 DEF_PLAIN = 'is_featured content created modified'
 
@@ -144,7 +145,7 @@ class View(base.View):
 
     new_params['export_content_type'] = 'text/text'
     new_params['export_extension'] = '.csv'
-    new_params['export_function'] = surveys.toCSV(self)
+    new_params['exporter'] = surveys.SurveyExporter(self)
     new_params['delete_redirect'] = '/'
 
     new_params['edit_template'] = 'soc/survey/edit.html'
@@ -322,7 +323,8 @@ class View(base.View):
 
       # there is a SurveyContent already
       survey_content = entity.survey_content
-      schema = eval(survey_content.schema)
+      # the schema is modified by the caller, the cached one is shared
+      schema = copy.deepcopy(survey_content.getSchema())
 
       for question_name in survey_content.dynamic_properties():
 
@@ -816,7 +818,7 @@ class View(base.View):
     from soc.models.survey import COMMENT_PREFIX
 
     survey_content = survey.survey_content
-    survey_schema = surveys.SurveyContentSchema(survey_content.schema)
+    survey_schema = surveys.SurveyContentSchema(survey_content.getSchema())
 
     fields = survey_content.orderedProperties()
 
@@ -918,8 +920,7 @@ class View(base.View):
     content = ((prop, getattr(sur.survey_content, prop)) for prop in dynamic)
     json['survey_content'] = dict(content)
 
-    schema =  sur.survey_content.schema
-    json['survey_content']['schema'] = eval(sur.survey_content.schema)
+    json['survey_content']['schema'] = sur.survey_content.getSchema()
 
     data = simplejson.dumps(json, indent=2)
 
@@ -117,6 +117,7 @@ class EditSitePage(SiteRequestHandler):
       return False
 
     site_form.save()
+    site_logic.flushCache(self.data.site)
 
   def post(self):
     """Handler for HTTP POST request.
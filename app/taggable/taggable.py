@@ -1,8 +1,42 @@
 from google.appengine.ext import db
 
+import random
 import string
+import zlib
 import soc.models.linkable
 
+
+# the number of shards the number of entities tagged with a tag is spread over
+TAG_COUNTER_SHARDS = 10
+
+# the number of recent operations a shard remembers to skip them when retried
+TAG_COUNTER_OPS = 100
+
+# the maximum number of entities to get from the datastore at once
+GET_BATCH_SIZE = 500
+
+
+class TagCounterShard(db.Model):
+  """A shard of the number of entities that have been tagged with a tag.
+
+  The key_name of a shard is the key of the tag followed by the number of
+  the shard, so the shards of a tag can be retrieved without a query.
+  """
+
+  count = db.IntegerProperty(required=True, default=0)
+  "The change to the number of tagged entities recorded in this shard."
+
+  ops = db.StringListProperty(default=[])
+  "The ids of the most recent operations that have been applied to this shard."
+
+  @staticmethod
+  def key_names(tag_key):
+    """Returns the key_names of all shards of the tag with tag_key.
+    """
+
+    return ['%s/%d' % (tag_key, i) for i in range(TAG_COUNTER_SHARDS)]
+
+
 class Tag(db.Model):
   """Google AppEngine model for store of tags.
   """
@@ -14,10 +48,10 @@ class Tag(db.Model):
   "The date and time that the tag was first added to the datastore."
 
   tagged = db.ListProperty(db.Key)
-  "A List of db.Key values for the datastore objects that have been tagged with this tag value."
+  "A List of db.Key values for the datastore objects that have been tagged with this tag value, only used for models that do not store the keys of their tags."
 
   tagged_count = db.IntegerProperty(default=0)
-  "The number of entities in tagged."
+  "The number of entities in tagged, see get_tagged_count() for the total."
 
   auto_delete = db.BooleanProperty(required=True, default=False)
   "If true, a tag instance should be deleted when tagged_count reaches zero."
@@ -41,10 +75,14 @@ class Tag(db.Model):
         self.tagged_count -= 1
         if not self.tagged_count and self.auto_delete:
           self.delete()
+          return True
         else:
           self.put()
-    db.run_in_transaction(remove_tagged_txn)
-    self.__class__.expire_cached_tags()
+      return False
+
+    # the cached lists of tags expire by themselves when only counts change
+    if db.run_in_transaction(remove_tagged_txn):
+      self.__class__.expire_cached_tags()
 
   def add_tagged(self, key):
     def add_tagged_txn():
@@ -53,6 +91,93 @@ class Tag(db.Model):
         self.tagged_count += 1
         self.put()
     db.run_in_transaction(add_tagged_txn)
+
+  def increment_tagged(self, delta=1, op_id=None):
+    """Adds delta to the number of tagged entities in a random shard.
+
+    Used for entities that store the keys of their tags, so that tagging
+    an entity does not write to the tag entity itself.
+
+    If op_id is given the shard is picked by op_id and an increment with
+    the same op_id is only applied once, so that it can safely be retried.
+    """
+
+    if op_id:
+      shard = (zlib.crc32(op_id) & 0x7fffffff) % TAG_COUNTER_SHARDS
+    else:
+      shard = random.randint(0, TAG_COUNTER_SHARDS - 1)
+    key_name = TagCounterShard.key_names(self.key())[shard]
+
+    def increment_tagged_txn():
+      counter = TagCounterShard.get_by_key_name(key_name)
+      if not counter:
+        counter = TagCounterShard(key_name=key_name)
+      if op_id:
+        if op_id in counter.ops:
+          return
+        counter.ops = (counter.ops + [op_id])[-TAG_COUNTER_OPS:]
+      counter.count += delta
+      counter.put()
+    db.run_in_transaction(increment_tagged_txn)
+
+  def index_tagged(self, key):
+    """Moves key from tagged to the sharded counter.
+
+    Used to convert an entity to store the keys of its tags itself, once
+    the entity has been stored with the keys. The key is counted before it
+    is removed from tagged, with an op_id for this tag and key so that a
+    retry does not count it twice.
+    """
+
+    tag = self.get(self.key())
+    if key not in tag.tagged:
+      return
+
+    self.increment_tagged(op_id='index/%s/%s' % (self.key(), key))
+
+    def index_tagged_txn():
+      tag = self.get(self.key())
+      if key in tag.tagged:
+        tag.tagged.remove(key)
+        tag.tagged_count -= 1
+        tag.put()
+
+    db.run_in_transaction(index_tagged_txn)
+
+  def get_tagged_count(self):
+    """Returns the number of entities that have been tagged with this tag.
+    """
+
+    return self.__class__.get_tagged_counts([self])[0]
+
+  @staticmethod
+  def get_tagged_counts(tags):
+    """Returns the number of tagged entities for each of the given tags.
+    """
+
+    key_names = []
+    for tag in tags:
+      key_names.extend(TagCounterShard.key_names(tag.key()))
+
+    shards = []
+    for i in range(0, len(key_names), GET_BATCH_SIZE):
+      shards.extend(TagCounterShard.get_by_key_name(
+          key_names[i:i + GET_BATCH_SIZE]))
+
+    counts = []
+    for i, tag in enumerate(tags):
+      tag_shards = shards[i * TAG_COUNTER_SHARDS:(i + 1) * TAG_COUNTER_SHARDS]
+      counts.append(tag.tagged_count + sum([j.count for j in tag_shards if j]))
+
+    return counts
+
+  def delete_with_counter(self):
+    """Deletes the tag and the shards of its counter.
+    """
+
+    shard_keys = [db.Key.from_path(TagCounterShard.kind(), i)
+        for i in TagCounterShard.key_names(self.key())]
+    db.delete([self.key()] + shard_keys)
     self.__class__.expire_cached_tags()
 
   def clear_tagged(self):
@@ -64,7 +189,9 @@ class Tag(db.Model):
         self.tagged_count = 0
         self.put()
     db.run_in_transaction(clear_tagged_txn)
-    self.__class__.expire_cached_tags()
+
+    if self.auto_delete:
+      self.__class__.expire_cached_tags()
 
   @classmethod
   def get_by_name(cls, tag_name):
@@ -133,10 +260,15 @@ class Tag(db.Model):
     only return only that many tags; otherwise, return all.
     """
 
-    tag_list = db.Query(cls).filter('tagged_count >', 0).order(
-        "-tagged_count").fetch(limit)
+    # the counts are sharded so they can not be ordered on in a query
+    tags = db.Query(cls).fetch(1000)
+    counts = cls.get_tagged_counts(tags)
 
-    return tag_list
+    tag_list = [(-count, tag.tag, tag) for count, tag in zip(counts, tags)
+                if count > 0]
+    tag_list.sort()
+
+    return [tag for _, _, tag in tag_list[:limit]]
 
   @classmethod
   def get_tags_by_name(cls, limit=1000, ascending=True):
@@ -182,6 +314,7 @@ class Tag(db.Model):
         new_tag.put()
         return new_tag
       existing_tag = db.run_in_transaction(create_tag_txn)
+      cls.expire_cached_tags()
     return existing_tag
 
   @classmethod
@@ -198,9 +331,9 @@ class Tag(db.Model):
       if existing_tag is None:
         new_tag = cls(key_name=tag_key_name, tag=new_tag_name, scope=scope, 
                       added=tag.added, tagged=tag.tagged,
-                      tagged_count=tag.tagged_count)
+                      tagged_count=tag.get_tagged_count())
         new_tag.put()
-        tag.delete()
+        tag.delete_with_counter()
 
         return new_tag
 
@@ -216,7 +349,7 @@ class Tag(db.Model):
     tag = cls.get_by_scope_and_name(scope, tag_name)
 
     if tag:
-      tag.delete()
+      tag.delete_with_counter()
       return True
 
     return False
@@ -239,6 +372,9 @@ class Tag(db.Model):
   @classmethod
   def expire_cached_tags(cls):
     """Expire all tag lists which exist in memcache.
+
+    Called when a tag is created or deleted. Changes to the number of
+    tagged entities show up when the cached lists expire.
     """
 
     from google.appengine.api import memcache
@@ -258,6 +394,11 @@ def tag_property(tag_name):
   """Decorator that creates and returns a tag property to be used
   in Google AppEngine model.
 
+  If the model has a db.ListProperty(db.Key) named after the tag property
+  with a _keys suffix, such as difficulty_keys for difficulty, the keys of
+  the tags are stored in it. Otherwise the key of the entity is stored in
+  the tagged list of every tag it has been tagged with.
+
   Args:
     tag_name: name of the tag to be created.
   """
@@ -268,8 +409,16 @@ def tag_property(tag_name):
     """
 
     if self._tags[tag_name] is None or len(self._tags[tag_name]) == 0:
-      self._tags[tag_name] = self._tag_model[
-          tag_name].get_tags_for_key(self.key())
+      keys = self.tag_keys(tag_name)
+      if keys:
+        tags = self._tag_model[tag_name].get(keys)
+        # tags that have been deleted are left in the keys of the entity
+        self._tags[tag_name] = [i for i in tags if i]
+      elif self.is_saved():
+        self._tags[tag_name] = self._tag_model[
+            tag_name].get_tags_for_key(self.key())
+      else:
+        self._tags[tag_name] = []
     return self._tags[tag_name]
 
   def set_tags(self, seed):
@@ -286,26 +435,29 @@ def tag_property(tag_name):
       seed['tags'] = string.split(seed['tags'], self.tag_separator)
     if type(seed['tags']) is types.ListType:
       get_tags(self)
+      self.index_tags(tag_name)
+      tag_values = [string.strip(i) for i in seed['tags']]
       # Firstly, we will check to see if any tags have been removed.
       # Iterate over a copy of _tags, as we may need to modify _tags
       for each_tag in self._tags[tag_name][:]:
-        if each_tag not in seed['tags']:
+        if each_tag.tag not in tag_values:
           # A tag that was previously assigned to this entity is
           # missing in the list that is being assigned, so we
           # disassocaite this entity and the tag.
-          each_tag.remove_tagged(self.key())
+          self._remove_tag(tag_name, each_tag)
           self._tags[tag_name].remove(each_tag)
       # Secondly, we will check to see if any tags have been added.
-      for each_tag in seed['tags']:
-        each_tag = string.strip(each_tag)
-        if len(each_tag) > 0 and each_tag not in self._tags[tag_name]:
+      current_values = [i.tag for i in self._tags[tag_name]]
+      for each_tag in tag_values:
+        if len(each_tag) > 0 and each_tag not in current_values:
           # A tag that was not previously assigned to this entity
           # is present in the list that is being assigned, so we
           # associate this entity with the tag.
           tag = self._tag_model[tag_name].get_or_create(
               seed['scope'], each_tag)
-          tag.add_tagged(self.key())
+          self._add_tag(tag_name, tag)
           self._tags[tag_name].append(tag)
+          current_values.append(each_tag)
     else:
       raise Exception, "tags must be either a unicode, a string or a list"
 
@@ -333,6 +485,7 @@ class Taggable(object):
 
     self._tags = {}
     self._tag_model = {}
+    self._tag_changes = []
 
     for tag_name in kwargs:
       self._tags[tag_name] = None
@@ -340,6 +493,107 @@ class Taggable(object):
 
     self.tag_separator = ", "
 
+  def _tag_keys_name(self, tag_name):
+    """Returns the name of the property that stores the keys of the tags,
+    None if the entity does not store them.
+    """
+
+    name = '%s_keys' % tag_name
+    if name in self.properties():
+      return name
+    return None
+
+  def tag_keys(self, tag_name):
+    """Returns the keys of the tags stored on this entity.
+
+    Returns an empty list if the entity does not store the keys of its tags.
+    """
+
+    name = self._tag_keys_name(tag_name)
+    if not name:
+      return []
+    return getattr(self, name)
+
+  def index_tags(self, tag_name):
+    """Stores the keys of the tags of this entity that are only recorded in
+    the tagged list of the tags.
+
+    The entity itself has to be stored by the caller, which then calls
+    apply_tag_changes() to remove it from the tagged lists. If the keys
+    have been stored by an earlier attempt, the tags that still list the
+    entity are updated as well.
+
+    Returns:
+      True iff the keys of the tags of the entity have been changed
+    """
+
+    name = self._tag_keys_name(tag_name)
+    if not name or not self.is_saved():
+      return False
+
+    tags = getattr(self, tag_name)
+    changed = not getattr(self, name) and bool(tags)
+    if changed:
+      setattr(self, name, [i.key() for i in tags])
+
+    self._tag_changes += [(i, None) for i in tags if self.key() in i.tagged]
+    return changed
+
+  def _add_tag(self, tag_name, tag):
+    """Tags this entity with tag.
+    """
+
+    name = self._tag_keys_name(tag_name)
+    if not name:
+      tag.add_tagged(self.key())
+      return
+
+    keys = getattr(self, name)
+    if tag.key() not in keys:
+      keys.append(tag.key())
+      self._tag_changes.append((tag, 1))
+
+  def _remove_tag(self, tag_name, tag):
+    """Removes tag from the tags of this entity.
+    """
+
+    name = self._tag_keys_name(tag_name)
+    if not name:
+      tag.remove_tagged(self.key())
+      return
+
+    keys = getattr(self, name)
+    if tag.key() in keys:
+      keys.remove(tag.key())
+      self._tag_changes.append((tag, -1))
+
+  def apply_tag_changes(self):
+    """Updates the tags for the changes made to the tags of this entity.
+
+    Has to be called after the entity has been stored, so that the tags
+    are not counted for an entity that failed to be stored.
+    """
+
+    changes, self._tag_changes = self._tag_changes, []
+
+    for tag, delta in changes:
+      if delta is None:
+        tag.index_tagged(self.key())
+        continue
+
+      tag.increment_tagged(delta)
+      if delta < 0 and tag.auto_delete and tag.get_tagged_count() <= 0:
+        tag.delete_with_counter()
+
+  def clear_tags(self, tag_name):
+    """Removes all tags of tag_name from this entity.
+    """
+
+    self.index_tags(tag_name)
+    for tag in getattr(self, tag_name):
+      self._remove_tag(tag_name, tag)
+    self._tags[tag_name] = []
+
   def tags_string(self, tag_name, ret_list=False):
     """Create a formatted string version of this entity's tags.
 
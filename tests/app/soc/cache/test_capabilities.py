@@ -0,0 +1,186 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+from google.appengine.api import memcache
+
+from soc.cache import capabilities
+from soc.cache import sidebar
+from soc.logic.models import role as role_logic
+from soc.modules import callback
+from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
+from soc.modules.gsoc.logic.models.org_admin import logic as org_admin_logic
+from soc.modules.gsoc.logic.models.organization import logic as org_logic
+from soc.modules.gsoc.logic.models.student import logic as student_logic
+from soc.modules.gsoc.models.mentor import GSoCMentor
+from soc.views import out_of_band
+from soc.views.helper import access
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+
+# the number of queries of a full sidebar build for a mentor when every
+# role was looked up with its own queries
+UNCACHED_SIDEBAR_QUERIES = 34
+
+
+class CapabilitiesTest(DjangoTestCase):
+  """Tests for the soc.cache.capabilities module and its use in access.
+  """
+
+  def setUp(self):
+    super(CapabilitiesTest, self).setUp()
+    self.init()
+    memcache.flush_all()
+
+    self.user = self.data.createUser()
+    self.mentor = self.seed(GSoCMentor, {'user': self.user,
+                                         'scope': self.org,
+                                         'program': self.gsoc,
+                                         'status': 'active'})
+    self.args = {'scope_path': self.mentor.scope_path}
+
+  def getChecker(self):
+    """Returns a checker for the current user, as set up for a request.
+    """
+
+    checker = access.Checker(None)
+    checker.setCurrentUser(self.user.account, self.user)
+    return checker
+
+  def testHasRole(self):
+    """Tests that the capability set matches on status and fields.
+    """
+
+    user_capabilities = capabilities.get(self.user)
+
+    self.assertTrue(user_capabilities.hasRole('gsoc_mentor',
+                                              program=self.gsoc))
+    self.assertTrue(user_capabilities.hasRole('gsoc_mentor',
+        status=['active', 'inactive'], scope=self.org.key()))
+    self.assertFalse(user_capabilities.hasRole('gsoc_mentor',
+                                               status='inactive'))
+    self.assertFalse(user_capabilities.hasRole('gsoc_org_admin'))
+    self.assertFalse(capabilities.get(None).hasRole('gsoc_mentor'))
+
+  def testRoleChecksQueryOnce(self):
+    """Tests that the roles are queried once for any number of checks.
+    """
+
+    checker = self.getChecker()
+
+    counter = RPCCounter()
+    counter.start()
+
+    checker.checkHasRoleForScope(self.args, mentor_logic)
+    queries = counter.count('RunQuery')
+
+    checker.checkHasRoleForScope(self.args, mentor_logic)
+    self.assertRaises(out_of_band.Error, checker.checkHasRoleForScope,
+                      self.args, org_admin_logic)
+    checker.checkIsNotStudentForProgramOfOrg(
+        {'scope_path': self.org.key().name()}, org_logic, student_logic)
+
+    counter.stop()
+    self.assertEqual(counter.count('RunQuery'), queries)
+
+  def countSidebarRPCs(self):
+    """Returns the RPCCounter of a full, uncached sidebar build.
+    """
+
+    core = callback.getCore()
+    sidebar.flush(self.user.account)
+
+    counter = RPCCounter()
+    counter.start()
+    core.startNewRequest(None)
+    self.sidebar = core.getSidebar(self.user.account, self.user)
+    core.endRequest(None, False)
+    counter.stop()
+
+    return counter
+
+  def testSidebarQueries(self):
+    """Tests that a sidebar build looks up the roles of the user in the
+    capability set only.
+    """
+
+    role_models = set([logic.getModel() for name, logic
+                       in role_logic.ROLE_LOGICS.iteritems() if name])
+    role_kinds = set([i.kind() for i in role_models])
+
+    cold = self.countSidebarRPCs().count('RunQuery')
+    self.assertTrue(cold < UNCACHED_SIDEBAR_QUERIES)
+
+    counter = self.countSidebarRPCs()
+    queries = counter.count('RunQuery')
+    self.assertTrue(queries < cold)
+
+    kinds = set([i.kind() for i in counter.requests('RunQuery')])
+    self.assertEqual(kinds & role_kinds, set())
+
+    # the menu of the organization of the mentor is still shown
+    headings = [i.get('heading', '') for i in self.sidebar]
+    self.assertTrue([i for i in headings if i.startswith(self.org.short_name)])
+
+    capabilities.flush(self.user)
+    self.assertEqual(self.countSidebarRPCs().count('RunQuery'),
+                     queries + len(role_models))
+
+  def testGetRoles(self):
+    """Tests that roles are retrieved by the keys in the capability set.
+    """
+
+    roles = capabilities.getRoles(self.user, 'gsoc_mentor',
+                                  ['active', 'inactive'], program=self.gsoc)
+    self.assertEqual([i.key() for i in roles], [self.mentor.key()])
+    self.assertEqual(capabilities.getRole(self.user, 'gsoc_org_admin'), None)
+
+    # a role that has been changed behind the cache is left out
+    self.mentor.status = 'invalid'
+    self.mentor.put()
+    self.assertEqual(capabilities.getRoles(self.user, 'gsoc_mentor'), [])
+
+  def testCapabilitiesCachedAcrossRequests(self):
+    """Tests that a new request reuses the capabilities from memcache.
+    """
+
+    self.getChecker().checkHasRoleForScope(self.args, mentor_logic)
+
+    counter = RPCCounter()
+    counter.start()
+    self.getChecker().checkHasRoleForScope(self.args, mentor_logic)
+    counter.stop()
+
+    self.assertEqual(counter.count('RunQuery'), 0)
+
+  def testRoleUpdateFlushesCapabilities(self):
+    """Tests that a status change of a role is visible in the next request.
+    """
+
+    self.getChecker().checkHasRoleForScope(self.args, mentor_logic)
+
+    mentor_logic.updateEntityProperties(self.mentor, {'status': 'inactive'})
+
+    self.assertRaises(out_of_band.Error,
+                      self.getChecker().checkHasRoleForScope,
+                      self.args, mentor_logic)
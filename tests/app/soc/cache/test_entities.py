@@ -0,0 +1,162 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import unittest
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+
+from soc.cache import entities
+from soc.logic.models.site import logic as site_logic
+from soc.models.site import Site
+
+from tests.test_utils import RPCCounter
+
+
+class CachedModel(db.Model):
+  """A model used to test the entity cache.
+  """
+
+  value = db.StringProperty()
+
+
+class EntityCacheTest(unittest.TestCase):
+  """Tests for the soc.cache.entities module.
+  """
+
+  def setUp(self):
+    self.entity = CachedModel(key_name='cached', value='first')
+    self.entity.put()
+    self.key = self.entity.key()
+    self.counter = RPCCounter()
+    self.counter.start()
+
+  def tearDown(self):
+    self.counter.stop()
+    memcache.flush_all()
+    entities.clear()
+
+  def testGetCachesEntity(self):
+    """Tests that only the first get reads from the datastore.
+    """
+
+    self.assertEqual(entities.get(self.key).value, 'first')
+    self.assertEqual(entities.get(self.key).value, 'first')
+    self.assertEqual(self.counter.count('Get'), 1)
+
+  def testGetFromMemcache(self):
+    """Tests that entities are retrieved from memcache by other instances.
+    """
+
+    entities.get(self.key)
+    entities.clear()
+    self.assertEqual(entities.get(self.key).value, 'first')
+    self.assertEqual(self.counter.count('Get'), 1)
+
+  def testGetReturnsNewInstances(self):
+    """Tests that modifying a returned entity does not modify the cache.
+    """
+
+    entity = entities.get(self.key)
+    entity.value = 'modified'
+    self.assertEqual(entities.get(self.key).value, 'first')
+
+  def testGetMultiple(self):
+    """Tests that a list of keys is fetched with a single get.
+    """
+
+    missing = db.Key.from_path('CachedModel', 'missing')
+    result = entities.get([self.key, missing])
+    self.assertEqual(result[0].value, 'first')
+    self.assertEqual(result[1], None)
+    self.assertEqual(self.counter.count('Get'), 1)
+
+  def testFlush(self):
+    """Tests that a flushed entity is read from the datastore again.
+    """
+
+    entities.get(self.key)
+    self.entity.value = 'second'
+    self.entity.put()
+    self.assertEqual(entities.get(self.key).value, 'first')
+
+    entities.flush(self.entity)
+    self.assertEqual(entities.get(self.key).value, 'second')
+    self.assertEqual(self.counter.count('Get'), 2)
+
+  def testFlushOtherInstance(self):
+    """Tests that a flush invalidates the local copy of other instances.
+    """
+
+    entities.get(self.key)
+    self.entity.value = 'second'
+    self.entity.put()
+
+    # flush the version without dropping the local copy of this instance
+    memcache.incr(entities._versionKey(str(self.key)))
+    self.assertEqual(entities.get(self.key).value, 'second')
+
+  def testGetScopedKey(self):
+    """Tests that a scoped key is computed once until the scope is flushed.
+    """
+
+    calls = []
+    def func():
+      calls.append(True)
+      return self.key
+
+    self.assertEqual(entities.getScopedKey(self.key, 'self', func), self.key)
+    self.assertEqual(entities.getScopedKey(self.key, 'self', func), self.key)
+    self.assertEqual(len(calls), 1)
+
+    entities.clear()
+    self.assertEqual(entities.getScopedKey(self.key, 'self', func), self.key)
+    self.assertEqual(len(calls), 1)
+
+    entities.flush(self.key)
+    entities.getScopedKey(self.key, 'self', func)
+    self.assertEqual(len(calls), 2)
+
+  def testGetScopedKeyNone(self):
+    """Tests that a missing result is cached as well.
+    """
+
+    calls = []
+    def func():
+      calls.append(True)
+      return None
+
+    self.assertEqual(entities.getScopedKey(self.key, 'none', func), None)
+    entities.clear()
+    self.assertEqual(entities.getScopedKey(self.key, 'none', func), None)
+    self.assertEqual(len(calls), 1)
+
+  def testLogicUpdateFlushes(self):
+    """Tests that updating an entity through its logic flushes the cache.
+    """
+
+    site = Site(key_name='site', link_id='site', site_name='first')
+    site.put()
+
+    self.assertEqual(site_logic.getSingleton().site_name, 'first')
+    site_logic.updateEntityProperties(site, {'site_name': 'second'})
+    self.assertEqual(site_logic.getSingleton().site_name, 'second')
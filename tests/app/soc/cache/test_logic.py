@@ -0,0 +1,164 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import unittest
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+
+from soc.cache import logic as query_cache
+from soc.logic.models import base
+
+from tests.test_utils import RPCCounter
+
+
+class ScopedModel(db.Model):
+  """A scoped model used to test the query cache.
+  """
+
+  scope_path = db.StringProperty()
+  value = db.IntegerProperty()
+
+
+class CachedLogic(base.Logic):
+  """Logic for ScopedModel with cached queries.
+  """
+
+  CACHE_QUERIES = True
+
+  def __init__(self):
+    super(CachedLogic, self).__init__(ScopedModel, id_based=True)
+
+
+class QueryKeyTest(unittest.TestCase):
+  """Tests for the memcache keys of queries.
+  """
+
+  def testKeyIsStable(self):
+    """Tests that equivalent filters result in the same key.
+    """
+
+    first = {'scope_path': 'a', 'value': [1, 2], 'status': ['active']}
+    second = {'status': 'active', 'value': [1, 2], 'scope_path': 'a'}
+
+    self.assertEqual(query_cache.key(ScopedModel, first, ['value']),
+                     query_cache.key(ScopedModel, second, ['value']))
+    self.assertNotEqual(query_cache.key(ScopedModel, first, ['value']),
+                        query_cache.key(ScopedModel, first, ['-value']))
+
+  def testKeyForEntities(self):
+    """Tests that entities and their keys result in the same key.
+    """
+
+    entity = ScopedModel(key_name='entity')
+    entity.put()
+
+    self.assertEqual(query_cache.key(ScopedModel, {'ref': entity}),
+                     query_cache.key(ScopedModel, {'ref': entity.key()}))
+
+  def testFlush(self):
+    """Tests that flush removes the data of the query.
+    """
+
+    memcache_key = query_cache.key(ScopedModel, {'value': 1}, None)
+    query_cache.set(['data'], memcache_key)
+    query_cache.flush(ScopedModel, {'value': 1})
+
+    self.assertEqual(query_cache.get(ScopedModel, {'value': 1}, None),
+                     (None, memcache_key))
+
+
+class GetForFieldsCacheTest(unittest.TestCase):
+  """Tests for the caching of Logic.getForFields.
+  """
+
+  def setUp(self):
+    self.logic = CachedLogic()
+
+    for scope_path in ['a', 'b']:
+      for value in range(3):
+        self.logic.updateOrCreateFromFields(
+            {'scope_path': scope_path, 'value': value})
+
+    self.counter = RPCCounter()
+    self.counter.start()
+
+  def tearDown(self):
+    self.counter.stop()
+    memcache.flush_all()
+
+  def values(self, filter):
+    """Returns the sorted values of the entities that match filter.
+    """
+
+    return sorted([i.value for i in self.logic.getForFields(filter)])
+
+  def testCachesKeys(self):
+    """Tests that a cached query is answered with a single get.
+    """
+
+    self.assertEqual(self.values({'scope_path': 'a'}), [0, 1, 2])
+    self.assertEqual(self.counter.count('RunQuery'), 1)
+
+    self.assertEqual(self.values({'scope_path': 'a'}), [0, 1, 2])
+    self.assertEqual(self.counter.count('RunQuery'), 1)
+    self.assertEqual(self.counter.count('Get'), 1)
+
+  def testCreateInvalidates(self):
+    """Tests that creating an entity invalidates the queries of its scope.
+    """
+
+    self.values({'scope_path': 'a'})
+    self.values({'scope_path': 'b'})
+    self.values({'value': 0})
+
+    self.logic.updateOrCreateFromFields({'scope_path': 'a', 'value': 3})
+
+    self.assertEqual(self.values({'scope_path': 'a'}), [0, 1, 2, 3])
+    self.assertEqual(self.values({'scope_path': 'b'}), [0, 1, 2])
+    self.assertEqual(self.values({'value': 0}), [0, 0])
+    self.assertEqual(self.counter.count('RunQuery'), 3 + 2)
+
+  def testUpdateInvalidates(self):
+    """Tests that silently updating an entity invalidates queries.
+    """
+
+    entity = self.logic.getForFields({'scope_path': 'b', 'value': 2},
+                                     unique=True)
+    self.assertEqual(self.values({'value': 5}), [])
+
+    self.logic.updateEntityProperties(entity, {'value': 5}, silent=True)
+
+    self.assertEqual(self.values({'value': 5}), [5])
+    self.assertEqual(self.values({'scope_path': 'b'}), [0, 1, 5])
+
+  def testDeleteInvalidates(self):
+    """Tests that deleting an entity invalidates queries.
+    """
+
+    entity = self.logic.getForFields({'scope_path': 'a', 'value': 0},
+                                     unique=True)
+    self.values({'scope_path': 'a'})
+
+    self.logic.delete(entity)
+
+    self.assertEqual(self.values({'scope_path': 'a'}), [1, 2])
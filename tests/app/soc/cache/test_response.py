@@ -0,0 +1,81 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import unittest
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+
+from soc.cache import entities
+from soc.cache import response
+
+
+class ResponseCacheTest(unittest.TestCase):
+  """Tests for the soc.cache.response module.
+  """
+
+  def setUp(self):
+    self.scope = db.Key.from_path('Program', 'cached')
+    self.key = response.key('/page', [self.scope])
+
+  def tearDown(self):
+    memcache.flush_all()
+    entities.clear()
+
+  def testPutAndGet(self):
+    """Tests that a cached value is returned until it expires.
+    """
+
+    self.assertEqual(response.get(self.key), None)
+    response.put(self.key, 'page', 4, 60)
+    self.assertEqual(response.get(self.key), 'page')
+
+  def testKeyChangesWithScope(self):
+    """Tests that flushing a scope invalidates the cached values.
+    """
+
+    response.put(self.key, 'page', 4, 60)
+    response.flush(self.scope)
+
+    key = response.key('/page', [self.scope])
+    self.assertNotEqual(key, self.key)
+    self.assertEqual(response.get(key), None)
+
+  def testExpiredValueIsRenderedOnce(self):
+    """Tests that only the first request renders an expired value again,
+    while other requests get the expired value.
+    """
+
+    response.put(self.key, 'old', 3, -1)
+
+    self.assertEqual(response.get(self.key), None)
+    self.assertEqual(response.get(self.key), 'old')
+
+    response.put(self.key, 'new', 3, 60)
+    self.assertEqual(response.get(self.key), 'new')
+
+  def testLargeValuesAreNotCached(self):
+    """Tests that values which do not fit into memcache are skipped.
+    """
+
+    response.put(self.key, 'large', response.MAX_SIZE + 1, 60)
+    self.assertEqual(response.get(self.key), None)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import os
+import unittest
+
+from django.template import TemplateDoesNotExist
+
+from soc.cache import templates
+
+
+LOADERS = (
+    'django.template.loaders.filesystem.load_template_source',
+    'django.template.loaders.app_directories.load_template_source',
+)
+
+TEMPLATE = 'v2/modules/gsoc/homepage/_apply.html'
+
+
+class TemplatesCacheTest(unittest.TestCase):
+  """Tests that compiled templates are cached.
+  """
+
+  def setUp(self):
+    self.loader = templates.Loader(LOADERS)
+    self.version = os.environ.get('CURRENT_VERSION_ID')
+
+  def tearDown(self):
+    os.environ['CURRENT_VERSION_ID'] = self.version
+
+  def testLoadTemplate(self):
+    """Tests that a template is compiled once.
+    """
+
+    template, _ = self.loader.load_template(TEMPLATE)
+    self.assertTrue(hasattr(template, 'render'))
+
+    cached, _ = self.loader.load_template(TEMPLATE)
+    self.assertTrue(cached is template)
+
+  def testLoadTemplateNewVersion(self):
+    """Tests that a new version of the app compiles the template again.
+    """
+
+    template, _ = self.loader.load_template(TEMPLATE)
+
+    os.environ['CURRENT_VERSION_ID'] = 'another-version'
+    other, _ = self.loader.load_template(TEMPLATE)
+    self.assertFalse(other is template)
+
+  def testLoadMissingTemplate(self):
+    """Tests that loading a missing template raises TemplateDoesNotExist.
+    """
+
+    self.assertRaises(TemplateDoesNotExist, self.loader.load_template,
+                      'v2/missing.html')
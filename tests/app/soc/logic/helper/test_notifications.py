@@ -0,0 +1,102 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from google.appengine.api import users
+from google.appengine.ext import db
+
+from soc.logic.helper import notifications
+from soc.models.notification import Notification
+from soc.models.user import User
+from soc.tasks import mailer
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+from tests.test_utils import TaskQueueTestCase
+
+
+RECIPIENTS = 200
+
+
+class NotificationsTest(DjangoTestCase, TaskQueueTestCase):
+  """Tests related to soc.logic.helper.notifications.
+  """
+
+  def setUp(self):
+    super(NotificationsTest, self).setUp()
+    self.init()
+
+    self.site.noreply_email = 'noreply@example.com'
+    self.site.put()
+
+    self.users = []
+    for i in range(RECIPIENTS):
+      link_id = 'member%03d' % i
+      account = users.User(email='%s@example.com' % link_id)
+      self.users.append(User(key_name=link_id, link_id=link_id,
+                             scope_path='', account=account,
+                             name='Member %d' % i))
+    db.put(self.users)
+
+  def sendNotifications(self, to_users):
+    """Notifies to_users of a new request for the org.
+
+    Returns an RPCCounter for the datastore calls that were made.
+    """
+
+    message_properties = {
+        'requester': 'A Requester',
+        'role_verbose': 'Mentor',
+        'group': self.org.name,
+        'request_url': 'http://localhost/request',
+        }
+
+    counter = RPCCounter()
+    counter.start()
+    notifications.sendNotifications(to_users, None, message_properties,
+        'New Request', notifications.DEF_NEW_REQUEST_NOTIFICATION_TEMPLATE)
+    counter.stop()
+
+    return counter
+
+  def testSendNotificationsBatchesRPCs(self):
+    """Tests that notifying the members of an org takes a few RPCs only.
+    """
+
+    keys = [i.key() for i in self.users]
+    counter = self.sendNotifications(keys)
+
+    self.assertEqual(Notification.all().count(), RECIPIENTS)
+
+    # the users are retrieved and the notifications stored at once
+    self.assertTrue(counter.count('Get') <= 2)
+    batches = len(self.get_tasks(url=mailer.SEND_MAIL_BATCH_URL))
+    self.assertEqual(batches, RECIPIENTS / mailer.MAIL_BATCH_SIZE)
+    self.assertEqual(counter.count('Put'), 1 + batches)
+
+  def testSendNotificationsOncePerUser(self):
+    """Tests that users which are specified twice are notified once.
+    """
+
+    to_users = self.users[:2] + [self.users[0].key()]
+    self.sendNotifications(to_users)
+
+    self.assertEqual(Notification.all().count(), 2)
@@ -27,6 +27,7 @@ from google.appengine.api import users
 
 from tests.app.soc.logic.models.test_model import TestModelLogic
 from tests.app.soc.models.test_model import TestModel
+from tests.test_utils import RPCCounter
 
 
 class BaseTest(unittest.TestCase):
@@ -446,9 +447,6 @@ class BaseTest(unittest.TestCase):
 
   def testGetAll(self):
     """Test that all entries are retrieved.
-
-    Note: an error will be raised if there are more than 1k entries
-    in the current implementation.
     """
 
     query = TestModel.all()
@@ -476,3 +474,81 @@ class BaseTest(unittest.TestCase):
     expected = []
     actual = self.logic.getAll(query = query)
     self.assertEqual(expected, actual)
+
+  def testGetAllInBatches(self):
+    """Test that all entries are retrieved when they span several batches.
+    """
+
+    query = TestModel.all()
+    expected = set(range(5))
+    actual = set([i.value for i in self.logic.getAll(query, batch_size=2)])
+    self.assertEqual(expected, actual)
+
+  def testGetAllMultiQuery(self):
+    """Test that all entries matching an 'IN' filter are retrieved.
+    """
+
+    query = self.logic.getQueryForFields(filter={'value': [0, 2, 4]})
+    expected = [0, 2, 4]
+    actual = sorted([i.value for i in self.logic.getAll(query, batch_size=1)])
+    self.assertEqual(expected, actual)
+
+  def testBatchIterator(self):
+    """Test that the batches have at most batch_size entries.
+    """
+
+    query = TestModel.all().order('value')
+    expected = [[0, 1], [2, 3], [4]]
+    actual = [[i.value for i in batch]
+              for batch in self.logic.batchIterator(query, batch_size=2)]
+    self.assertEqual(expected, actual)
+
+  def testBatchIteratorNoOffset(self):
+    """Test that the batches are retrieved without skipping entities.
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    batches = list(self.logic.batchIterator(TestModel.all(), batch_size=1))
+    counter.stop()
+
+    self.assertEqual(5, len(batches))
+    # one query per batch and a final one to find that there are no more
+    offsets = [i.offset() for i in counter.requests('RunQuery')]
+    self.assertEqual([0] * 6, offsets)
+
+  def testEntityIterator(self):
+    """Test that the iterator yields every entity exactly once.
+    """
+
+    query_gen = lambda: TestModel.all()
+    expected = range(5)
+    actual = sorted([i.value for i in self.logic.entityIterator(
+        query_gen, batch_size=2)])
+    self.assertEqual(expected, actual)
+
+  def testGetBatchOfData(self):
+    """Test that batches continue at the returned start key.
+    """
+
+    entities, start_key = self.logic.getBatchOfData(batch_size=3)
+    self.assertEqual(3, len(entities))
+    self.assertEqual(self.entities[3].key(), start_key)
+
+    entities, start_key = self.logic.getBatchOfData(start_key=start_key,
+                                                    batch_size=3)
+    self.assertEqual([3, 4], [i.value for i in entities])
+    self.assertEqual(None, start_key)
+
+  def testGetBatchOfDataQueriesOnce(self):
+    """Test that a batch is retrieved with a single query, whatever its size.
+    """
+
+    for batch_size in [0, 3, 5, 2000]:
+      counter = RPCCounter()
+      counter.start()
+      entities, start_key = self.logic.getBatchOfData(batch_size=batch_size)
+      counter.stop()
+
+      self.assertEqual(1, counter.count('RunQuery'))
+      self.assertEqual(max(1, min(batch_size, 5)), len(entities))
@@ -163,8 +163,7 @@ class CleaningTest(unittest.TestCase):
         'modified_by': self.user,
         }
     document = document_logic.updateOrCreateFromFields(document_properties)
-    site.tos = document
-    site.put()
+    site_logic.updateEntityProperties(site, {'tos': document})
     # Test that True will be returned if there is a tos document and
     # the value of the field is not empty
     field_value = 'Any value'
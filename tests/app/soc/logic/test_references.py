@@ -0,0 +1,103 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import unittest
+
+from google.appengine.ext import db
+
+from soc.logic import references
+
+from tests.app.soc.models.test_model import TestModel
+from tests.test_utils import RPCCounter
+
+
+class ReferencingModel(db.Model):
+  """Model with a reference and a list of keys to TestModel entities.
+  """
+
+  single = db.ReferenceProperty(TestModel)
+  multiple = db.ListProperty(item_type=db.Key, default=[])
+  value = db.IntegerProperty()
+
+
+class ReferencesTest(unittest.TestCase):
+  """Tests related to the references logic.
+  """
+
+  def setUp(self):
+    self.targets = [TestModel(value=i) for i in range(5)]
+    db.put(self.targets)
+
+    keys = [i.key() for i in self.targets]
+    self.entities = [ReferencingModel(single=keys[i], multiple=keys[:i])
+                     for i in range(5)]
+    db.put(self.entities)
+
+    # make sure nothing is cached on the entities
+    self.entities = db.get([i.key() for i in self.entities])
+
+  def testPrefetchUsesOneGet(self):
+    """Test that all references are retrieved with a single get.
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    references.prefetch(self.entities, ['single', 'multiple'])
+    singles = [i.single.value for i in self.entities]
+    multiples = [[j.value for j in references.getReferenced(i, 'multiple')]
+                 for i in self.entities]
+    counter.stop()
+
+    self.assertEqual(1, counter.count())
+    self.assertEqual(range(5), singles)
+    self.assertEqual([range(i) for i in range(5)], multiples)
+
+  def testGetReferencedWithoutPrefetch(self):
+    """Test that the referenced entities are retrieved if not prefetched.
+    """
+
+    entity = self.entities[3]
+    expected = [0, 1, 2]
+    actual = [i.value for i in references.getReferenced(entity, 'multiple')]
+    self.assertEqual(expected, actual)
+
+  def testPrefetchSkipsMissingEntities(self):
+    """Test that references to deleted entities are skipped.
+    """
+
+    self.targets[0].delete()
+    references.prefetch(self.entities, ['multiple'])
+    expected = [1, 2]
+    actual = [i.value for i in references.getReferenced(
+        self.entities[3], 'multiple')]
+    self.assertEqual(expected, actual)
+
+  def testPrefetchInvalidField(self):
+    """Test that fields that are not references are ignored.
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    references.prefetch(self.entities, ['value', 'non_existing'])
+    counter.stop()
+
+    self.assertEqual(0, counter.count())
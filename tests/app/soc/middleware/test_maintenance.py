@@ -0,0 +1,94 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the maintenance middleware.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import os
+
+from soc.logic.models.site import logic as site_logic
+from soc.middleware.maintenance import MaintenanceMiddleware
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+from tests.timeline_utils import past
+from tests.timeline_utils import future
+
+
+class MaintenanceMiddlewareTest(DjangoTestCase):
+  """Tests for the maintenance middleware.
+  """
+
+  def setUp(self):
+    self.init()
+    self.url = '/gsoc/homepage/' + self.gsoc.key().name()
+
+  def startMaintenance(self):
+    """Puts the site in maintenance mode.
+    """
+    site_logic.updateEntityProperties(self.site, {
+        'maintenance_start': past(), 'maintenance_end': future()})
+
+  def testNotInMaintenance(self):
+    """Tests that the check does not build the context or query the user.
+    """
+    middleware = MaintenanceMiddleware()
+    # cache the site singleton
+    site_logic.getSingleton()
+
+    counter = RPCCounter()
+    counter.start()
+    try:
+      result = middleware.process_request(None)
+    finally:
+      counter.stop()
+
+    self.assertEqual(result, None)
+    self.assertEqual(counter.count('RunQuery', 'Get'), 0)
+
+  def testInMaintenance(self):
+    """Tests that the maintenance page is shown to regular users.
+    """
+    self.data.createUser()
+    self.startMaintenance()
+    response = self.client.get(self.url)
+    self.assertTemplateUsed(response, 'soc/base.html')
+    self.assertContains(response, 'Down for maintenance')
+
+  def testInMaintenanceDeveloper(self):
+    """Tests that developers can use the site during maintenance.
+    """
+    self.data.createDeveloper()
+    self.startMaintenance()
+    response = self.client.get(self.url)
+    self.assertGSoCTemplatesUsed(response)
+
+  def testInMaintenanceTask(self):
+    """Tests that tasks are run during maintenance.
+    """
+    self.startMaintenance()
+    os.environ['HTTP_X_APPENGINE_QUEUENAME'] = 'default'
+    try:
+      result = MaintenanceMiddleware().process_request(None)
+    finally:
+      del os.environ['HTTP_X_APPENGINE_QUEUENAME']
+    self.assertEqual(result, None)
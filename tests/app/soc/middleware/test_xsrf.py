@@ -0,0 +1,101 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the XSRF middleware.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+from django import http
+
+from soc.middleware import xsrf
+from soc.middleware.xsrf import XsrfMiddleware
+from soc.modules import callback
+
+from tests.test_utils import DjangoTestCase
+
+
+FORM = '<p>text</p><FORM action="#" method="post"><input /></form>'
+
+
+class XsrfMiddlewareTest(DjangoTestCase):
+  """Tests for the XSRF middleware.
+  """
+
+  def setUp(self):
+    self.init()
+    self.middleware = XsrfMiddleware()
+    self.core = callback.getCore()
+    self.core.startNewRequest(None)
+
+  def tearDown(self):
+    self.core.endRequest(None, False)
+
+  def process(self, content):
+    """Returns the content of a response processed by the middleware.
+    """
+    response = http.HttpResponse(content)
+    return self.middleware.process_response(None, response).content
+
+  def testWithoutForm(self):
+    """Tests that responses without forms are not changed.
+    """
+    content = '<p>text</p>' * 10
+    self.assertEqual(self.process(content), content)
+    self.assertEqual(self.core.getRequestValue('xsrf_token'), None)
+
+  def testWithForm(self):
+    """Tests that the token is added to POST forms.
+    """
+    content = self.process(FORM + FORM)
+    token = xsrf.getToken()
+    self.assertEqual(content.count("value='%s'" % token), 2)
+    self.assertTrue(content.startswith('<p>text</p><FORM'))
+
+  def testTokenPerRequest(self):
+    """Tests that the token is generated once per request.
+    """
+    token = xsrf.getToken()
+    self.core.setRequestValue('xsrf_token', 'cached')
+    self.assertEqual(xsrf.getToken(), 'cached')
+    self.assertTrue(token)
+
+  def testTokenized(self):
+    """Tests that responses that contain the token already are not changed.
+    """
+    xsrf.markTokenized()
+    self.assertEqual(self.process(FORM), FORM)
+
+
+class XsrfFieldTest(DjangoTestCase):
+  """Tests for the xsrf_field template tag.
+  """
+
+  def setUp(self):
+    self.init()
+
+  def testFormPage(self):
+    """Tests that a form page contains the token exactly once.
+    """
+    self.data.createHost()
+    url = '/gsoc/program/edit/' + self.gsoc.key().name()
+    response = self.client.get(url)
+    self.assertEqual(response.content.count("name='xsrf_token'"), 1)
+    self.assertFalse("id='xsrftoken'" in response.content)
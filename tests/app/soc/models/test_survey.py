@@ -0,0 +1,83 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+import unittest
+
+from soc.models import survey
+from soc.models.survey import SurveyContent
+
+
+SCHEMA = {
+    u'LongQ': {'index': 1, 'type': 'long_answer', 'has_comment': False},
+    u'ShortQ': {'index': 0, 'type': 'short_answer', 'has_comment': True},
+    }
+
+
+class SurveyContentTest(unittest.TestCase):
+  """Tests for the schema of SurveyContent.
+  """
+
+  def createContent(self, schema):
+    """Returns a SurveyContent with a question for every field of schema.
+    """
+
+    content = SurveyContent(schema=schema)
+    for field in SCHEMA:
+      setattr(content, field, 'Question %s' % field)
+    return content
+
+  def testLoadLegacySchema(self):
+    """Tests that schemas stored as a repr are still loaded.
+    """
+
+    self.assertEqual(survey.loadSchema(str(SCHEMA)), SCHEMA)
+    self.assertEqual(survey.loadSchema(survey.dumpSchema(SCHEMA)), SCHEMA)
+    self.assertEqual(survey.loadSchema(None), {})
+
+  def testLegacySchemaIsNotEvaluated(self):
+    """Tests that legacy schemas can only contain literals.
+    """
+
+    self.assertEqual(survey.loadSchema("{'a': [True, None, -1, (u'b',)]}"),
+                     {'a': [True, None, -1, (u'b',)]})
+    self.assertRaises(ValueError, survey.loadSchema, "{'a': open('x')}")
+    self.assertRaises(ValueError, survey.loadSchema,
+                      "{'a': ().__class__.__bases__}")
+
+  def testGetSchemaIsCached(self):
+    """Tests that a schema is parsed once and shared by its contents.
+    """
+
+    text = survey.dumpSchema(SCHEMA)
+    first = self.createContent(text).getSchema()
+    second = self.createContent(text).getSchema()
+
+    self.assertEqual(first, SCHEMA)
+    self.assertTrue(first is second)
+
+  def testGetSurveyOrder(self):
+    """Tests that the questions are ordered by their index.
+    """
+
+    content = self.createContent(survey.dumpSchema(SCHEMA))
+
+    self.assertEqual(content.orderedProperties(), ['ShortQ', 'LongQ'])
@@ -0,0 +1,167 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Daniel Hans" <dhans@google.com>',
+  ]
+
+
+from soc.models.user import User
+from soc.modules.gci.logic.models.student_ranking import logic \
+    as ranking_logic
+from soc.modules.gci.models.program import GCIProgram
+from soc.modules.gci.models.student import GCIStudent
+from soc.modules.gci.models.task import GCITask
+from soc.modules.gci.models.task import TaskDifficultyTag
+from soc.tasks.updates import student_ranking
+
+from tests.test_utils import DjangoTestCase
+
+
+class StudentRankingTest(DjangoTestCase):
+  """Tests for the GCI student ranking logic.
+  """
+
+  def setUp(self):
+    super(StudentRankingTest, self).setUp()
+    properties = {'task_difficulties': ['Easy'], 'task_types': ['Code']}
+    self.program = self.seed(GCIProgram, properties)
+    self.easy = TaskDifficultyTag.get_or_create(self.program, 'Easy')
+    self.easy.value = 5
+    self.easy.put()
+
+  def createStudentWithTask(self, link_id):
+    """Returns a student and a task of the program closed by the student.
+    """
+
+    user = self.seed(User, {'name': link_id})
+    student = self.seed(GCIStudent, {'link_id': link_id,
+                                     'user': user,
+                                     'scope': self.program,
+                                     'scope_path': self.program.key().name(),
+                                     'status': 'active',
+                                     'consent_form': None,
+                                     'consent_form_two': None,
+                                     'student_id_form': None})
+    task = self.seed(GCITask, {'program': self.program,
+                               'student': student,
+                               'status': 'Closed',
+                               'difficulty_keys': [],
+                               'task_type_keys': [],
+                               'arbit_tag_keys': []})
+    task.difficulty = {'tags': 'Easy', 'scope': self.program}
+    task.put()
+    return student, task
+
+  def testUpdateRankingIsIdempotent(self):
+    """Tests that the points of a task are only added once.
+    """
+
+    student, task = self.createStudentWithTask('student')
+
+    ranking_logic.updateRanking(task)
+    ranking_logic.updateRanking(task)
+
+    ranking = ranking_logic.getOrCreateForStudent(student)
+    self.assertEqual(ranking.points, 5)
+    self.assertEqual(ranking.tasks_count, 1)
+    self.assertEqual(ranking.student_name, 'student')
+
+  def testGetRank(self):
+    """Tests that the rank is read from the ranker of the program.
+    """
+
+    first, first_task = self.createStudentWithTask('first')
+    second, second_task = self.createStudentWithTask('second')
+
+    ranking_logic.updateRanking(first_task)
+    ranking_logic.updateRanking(second_task)
+
+    other = self.seed(GCITask, {'program': self.program,
+                                'student': first,
+                                'status': 'Closed',
+                                'difficulty_keys': [self.easy.key()],
+                                'task_type_keys': [],
+                                'arbit_tag_keys': []})
+    ranking_logic.updateRanking(other)
+
+    first_ranking = ranking_logic.getOrCreateForStudent(first)
+    second_ranking = ranking_logic.getOrCreateForStudent(second)
+    self.assertEqual(ranking_logic.getRank(first_ranking), 1)
+    self.assertEqual(ranking_logic.getRank(second_ranking), 2)
+
+    ranking_logic.clearRankings([first_ranking])
+    self.assertEqual(ranking_logic.getRank(second_ranking), 1)
+
+  def testUpdateRankingRepairsRanker(self):
+    """Tests that a retry stores the points in the ranker if that failed
+    after the ranking was stored.
+    """
+
+    first, first_task = self.createStudentWithTask('first')
+    second, second_task = self.createStudentWithTask('second')
+    ranking_logic.updateRanking(first_task)
+
+    # the ranking is stored, but the ranker was not updated
+    ranking = ranking_logic.getOrCreateForStudent(second)
+    ranking.points = 5
+    ranking.tasks = [second_task.key()]
+    ranking.tasks_count = 1
+    ranking.put()
+
+    ranking_logic.updateRanking(second_task)
+
+    self.assertEqual(ranking_logic.getOrCreateForStudent(second).points, 5)
+    self.assertEqual(ranking_logic.getRank(ranking), 1)
+    ranker = ranking_logic.getRankerFor(self.program)
+    self.assertEqual(ranker.TotalRankedScores(), 2)
+
+  def testUpdate(self):
+    """Tests that the update stores existing rankings in the ranker.
+    """
+
+    first, first_task = self.createStudentWithTask('first')
+    ranking = ranking_logic.getOrCreateForStudent(first)
+    ranking.points = 5
+    ranking.tasks = [first_task.key()]
+    ranking.student_name = ''
+    ranking.put()
+
+    stored = student_ranking.runStudentRankingUpdate.process([ranking])
+
+    ranker = ranking_logic.getRankerFor(self.program)
+    self.assertEqual(ranker.TotalRankedScores(), 1)
+
+    self.assertEqual(stored, [ranking])
+    self.assertEqual(ranking.student_name, 'first')
+    self.assertEqual(ranking.tasks_count, 1)
+
+  def testUpdateRankingSetsStudentName(self):
+    """Tests that a ranking without a student name gets one with its
+    next task.
+    """
+
+    student, task = self.createStudentWithTask('student')
+    ranking = ranking_logic.getOrCreateForStudent(student)
+    ranking.student_name = ''
+    ranking.put()
+
+    ranking_logic.updateRanking(task, ranking=ranking)
+
+    ranking = ranking_logic.getOrCreateForStudent(student)
+    self.assertEqual(ranking.student_name, 'student')
+    self.assertEqual(ranking.tasks_count, 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Daniel Hans" <dhans@google.com>',
+  ]
+
+
+from soc.modules.gci.models.program import GCIProgram
+from soc.modules.gci.models.task import GCITask
+from soc.modules.gci.models.task import TaskDifficultyTag
+from soc.modules.gci.models.task import TaskTypeTag
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+
+class TaskTagsTest(DjangoTestCase):
+  """Tests for the tags of GCI Tasks.
+  """
+
+  def setUp(self):
+    super(TaskTagsTest, self).setUp()
+    properties = {'task_difficulties': ['Easy'],
+                  'task_types': ['Code', 'Documentation']}
+    self.program = self.seed(GCIProgram, properties)
+    self.easy = TaskDifficultyTag.get_or_create(self.program, 'Easy')
+    self.easy.value = 1
+    self.easy.put()
+    self.task = self.seed(GCITask, {'program': self.program,
+                                    'difficulty_keys': [],
+                                    'task_type_keys': [],
+                                    'arbit_tag_keys': []})
+
+  def testSetTagsStoresKeys(self):
+    """Tests that the keys of the tags are stored on the task only.
+    """
+
+    self.task.difficulty = {'tags': 'Easy', 'scope': self.program}
+    self.task.task_type = {'tags': ['Code', 'Documentation'],
+                           'scope': self.program}
+    self.task.put()
+    self.task.apply_tag_changes()
+
+    task = GCITask.get(self.task.key())
+    self.assertEqual(task.difficulty_keys, [self.easy.key()])
+    self.assertEqual(len(task.task_type_keys), 2)
+    self.assertEqual(task.taskType(), 'Code, Documentation')
+
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.tagged, [])
+    self.assertEqual(easy.get_tagged_count(), 1)
+
+    # the tasks with a tag can be queried
+    query = GCITask.all().filter('task_type_keys', task.task_type_keys[0])
+    self.assertEqual(query.count(), 1)
+
+  def testRemoveTag(self):
+    """Tests that removing a tag updates the keys and the count.
+    """
+
+    self.task.task_type = {'tags': ['Code', 'Documentation'],
+                           'scope': self.program}
+    self.task.put()
+    self.task.apply_tag_changes()
+
+    self.task.task_type = {'tags': ['Code'], 'scope': self.program}
+
+    self.assertEqual(self.task.taskType(), 'Code')
+    self.assertEqual(len(self.task.task_type_keys), 1)
+
+    documentation = TaskTypeTag.get_by_scope_and_name(
+        self.program, 'Documentation')
+    self.assertEqual(documentation.get_tagged_count(), 1)
+
+    self.task.put()
+    self.task.apply_tag_changes()
+    self.assertEqual(documentation.get_tagged_count(), 0)
+
+  def testTagsCountedAfterStoring(self):
+    """Tests that tags are not counted before the task has been stored.
+    """
+
+    self.task.difficulty = {'tags': 'Easy', 'scope': self.program}
+    self.assertEqual(self.easy.get_tagged_count(), 0)
+
+    self.task.put()
+    self.task.apply_tag_changes()
+    self.assertEqual(self.easy.get_tagged_count(), 1)
+
+    # the changes are applied once
+    self.task.apply_tag_changes()
+    self.assertEqual(self.easy.get_tagged_count(), 1)
+
+  def testResolveTagsWithoutRPCs(self):
+    """Tests that the tags of a task are resolved from the prefetched tags.
+    """
+
+    self.task.difficulty = {'tags': 'Easy', 'scope': self.program}
+    self.task.put()
+
+    all_d = TaskDifficultyTag.get_all_by_key()
+    task = GCITask.get(self.task.key())
+
+    counter = RPCCounter()
+    counter.start()
+    value = task.taskDifficultyValue(all_d)
+    counter.stop()
+
+    self.assertEqual(value, '1 (Easy)')
+    self.assertEqual(counter.count(), 0)
+
+  def testIndexLegacyTags(self):
+    """Tests that tags recorded in the tagged list are moved to the task.
+    """
+
+    self.easy.add_tagged(self.task.key())
+
+    task = GCITask.get(self.task.key())
+    self.assertEqual(task.taskDifficulty().key(), self.easy.key())
+
+    self.assertTrue(task.index_tags('difficulty'))
+
+    # the tag keeps the task until the task has been stored
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.tagged, [self.task.key()])
+
+    task.put()
+    task.apply_tag_changes()
+
+    self.assertEqual(task.difficulty_keys, [self.easy.key()])
+
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.tagged, [])
+    self.assertEqual(easy.get_tagged_count(), 1)
+
+  def testIndexLegacyTagsRetried(self):
+    """Tests that indexing a task again after it has been stored finishes
+    moving its tags without counting them twice.
+    """
+
+    self.easy.add_tagged(self.task.key())
+
+    task = GCITask.get(self.task.key())
+    task.index_tags('difficulty')
+    task.put()
+
+    # the first attempt failed after storing the task
+    task = GCITask.get(self.task.key())
+    self.assertFalse(task.index_tags('difficulty'))
+    task.put()
+    task.apply_tag_changes()
+
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.tagged, [])
+    self.assertEqual(easy.get_tagged_count(), 1)
+
+  def testIndexTaggedRetried(self):
+    """Tests that a task that has been counted by an interrupted move is
+    not counted again.
+    """
+
+    self.easy.add_tagged(self.task.key())
+    op_id = 'index/%s/%s' % (self.easy.key(), self.task.key())
+    self.easy.increment_tagged(op_id=op_id)
+
+    self.easy.index_tagged(self.task.key())
+
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.tagged, [])
+    self.assertEqual(easy.get_tagged_count(), 1)
+
+  def testUnknownDifficultyIsNotStored(self):
+    """Tests that showing a task without a difficulty does not tag it.
+    """
+
+    difficulty = self.task.taskDifficulty()
+
+    self.assertEqual(difficulty.tag, 'Unknown')
+    self.assertEqual(self.task.difficulty_keys, [])
+    self.assertEqual(TaskDifficultyTag.get_by_scope_and_name(
+        self.program, 'Unknown'), None)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from soc.models.user import User
+
+from soc.modules.gci.models.bulk_create_data import GCIBulkCreateData
+from soc.modules.gci.models.mentor import GCIMentor
+from soc.modules.gci.models.org_admin import GCIOrgAdmin
+from soc.modules.gci.models.organization import GCIOrganization
+from soc.modules.gci.models.program import GCIProgram
+from soc.modules.gci.models.task import GCITask
+from soc.modules.gci.models.task import TaskDifficultyTag
+from soc.modules.gci.models.task import TaskTypeTag
+from soc.modules.gci.models.task_subscription import GCITaskSubscription
+from soc.modules.gci.tasks import bulk_create
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import TaskQueueTestCase
+
+
+class BulkCreateTest(DjangoTestCase, TaskQueueTestCase):
+  """Tests for the bulk creation of GCI Tasks.
+  """
+
+  def setUp(self):
+    super(BulkCreateTest, self).setUp()
+
+    self.program = self.seed(GCIProgram, {
+        'task_difficulties': ['Easy'],
+        'task_types': ['Code'],
+        })
+    self.org = self.seed(GCIOrganization, {'scope': self.program,
+                                           'status': 'active'})
+    self.org_admin = self.seed(GCIOrgAdmin, {
+        'scope': self.org,
+        'scope_path': self.org.key().name(),
+        'program': self.program,
+        'user': self.seed(User, {}),
+        })
+
+    self.seed(GCIMentor, {
+        'key_name': '%s/mentor' % self.org.key().name(),
+        'link_id': 'mentor',
+        'scope': self.org,
+        'scope_path': self.org.key().name(),
+        'program': self.program,
+        'status': 'active',
+        })
+
+    easy = TaskDifficultyTag.get_or_create(self.program, 'Easy')
+    easy.value = 1
+    easy.put()
+    self.easy = easy
+    self.code = TaskTypeTag.get_or_create(self.program, 'Code')
+
+  def getData(self, count, valid=True):
+    """Returns CSV data with count rows.
+    """
+
+    difficulty = 'Easy' if valid else 'Impossible'
+    row = 'Task %d,Description,5,mentor,' + difficulty + ',Code,"a, b"\n'
+    return ''.join([row % i for i in range(count)])
+
+  def runBulkCreate(self):
+    """Runs the bulk create task for the stored data.
+    """
+
+    bulk_data = GCIBulkCreateData.all().get()
+    request = MockRequest(bulk_create.BULK_CREATE_URL, 'POST')
+    request.POST = {'bulk_create_key': str(bulk_data.key())}
+    return bulk_create.bulkCreateTasks(request)
+
+  def testBulkCreate(self):
+    """Tests that all rows are created with their tags and mentors.
+    """
+
+    bulk_create.spawnBulkCreateTasks(
+        self.getData(bulk_create.DEF_BATCH_SIZE + 1), self.org_admin)
+    self.runBulkCreate()
+
+    tasks = GCITask.all().fetch(1000)
+    self.assertEqual(len(tasks), bulk_create.DEF_BATCH_SIZE + 1)
+    self.assertEqual(GCITaskSubscription.all().count(), len(tasks))
+    self.assertEqual(GCIBulkCreateData.all().count(), 0)
+
+    task = tasks[0]
+    self.assertEqual(task.difficulty_keys, [self.easy.key()])
+    self.assertEqual(task.task_type_keys, [self.code.key()])
+    self.assertEqual(len(task.arbit_tag_keys), 2)
+    self.assertEqual(len(task.mentors), 1)
+
+    easy = TaskDifficultyTag.get(self.easy.key())
+    self.assertEqual(easy.get_tagged_count(), len(tasks))
+
+  def testRowsAreCreatedOnce(self):
+    """Tests that rows created by an interrupted invocation are skipped.
+    """
+
+    bulk_create.spawnBulkCreateTasks(self.getData(3), self.org_admin)
+    bulk_data = GCIBulkCreateData.all().get()
+
+    # create the rows without storing the progress
+    tasks = [bulk_create._loadTask(i) for i in bulk_create._getRows(bulk_data)]
+    resolver = bulk_create.TaskResolver(self.org_admin, tasks)
+    bulk_create._createTasks(bulk_data, 0, 0, tasks, self.org_admin, resolver)
+    self.assertEqual(GCITask.all().count(), 3)
+
+    self.runBulkCreate()
+
+    self.assertEqual(GCITask.all().count(), 3)
+    self.assertEqual(GCITaskSubscription.all().count(), 3)
+
+    # the rows of the interrupted invocation are counted once
+    self.assertEqual(self.easy.get_tagged_count(), 3)
+
+  def testTagsAreCountedOnce(self):
+    """Tests that counting the tags of a batch again has no effect.
+    """
+
+    bulk_create.spawnBulkCreateTasks(self.getData(3), self.org_admin)
+    bulk_data = GCIBulkCreateData.all().get()
+
+    tasks = [bulk_create._loadTask(i) for i in bulk_create._getRows(bulk_data)]
+    resolver = bulk_create.TaskResolver(self.org_admin, tasks)
+    bulk_create._createTasks(bulk_data, 0, 0, tasks, self.org_admin, resolver)
+    bulk_data.next_row = 3
+    bulk_data.put()
+
+    # count the tags and store the pending tags again as if the invocation
+    # was cut short before it could clear them
+    pending = bulk_data.pending_tags, bulk_data.pending_counts
+    bulk_create._countTags(bulk_data)
+    bulk_data.pending_tags, bulk_data.pending_counts = pending
+    bulk_data.put()
+
+    self.runBulkCreate()
+
+    self.assertEqual(self.easy.get_tagged_count(), 3)
+    self.assertEqual(self.code.get_tagged_count(), 3)
+
+  def testInvalidRows(self):
+    """Tests that invalid rows are reported and not created.
+    """
+
+    bulk_create.spawnBulkCreateTasks(self.getData(2, valid=False),
+                                     self.org_admin)
+    bulk_data = GCIBulkCreateData.all().get()
+
+    tasks = [bulk_create._loadTask(i) for i in bulk_create._getRows(bulk_data)]
+    resolver = bulk_create.TaskResolver(self.org_admin, tasks)
+    created = bulk_create._createTasks(bulk_data, 0, 0, tasks,
+                                       self.org_admin, resolver)
+
+    self.assertEqual(created, 0)
+    self.assertEqual(len(bulk_data.errors), 2)
+    self.assertTrue('row 2' in bulk_data.errors[1])
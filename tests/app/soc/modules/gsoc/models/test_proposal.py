@@ -0,0 +1,139 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.models.proposal import GSoCProposalSummary
+from soc.modules.gsoc.models.proposal import SUMMARY_PROPERTIES
+from soc.modules.gsoc.models.score import GSoCScore
+from soc.tasks.updates import proposal_scores
+from soc.tasks.updates import proposal_summary
+
+from tests.test_utils import DjangoTestCase
+
+
+class GSoCProposalTest(DjangoTestCase):
+  """Tests that GSoCProposals are stored together with their summary.
+  """
+
+  def setUp(self):
+    super(GSoCProposalTest, self).setUp()
+    self.init()
+    self.data.createStudent()
+
+    properties = {'parent': self.data.profile, 'program': self.gsoc,
+                  'org': self.org, 'status': 'new', 'score': 0,
+                  'nr_scores': 0, 'score_authors': [], 'score_values': []}
+    self.proposal = self.seed(GSoCProposal, properties)
+
+  def assertSummarized(self, proposal):
+    """Asserts that the stored summary of proposal matches it.
+    """
+
+    summary = GSoCProposalSummary.get(proposal.getSummaryKey())
+    self.assertEqual(summary.parent_key(), proposal.parent_key())
+
+    proposal_props = GSoCProposal.properties()
+    summary_props = GSoCProposalSummary.properties()
+
+    for name in SUMMARY_PROPERTIES:
+      self.assertEqual(proposal_props[name].get_value_for_datastore(proposal),
+                       summary_props[name].get_value_for_datastore(summary))
+
+  def testSummaryIsCreated(self):
+    """Tests that a new proposal is stored with its summary.
+    """
+
+    self.assertSummarized(self.proposal)
+
+  def testSummaryIsUpdated(self):
+    """Tests that a summary is updated with its proposal.
+    """
+
+    self.proposal.title = 'Another title'
+    self.proposal.score = 12
+
+    db.run_in_transaction(self.proposal.put)
+
+    self.assertSummarized(self.proposal)
+    summary = GSoCProposalSummary.get(self.proposal.getSummaryKey())
+    self.assertEqual(summary.title, 'Another title')
+
+  def testSummaryIsDeleted(self):
+    """Tests that a summary is deleted with its proposal.
+    """
+
+    self.proposal.delete()
+
+    self.assertEqual(GSoCProposalSummary.all().count(), 0)
+
+  def testUpdate(self):
+    """Tests that the update creates missing summaries.
+    """
+
+    db.delete(self.proposal.getSummaryKey())
+
+    summaries = proposal_summary.runProposalSummaryUpdate.process(
+        [self.proposal])
+    db.put(summaries)
+
+    self.assertSummarized(self.proposal)
+
+  def testSetScoreFor(self):
+    """Tests that setScoreFor maintains the score aggregates.
+    """
+
+    first = db.Key.from_path('GSoCProfile', 'first')
+    second = db.Key.from_path('GSoCProfile', 'second')
+
+    self.proposal.setScoreFor(first, 3)
+    self.proposal.setScoreFor(second, 5)
+    self.proposal.setScoreFor(first, 1)
+
+    self.assertEqual(self.proposal.score, 6)
+    self.assertEqual(self.proposal.nr_scores, 2)
+    self.assertEqual(self.proposal.getScoreFor(first), 1)
+    self.assertEqual(self.proposal.getScoreFor(second), 5)
+
+    self.proposal.setScoreFor(second, 0)
+
+    self.assertEqual(self.proposal.score, 1)
+    self.assertEqual(self.proposal.nr_scores, 1)
+    self.assertEqual(self.proposal.getScoreFor(second), 0)
+
+  def testScoresUpdate(self):
+    """Tests that the update computes the aggregates from the scores.
+    """
+
+    other = db.Key.from_path('GSoCProfile', 'other')
+    for author, value in [(self.data.profile.key(), 2), (other, 4)]:
+      GSoCScore(parent=self.proposal, author=author, value=value).put()
+
+    entities = proposal_scores.runProposalScoresUpdate.process(
+        [self.proposal])
+    db.put(entities)
+
+    proposal = GSoCProposal.get(self.proposal.key())
+    self.assertEqual(proposal.score, 6)
+    self.assertEqual(proposal.nr_scores, 2)
+    self.assertSummarized(proposal)
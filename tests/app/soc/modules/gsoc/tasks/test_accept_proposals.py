@@ -25,10 +25,16 @@ import httplib
 
 from google.appengine.api import users
 from google.appengine.ext import db
+from google.appengine.runtime import DeadlineExceededError
+
+from django.utils import simplejson
+
+from mox import stubout
 
 from soc.logic.models.host import logic as host_logic
 from soc.logic.models.sponsor import logic as sponsor_logic
 from soc.logic.models.user import logic as user_logic
+from soc.models.email import EmailBatch
 
 from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
 from soc.modules.gsoc.logic.models.organization import logic \
@@ -38,10 +44,13 @@ from soc.modules.gsoc.logic.models.timeline import logic as gsoc_timeline_logic
 from soc.modules.gsoc.logic.models.student import logic as student_logic
 from soc.modules.gsoc.logic.models.student_proposal import logic \
     as student_proposal_logic
+from soc.modules.gsoc.tasks import accept_proposals
 
 from tests.test_utils import DjangoTestCase
 from tests.test_utils import MailTestCase
+from tests.test_utils import MockRequest
 from tests.test_utils import TaskQueueTestCase
+from tests.test_utils import runTasks
 
 
 class AcceptProposalsTest(DjangoTestCase, TaskQueueTestCase, MailTestCase):
@@ -331,11 +340,16 @@ class AcceptProposalsTest(DjangoTestCase, TaskQueueTestCase, MailTestCase):
     response = self.client.post(url, postdata)
     self.assertEqual(response.status_code, httplib.OK)
     self.assertEqual(db.get(self.proposal.key()).status, 'pending')
-    self.assertEmailNotSent(to=self.student.email)
     self.assertEqual(db.get(self.another_proposal.key()).status, 'accepted')
-    self.assertEmailSent(to=self.another_student.email, html='accepted')
     task_url = next_path
     self.assertTasksInQueue(n=1, url=task_url)
+    # the mails are sent by a single task for the whole batch
+    mail_url = '/tasks/accept_proposals/mail'
+    self.assertTasksInQueue(n=1, url=mail_url)
+    self.assertEmailNotSent(to=self.another_student.email)
+    runTasks(url=mail_url)
+    self.assertEmailNotSent(to=self.student.email)
+    self.assertEmailSent(to=self.another_student.email, html='accepted')
 
   def testRejectProposalsThroughPostWithoutCorrectXsrfToken(self):
     """Tests that rejecting proposals is forbidden without correct XSRF token.
@@ -366,8 +380,11 @@ class AcceptProposalsTest(DjangoTestCase, TaskQueueTestCase, MailTestCase):
     response = self.client.post(url, postdata)
     self.assertEqual(response.status_code, httplib.OK)
     self.assertEqual(db.get(self.proposal.key()).status, 'rejected')
-    self.assertEmailSent(to=self.student.email, html='not selected')
     self.assertEqual(db.get(self.another_proposal.key()).status, 'rejected')
+    mail_url = '/tasks/accept_proposals/mail'
+    self.assertTasksInQueue(n=1, url=mail_url)
+    runTasks(url=mail_url)
+    self.assertEmailSent(to=self.student.email, html='not selected')
     self.assertEmailSent(to=self.another_student.email, html='not selected')
 
   def testRejectProposalsShortTimelimitThroughPostWithCorrectXsrfToken(self):
@@ -392,3 +409,46 @@ class AcceptProposalsTest(DjangoTestCase, TaskQueueTestCase, MailTestCase):
     self.assertEmailNotSent(to=self.another_student.email, html='not selected')
     task_url = url
     self.assertTasksInQueue(n=1, url=task_url)
+
+  def sendProposalEmails(self):
+    """Runs the mail task of the accepted proposals directly.
+    """
+    task = self.get_tasks(url=accept_proposals.MAIL_URL)[0]
+    request = MockRequest(accept_proposals.MAIL_URL, 'POST')
+    request.POST = task['params']
+    return accept_proposals.send_proposal_emails(request)
+
+  def testMailsOfInterruptedBatchAreSentOnce(self):
+    """Tests that the mails of a batch that is cut short before it is stored
+    are sent once, after the batch has been accepted again.
+    """
+    def put(*args, **kwargs):
+      raise DeadlineExceededError()
+
+    stubs = stubout.StubOutForTesting()
+    stubs.Set(db, 'put', put)
+    try:
+      self.assertRaises(DeadlineExceededError,
+                        accept_proposals.accept_proposal_batch,
+                        [db.get(self.another_proposal.key())])
+    finally:
+      stubs.UnsetAll()
+
+    self.assertTasksInQueue(n=1, url=accept_proposals.MAIL_URL)
+
+    # the mails wait for the proposals to be accepted
+    response = self.sendProposalEmails()
+    self.assertEqual(response.status_code, httplib.INTERNAL_SERVER_ERROR)
+    self.assertEqual(EmailBatch.all().count(), 0)
+
+    accept_proposals.accept_proposal_batch(
+        [db.get(self.another_proposal.key())])
+    self.assertTasksInQueue(n=1, url=accept_proposals.MAIL_URL)
+
+    response = self.sendProposalEmails()
+    self.assertEqual(response.status_code, httplib.OK)
+
+    batches = EmailBatch.all().fetch(10)
+    self.assertEqual(len(batches), 1)
+    contexts = simplejson.loads(batches[0].contexts)
+    self.assertEqual([self.another_student.email], [i['to'] for i in contexts])
@@ -0,0 +1,134 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Leo (Chong Liu)" <HiddenPython@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+from soc.modules.gsoc.logic.models.ranker_root import logic as \
+    ranker_root_logic
+from soc.modules.gsoc.logic.models.student_proposal import logic as \
+    student_proposal_logic
+from soc.modules.gsoc.models import student_proposal
+from soc.modules.gsoc.models.pending_score import PendingScore
+from soc.modules.gsoc.models.student import GSoCStudent
+from soc.modules.gsoc.models.student_proposal import StudentProposal
+from soc.modules.gsoc.tasks import proposal_review
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import TaskQueueTestCase
+
+
+class ProposalReviewTest(DjangoTestCase, TaskQueueTestCase):
+  """Tests for the buffered score updates in
+  soc.modules.gsoc.tasks.proposal_review.
+  """
+
+  def setUp(self):
+    super(ProposalReviewTest, self).setUp()
+    self.init()
+
+    ranker_root_logic.create(student_proposal.DEF_RANKER_NAME, self.org,
+        student_proposal.DEF_SCORE, 100)
+
+    student = self.seed(GSoCStudent, {'scope': self.gsoc,
+                                      'status': 'active'})
+
+    self.proposals = []
+    for i in range(3):
+      link_id = 'proposal%d' % i
+      self.proposals.append(StudentProposal(
+          key_name='%s/%s' % (student.key().name(), link_id),
+          link_id=link_id, scope_path=student.key().name(),
+          scope=student, program=self.gsoc, org=self.org,
+          title='Proposal %d' % i, abstract='abstract', content='content',
+          score=i, status='pending'))
+    db.put(self.proposals)
+
+    self.ranker = student_proposal_logic.getRankerForOrg(self.org)
+    self.ranker.SetScores(dict((i.key().name(), [i.score])
+                               for i in self.proposals))
+
+  def setScore(self, proposal, score):
+    """Changes the score of proposal and runs the update_ranker task.
+    """
+
+    proposal.score = score
+    proposal.put()
+
+    request = MockRequest(proposal_review.URL_UPDATE_RANKER, 'POST')
+    request.POST = {'student_proposal_key': proposal.key().name(),
+                    'value': str(score)}
+    proposal_review.update_ranker(request)
+
+  def flush(self):
+    """Runs the flush_scores task for the organization.
+    """
+
+    request = MockRequest(proposal_review.URL_FLUSH_SCORES, 'POST')
+    request.POST = {'org_key': str(self.org.key())}
+    proposal_review.flush_scores(request)
+
+  def findRanks(self, pending=None):
+    """Returns the ranks of the proposals.
+    """
+
+    scores = [[i.score] for i in self.proposals]
+    return self.ranker.FindRanks(scores, pending=pending)
+
+  def testScoresAreBuffered(self):
+    """Tests that score changes are only stored in the ranker when they
+    are flushed, and that one task flushes all of them.
+    """
+
+    self.setScore(self.proposals[0], 10)
+    self.setScore(self.proposals[1], 20)
+    self.setScore(self.proposals[0], 30)
+
+    self.assertEqual(PendingScore.all().count(), 3)
+    self.assertTasksInQueue(n=1, url=proposal_review.URL_FLUSH_SCORES)
+    name = self.proposals[0].key().name()
+    self.assertEqual(self.ranker.GetScores([name]), {name: [0]})
+
+    pending = student_proposal_logic.getPendingScores(self.org)
+    self.assertEqual(pending[name], [30])
+    self.assertEqual(self.findRanks(pending), [0, 1, 2])
+
+    self.flush()
+
+    self.assertEqual(PendingScore.all().count(), 0)
+    self.assertEqual(self.findRanks(), [0, 1, 2])
+
+  def testFlushUsesProposals(self):
+    """Tests that rejected proposals are removed from the ranker, however
+    their score changes are flushed.
+    """
+
+    self.setScore(self.proposals[2], 5)
+    self.proposals[2].status = 'rejected'
+    self.proposals[2].put()
+
+    self.flush()
+    self.flush()
+
+    name = self.proposals[2].key().name()
+    self.assertEqual(self.ranker.GetScores([name]), {})
+    self.assertEqual(self.findRanks()[:2], [1, 0])
@@ -0,0 +1,168 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the statistic collection logic.
+"""
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+from django.utils import simplejson
+
+from soc.modules.gsoc.models.student import GSoCStudent
+from soc.modules.gsoc.models.student_proposal import StudentProposal
+from soc.modules.statistic.logic.models.statistic import logic as \
+    statistic_logic
+from soc.modules.statistic.models.statistic import Statistic
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+
+STUDENTS = 20
+
+# small batches so that a handful of entities spans several of them
+BATCH_SIZE = 4
+
+INSTRUCTIONS = {
+    "type": "overall",
+    "items": [
+        {
+        "name": "Number of Students",
+        "type": "number",
+        "model": "gsoc_student",
+        "program_field": "scope",
+        "filter": "property_filter",
+        "params": {
+            "property_conditions": {
+                "status": ["active", "inactive"]
+                },
+            }
+        },
+        {
+        "name": "Number of Student Proposals",
+        "type": "number",
+        "model": "gsoc_student_proposal",
+        "program_field": "program",
+        },
+        {
+        "name": "Number of Students With Proposals",
+        "type": "number",
+        "model": "gsoc_student_proposal",
+        "program_field": "program",
+        "fields": ["scope"]
+        },
+        {
+        "name": "Average Number of Proposals Per Student",
+        "type": "average",
+        "model": "gsoc_student",
+        "program_field": "scope",
+        "ref_logic": "gsoc_student_proposal",
+        "ref_field": "scope"
+        },
+        ]
+    }
+
+
+class StatisticLogicTest(DjangoTestCase):
+  """Tests for the statistic collection logic.
+  """
+
+  def setUp(self):
+    self.init()
+    statistic_logic.BATCH_SIZE = BATCH_SIZE
+
+    students = []
+    for i in range(STUDENTS):
+      status = 'invalid' if i % 10 == 0 else 'active'
+      properties = self.seedProperties(GSoCStudent,
+          {'scope': self.gsoc, 'link_id': 'student%d' % i,
+           'status': status})
+      students.append(GSoCStudent(**properties))
+    db.put(students)
+
+    # every other student has two proposals
+    proposals = []
+    for i, student in enumerate(students[::2]):
+      for j in range(2):
+        properties = self.seedProperties(StudentProposal,
+            {'scope': student, 'link_id': 'proposal%d_%d' % (i, j),
+             'program': self.gsoc, 'org': self.org, 'mentor': None})
+        proposals.append(StudentProposal(**properties))
+    db.put(proposals)
+
+    self.entities = len(students) + len(proposals)
+
+    properties = {
+        'scope': self.gsoc, 'scope_path': self.gsoc.key().name(),
+        'link_id': 'overall', 'name': 'Overall',
+        'instructions_json': simplejson.dumps(INSTRUCTIONS),
+        'working_json': None, 'final_json': None, 'choices_json': None,
+        'next_entity': None,
+        }
+    self.statistic = self.seed(Statistic, properties)
+
+  def tearDown(self):
+    del statistic_logic.BATCH_SIZE
+
+  def collect(self):
+    """Collects the statistic like the collect task does.
+
+    Returns the number of datastore RPCs that were made.
+    """
+    counter = RPCCounter()
+    counter.start()
+
+    statistic = self.statistic
+    completed = False
+    tasks = 0
+
+    while not completed:
+      statistic, completed = statistic_logic.collectDispatcher(statistic)
+      tasks += 1
+      self.assertTrue(tasks < 100)
+
+    counter.stop()
+    self.statistic = statistic
+    return counter.count()
+
+  def testCollectOverall(self):
+    """Tests that all overall items are collected correctly.
+    """
+    self.collect()
+
+    result = simplejson.loads(self.statistic.final_json)
+    self.assertEqual(result['Number of Students'], STUDENTS - STUDENTS / 10)
+    self.assertEqual(result['Number of Student Proposals'], STUDENTS)
+    self.assertEqual(result['Number of Students With Proposals'],
+                     STUDENTS / 2)
+    self.assertEqual(result['Average Number of Proposals Per Student'], 1.0)
+
+  def testCollectOverallIsBatched(self):
+    """Tests that the datastore is not queried for every entity.
+    """
+    rpcs = self.collect()
+
+    # every batch takes a query and a put, allow for a few more per item
+    # to start and finish it; the average item reads all entities once
+    batches = self.entities * 2 / BATCH_SIZE
+    self.assertTrue(rpcs <= 3 * batches + 3 * len(INSTRUCTIONS['items']),
+                    rpcs)
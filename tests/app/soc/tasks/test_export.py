@@ -0,0 +1,198 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+from google.appengine.ext import db
+
+from soc.logic import export as export_logic
+from soc.models import survey
+from soc.models.export import Export
+from soc.models.survey import Survey
+from soc.models.survey import SurveyContent
+from soc.models.survey_record import SurveyRecord
+from soc.models.user import User
+from soc.tasks import export as export_tasks
+
+from tests.app.soc.models.test_model import TestModel
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import TaskQueueTestCase
+
+
+class TestExporter(export_logic.Exporter):
+  """Exports the values of all TestModel entities.
+  """
+
+  page_size = 10
+
+  def getFilename(self, entity):
+    return 'test'
+
+  def getColumns(self, entity):
+    return ['value']
+
+  def getQuery(self, entity):
+    return TestModel.all().order('__key__')
+
+  def getRows(self, entity, entities):
+    for i in entities:
+      yield [i.value]
+
+
+class TestView(object):
+  """View that holds a TestExporter.
+  """
+
+  def getParams(self):
+    return {'exporter': TestExporter()}
+
+
+class BrokenExporter(TestExporter):
+  """TestExporter that fails to produce its rows.
+  """
+
+  def getRows(self, entity, entities):
+    raise ValueError('broken')
+
+
+class BrokenView(object):
+  """View that holds a BrokenExporter.
+  """
+
+  def getParams(self):
+    return {'exporter': BrokenExporter()}
+
+
+view = TestView()
+broken_view = BrokenView()
+
+
+class ExportTest(DjangoTestCase, TaskQueueTestCase):
+  """Tests for the tasks in soc.tasks.export.
+  """
+
+  def setUp(self):
+    super(ExportTest, self).setUp()
+
+    self.user = self.seed(User, {})
+    db.put([TestModel(value=i) for i in range(25)])
+    self.entity = TestModel.all().get()
+
+  def runExport(self, export):
+    """Runs the export task for export and returns the stored Export.
+    """
+
+    request = MockRequest(export_tasks.RUN_EXPORT_URL, 'POST')
+    request.POST = {'export_key': str(export.key())}
+    export_tasks.runExport(request)
+
+    return Export.get(export.key())
+
+  def startExport(self, format):
+    """Starts an export of the TestModel entities in the specified format.
+    """
+
+    return export_tasks.startExport(self.user, '%s.view' % __name__,
+                                    TestExporter(), self.entity,
+                                    format=format)
+
+  def testExportCSV(self):
+    """Tests that every page is appended to a CSV export.
+    """
+
+    export = self.startExport(export_logic.CSV)
+    self.assertTasksInQueue(n=1, url=export_tasks.RUN_EXPORT_URL)
+
+    export = self.runExport(export)
+
+    self.assertEqual(export.status, 'finished')
+    self.assertEqual(export.row_count, 25)
+    self.assertEqual(export.chunk_count, 3)
+
+    data = ''.join(export_tasks.getChunks(export))
+    expected = ['value'] + [str(i) for i in range(25)]
+    self.assertEqual(data.split('\r\n')[:-1], expected)
+
+  def testExportJSON(self):
+    """Tests that a JSON export is a single list of objects.
+    """
+
+    from django.utils import simplejson
+
+    export = self.runExport(self.startExport(export_logic.JSON))
+
+    data = simplejson.loads(''.join(export_tasks.getChunks(export)))
+    self.assertEqual(data, [{'value': i} for i in range(25)])
+
+  def testPageIsWrittenOnce(self):
+    """Tests that a page is not appended again by a second run.
+    """
+
+    export = self.startExport(export_logic.CSV)
+    stale = Export.get(export.key())
+
+    export = self.runExport(export)
+    export_tasks._appendChunks(stale, 'duplicate', None, 10, False)
+
+    self.assertEqual(Export.get(export.key()).chunk_count, 3)
+
+  def testExportFailed(self):
+    """Tests that an export is marked as failed if writing it fails.
+    """
+
+    export = export_tasks.startExport(self.user, '%s.broken_view' % __name__,
+                                      BrokenExporter(), self.entity)
+    export = self.runExport(export)
+
+    self.assertEqual(export.status, 'failed')
+    self.assertEqual(export.chunk_count, 0)
+
+  def testExportSurvey(self):
+    """Tests that the records of a survey are exported by its View.
+    """
+
+    from soc.views.models import survey as survey_view
+
+    schema = survey.dumpSchema(
+        {'question': {'index': 0, 'type': 'short_answer'}})
+    content = SurveyContent(schema=schema, question='What?')
+    content.put()
+    entity = Survey(title='Survey', link_id='survey', scope_path='test',
+                    prefix='user', author=self.user, modified_by=self.user,
+                    content='content', survey_content=content)
+    entity.put()
+    for i in range(3):
+      SurveyRecord(survey=entity, user=self.user, question='answer %d' % i,
+                   modified=entity.modified).put()
+
+    exporter = survey_view.view.getParams()['exporter']
+    export = export_tasks.startExport(
+        self.user, 'soc.views.models.survey.view', exporter, entity)
+    export = self.runExport(export)
+
+    self.assertEqual(export.status, 'finished')
+    self.assertEqual(export.row_count, 3)
+
+    data = ''.join(export_tasks.getChunks(export))
+    self.assertTrue(data.startswith('# Melange Survey export for'))
+    self.assertTrue('# author: %s' % self.user.link_id in data)
+    self.assertTrue('user,created,modified,question\r\n' in data)
+    self.assertTrue('answer 2' in data)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Lennard de Rijk" <ljvderijk@gmail.com>',
+  ]
+
+
+import httplib
+
+from google.appengine.api import mail
+
+from mox import stubout
+
+from soc.models.email import EmailBatch
+from soc.tasks import mailer
+
+from tests.test_utils import MailTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import TaskQueueTestCase
+
+
+class MailerTest(TaskQueueTestCase, MailTestCase):
+  """Tests related to the batched mails of soc.tasks.mailer.
+  """
+
+  def getContexts(self, count):
+    """Returns count mail contexts to distinct recipients.
+    """
+
+    return [{
+        'to': 'student%03d@example.com' % i,
+        'sender': 'noreply@example.com',
+        'subject': 'Batch mail %d' % i,
+        'html': 'Body of mail %d' % i,
+        } for i in range(count)]
+
+  def sendBatch(self, batch):
+    """Runs the task that sends the specified batch.
+    """
+
+    request = MockRequest(mailer.SEND_MAIL_BATCH_URL, 'POST')
+    request.POST = {'batch_key': str(batch.key())}
+    return mailer.sendMailBatch(request)
+
+  def testSpawnMailBatch(self):
+    """Tests that the contexts are stored in a few batches with a task each.
+    """
+
+    mailer.spawnMailBatch(self.getContexts(mailer.MAIL_BATCH_SIZE + 1))
+
+    self.assertEqual(EmailBatch.all().count(), 2)
+    self.assertTasksInQueue(n=2, url=mailer.SEND_MAIL_BATCH_URL)
+
+  def testSendMailBatch(self):
+    """Tests that all mails of a batch are sent and the batch is deleted.
+    """
+
+    mailer.spawnMailBatch(self.getContexts(3))
+    batch = EmailBatch.all().get()
+
+    response = self.sendBatch(batch)
+    self.assertEqual(response.status_code, httplib.OK)
+
+    for i in range(3):
+      self.assertEmailSent(to='student%03d@example.com' % i, n=1)
+    self.assertEqual(EmailBatch.all().count(), 0)
+
+  def testSendMailBatchSkipsSentMails(self):
+    """Tests that mails recorded as sent are not sent again.
+    """
+
+    mailer.spawnMailBatch(self.getContexts(3))
+    batch = EmailBatch.all().get()
+    batch.sent = [0, 2]
+    batch.put()
+
+    self.sendBatch(batch)
+
+    self.assertEmailNotSent(to='student000@example.com')
+    self.assertEmailSent(to='student001@example.com', n=1)
+    self.assertEmailNotSent(to='student002@example.com')
+
+  def testSendMailBatchRecordsProgressOnError(self):
+    """Tests that the mails sent before an unexpected error are recorded.
+    """
+
+    mailer.spawnMailBatch(self.getContexts(3))
+    batch = EmailBatch.all().get()
+
+    send = mail.EmailMessage.send
+    def failingSend(message, *args, **kwargs):
+      if message.to == 'student001@example.com':
+        raise RuntimeError('Unexpected error')
+      return send(message, *args, **kwargs)
+
+    stubs = stubout.StubOutForTesting()
+    stubs.SmartSet(mail.EmailMessage, 'send', failingSend)
+    try:
+      self.assertRaises(RuntimeError, self.sendBatch, batch)
+    finally:
+      stubs.SmartUnsetAll()
+
+    self.assertEqual(EmailBatch.get(batch.key()).sent, [0])
+
+    self.sendBatch(batch)
+
+    self.assertEmailSent(to='student000@example.com', n=1)
+    self.assertEmailSent(to='student001@example.com', n=1)
+    self.assertEqual(EmailBatch.all().count(), 0)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+from soc.models.migration_failure import MigrationFailure
+from soc.tasks.helper import migration
+
+from soc.modules.gsoc.logic.models.mentor import logic as mentor_logic
+from soc.modules.gsoc.models.mentor import GSoCMentor
+from soc.modules.gsoc.models.program import GSoCProgram
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+
+# link_ids of the mentors that markMentors fails to migrate
+FAILING = set()
+
+
+@migration.migrate(mentor_logic)
+def markMentors(entities):
+  """Test migration that changes the status of mentors.
+  """
+
+  for entity in entities:
+    if entity.link_id in FAILING:
+      raise ValueError('Can not migrate %s' % entity.link_id)
+    entity.status = 'inactive'
+
+  return entities
+
+
+class MigrationTest(DjangoTestCase):
+  """Tests for the soc.tasks.helper.migration module.
+  """
+
+  def setUp(self):
+    super(MigrationTest, self).setUp()
+    self.init()
+    FAILING.clear()
+
+    self.mentors = []
+    for link_id in ['first', 'second']:
+      user = self.data.createUser()
+      self.mentors.append(self.seed(GSoCMentor, {'user': user,
+                                                 'link_id': link_id,
+                                                 'scope': self.org,
+                                                 'program': self.gsoc,
+                                                 'status': 'active'}))
+
+  def testGetCorresponding(self):
+    """Tests that the referenced entities are retrieved with one get.
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    programs = migration.getCorresponding(self.mentors, ['program'],
+                                          GSoCProgram)
+    counter.stop()
+
+    self.assertEqual(counter.count('Get'), 1)
+    self.assertEqual(programs.keys(), [self.gsoc.key().name()])
+
+  def testGetProperties(self):
+    """Tests that references are copied as keys.
+    """
+
+    properties = migration.getProperties(self.mentors[0])
+
+    self.assertEqual(properties['program'], self.gsoc.key())
+    self.assertEqual(properties['link_id'], 'first')
+
+  def testProcessEach(self):
+    """Tests that only the entities that fail are reported.
+    """
+
+    FAILING.add('first')
+
+    to_put, failed = markMentors.processEach(self.mentors)
+
+    self.assertEqual([i.link_id for i in to_put], ['second'])
+    self.assertEqual(len(failed), 1)
+    self.assertEqual(failed[0][0], self.mentors[0].key())
+
+  def testRetryFailures(self):
+    """Tests that recorded failures are migrated again.
+    """
+
+    FAILING.add('first')
+    _, failed = markMentors.processEach(self.mentors)
+    migration.recordFailures(markMentors, 'job', 'job-0', failed)
+
+    record = MigrationFailure.get_by_key_name('job/job-0')
+    self.assertEqual(record.failed_keys, [self.mentors[0].key()])
+    self.assertEqual(record.migration, markMentors.name)
+
+    FAILING.clear()
+    migration.retryFailures('job')
+
+    self.assertEqual(MigrationFailure.get_by_key_name('job/job-0'), None)
+    self.assertEqual(GSoCMentor.get(self.mentors[0].key()).status, 'inactive')
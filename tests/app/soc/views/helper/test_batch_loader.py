@@ -0,0 +1,73 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import unittest
+
+from google.appengine.ext import db
+
+from soc.views.helper.batch_loader import BatchLoader
+
+from tests.app.soc.models.test_model import TestModel
+from tests.test_utils import RPCCounter
+
+
+class BatchLoaderTest(unittest.TestCase):
+  """Tests for the BatchLoader.
+  """
+
+  def setUp(self):
+    self.keys = db.put([TestModel(value=i) for i in range(3)])
+    self.loader = BatchLoader()
+
+  def count(self, func, *args):
+    """Returns the result of func and the number of datastore gets it made.
+    """
+    counter = RPCCounter()
+    counter.start()
+    try:
+      result = func(*args)
+    finally:
+      counter.stop()
+    return result, counter.count('Get')
+
+  def testWantedKeysAreFetchedTogether(self):
+    """Tests that all wanted keys are fetched with a single call.
+    """
+    missing = db.Key.from_path(TestModel.kind(), 'missing')
+    self.loader.want(self.keys + [missing, None])
+
+    entity, gets = self.count(self.loader.get, self.keys[0])
+    self.assertEqual(entity.value, 0)
+    self.assertEqual(gets, 1)
+
+    entities, gets = self.count(self.loader.getMany, self.keys + [missing])
+    self.assertEqual([i and i.value for i in entities], [0, 1, 2, None])
+    self.assertEqual(gets, 0)
+
+  def testEntitiesAreReused(self):
+    """Tests that an entity is only fetched once per loader.
+    """
+    first = self.loader.get(self.keys[0])
+
+    second, gets = self.count(self.loader.get, self.keys[0])
+    self.assertTrue(first is second)
+    self.assertEqual(gets, 0)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Load test for accepting and rejecting the proposals of a program.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_accept_proposals.py -s
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import sys
+import time
+
+from google.appengine.ext import db
+
+from soc.modules.gsoc.logic.models.ranker_root import logic as \
+    ranker_root_logic
+from soc.modules.gsoc.models import student_proposal
+from soc.modules.gsoc.models.mentor import GSoCMentor
+from soc.modules.gsoc.models.organization import GSoCOrganization
+from soc.modules.gsoc.models.student import GSoCStudent
+from soc.modules.gsoc.models.student_project import StudentProject
+from soc.modules.gsoc.models.student_proposal import StudentProposal
+from soc.modules.gsoc.tasks import accept_proposals
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import RPCCounter
+from tests.test_utils import TaskQueueTestCase
+
+
+ORGS = 150
+PROPOSALS = 5000
+STUDENTS = 500
+SLOTS = 10
+
+
+class AcceptProposalsBenchmark(DjangoTestCase, TaskQueueTestCase):
+  """Accepts and rejects 5000 proposals of 150 organizations.
+  """
+
+  def setUp(self):
+    super(AcceptProposalsBenchmark, self).setUp()
+    self.init()
+
+    program_key_name = self.gsoc.key().name()
+
+    # seed one of each and copy it, the seeder is too slow for thousands
+    org_properties = self.seedProperties(GSoCOrganization,
+        {'scope': self.gsoc, 'status': 'active', 'slots': SLOTS})
+    self.orgs = []
+    for i in range(ORGS):
+      link_id = 'org%03d' % i
+      org_properties.update({
+          'key_name': '%s/%s' % (program_key_name, link_id),
+          'link_id': link_id,
+          'scope_path': program_key_name,
+          })
+      self.orgs.append(GSoCOrganization(**org_properties))
+    db.put(self.orgs)
+
+    for org in self.orgs:
+      ranker_root_logic.create(student_proposal.DEF_RANKER_NAME, org,
+          student_proposal.DEF_SCORE, 100)
+
+    mentor = self.seed(GSoCMentor, {'scope': self.org,
+                                    'program': self.gsoc})
+
+    student_properties = self.seedProperties(GSoCStudent,
+        {'scope': self.gsoc, 'status': 'active'})
+    students = []
+    for i in range(STUDENTS):
+      link_id = 'student%03d' % i
+      student_properties.update({
+          'key_name': '%s/%s' % (program_key_name, link_id),
+          'link_id': link_id,
+          'scope_path': program_key_name,
+          'email': '%s@example.com' % link_id,
+          })
+      students.append(GSoCStudent(**student_properties))
+    db.put(students)
+
+    proposals = []
+    for i in range(PROPOSALS):
+      student = students[i % STUDENTS]
+      link_id = 'proposal%04d' % i
+      proposals.append(StudentProposal(
+          key_name='%s/%s' % (student.key().name(), link_id),
+          link_id=link_id, scope_path=student.key().name(),
+          scope=student, program=self.gsoc, org=self.orgs[i % ORGS],
+          title='Proposal %d' % i, abstract='abstract', content='content',
+          mentor=mentor if i % 7 else None, score=i % 100,
+          status='pending'))
+
+    for start in range(0, PROPOSALS, 500):
+      db.put(proposals[start:start + 500])
+
+  def convert(self):
+    """Runs the accept and reject task for every organization.
+
+    Returns the number of seconds and of datastore RPCs it took.
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    start = time.time()
+
+    for org in self.orgs:
+      params = {
+          'orgkey': org.key().name(),
+          'timelimit': 20000,
+          'nextpath': '/tasks/accept_proposals/reject',
+          }
+
+      for path, task in [
+          ('/tasks/accept_proposals/accept', accept_proposals.accept_proposals),
+          ('/tasks/accept_proposals/reject', accept_proposals.reject_proposals)]:
+        request = MockRequest(path, 'POST')
+        request.POST = params.copy()
+        task(request)
+
+    seconds = time.time() - start
+    counter.stop()
+
+    return seconds, counter.count()
+
+  def count(self, model, **filters):
+    """Returns the number of entities of model that match filters.
+    """
+
+    query = model.all(keys_only=True)
+    for name, value in filters.iteritems():
+      query.filter(name, value)
+
+    return query.count(PROPOSALS + 1)
+
+  def testConvertProposals(self):
+    """Tests that all proposals are converted with batched writes.
+    """
+
+    seconds, rpcs = self.convert()
+    sys.stderr.write('\n%d proposals of %d orgs: %.1fs, %d rpcs, '
+                     '%.2f rpcs/proposal\n' % (PROPOSALS, ORGS, seconds, rpcs,
+                     float(rpcs) / PROPOSALS))
+
+    accepted = ORGS * SLOTS
+    self.assertEqual(self.count(StudentProject), accepted)
+    self.assertEqual(self.count(StudentProposal, status='accepted'), accepted)
+    self.assertEqual(self.count(StudentProposal, status='rejected'),
+                     PROPOSALS - accepted)
+
+    # a single mail task for accepted and rejected proposals of every org
+    mail_tasks = len(self.get_tasks(url=accept_proposals.MAIL_URL))
+    self.assertEqual(mail_tasks, 2 * ORGS)
+    self.assertTrue(rpcs < PROPOSALS / 2)
+
+    # converting again, like a requeued task would, changes nothing
+    self.convert()
+    self.assertEqual(self.count(StudentProject), accepted)
+    self.assertEqual(len(self.get_tasks(url=accept_proposals.MAIL_URL)),
+                     mail_tasks)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks for reading large result sets through the base logic.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_base.py -s
+
+The datastore stub scans the whole kind for every query, so its wall clock
+time grows with the size of the kind no matter how the query is paged. The
+number of queries and the number of entities skipped through an offset are
+what the production datastore is billed and timed on.
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import sys
+import time
+import unittest
+
+from google.appengine.api import apiproxy_stub_map
+from google.appengine.ext import db
+
+from tests.app.soc.logic.models.test_model import TestModelLogic
+from tests.app.soc.models.test_model import TestModel
+from tests.test_utils import RPCCounter
+
+
+SIZES = [1000, 5000, 10000, 50000]
+
+
+def offsetGetAll(query):
+  """Reads all entities with offset pagination, used as a baseline.
+  """
+
+  chunk = 999
+  offset = 0
+  result = []
+  more = True
+
+  while(more):
+    data = query.fetch(chunk+1, offset)
+    more = len(data) > chunk
+    if more:
+      del data[chunk]
+    result.extend(data)
+    offset = offset + chunk
+
+  return result
+
+
+class GetAllBenchmark(unittest.TestCase):
+  """Compares the read cost of getAll with offset based pagination.
+  """
+
+  def seed(self, n):
+    """Replaces the contents of the datastore with n TestModel entities.
+    """
+
+    apiproxy_stub_map.apiproxy.GetStub('datastore_v3').Clear()
+
+    for start in range(0, n, 500):
+      db.put([TestModel(value=i) for i in range(start, min(n, start + 500))])
+
+  def measure(self, func):
+    """Returns the seconds, query calls and skipped entities of func().
+    """
+
+    counter = RPCCounter()
+    counter.start()
+    start = time.time()
+    result = func()
+    seconds = time.time() - start
+    counter.stop()
+
+    queries = counter.requests('RunQuery')
+    skipped = sum([i.offset() for i in queries])
+    return len(result), seconds, len(queries), skipped
+
+  def testReadCostIsLinear(self):
+    """Test that getAll reads every entity once, regardless of size.
+    """
+
+    logic = TestModelLogic()
+    sys.stderr.write('\n%8s %10s %8s %10s %12s\n' % (
+        'entities', 'method', 'queries', 'skipped', 'seconds'))
+
+    for n in SIZES:
+      self.seed(n)
+
+      for name, func in [
+          ('offset', lambda: offsetGetAll(TestModel.all())),
+          ('cursor', lambda: logic.getAll(TestModel.all()))]:
+        count, seconds, queries, skipped = self.measure(func)
+        self.assertEqual(n, count)
+        sys.stderr.write('%8d %10s %8d %10d %12.3f\n' % (
+            n, name, queries, skipped, seconds))
+
+      # no entity is skipped and there is one query per 1000 entities
+      self.assertEqual(0, skipped)
+      self.assertEqual(n / 1000 + 1, queries)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks for the per request cost of the maintenance check.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_maintenance.py -s
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import sys
+import time
+
+from django.http import HttpRequest
+
+from soc.middleware.maintenance import MaintenanceMiddleware
+from soc.modules import callback
+from soc.views.helper import responses
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+
+REQUESTS = 100
+
+
+def universalContextCheck(request):
+  """The maintenance check as it was done before, used as a baseline.
+  """
+
+  context = responses.getUniversalContext(request)
+  if not context['is_admin'] and context['in_maintenance']:
+    return True
+
+
+class MaintenanceCheckBenchmark(DjangoTestCase):
+  """Compares the maintenance check with building the universal context.
+  """
+
+  def setUp(self):
+    self.init()
+    self.data.createUser()
+
+  def measure(self, func):
+    """Returns the milliseconds and RPCs per request of func(request).
+    """
+
+    core = callback.getCore()
+    counter = RPCCounter(service=None)
+    counter.start()
+    start = time.time()
+
+    for _ in range(REQUESTS):
+      request = HttpRequest()
+      request.path = '/gsoc/homepage/' + self.gsoc.key().name()
+      core.startNewRequest(request)
+      func(request)
+      core.endRequest(request, False)
+
+    seconds = time.time() - start
+    counter.stop()
+
+    return (seconds * 1000 / REQUESTS,
+            float(counter.count()) / REQUESTS)
+
+  def testMaintenanceCheck(self):
+    """Test that the maintenance check is cheaper than the universal context.
+    """
+
+    middleware = MaintenanceMiddleware()
+    sys.stderr.write('\n%10s %12s %12s\n' % ('method', 'ms/request',
+                                              'rpcs/request'))
+
+    results = {}
+    for name, func in [
+        ('context', universalContextCheck),
+        ('middleware', middleware.process_request)]:
+      # warm up the caches
+      self.measure(func)
+      results[name] = self.measure(func)
+      sys.stderr.write('%10s %12.3f %12.2f\n' % ((name,) + results[name]))
+
+    self.assertTrue(results['middleware'][0] < results['context'][0])
+    self.assertTrue(results['middleware'][1] < results['context'][1])
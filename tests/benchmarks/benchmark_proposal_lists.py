@@ -0,0 +1,94 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Benchmark for the bytes that a page of a proposal list reads.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_proposal_lists.py -s
+
+The size of an entity is measured as the size of its encoded protocol
+buffer, which is what the datastore returns and the list deserializes.
+"""
+
+
+__authors__ = [
+  '"Daniel Hans" <daniel.m.hans@gmail.com>',
+  ]
+
+
+import sys
+import time
+
+from google.appengine.ext import db
+
+from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.models.proposal import GSoCProposalSummary
+
+from tests.test_utils import DjangoTestCase
+
+
+PROPOSALS = 200
+PAGE_SIZE = 50
+
+# the size of the content of a typical proposal
+CONTENT_SIZE = 20000
+
+
+class ProposalListsBenchmark(DjangoTestCase):
+  """Reads a page of the proposals of an organization.
+  """
+
+  def setUp(self):
+    super(ProposalListsBenchmark, self).setUp()
+    self.init()
+    self.data.createStudent()
+
+    for i in range(PROPOSALS):
+      GSoCProposal(parent=self.data.profile, title='Proposal %d' % i,
+                   abstract='a' * 500, content='c' * CONTENT_SIZE,
+                   program=self.gsoc, org=self.org, status='pending').put()
+
+  def readPage(self, model):
+    """Returns the bytes and seconds it takes to read a page of model.
+    """
+
+    start = time.time()
+
+    query = model.all().filter('org IN', [self.org.key()])
+    entities = query.fetch(PAGE_SIZE)
+
+    seconds = time.time() - start
+    size = sum([len(db.model_to_protobuf(i).Encode()) for i in entities])
+
+    self.assertEqual(len(entities), PAGE_SIZE)
+
+    return size, seconds
+
+  def testSummariesAreSmall(self):
+    """Tests that a page of summaries is a fraction of the size of a page
+    of proposals.
+    """
+
+    before, before_seconds = self.readPage(GSoCProposal)
+    after, after_seconds = self.readPage(GSoCProposalSummary)
+
+    sys.stderr.write(
+        '\n%d rows per page: proposals %d bytes (%.3fs), '
+        'summaries %d bytes (%.3fs)\n' % (PAGE_SIZE, before, before_seconds,
+                                          after, after_seconds))
+
+    self.assertTrue(after * 20 < before)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Benchmark for the ranks in the list of proposals under review.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_proposal_ranks.py -s
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import sys
+
+from google.appengine.ext import db
+
+from soc.views.helper import lists
+
+from soc.modules.gsoc.logic.models.ranker_root import logic as \
+    ranker_root_logic
+from soc.modules.gsoc.logic.models.student_proposal import logic as \
+    sp_logic
+from soc.modules.gsoc.models import student_proposal
+from soc.modules.gsoc.models.student import GSoCStudent
+from soc.modules.gsoc.models.student_proposal import StudentProposal
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import RPCCounter
+
+
+PROPOSALS = 500
+PAGE_SIZE = 50
+
+
+class ProposalRanksBenchmark(DjangoTestCase):
+  """Lists the ranks of the 500 proposals of an organization.
+  """
+
+  def setUp(self):
+    super(ProposalRanksBenchmark, self).setUp()
+    self.init()
+
+    ranker_root_logic.create(student_proposal.DEF_RANKER_NAME, self.org,
+        student_proposal.DEF_SCORE, 100)
+
+    student = self.seed(GSoCStudent, {'scope': self.gsoc,
+                                      'status': 'active'})
+
+    proposals = []
+    for i in range(PROPOSALS):
+      link_id = 'proposal%04d' % i
+      proposals.append(StudentProposal(
+          key_name='%s/%s' % (student.key().name(), link_id),
+          link_id=link_id, scope_path=student.key().name(),
+          scope=student, program=self.gsoc, org=self.org,
+          title='Proposal %d' % i, abstract='abstract', content='content',
+          score=(i * 37) % 200 - 100, status='pending'))
+    db.put(proposals)
+
+    self.ranker = sp_logic.getRankerFor(proposals[0])
+    self.ranker.SetScores(dict((i.key().name(), [i.score])
+                               for i in proposals))
+
+  def getParams(self, batched):
+    """Returns list params for the rank column.
+
+    Args:
+      batched: whether the ranks of a page are found with a single call
+          instead of one call per row
+    """
+
+    params = {
+        'logic': sp_logic,
+        'review_field_keys': ['rank', 'score'],
+        'review_field_names': ['Rank', 'Score'],
+        'review_conf_limit': PAGE_SIZE,
+        }
+
+    if batched:
+      params['review_page_extra'] = lambda entities, ranker: dict(
+          zip([i.key() for i in entities],
+              ranker.FindRanks([[i.score] for i in entities])))
+      params['review_field_extra'] = lambda entity, ranker, ranks: {
+          'rank': ranks[entity.key()] + 1,
+          }
+    else:
+      params['review_field_extra'] = lambda entity, ranker: {
+          'rank': ranker.FindRanks([[entity.score]])[0] + 1,
+          }
+
+    return params
+
+  def listAll(self, params):
+    """Reads every page of the list.
+
+    Returns the ranks by proposal and the number of datastore gets.
+    """
+
+    ranks = {}
+    start = ''
+
+    counter = RPCCounter()
+    counter.start()
+
+    while True:
+      request = MockRequest('/gsoc/org/list_proposals')
+      request.GET = {'start': start}
+      contents = lists.getListData(request, params, {'org': self.org},
+                                   visibility='review', args=[self.ranker])
+
+      rows = contents['data'][start]
+      for row in rows:
+        ranks[row['columns']['key']] = row['columns']['rank']
+
+      if len(rows) < PAGE_SIZE:
+        break
+      start = rows[-1]['columns']['key']
+
+    counter.stop()
+
+    return ranks, counter.count('Get')
+
+  def testRanksAreResolvedPerPage(self):
+    """Tests that the ranks of a page cost a single datastore get.
+    """
+
+    before, before_gets = self.listAll(self.getParams(False))
+    after, after_gets = self.listAll(self.getParams(True))
+
+    sys.stderr.write('\n%d proposals, %d per page: %d gets per row, '
+                     '%d gets per page\n' % (PROPOSALS, PAGE_SIZE,
+                     before_gets, after_gets))
+
+    self.assertEqual(len(after), PROPOSALS)
+    self.assertEqual(before, after)
+
+    # a get for the start entity and one for the ranker nodes of every page
+    pages = PROPOSALS / PAGE_SIZE + 1
+    self.assertTrue(after_gets <= 2 * pages)
+    self.assertTrue(before_gets >= PROPOSALS)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Benchmark for rendering the v2 pages with compiled templates cached.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_templates.py -s
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import sys
+import time
+
+from django.conf import settings
+from django.template import loader
+
+from soc.cache import templates
+
+from tests.test_utils import DjangoTestCase
+
+
+ITERATIONS = 1000
+
+UNCACHED_LOADERS = (
+    'django.template.loaders.filesystem.load_template_source',
+    'django.template.loaders.app_directories.load_template_source',
+)
+
+CACHED_LOADERS = (
+    ('soc.cache.templates.Loader', UNCACHED_LOADERS),
+)
+
+
+class TemplatesBenchmark(DjangoTestCase):
+  """Renders the homepage and dashboard with and without the cache.
+  """
+
+  def setUp(self):
+    self.init()
+    self.data.createStudent()
+    self.loaders = settings.TEMPLATE_LOADERS
+
+  def tearDown(self):
+    self.useLoaders(self.loaders)
+
+  def useLoaders(self, loaders):
+    """Makes django look up templates with the specified loaders.
+    """
+
+    settings.TEMPLATE_LOADERS = loaders
+    # django resolves the loaders on first use only
+    loader.template_source_loaders = None
+
+  def measure(self, url):
+    """Returns the milliseconds per render of the page at url.
+    """
+
+    start = time.time()
+
+    for _ in range(ITERATIONS):
+      response = self.client.get(url)
+
+    self.assertResponseOK(response)
+    return (time.time() - start) * 1000 / ITERATIONS
+
+  def testRender(self):
+    """Tests that rendering with cached templates is faster.
+    """
+
+    pages = [
+        ('homepage', '/gsoc/homepage/' + self.gsoc.key().name()),
+        ('dashboard', '/gsoc/dashboard/' + self.gsoc.key().name()),
+        ]
+
+    sys.stderr.write('\n%12s %12s %12s\n' % ('page', 'plain ms', 'cached ms'))
+
+    for name, url in pages:
+      self.useLoaders(UNCACHED_LOADERS)
+      before = self.measure(url)
+
+      self.useLoaders(CACHED_LOADERS)
+      templates.warm('v2')
+      after = self.measure(url)
+
+      sys.stderr.write('%12s %12.3f %12.3f\n' % (name, before, after))
+      self.assertTrue(after < before)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks for adding the XSRF token to rendered pages.
+
+Not part of the regular test run, use:
+  python tests/run.py tests/benchmarks/benchmark_xsrf.py -s
+"""
+
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+import itertools
+import sys
+import time
+
+from django import http
+
+from soc.logic.helper import xsrfutil
+from soc.logic.models.site import logic as site_logic
+from soc.middleware import xsrf
+from soc.modules import callback
+
+from tests.test_utils import DjangoTestCase
+
+
+ITERATIONS = 50
+
+# size of the page used to represent large list and survey pages
+LARGE_PAGE_SIZE = 300 * 1024
+
+
+def rewriteResponse(request, response):
+  """The XSRF middleware as it was before, used as a baseline.
+  """
+
+  content_type = response.get('Content-Type', None)
+  if content_type and content_type.split(';')[0] in xsrf._HTML_TYPES:
+    xsrf_token = xsrfutil.getGeneratedTokenForCurrentUser(
+        site_logic.getXsrfSecretKey(site_logic.getSingleton()))
+
+    idattributes = itertools.chain(("id='xsrftoken'",), itertools.repeat(''))
+
+    def add_xsrf_field(match):
+      return match.group() + ("<div style='display:none;'>" +
+          "<input type='hidden' " + idattributes.next() +
+          " name='xsrf_token' value='" + xsrf_token + "' /></div>")
+
+    response.content, _ = xsrf._POST_FORM_RE.subn(
+        add_xsrf_field, response.content)
+
+  return response
+
+
+class XsrfBenchmark(DjangoTestCase):
+  """Compares the XSRF middleware with rewriting every response.
+  """
+
+  def setUp(self):
+    self.init()
+    self.data.createHost()
+
+  def pages(self):
+    """Returns the name, content and whether the template tag was used
+    for a number of rendered pages.
+    """
+
+    homepage = self.client.get(
+        '/gsoc/homepage/' + self.gsoc.key().name()).content
+    form = self.client.get(
+        '/gsoc/program/edit/' + self.gsoc.key().name()).content
+
+    # a large page that has a form at the end, like a survey
+    large = homepage * (LARGE_PAGE_SIZE / len(homepage))
+    large_form = large + '<form action="#" method="post"></form>'
+
+    return [
+        ('homepage', homepage, False),
+        ('form', form, True),
+        ('large', large, False),
+        ('large_form', large_form, False),
+        ]
+
+  def measure(self, func, content, tokenized):
+    """Returns the milliseconds per response of func(request, response).
+    """
+
+    core = callback.getCore()
+    start = time.time()
+
+    for _ in range(ITERATIONS):
+      core.startNewRequest(None)
+      if tokenized:
+        xsrf.markTokenized()
+      func(None, http.HttpResponse(content))
+      core.endRequest(None, False)
+
+    return (time.time() - start) * 1000 / ITERATIONS
+
+  def testProcessResponse(self):
+    """Test that the middleware is not slower than rewriting every page.
+    """
+
+    middleware = xsrf.XsrfMiddleware()
+    sys.stderr.write('\n%12s %8s %12s %12s\n' % (
+        'page', 'KB', 'rewrite ms', 'middle ms'))
+
+    for name, content, tokenized in self.pages():
+      before = self.measure(rewriteResponse, content, tokenized)
+      after = self.measure(middleware.process_response, content, tokenized)
+      sys.stderr.write('%12s %8d %12.3f %12.3f\n' % (
+          name, len(content) / 1024, before, after))
+
+      self.assertTrue(after <= before)
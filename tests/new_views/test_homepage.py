@@ -24,10 +24,14 @@ __authors__ = [
 
 
 import httplib
+import os
 
 from tests.timeline_utils import TimelineHelper
 from tests.profile_utils import GSoCProfileHelper
 from tests.test_utils import DjangoTestCase
+from tests.test_utils import RPCCounter
+
+from soc.cache import response as response_cache
 
 # TODO: perhaps we should move this out?
 from soc.modules.seeder.logic.seeder import logic as seeder_logic
@@ -101,3 +105,60 @@ class HomepageViewTest(DjangoTestCase):
     apply_tmpl = response.context['apply']
     self.assertTrue(apply_tmpl.data.profile)
     self.assertFalse('profile_link' in apply_tmpl.context())
+
+  def testHomepageCachesConfiguration(self):
+    """Tests that the site, program and timeline are not read from the
+    datastore once they have been cached.
+    """
+    url = '/gsoc/homepage/' + self.gsoc.key().name()
+    self.client.get(url)
+
+    counter = RPCCounter()
+    counter.start()
+    try:
+      response = self.client.get(url)
+    finally:
+      counter.stop()
+
+    self.assertHomepageTemplatesUsed(response)
+
+    kinds = set()
+    for request in counter.requests('Get'):
+      for key in request.key_list():
+        kinds.add(key.path().element_list()[-1].type())
+
+    for kind in ['Site', 'GSoCProgram', 'GSoCTimeline', 'OrgAppSurvey']:
+      self.assertFalse(kind in kinds)
+
+  def testHomepageResponseCached(self):
+    """Tests that the homepage is rendered once for anonymous users until
+    the program changes.
+    """
+    url = '/gsoc/homepage/' + self.gsoc.key().name()
+
+    user_email = os.environ['USER_EMAIL']
+    os.environ['USER_EMAIL'] = ''
+    try:
+      response = self.client.get(url)
+      self.assertHomepageTemplatesUsed(response)
+
+      cached = self.client.get(url)
+      self.assertResponseOK(cached)
+      self.assertTemplateNotUsed(cached, 'v2/modules/gsoc/homepage/base.html')
+      self.assertEqual(cached.content, response.content)
+
+      response_cache.flush(self.gsoc)
+
+      response = self.client.get(url)
+      self.assertHomepageTemplatesUsed(response)
+    finally:
+      os.environ['USER_EMAIL'] = user_email
+
+  def testHomepageResponseNotCachedForUsers(self):
+    """Tests that the homepage is rendered for every logged in user.
+    """
+    url = '/gsoc/homepage/' + self.gsoc.key().name()
+    self.client.get(url)
+
+    response = self.client.get(url)
+    self.assertHomepageTemplatesUsed(response)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the v2 list helpers.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+from google.appengine.ext import db
+
+from django.utils import simplejson
+
+from soc.logic import references
+from soc.logic.exceptions import BadRequest
+from soc.modules.gsoc.models.profile import GSoCProfile
+from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.views.helper import lists
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import RPCCounter
+
+
+class RawQueryContentResponseBuilderTest(DjangoTestCase):
+  """Tests the RawQueryContentResponseBuilder.
+  """
+
+  def setUp(self):
+    self.init()
+    self.data.createStudent()
+
+    self.mentors = []
+    for i in range(5):
+      properties = {'scope': self.gsoc, 'mentor_for': [self.org.key()]}
+      self.mentors.append(self.seed(GSoCProfile, properties))
+
+    mentor_keys = [i.key() for i in self.mentors]
+    proposals = []
+    for i in range(500):
+      proposals.append(GSoCProposal(
+          parent=self.data.profile, title='proposal %d' % i,
+          abstract='abstract', content='content', program=self.gsoc,
+          org=self.org, mentor=self.mentors[i % 5],
+          possible_mentors=mentor_keys[:i % 5]))
+    db.put(proposals)
+
+    list_config = lists.ListConfiguration()
+    list_config.addSimpleColumn('title', 'Title')
+    list_config.addColumn('org', 'Organization',
+                          lambda ent, *args: ent.org.name)
+    list_config.addColumn('mentor', 'Mentor',
+                          lambda ent, *args: ent.mentor.name())
+    list_config.addColumn('possible_mentors', 'Possible Mentors',
+        lambda ent, *args: ', '.join([i.name() for i in
+            references.getReferenced(ent, 'possible_mentors')]))
+    self.list_config = list_config
+
+  def build(self, prefetch):
+    """Returns the rows of a 500 row page and the RPCs needed to build it.
+    """
+    request = MockRequest()
+    request.GET = {'limit': '500'}
+
+    query = GSoCProposal.all().ancestor(self.data.profile)
+    starter = lists.keyModelStarter(GSoCProposal)
+    builder = lists.RawQueryContentResponseBuilder(
+        request, self.list_config, query, starter, prefetch=prefetch)
+
+    counter = RPCCounter()
+    counter.start()
+    content = builder.build().content()
+    counter.stop()
+
+    return content['data'][''], counter
+
+  def testPrefetchRPCCount(self):
+    """Tests that prefetching resolves all references with a single get.
+    """
+    rows, counter = self.build(['org', 'mentor', 'possible_mentors'])
+
+    self.assertEqual(500, len(rows))
+    self.assertEqual(1, counter.count('Get'))
+    self.assertEqual(self.org.name, rows[0]['columns']['org'])
+
+    expected = ', '.join([i.name() for i in self.mentors[:4]])
+    self.assertEqual(expected, rows[4]['columns']['possible_mentors'])
+
+  def testWithoutPrefetchRPCCount(self):
+    """Tests that without prefetching every row costs several gets.
+    """
+    rows, counter = self.build(None)
+
+    self.assertEqual(500, len(rows))
+    self.assertTrue(counter.count('Get') > 1000)
+
+  def buildPage(self, **kwargs):
+    """Returns the content of the page requested with kwargs and the RPCs
+    needed to build it.
+    """
+    request = MockRequest('/gsoc/dashboard')
+    request.GET = kwargs
+
+    query = GSoCProposal.all().ancestor(self.data.profile)
+    starter = lists.keyModelStarter(GSoCProposal)
+    builder = lists.RawQueryContentResponseBuilder(
+        request, self.list_config, query, starter, prefetch=['org'])
+
+    counter = RPCCounter()
+    counter.start()
+    content = builder.build().content()
+    counter.stop()
+
+    return content, counter
+
+  def testPage(self):
+    """Tests that only the requested page is returned.
+    """
+    content, _ = self.buildPage(page='2', rows='50')
+
+    self.assertEqual(2, content['page'])
+    self.assertEqual(10, content['total'])
+    self.assertEqual(500, content['records'])
+    self.assertEqual(50, len(content['rows']))
+
+  def testPageSortedAndFiltered(self):
+    """Tests that rows are filtered and sorted before a page is taken.
+    """
+    filters = simplejson.dumps({'title': 'PROPOSAL 1'})
+    content, _ = self.buildPage(page='1', rows='10', sidx='title',
+                                sord='desc', filters=filters)
+
+    # proposal 1, 10-19 and 100-199
+    self.assertEqual(111, content['records'])
+    self.assertEqual(10, len(content['rows']))
+    self.assertEqual('proposal 199', content['rows'][0]['columns']['title'])
+
+  def testPageRowsCached(self):
+    """Tests that the rows are rendered once for consecutive pages.
+    """
+    self.buildPage(page='1', rows='10', sidx='title')
+    content, counter = self.buildPage(page='2', rows='10', sidx='title')
+
+    self.assertEqual(10, len(content['rows']))
+    self.assertEqual(0, counter.count('RunQuery', 'Get'))
+
+    # unless the client asks for fresh rows
+    _, counter = self.buildPage(page='2', rows='10', sidx='title',
+                                refresh='true')
+    self.assertTrue(counter.count('RunQuery') > 0)
+
+  def testPageRowsInQuery(self):
+    """Tests that all rows of a query with an IN filter are rendered once.
+    """
+    other_org = self.seed(self.org.__class__, {'scope': self.gsoc})
+    proposals = []
+    for i in range(200):
+      proposals.append(GSoCProposal(
+          parent=self.data.profile, title='other %d' % i,
+          abstract='abstract', content='content', program=self.gsoc,
+          org=other_org, mentor=self.mentors[0]))
+    db.put(proposals)
+
+    request = MockRequest('/gsoc/dashboard')
+    request.GET = {'page': '1', 'rows': '10', 'sidx': 'title'}
+
+    query = GSoCProposal.all().filter('org IN', [self.org, other_org])
+    starter = lists.keyModelStarter(GSoCProposal)
+    builder = lists.RawQueryContentResponseBuilder(
+        request, self.list_config, query, starter, prefetch=['org'])
+    content = builder.build().content()
+
+    self.assertEqual(700, content['records'])
+
+  def testAdvancedSearch(self):
+    """Tests the operators of the advanced search.
+    """
+    rows = [{'columns': {'title': 'proposal %d' % i}} for i in range(20)]
+
+    search = {'groupOp': 'OR', 'rules': [
+        {'field': 'title', 'op': 'eq', 'data': 'Proposal 3'},
+        {'field': 'title', 'op': 'ew', 'data': '7'}]}
+    result = lists.filterRows(rows, {}, search)
+    self.assertEqual(['proposal 3', 'proposal 7', 'proposal 17'],
+                     [i['columns']['title'] for i in result])
+
+    search['groupOp'] = 'AND'
+    self.assertEqual([], lists.filterRows(rows, {}, search))
+
+  def testInvalidArguments(self):
+    """Tests that malformed list arguments are a bad request.
+    """
+    self.assertRaises(BadRequest, self.buildPage, page='1', rows='ten')
+    self.assertRaises(BadRequest, self.buildPage, page='1', filters='{')
+    self.assertRaises(BadRequest, self.buildPage, page='1', filters='[]')
+    self.assertRaises(BadRequest, self.buildPage, page='1',
+                      search='{"rules": [{"field": [], "op": "eq"}]}')
+
+  def testRowsClamped(self):
+    """Tests that a page never has more than MAX_RECORDS rows.
+    """
+    content, _ = self.buildPage(page='1', rows=str(lists.MAX_RECORDS * 10))
+    self.assertEqual(1, content['total'])
+    self.assertEqual(500, len(content['rows']))
+
+  def testPatternFilter(self):
+    """Tests that re: filters match alternatives literally.
+    """
+    rows = [{'columns': {'title': i}}
+            for i in ['accepted', 'not accepted', 'a.b', 'axb', 'x' * 30]]
+
+    result = lists.filterRows(rows, {'title': 're:^accepted$|a.b'})
+    self.assertEqual(['accepted', 'a.b'],
+                     [i['columns']['title'] for i in result])
+
+    # a pattern that backtracks exponentially as a regular expression
+    result = lists.filterRows(rows, {'title': 're:^(x+x+)+y$'})
+    self.assertEqual([], result)
@@ -30,6 +30,7 @@ from tests.timeline_utils import TimelineHelper
 
 # TODO: perhaps we should move this out?
 from soc.modules.gsoc.models.proposal import GSoCProposal
+from soc.modules.gsoc.models.proposal import GSoCProposalSummary
 from soc.modules.seeder.logic.seeder import logic as seeder_logic
 
 
@@ -62,7 +63,9 @@ class ProposalTest(DjangoTestCase):
     self.assertProposalTemplatesUsed(response)
 
     # test proposal POST
-    override = {'program': self.gsoc, 'score': 0, 'mentor': None, 'org': self.org, 'status': 'new'}
+    override = {'program': self.gsoc, 'score': 0, 'nr_scores': 0,
+                'score_authors': [], 'score_values': [], 'mentor': None,
+                'org': self.org, 'status': 'new'}
     response, properties = self.modelPost(url, GSoCProposal, override)
     self.assertResponseRedirect(response)
 
@@ -95,13 +98,23 @@ class ProposalTest(DjangoTestCase):
     # test score POST
     from soc.modules.gsoc.models.score import GSoCScore
     url = '/gsoc/proposal/score/' + suffix
-    override = {'author': self.data.profile, 'parent': proposal}
+    override = {'author': self.data.profile, 'parent': proposal, 'value': 1}
     response, properties = self.modelPost(url, GSoCScore, override)
     self.assertResponseOK(response)
 
     score = GSoCScore.all().get()
     self.assertPropertiesEqual(properties, score)
 
+    # test wish to mentor POST, which updates the summary as well
+    url = '/gsoc/proposal/wish_to_mentor/' + suffix
+    response = self.post(url, {'value': 'request'})
+    self.assertResponseOK(response)
+
+    summary = GSoCProposal.get(proposal.key()).getSummary()
+    stored = GSoCProposalSummary.get(proposal.getSummaryKey())
+    self.assertEqual([self.data.profile.key()], summary.possible_mentors)
+    self.assertEqual(summary.possible_mentors, stored.possible_mentors)
+
   def testSubmitProposalWhenInactive(self):
     """Test the submission of student proposals during the student signup
     period is not active.
@@ -0,0 +1,76 @@
+#!/usr/bin/env python2.5
+#
+# Copyright 2011 the Melange authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests for the RequestData of the GSoC module.
+"""
+
+__authors__ = [
+  '"Sverre Rabbelier" <sverre@rabbelier.nl>',
+  ]
+
+
+from soc.modules.gsoc.views.helper.request_data import RequestData
+
+from tests.test_utils import DjangoTestCase
+from tests.test_utils import MockRequest
+from tests.test_utils import RPCCounter
+
+
+class RequestDataTest(DjangoTestCase):
+  """Tests that RequestData.populate loads the entities of a request.
+  """
+
+  def setUp(self):
+    self.init()
+    self.data.createMentor(self.org)
+
+    # the id of the current user, so that its key is remembered
+    self.data.user.user_id = '42'
+    self.data.user.put()
+
+  def populate(self):
+    """Returns a RequestData populated for a page of the organization and
+    the number of datastore gets it made.
+    """
+    kwargs = {
+        'sponsor': self.gsoc.scope_path,
+        'program': self.gsoc.link_id,
+        'organization': self.org.link_id,
+        }
+
+    counter = RPCCounter()
+    counter.start()
+    data = RequestData()
+    data.populate(None, MockRequest('/gsoc/org/home'), [], kwargs)
+    counter.stop()
+
+    return data, counter.count('Get')
+
+  def testPopulate(self):
+    """Tests that the entities of a request are loaded with two gets, once
+    the cached entities are in memcache.
+    """
+    self.populate()
+    data, gets = self.populate()
+
+    self.assertEqual(2, gets)
+    self.assertEqual(self.gsoc.key(), data.program.key())
+    self.assertEqual(self.org.key(), data.organization.key())
+    self.assertEqual(self.data.user.key(), data.user.key())
+    self.assertEqual(self.data.profile.key(), data.profile.key())
+    self.assertEqual([self.org.key()], [i.key() for i in data.mentor_for])
+    self.assertEqual(self.gsoc.timeline.key(), data.program_timeline.key())
@@ -88,7 +88,7 @@ def load_melange():
 
 
 class AppEngineDatastoreClearPlugin(plugins.Plugin):
-  """Nose plugin to clear the AppEngine datastore between tests.
+  """Nose plugin to clear the AppEngine datastore and memcache between tests.
   """
   name = 'AppEngineDatastoreClearPlugin'
   enabled = True
@@ -106,6 +106,14 @@ class AppEngineDatastoreClearPlugin(plugins.Plugin):
     if datastore is not None:
       datastore.Clear()
 
+    # entities cached by a previous test are not in the datastore anymore
+    if apiproxy_stub_map.apiproxy.GetStub('memcache') is not None:
+      from google.appengine.api import memcache
+      memcache.flush_all()
+
+    from soc.cache import entities
+    entities.clear()
+
 
 def main():
   sys.path = extra_paths + sys.path
@@ -34,6 +34,7 @@ import unittest
 import gaetestbed
 from mox import stubout
 
+from google.appengine.api import apiproxy_stub_map
 from google.appengine.ext import db
 
 from django.test import client
@@ -85,6 +86,75 @@ class MockRequest(object):
     core.endRequest(self, False)
 
 
+_active_rpc_counters = []
+
+
+def _countRPC(service, call, request, response):
+  """Pre-call hook that records an API call with all active counters.
+  """
+
+  for counter in _active_rpc_counters:
+    if counter.service in (None, service):
+      counter.calls.append((call, request))
+
+
+class RPCCounter(object):
+  """Records the API calls made to a service while it is started.
+
+  Used to assert on the number of datastore round trips a piece of code
+  makes, e.g.:
+
+    counter = RPCCounter()
+    counter.start()
+    ...
+    counter.stop()
+    self.assertEqual(1, counter.count('Get'))
+  """
+
+  def __init__(self, service='datastore_v3'):
+    """Creates a new counter for the specified service, or for all
+    services if service is None.
+    """
+
+    self.service = service
+    self.calls = []
+
+  def start(self):
+    """Starts recording calls, the hook is installed on first use.
+    """
+
+    apiproxy_stub_map.apiproxy.GetPreCallHooks().Append(
+        'rpc_counter', _countRPC)
+    self.calls = []
+    _active_rpc_counters.append(self)
+
+  def stop(self):
+    """Stops recording calls.
+    """
+
+    if self in _active_rpc_counters:
+      _active_rpc_counters.remove(self)
+
+  def count(self, *calls):
+    """Returns the number of recorded calls.
+
+    Args:
+      calls: the names of the calls to count, e.g. 'Get' or 'RunQuery',
+          if none are specified all calls are counted
+    """
+
+    if not calls:
+      return len(self.calls)
+
+    return len([i for i, _ in self.calls if i in calls])
+
+  def requests(self, call):
+    """Returns the request protocol buffers of all recorded calls of a type.
+    """
+
+    return [request for i, request in self.calls if i == call]
+
+
 def get_general_raw(args_names):
   """Gets a general_raw function object.
   """
@@ -444,6 +514,7 @@ class MailTestCase(gaetestbed.mail.MailTestCase, unittest.TestCase):
 
     # Run all mail tasks first so that all mails will be sent out
     runTasks(url = '/tasks/mail/send_mail', queue_names = ['mail'])
+    runTasks(url = '/tasks/mail/send_mail_batch', queue_names = ['mail'])
     messages = self.get_sent_messages(
         to = to,
         sender = sender,
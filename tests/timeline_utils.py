@@ -26,6 +26,8 @@ __authors__ = [
 from datetime import datetime
 from datetime import timedelta
 
+from soc.cache import entities as entity_cache
+
 
 def past(delta=100):
   """Returns a date that is delta days past today.
@@ -62,6 +64,14 @@ class TimelineHelper(object):
     self.timeline.student_signup_end = None
     self.timeline.accepted_students_announced_deadline = None
 
+  def _save(self):
+    """Stores the timeline and org app and flushes their cached copies.
+    """
+    self.timeline.put()
+    self.org_appl.put()
+    entity_cache.flush(self.timeline)
+    entity_cache.flush(self.org_appl)
+
   def offSeason(self):
     """Sets the current period to off season.
     """
@@ -74,8 +84,7 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = past()
     self.timeline.student_signup_end = past()
     self.timeline.accepted_students_announced_deadline = past()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()
 
   def kickoff(self):
     """Sets the current period to the program kickoff.
@@ -89,8 +98,7 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = future()
     self.timeline.student_signup_end = future()
     self.timeline.accepted_students_announced_deadline = future()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()
 
   def orgSignup(self):
     """Sets the current period to the organization signup phase.
@@ -104,8 +112,7 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = future()
     self.timeline.student_signup_end = future()
     self.timeline.accepted_students_announced_deadline = future()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()
 
   def orgsAnnounced(self):
     """Sets the current period to the organization signup phase.
@@ -119,8 +126,7 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = future()
     self.timeline.student_signup_end = future()
     self.timeline.accepted_students_announced_deadline = future()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()
 
   def studentSignup(self):
     """Sets the current period to the student signup phase.
@@ -134,8 +140,7 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = past()
     self.timeline.student_signup_end = future()
     self.timeline.accepted_students_announced_deadline = future()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()
 
   def studentsAnnounced(self):
     """Sets the current period to be future accepted students announced phase.
@@ -149,5 +154,4 @@ class TimelineHelper(object):
     self.timeline.student_signup_start = past()
     self.timeline.student_signup_end = past()
     self.timeline.accepted_students_announced_deadline = past()
-    self.timeline.put()
-    self.org_appl.put()
+    self._save()